@@ -1,91 +1,557 @@
 """
 Gerenciador de Banco de Dados SQLite
 """
+import itertools
 import sqlite3
 import os
+import threading
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
 
+from core.metrics import metrics
+
+
+class _ThreadOwner:
+    """Marcador guardado no threading.local; é destruído quando a thread termina"""
+    
+    __slots__ = ('__weakref__',)
+
 
 class DatabaseManager:
     """Gerencia conexões e operações com o banco de dados SQLite"""
     
-    def __init__(self, db_path="msx_config.db"):
+    # Pragmas aplicados a cada nova conexão
+    PRAGMAS = (
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("temp_store", "MEMORY"),
+        ("cache_size", -8000),
+        ("mmap_size", 64 * 1024 * 1024),
+        ("foreign_keys", "ON"),
+    )
+    
+    # Tempo máximo (em segundos) aguardando um lock de escrita
+    BUSY_TIMEOUT = 10.0
+    
+    # Quantidade de statements preparados mantidos em cache por conexão
+    STATEMENT_CACHE_SIZE = 256
+    
+    # Linhas gravadas por transação em execute_many/upsert
+    WRITE_BATCH_SIZE = 5000
+    
+    # Linhas buscadas por vez em iter_rows
+    FETCH_ARRAYSIZE = 1000
+    
+    # Formatos de linha aceitos por iter_rows
+    ROW_TYPES = ('row', 'tuple', 'dict')
+    
+    def __init__(self, db_path="msx_config.db", persistent=True):
         """
         Inicializa o gerenciador de banco de dados
         
         Args:
             db_path: Caminho para o arquivo do banco de dados
+            persistent: Mantém uma conexão aberta por thread em vez de
+                abrir e fechar uma conexão a cada operação
         """
         self.db_path = db_path
-        self.conn = None
+        self.persistent = persistent
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+    
+    @property
+    def conn(self):
+        """Conexão da thread atual (ou None se ainda não conectada)"""
+        return getattr(self._local, "conn", None)
+    
+    def _open_connection(self):
+        """
+        Abre uma nova conexão já configurada
         
+        Returns:
+            sqlite3.Connection configurada com os pragmas padrão
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.BUSY_TIMEOUT,
+            cached_statements=self.STATEMENT_CACHE_SIZE,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(self.BUSY_TIMEOUT * 1000)}")
+        for name, value in self.PRAGMAS:
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+    
     def connect(self):
         """Conecta ao banco de dados"""
+        conn = self.conn
+        if conn is not None:
+            return conn
+        
         try:
-            self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row
-            return self.conn
+            conn = self._open_connection()
         except sqlite3.Error as e:
-            print(f"Erro ao conectar ao banco de dados: {e}")
+            metrics.error('db.connect', e)
             raise
+        
+        self._local.conn = conn
+        self._local.depth = 0
+        if self.persistent:
+            self.close_idle()
+            with self._connections_lock:
+                self._connections.append((threading.current_thread(), conn))
+            # Fecha a conexão assim que a thread terminar, mesmo que nenhuma
+            # outra thread volte a conectar
+            owner = _ThreadOwner()
+            weakref.finalize(owner, self._forget, conn)
+            self._local.owner = owner
+        return conn
+    
+    def _forget(self, conn):
+        """Fecha a conexão de uma thread que terminou"""
+        with self._connections_lock:
+            self._connections = [
+                item for item in self._connections if item[1] is not conn
+            ]
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
     
     def close(self):
-        """Fecha a conexão com o banco de dados"""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Fecha a conexão da thread atual com o banco de dados"""
+        conn = self.conn
+        if conn:
+            with self._connections_lock:
+                self._connections = [
+                    item for item in self._connections if item[1] is not conn
+                ]
+            conn.close()
+            self._local.conn = None
+            self._local.depth = 0
+            self._local.owner = None
+    
+    def close_idle(self):
+        """Fecha as conexões persistentes de threads que já terminaram"""
+        with self._connections_lock:
+            idle = [conn for thread, conn in self._connections if not thread.is_alive()]
+            self._connections = [
+                item for item in self._connections if item[0].is_alive()
+            ]
+        for conn in idle:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+    
+    def close_all(self):
+        """Fecha as conexões persistentes de todas as threads"""
+        with self._connections_lock:
+            connections = self._connections
+            self._connections = []
+        for _, conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local.conn = None
+        self._local.depth = 0
+        self._local.owner = None
+    
+    def _release(self):
+        """Fecha a conexão ao fim de uma operação no modo não persistente"""
+        if not self.persistent and not self.in_transaction():
+            self.close()
+    
+    def in_transaction(self):
+        """
+        Indica se a thread atual está dentro de uma transação explícita
+        
+        Returns:
+            bool: True se há uma transação aberta por transaction()
+        """
+        return getattr(self._local, "depth", 0) > 0
+    
+    def data_version(self):
+        """
+        Lê o PRAGMA data_version da conexão da thread atual
+        
+        O valor muda sempre que outra conexão confirma uma escrita no banco,
+        o que permite detectar alterações feitas por outros processos.
+        
+        Returns:
+            int: Versão dos dados vista por esta conexão
+        """
+        conn = self.connect()
+        
+        try:
+            return conn.execute("PRAGMA data_version").fetchone()[0]
+        finally:
+            self._release()
+    
+    @contextmanager
+    def transaction(self, immediate=True):
+        """
+        Abre uma transação (ou savepoint, se aninhada) na thread atual
+        
+        Todas as chamadas a execute_query dentro do bloco fazem parte da
+        mesma transação; ela é confirmada ao sair do bloco e desfeita se
+        uma exceção for lançada.
+        
+        Args:
+            immediate: Obtém o lock de escrita logo no início (BEGIN
+                IMMEDIATE), evitando falhas ao promover uma leitura
+        
+        Yields:
+            sqlite3.Connection da thread atual
+        """
+        conn = self.connect()
+        depth = self._local.depth
+        savepoint = f"sp_{depth}"
+        
+        if depth == 0:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        else:
+            conn.execute(f"SAVEPOINT {savepoint}")
+        self._local.depth = depth + 1
+        
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                conn.execute("ROLLBACK")
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            self._release()
+            raise
+        else:
+            self._local.depth = depth
+            if depth == 0:
+                conn.execute("COMMIT")
+            else:
+                conn.execute(f"RELEASE {savepoint}")
+            self._release()
     
     def initialize(self):
         """Inicializa o banco de dados criando as tabelas necessárias"""
         conn = self.connect()
-        cursor = conn.cursor()
         
         # Cria tabela de configurações
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS config (
-                id INTEGER PRIMARY KEY CHECK (id = 1),
-                root_directory TEXT NOT NULL,
-                work_directory TEXT NOT NULL,
-                temp_directory TEXT NOT NULL,
-                download_directory TEXT NOT NULL,
-                theme TEXT NOT NULL,
-                database_directory TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        conn.commit()
-        self.close()
+        with self.transaction():
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS config (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    root_directory TEXT NOT NULL,
+                    work_directory TEXT NOT NULL,
+                    temp_directory TEXT NOT NULL,
+                    download_directory TEXT NOT NULL,
+                    theme TEXT NOT NULL,
+                    database_directory TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            self._ensure_columns(conn, "config", {
+                "temp_quota_mb": "INTEGER NOT NULL DEFAULT 1024"
+            })
+            
+            # Cria tabelas do catálogo de arquivos MSX
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS catalog_files (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE,
+                    directory TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    extension TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_catalog_files_directory
+                ON catalog_files (directory)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_catalog_files_extension
+                ON catalog_files (extension)
+            """)
+            # Índices das colunas ordenáveis da lista do catálogo: as páginas
+            # percorrem o índice (que já termina no id) em vez de ordenar a tabela
+            for column in ('name', 'size', 'mtime_ns', 'updated_at'):
+                conn.execute(f"""
+                    CREATE INDEX IF NOT EXISTS idx_catalog_files_{column}
+                    ON catalog_files ({column})
+                """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS catalog_scans (
+                    id INTEGER PRIMARY KEY,
+                    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    duration REAL NOT NULL,
+                    directories INTEGER NOT NULL,
+                    files_seen INTEGER NOT NULL,
+                    files_added INTEGER NOT NULL,
+                    files_updated INTEGER NOT NULL,
+                    files_removed INTEGER NOT NULL
+                )
+            """)
+            
+            # Cria cache de hashes dos arquivos
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_hashes (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    crc32 TEXT NOT NULL,
+                    sha1 TEXT NOT NULL,
+                    hashed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_file_hashes_sha1
+                ON file_hashes (sha1)
+            """)
+            
+            # Cria tabelas da base de software (softwaredb.xml do openMSX)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS softwaredb_software (
+                    id INTEGER PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    company TEXT,
+                    year TEXT,
+                    country TEXT,
+                    system TEXT,
+                    genmsxid TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS softwaredb_dumps (
+                    id INTEGER PRIMARY KEY,
+                    software_id INTEGER NOT NULL
+                        REFERENCES softwaredb_software (id) ON DELETE CASCADE,
+                    sha1 TEXT NOT NULL,
+                    media TEXT,
+                    mapper TEXT,
+                    start TEXT,
+                    original TEXT,
+                    remark TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_softwaredb_dumps_sha1
+                ON softwaredb_dumps (sha1)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_softwaredb_dumps_software
+                ON softwaredb_dumps (software_id)
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS softwaredb_imports (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    software_count INTEGER NOT NULL,
+                    dump_count INTEGER NOT NULL,
+                    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Cria índice dos arquivos contidos em fitas .cas
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cassette_images (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cassette_files (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL
+                        REFERENCES cassette_images (path) ON DELETE CASCADE,
+                    position INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    offset INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    blocks INTEGER NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_cassette_files_path
+                ON cassette_files (path)
+            """)
+            
+            # Cria controle do cache do diretório temporário
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS temp_cache (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_temp_cache_last_access
+                ON temp_cache (last_access)
+            """)
+            
+            # Cria controle do cache de miniaturas (mesmo formato do temp_cache)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS thumbnail_cache (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_thumbnail_cache_last_access
+                ON thumbnail_cache (last_access)
+            """)
+            
+            # Cria índice dos membros de arquivos compactados (.zip, .gz, .lzh)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS archive_files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    format TEXT NOT NULL,
+                    indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS archive_members (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL
+                        REFERENCES archive_files (path) ON DELETE CASCADE,
+                    member TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    compressed_size INTEGER NOT NULL,
+                    crc32 TEXT,
+                    sha1 TEXT,
+                    kind TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_archive_members_path
+                ON archive_members (path)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_archive_members_sha1
+                ON archive_members (sha1)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_archive_members_crc32
+                ON archive_members (crc32)
+            """)
+            
+            # Cria resultado da última busca de duplicados
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS duplicate_groups (
+                    id INTEGER PRIMARY KEY,
+                    sha1 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    found_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS duplicate_files (
+                    id INTEGER PRIMARY KEY,
+                    group_id INTEGER NOT NULL
+                        REFERENCES duplicate_groups (id) ON DELETE CASCADE,
+                    path TEXT NOT NULL,
+                    member TEXT,
+                    device INTEGER,
+                    inode INTEGER
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_duplicate_files_group
+                ON duplicate_files (group_id)
+            """)
+            
+            # Cria cache da análise de ROMs, indexado pelo SHA1 do conteúdo
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rom_analysis (
+                    sha1 TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mapper TEXT NOT NULL,
+                    start INTEGER,
+                    init INTEGER,
+                    statement INTEGER,
+                    device INTEGER,
+                    text INTEGER,
+                    writes INTEGER NOT NULL,
+                    version INTEGER NOT NULL,
+                    analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Cria histórico das métricas (ver core.metrics)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS metrics (
+                    id INTEGER PRIMARY KEY,
+                    recorded_at REAL NOT NULL,
+                    kind TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    value REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_metrics_recorded_at
+                ON metrics (recorded_at)
+            """)
     
+    def _ensure_columns(self, conn, table, columns):
+        """
+        Adiciona a uma tabela existente as colunas que ainda não existem
+        
+        Args:
+            conn: Conexão em uso
+            table: Nome da tabela
+            columns: Dicionário nome -> definição SQL da coluna
+        """
+        existing = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, definition in columns.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+    
+    @metrics.timer('db.execute_query')
     def execute_query(self, query, params=None):
         """
         Executa uma query no banco de dados
         
+        Fora de transaction() cada query é confirmada imediatamente;
+        dentro dela, a confirmação acontece ao fim do bloco.
+        
         Args:
             query: Query SQL a ser executada
             params: Parâmetros para a query (opcional)
-            
+        
         Returns:
             Cursor com os resultados
         """
         conn = self.connect()
-        cursor = conn.cursor()
         
         try:
             if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            conn.commit()
-            return cursor
-        except sqlite3.Error as e:
-            print(f"Erro ao executar query: {e}")
-            conn.rollback()
-            raise
+                return conn.execute(query, params)
+            return conn.execute(query)
         finally:
-            self.close()
+            self._release()
     
+    @metrics.timer('db.fetch_one')
     def fetch_one(self, query, params=None):
         """
         Busca um único registro
@@ -93,26 +559,24 @@ class DatabaseManager:
         Args:
             query: Query SQL
             params: Parâmetros (opcional)
-            
+        
         Returns:
             Registro encontrado ou None
         """
         conn = self.connect()
-        cursor = conn.cursor()
         
         try:
             if params:
-                cursor.execute(query, params)
+                cursor = conn.execute(query, params)
             else:
-                cursor.execute(query)
+                cursor = conn.execute(query)
             result = cursor.fetchone()
+            cursor.close()
             return dict(result) if result else None
-        except sqlite3.Error as e:
-            print(f"Erro ao buscar registro: {e}")
-            raise
         finally:
-            self.close()
+            self._release()
     
+    @metrics.timer('db.fetch_all')
     def fetch_all(self, query, params=None):
         """
         Busca múltiplos registros
@@ -120,22 +584,142 @@ class DatabaseManager:
         Args:
             query: Query SQL
             params: Parâmetros (opcional)
-            
+        
         Returns:
             Lista de registros
         """
         conn = self.connect()
-        cursor = conn.cursor()
         
         try:
             if params:
-                cursor.execute(query, params)
+                cursor = conn.execute(query, params)
             else:
-                cursor.execute(query)
+                cursor = conn.execute(query)
             results = cursor.fetchall()
             return [dict(row) for row in results]
-        except sqlite3.Error as e:
-            print(f"Erro ao buscar registros: {e}")
-            raise
         finally:
-            self.close()
\ No newline at end of file
+            self._release()
+    
+    def execute_many(self, query, rows, batch_size=None):
+        """
+        Executa uma query para cada linha, em transações de batch_size linhas
+        
+        rows pode ser um gerador: só um lote fica na memória por vez. Dentro
+        de transaction(), cada lote vira um savepoint da transação externa.
+        
+        Args:
+            query: Query SQL com parâmetros
+            rows: Iterável de tuplas de parâmetros
+            batch_size: Linhas por transação (padrão: WRITE_BATCH_SIZE)
+        
+        Returns:
+            int: Quantidade de linhas processadas
+        """
+        batch_size = batch_size or self.WRITE_BATCH_SIZE
+        rows = iter(rows)
+        total = 0
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            with metrics.timer('db.execute_many'), self.transaction() as conn:
+                conn.executemany(query, batch)
+            total += len(batch)
+            metrics.count('db.rows_written', len(batch))
+        return total
+    
+    def upsert(self, table, columns, rows, conflict=None, update=None, batch_size=None):
+        """
+        Insere ou atualiza linhas em lote (INSERT ... ON CONFLICT DO UPDATE)
+        
+        Args:
+            table: Nome da tabela
+            columns: Colunas na ordem dos valores de cada linha
+            rows: Iterável de tuplas (pode ser um gerador)
+            conflict: Colunas da restrição única (None: INSERT simples)
+            update: Colunas atualizadas no conflito (padrão: todas fora de
+                conflict), ou dict coluna -> expressão SQL; vazio ignora a linha
+            batch_size: Linhas por transação (padrão: WRITE_BATCH_SIZE)
+        
+        Returns:
+            int: Quantidade de linhas processadas
+        """
+        query = (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        if conflict:
+            conflict = [conflict] if isinstance(conflict, str) else list(conflict)
+            if update is None:
+                update = [column for column in columns if column not in conflict]
+            if not isinstance(update, dict):
+                update = {column: f"excluded.{column}" for column in update}
+            target = ', '.join(conflict)
+            if update:
+                assignments = ', '.join(f"{column} = {expr}" for column, expr in update.items())
+                query += f" ON CONFLICT({target}) DO UPDATE SET {assignments}"
+            else:
+                query += f" ON CONFLICT({target}) DO NOTHING"
+        return self.execute_many(query, rows, batch_size)
+    
+    def iter_rows(self, query, params=None, arraysize=None, row_type='row'):
+        """
+        Lê os registros em fluxo, arraysize linhas por vez
+        
+        Ao contrário de fetch_all, a memória usada não cresce com a tabela.
+        A leitura é um snapshot consistente (WAL) mesmo que outras conexões
+        gravem durante a iteração.
+        
+        Args:
+            query: Query SQL
+            params: Parâmetros (opcional)
+            arraysize: Linhas buscadas por vez (padrão: FETCH_ARRAYSIZE)
+            row_type: 'row' (sqlite3.Row, acesso por nome ou índice),
+                'tuple' ou 'dict'
+        
+        Yields:
+            Registros no formato pedido
+        """
+        if row_type not in self.ROW_TYPES:
+            raise ValueError(f"Formato de linha desconhecido: {row_type}")
+        # No modo não persistente, outra operação feita durante a iteração
+        # fecharia a conexão compartilhada; o gerador usa uma só sua
+        own = not self.persistent and not self.in_transaction()
+        if own:
+            try:
+                conn = self._open_connection()
+            except sqlite3.Error as e:
+                metrics.error('db.connect', e)
+                raise
+        else:
+            conn = self.connect()
+        cursor = conn.cursor()
+        if row_type == 'tuple':
+            cursor.row_factory = None
+        cursor.arraysize = arraysize or self.FETCH_ARRAYSIZE
+        
+        try:
+            # O cronômetro já registra os erros da execução da query
+            with metrics.timer('db.iter_rows'):
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+            try:
+                while True:
+                    rows = cursor.fetchmany()
+                    if not rows:
+                        break
+                    metrics.count('db.rows_read', len(rows))
+                    if row_type == 'dict':
+                        for row in rows:
+                            yield dict(row)
+                    else:
+                        yield from rows
+            except sqlite3.Error as e:
+                metrics.error('db.iter_rows', e)
+                raise
+        finally:
+            cursor.close()
+            if own:
+                conn.close()
\ No newline at end of file
@@ -2,8 +2,38 @@
 Gerenciador de Configurações
 """
 import os
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
 
+from core.metrics import metrics
+
+
+@dataclass(frozen=True)
+class ResolvedConfig:
+    """Configuração tipada, com os diretórios já resolvidos em caminhos absolutos"""
+    
+    root_directory: Path
+    work_directory: Path
+    temp_directory: Path
+    download_directory: Path
+    database_directory: Path
+    theme: str
+    temp_quota: int
+    
+    def path(self, directory_key):
+        """
+        Retorna o caminho absoluto de um diretório
+        
+        Args:
+            directory_key: Chave do diretório (ex: 'work_directory')
+        
+        Returns:
+            Path: Caminho absoluto
+        """
+        return getattr(self, directory_key)
+
 
 class ConfigManager:
     """Gerencia as configurações do sistema"""
@@ -15,9 +45,21 @@ class ConfigManager:
         'temp_directory': 'temp',
         'download_directory': 'download',
         'theme': 'dark',
-        'database_directory': 'data'
+        'database_directory': 'data',
+        'temp_quota_mb': 1024
     }
     
+    # Chaves dos diretórios relativos ao diretório raiz
+    DIRECTORY_KEYS = (
+        'work_directory',
+        'temp_directory',
+        'download_directory',
+        'database_directory'
+    )
+    
+    # Intervalo mínimo (s) entre verificações de mudanças no banco
+    CACHE_CHECK_INTERVAL = 1.0
+    
     def __init__(self, db_manager):
         """
         Inicializa o gerenciador de configurações
@@ -26,6 +68,77 @@ class ConfigManager:
             db_manager: Instância do DatabaseManager
         """
         self.db = db_manager
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._loaded = False
+        self._cache = None
+        self._resolved = None
+    
+    def invalidate(self):
+        """Descarta a configuração em cache; a próxima leitura vai ao banco"""
+        with self._lock:
+            self._loaded = False
+            self._cache = None
+            self._resolved = None
+    
+    def _is_stale(self):
+        """
+        Verifica se o banco mudou desde a última leitura nesta thread
+        
+        Usa PRAGMA data_version, que muda quando outra conexão (de outra
+        thread ou de outro processo) confirma uma escrita. A referência é a
+        versão registrada junto com a leitura do registro (_read); numa
+        thread que ainda não leu, não há referência e o registro é relido.
+        A verificação é feita no máximo uma vez a cada CACHE_CHECK_INTERVAL
+        segundos.
+        
+        Returns:
+            bool: True se o cache precisa ser recarregado
+        """
+        now = time.monotonic()
+        checked_at = getattr(self._local, 'checked_at', None)
+        if checked_at is not None and now - checked_at < self.CACHE_CHECK_INTERVAL:
+            return False
+        self._local.checked_at = now
+        
+        if not self.db.persistent:
+            return checked_at is not None
+        
+        seen = getattr(self._local, 'data_version', None)
+        if seen is None:
+            return True
+        return self.db.data_version() != seen
+    
+    def _read(self):
+        """
+        Lê o registro de configuração e registra a data_version da conexão
+        desta thread como referência para _is_stale
+        
+        A versão é lida antes do registro: uma escrita entre as duas leituras
+        só provoca uma releitura a mais, nunca uma alteração perdida.
+        """
+        version = self.db.data_version() if self.db.persistent else None
+        row = self.db.fetch_one("SELECT * FROM config WHERE id = 1")
+        self._local.data_version = version
+        self._local.checked_at = time.monotonic()
+        return row
+    
+    def _current(self):
+        """
+        Retorna o registro de configuração em cache, lendo do banco se preciso
+        
+        Returns:
+            dict com o registro salvo ou None se não há configuração
+        """
+        if self._loaded and not self._is_stale():
+            return self._cache
+        
+        row = self._read()
+        with self._lock:
+            self._cache = row
+            self._resolved = None
+            self._loaded = True
+        return row
     
     def config_exists(self):
         """
@@ -34,31 +147,67 @@ class ConfigManager:
         Returns:
             bool: True se existe configuração, False caso contrário
         """
-        query = "SELECT COUNT(*) as count FROM config WHERE id = 1"
-        result = self.db.fetch_one(query)
-        return result and result['count'] > 0
+        return self._current() is not None
     
     def load_config(self):
         """
-        Carrega a configuração do banco de dados
+        Carrega a configuração (do cache ou do banco de dados)
         
         Returns:
             dict: Configuração carregada ou padrão
         """
-        if self.config_exists():
-            query = "SELECT * FROM config WHERE id = 1"
-            config = self.db.fetch_one(query)
-            return config
+        config = self._current()
+        if config is not None:
+            return dict(config)
         else:
             return self.DEFAULT_CONFIG.copy()
     
+    def get(self, key, default=None):
+        """
+        Lê um valor da configuração atual
+        
+        Args:
+            key: Chave da configuração (ex: 'theme')
+            default: Valor retornado se a chave não existir
+        
+        Returns:
+            Valor da configuração
+        """
+        config = self._current() or self.DEFAULT_CONFIG
+        return config.get(key, default)
+    
+    def resolved(self):
+        """
+        Retorna a configuração atual tipada, com caminhos absolutos
+        
+        Returns:
+            ResolvedConfig
+        """
+        config = self._current() or self.DEFAULT_CONFIG
+        resolved = self._resolved
+        if resolved is None:
+            paths = {
+                key: Path(self.get_full_path(config, key))
+                for key in self.DIRECTORY_KEYS
+            }
+            resolved = ResolvedConfig(
+                root_directory=Path(os.path.abspath(config['root_directory'])),
+                theme=config['theme'],
+                temp_quota=int(config.get('temp_quota_mb') or 0) * 1024 * 1024,
+                **paths
+            )
+            with self._lock:
+                if self._cache is config or self._cache is None:
+                    self._resolved = resolved
+        return resolved
+    
     def save_config(self, config):
         """
-        Salva a configuração no banco de dados
+        Salva a configuração no banco de dados e atualiza o cache
         
         Args:
             config: Dicionário com as configurações
-            
+        
         Returns:
             bool: True se salvou com sucesso
         """
@@ -66,27 +215,23 @@ class ConfigManager:
             # Cria diretórios se não existirem
             self._create_directories(config)
             
-            if self.config_exists():
-                # Atualiza configuração existente
-                query = """
-                    UPDATE config SET
-                        root_directory = ?,
-                        work_directory = ?,
-                        temp_directory = ?,
-                        download_directory = ?,
-                        theme = ?,
-                        database_directory = ?,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = 1
-                """
-            else:
-                # Insere nova configuração
-                query = """
-                    INSERT INTO config (
-                        id, root_directory, work_directory, temp_directory,
-                        download_directory, theme, database_directory
-                    ) VALUES (1, ?, ?, ?, ?, ?, ?)
-                """
+            # Insere ou atualiza a configuração numa única instrução
+            query = """
+                INSERT INTO config (
+                    id, root_directory, work_directory, temp_directory,
+                    download_directory, theme, database_directory,
+                    temp_quota_mb
+                ) VALUES (1, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    root_directory = excluded.root_directory,
+                    work_directory = excluded.work_directory,
+                    temp_directory = excluded.temp_directory,
+                    download_directory = excluded.download_directory,
+                    theme = excluded.theme,
+                    database_directory = excluded.database_directory,
+                    temp_quota_mb = excluded.temp_quota_mb,
+                    updated_at = CURRENT_TIMESTAMP
+            """
             
             params = (
                 config['root_directory'],
@@ -94,14 +239,24 @@ class ConfigManager:
                 config['temp_directory'],
                 config['download_directory'],
                 config['theme'],
-                config['database_directory']
+                config['database_directory'],
+                int(config.get('temp_quota_mb', self.DEFAULT_CONFIG['temp_quota_mb']))
             )
             
-            self.db.execute_query(query, params)
-            return True
+            with self.db.transaction():
+                self.db.execute_query(query, params)
+                row = self._read()
             
+            # Grava no cache o que acabou de ser salvo
+            with self._lock:
+                self._cache = row
+                self._resolved = None
+                self._loaded = True
+            return True
+        
         except Exception as e:
-            print(f"Erro ao salvar configuração: {e}")
+            metrics.error('config.save', e)
+            self.invalidate()
             return False
     
     def _create_directories(self, config):
@@ -128,17 +283,35 @@ class ConfigManager:
             full_path = root / subdir
             full_path.mkdir(parents=True, exist_ok=True)
     
+    def ensure_directories(self, config):
+        """
+        Verifica os diretórios configurados, criando os que faltarem
+        
+        Args:
+            config: Dicionário com as configurações
+        
+        Returns:
+            list: Caminhos que não existiam e foram criados
+        """
+        paths = [Path(config['root_directory'])]
+        paths += [Path(self.get_full_path(config, key)) for key in self.DIRECTORY_KEYS]
+        
+        missing = [path for path in paths if not path.is_dir()]
+        if missing:
+            self._create_directories(config)
+        return [str(path) for path in missing]
+    
     def get_full_path(self, config, directory_key):
         """
-        Retorna o caminho completo de um diretório
+        Retorna o caminho completo (absoluto) de um diretório
         
         Args:
             config: Configuração
             directory_key: Chave do diretório (ex: 'work_directory')
-            
+        
         Returns:
             str: Caminho completo
         """
-        root = Path(config['root_directory'])
+        root = config['root_directory']
         subdir = config[directory_key]
-        return str(root / subdir)
\ No newline at end of file
+        return os.path.abspath(os.path.join(root, subdir))
\ No newline at end of file
@@ -0,0 +1,6 @@
+"""
+Módulo núcleo
+Infraestrutura compartilhada da aplicação (inicialização, tarefas, etc.)
+"""
+
+__version__ = "1.0.0"
\ No newline at end of file
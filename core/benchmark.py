@@ -0,0 +1,558 @@
+"""
+Benchmarks
+Mede os caminhos críticos (inicialização, banco, configuração e varredura de
+arquivos) sem precisar de display, grava os resultados em JSON e os compara
+com uma linha de base
+
+Uso:
+    python -m core.benchmark [nome ...] [--repeat N] [--output arquivo.json]
+                             [--baseline base.json] [--save-baseline base.json]
+                             [--tolerance 0.25]
+"""
+import argparse
+import contextlib
+import heapq
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime
+from pathlib import Path
+
+
+# Diferença relativa aceita antes de acusar regressão
+DEFAULT_TOLERANCE = 0.25
+
+# Repetições de cada benchmark (vale a mediana)
+DEFAULT_REPEAT = 5
+
+# Formato do arquivo de resultados
+FORMAT_VERSION = 1
+
+
+class _VirtualWindow:
+    """
+    Janela do Tk simulada: after() entra numa fila que mainloop() e update()
+    executam, sem criar nada na tela
+    """
+    
+    def __init__(self):
+        self._queue = []
+        self._ids = itertools.count(1)
+        self._cancelled = set()
+        self._running = False
+    
+    def after(self, ms, func=None, *args):
+        after_id = next(self._ids)
+        due = time.perf_counter() + ms / 1000
+        heapq.heappush(self._queue, (due, after_id, func, args))
+        return after_id
+    
+    def after_cancel(self, after_id):
+        self._cancelled.add(after_id)
+    
+    def _run_due(self):
+        """Executa os callbacks vencidos; retorna quando o próximo vence"""
+        while self._queue:
+            due, after_id, func, args = self._queue[0]
+            if due > time.perf_counter():
+                return due
+            heapq.heappop(self._queue)
+            if after_id not in self._cancelled and func is not None:
+                func(*args)
+        return None
+    
+    def mainloop(self):
+        self._running = True
+        while self._running and self._queue:
+            due = self._run_due()
+            if due is not None and self._running:
+                time.sleep(max(0.0, due - time.perf_counter()))
+    
+    def update(self):
+        self._run_due()
+    
+    update_idletasks = update
+    
+    def quit(self):
+        self._running = False
+    
+    def destroy(self):
+        self._running = False
+        self._queue.clear()
+
+
+class _VirtualWindowManager:
+    """Substitui ui.window_manager.WindowManager (uma janela raiz simulada)"""
+    
+    def __init__(self):
+        self.root = _VirtualWindow()
+        self.current = None
+        self._views = set()
+    
+    def add(self, name, frame=None, **options):
+        self._views.add(name)
+    
+    def has(self, name):
+        return name in self._views
+    
+    def show(self, name):
+        self.current = name
+    
+    def remove(self, name):
+        self._views.discard(name)
+    
+    def apply_theme(self, theme):
+        pass
+    
+    def run(self):
+        self.root.update()
+    
+    def quit(self):
+        self.root.quit()
+    
+    def close(self):
+        self.root.destroy()
+
+
+def _manager(manager):
+    return manager if manager is not None else _VirtualWindowManager()
+
+
+class _VirtualSplashScreen:
+    """Substitui ui.splash_screen.SplashScreen"""
+    
+    VIEW = "splash"
+    
+    def __init__(self, manager=None):
+        self.manager = _manager(manager)
+        self.window = self.manager.root
+        self.manager.add(self.VIEW)
+    
+    def show(self):
+        self.manager.show(self.VIEW)
+        self.window.update()
+    
+    def set_progress(self, value, text=None):
+        pass
+    
+    def update_status(self, text):
+        pass
+    
+    def close(self):
+        self.manager.remove(self.VIEW)
+
+
+class _VirtualMainWindow:
+    """Substitui ui.main_window.MainWindow: run() só processa a fila e sai"""
+    
+    VIEW = "main"
+    
+    def __init__(self, config, config_manager, plugins=None, context=None, manager=None):
+        self.manager = _manager(manager)
+        self.window = self.manager.root
+        self.manager.add(self.VIEW)
+        self.manager.show(self.VIEW)
+    
+    def run(self):
+        self.manager.run()
+
+
+class _VirtualConfigWindow:
+    """Substitui ui.config_window.ConfigWindow (fecha sem salvar)"""
+    
+    VIEW = "config"
+    
+    def __init__(self, config_manager, first_run=False, manager=None, on_close=None):
+        self.manager = _manager(manager)
+        self.window = self.manager.root
+        self.manager.add(self.VIEW)
+        self.config_saved = False
+    
+    def run(self):
+        self.manager.show(self.VIEW)
+        self.manager.run()
+
+
+@contextlib.contextmanager
+def virtual_tk():
+    """
+    Troca as janelas da aplicação por versões simuladas durante o bloco
+    
+    As janelas são importadas sob demanda por main.py, então basta colocar
+    os módulos simulados em sys.modules antes da inicialização.
+    """
+    fakes = {
+        "ui.window_manager": {"WindowManager": _VirtualWindowManager},
+        "ui.splash_screen": {"SplashScreen": _VirtualSplashScreen},
+        "ui.main_window": {"MainWindow": _VirtualMainWindow},
+        "ui.config_window": {"ConfigWindow": _VirtualConfigWindow},
+    }
+    saved = {name: sys.modules.get(name) for name in fakes}
+    for name, attributes in fakes.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
+    try:
+        yield
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+@contextlib.contextmanager
+def _workspace():
+    """Diretório temporário usado como diretório atual durante o bloco"""
+    previous = os.getcwd()
+    directory = tempfile.mkdtemp(prefix="msx-bench-")
+    os.chdir(directory)
+    try:
+        yield Path(directory)
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _metric(value, unit, better="lower"):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _configured(root):
+    """Cria banco e configuração apontando para root; retorna (db, config_manager)"""
+    from config.database import DatabaseManager
+    from config.settings import ConfigManager
+    
+    db = DatabaseManager("msx_config.db")
+    db.initialize()
+    config_manager = ConfigManager(db)
+    config = dict(ConfigManager.DEFAULT_CONFIG, root_directory=str(root))
+    config_manager.save_config(config)
+    return db, config_manager
+
+
+def _run_app():
+    """Inicializa e encerra a aplicação; retorna o tempo até a janela (ms)"""
+    import main
+    
+    app = main.MSXToolsApp()
+    main._PROCESS_START = time.perf_counter()
+    app.initialize()
+    app.shutdown()
+    return app.time_to_window
+
+
+def bench_startup():
+    """Tempo até a primeira janela: primeira execução, pipeline e snapshot"""
+    metrics = {}
+    with virtual_tk(), _workspace() as workspace:
+        metrics["first_run_ms"] = _metric(_run_app(), "ms")
+        
+        db, _ = _configured(workspace / "root")
+        db.close_all()
+        snapshot = Path("msx_config.snapshot.json")
+        if snapshot.exists():
+            snapshot.unlink()
+        metrics["pipeline_ms"] = _metric(_run_app(), "ms")
+        
+        # O encerramento anterior gravou o snapshot
+        metrics["snapshot_ms"] = _metric(_run_app(), "ms")
+    return metrics
+
+
+def bench_database(rows=20000, queries=2000):
+    """Latência de consultas e vazão de gravação/leitura em lote do DatabaseManager"""
+    from tools.identify import store_hashes
+    
+    metrics = {}
+    with _workspace() as workspace:
+        db, _ = _configured(workspace / "root")
+        
+        latencies = []
+        for _ in range(queries):
+            started = time.perf_counter()
+            db.fetch_one("SELECT * FROM config WHERE id = 1")
+            latencies.append((time.perf_counter() - started) * 1e6)
+        metrics["fetch_one_p50_us"] = _metric(statistics.median(latencies), "us")
+        metrics["fetch_one_p95_us"] = _metric(_percentile(latencies, 0.95), "us")
+        
+        data = [
+            (f"/bench/{i:07d}.rom", i, i, f"{i:08x}", f"{i:040x}")
+            for i in range(rows)
+        ]
+        started = time.perf_counter()
+        store_hashes(db, data)
+        metrics["upsert_rows_per_s"] = _metric(
+            rows / (time.perf_counter() - started), "rows/s", "higher"
+        )
+        
+        started = time.perf_counter()
+        count = sum(1 for _ in db.iter_rows("SELECT * FROM file_hashes", row_type="tuple"))
+        metrics["iter_rows_per_s"] = _metric(
+            count / (time.perf_counter() - started), "rows/s", "higher"
+        )
+        
+        started = time.perf_counter()
+        count = len(db.fetch_all("SELECT * FROM file_hashes"))
+        metrics["fetch_all_rows_per_s"] = _metric(
+            count / (time.perf_counter() - started), "rows/s", "higher"
+        )
+        
+        started = time.perf_counter()
+        for i in range(0, rows, rows // 100):
+            db.fetch_one("SELECT sha1 FROM file_hashes WHERE path = ?", (data[i][0],))
+        metrics["lookup_us"] = _metric(
+            (time.perf_counter() - started) / 100 * 1e6, "us"
+        )
+        db.close_all()
+    return metrics
+
+
+def bench_config(iterations=500):
+    """Vazão de ConfigManager.load_config (com e sem cache) e save_config"""
+    metrics = {}
+    with _workspace() as workspace:
+        db, config_manager = _configured(workspace / "root")
+        config = config_manager.load_config()
+        
+        started = time.perf_counter()
+        for _ in range(iterations):
+            config_manager.load_config()
+        metrics["load_cached_per_s"] = _metric(
+            iterations / (time.perf_counter() - started), "ops/s", "higher"
+        )
+        
+        started = time.perf_counter()
+        for _ in range(iterations):
+            config_manager.invalidate()
+            config_manager.load_config()
+        metrics["load_uncached_per_s"] = _metric(
+            iterations / (time.perf_counter() - started), "ops/s", "higher"
+        )
+        
+        saves = max(1, iterations // 5)
+        started = time.perf_counter()
+        for i in range(saves):
+            config['theme'] = "dark" if i % 2 else "light"
+            config_manager.save_config(config)
+        metrics["save_per_s"] = _metric(
+            saves / (time.perf_counter() - started), "ops/s", "higher"
+        )
+        db.close_all()
+    return metrics
+
+
+def make_tree(root, directories=200, files_per_directory=50, seed=0):
+    """
+    Cria uma árvore sintética de arquivos MSX (conteúdo pequeno e variado)
+    
+    Returns:
+        int: Quantidade de arquivos criados
+    """
+    extensions = ("rom", "dsk", "cas", "bas", "sc5", "txt")
+    count = 0
+    for d in range(directories):
+        directory = Path(root) / f"group{d % 10}" / f"dir{d:04d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        for f in range(files_per_directory):
+            ext = extensions[(d + f + seed) % len(extensions)]
+            (directory / f"file{f:03d}.{ext}").write_bytes(
+                bytes([(d * 31 + f) & 0xFF]) * (64 + f)
+            )
+            count += 1
+    return count
+
+
+def bench_scan(directories=200, files_per_directory=50):
+    """Taxa de varredura do catálogo numa árvore sintética (inicial e sem mudanças)"""
+    from tools.catalog import Catalog
+    
+    metrics = {}
+    with _workspace() as workspace:
+        root = workspace / "root"
+        total = make_tree(root, directories, files_per_directory)
+        db, config_manager = _configured(root)
+        catalog = Catalog(db, config_manager)
+        
+        started = time.perf_counter()
+        catalog.scan()
+        metrics["initial_files_per_s"] = _metric(
+            total / (time.perf_counter() - started), "files/s", "higher"
+        )
+        
+        started = time.perf_counter()
+        catalog.scan()
+        metrics["rescan_files_per_s"] = _metric(
+            total / (time.perf_counter() - started), "files/s", "higher"
+        )
+        
+        started = time.perf_counter()
+        seen = 0
+        for _, _, filenames in os.walk(root):
+            seen += len(filenames)
+        metrics["os_walk_files_per_s"] = _metric(
+            seen / (time.perf_counter() - started), "files/s", "higher"
+        )
+        db.close_all()
+    return metrics
+
+
+# Benchmarks disponíveis, na ordem de execução
+BENCHMARKS = {
+    "startup": bench_startup,
+    "database": bench_database,
+    "config": bench_config,
+    "scan": bench_scan,
+}
+
+
+def run(names=None, repeat=DEFAULT_REPEAT, progress=None):
+    """
+    Executa os benchmarks e agrega as repetições pela mediana
+    
+    Args:
+        names: Benchmarks a executar (padrão: todos)
+        repeat: Repetições de cada benchmark
+        progress: Função chamada com (nome, repetição) (opcional)
+    
+    Returns:
+        dict: Resultados no formato gravado em JSON
+    """
+    names = list(names or BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Benchmarks desconhecidos: {', '.join(unknown)}")
+    
+    results = {}
+    for name in names:
+        samples = {}
+        for index in range(repeat):
+            if progress:
+                progress(name, index + 1)
+            for metric, data in BENCHMARKS[name]().items():
+                samples.setdefault(metric, (data, []))[1].append(data["value"])
+        for metric, (data, values) in samples.items():
+            values = [v for v in values if v is not None]
+            results[f"{name}.{metric}"] = {
+                "value": statistics.median(values) if values else None,
+                "min": min(values) if values else None,
+                "max": max(values) if values else None,
+                "unit": data["unit"],
+                "better": data["better"],
+            }
+    
+    return {
+        "format": FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compara resultados com uma linha de base
+    
+    Args:
+        current: Resultado de run()
+        baseline: Resultado de run() gravado anteriormente
+        tolerance: Piora relativa aceita (0.25 = 25%)
+    
+    Returns:
+        list: Tuplas (métrica, base, atual, variação relativa, regrediu),
+            variação positiva significa pior
+    """
+    rows = []
+    for name, base in baseline.get("results", {}).items():
+        now = current["results"].get(name)
+        if now is None or not base["value"] or now["value"] is None:
+            continue
+        change = (now["value"] - base["value"]) / base["value"]
+        if base["better"] == "higher":
+            change = -change
+        rows.append((name, base["value"], now["value"], change, change > tolerance))
+    return rows
+
+
+def format_report(current, comparison=None):
+    """Formata os resultados (e a comparação, se houver) para exibição"""
+    lines = [f"Python {current['python']} em {current['platform']} ({current['cpus']} CPUs)", ""]
+    changes = {row[0]: row for row in comparison or []}
+    for name, data in current["results"].items():
+        value = data["value"]
+        text = "—" if value is None else f"{value:12.1f} {data['unit']}"
+        line = f"  {name:36} {text}"
+        if name in changes:
+            _, _, _, change, regressed = changes[name]
+            line += f"  {'+' if change >= 0 else ''}{change * 100:.0f}%"
+            if regressed:
+                line += "  REGRESSÃO"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando"""
+    parser = argparse.ArgumentParser(description="Benchmarks do MSX Tools")
+    parser.add_argument(
+        "benchmarks",
+        nargs="*",
+        help=f"benchmarks a executar (padrão: {' '.join(BENCHMARKS)})"
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", help="grava os resultados neste arquivo JSON")
+    parser.add_argument("--baseline", help="compara com este arquivo de resultados")
+    parser.add_argument("--save-baseline", help="grava os resultados como linha de base")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"benchmarks desconhecidos: {', '.join(unknown)}")
+    
+    # Permite executar a partir de qualquer diretório
+    project = str(Path(__file__).resolve().parent.parent)
+    if project not in sys.path:
+        sys.path.insert(0, project)
+    
+    current = run(
+        args.benchmarks,
+        args.repeat,
+        progress=lambda name, index: print(
+            f"{name} ({index}/{args.repeat})...", file=sys.stderr
+        )
+    )
+    
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            comparison = compare(current, json.load(f), args.tolerance)
+    print(format_report(current, comparison))
+    
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=2)
+    
+    if comparison and any(row[4] for row in comparison):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
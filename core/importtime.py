@@ -0,0 +1,101 @@
+"""
+Relatório de Tempo de Importação
+Executa o Python com -X importtime e resume os módulos mais caros
+
+Uso:
+    python -m core.importtime [módulo ...] [--top N]
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+
+# Módulos importados por padrão: o ponto de entrada e as janelas adiadas
+DEFAULT_MODULES = ["main", "ui.main_window", "ui.config_window"]
+
+
+def measure(modules, cwd=None):
+    """
+    Mede o tempo de importação de uma lista de módulos num processo novo
+    
+    Args:
+        modules: Nomes dos módulos a importar, em ordem
+        cwd: Diretório de trabalho do processo (padrão: raiz do projeto)
+    
+    Returns:
+        list: Tuplas (módulo, próprio_us, acumulado_us, profundidade)
+    """
+    if cwd is None:
+        cwd = Path(__file__).resolve().parent.parent
+    
+    code = "; ".join(f"import {name}" for name in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(cwd),
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        self_us = int(fields[0])
+        cumulative_us = int(fields[1])
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), self_us, cumulative_us, depth))
+    return entries
+
+
+def format_report(entries, top=25):
+    """
+    Formata o relatório de importação
+    
+    Args:
+        entries: Resultado de measure()
+        top: Quantidade de módulos listados
+    
+    Returns:
+        str: Relatório pronto para exibição
+    """
+    total = sum(self_us for _, self_us, _, _ in entries)
+    roots = [e for e in entries if e[3] == 0]
+    lines = [f"Tempo total de importação: {total / 1000:.1f} ms", ""]
+    
+    lines.append("Importações de primeiro nível (acumulado):")
+    for name, _, cumulative_us, _ in sorted(roots, key=lambda e: -e[2])[:top]:
+        lines.append(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+    
+    lines.append("")
+    lines.append(f"{top} módulos mais caros (tempo próprio):")
+    for name, self_us, _, _ in sorted(entries, key=lambda e: -e[1])[:top]:
+        lines.append(f"  {self_us / 1000:9.1f} ms  {name}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando"""
+    parser = argparse.ArgumentParser(
+        description="Relatório de tempo de importação do MSX Tools"
+    )
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        default=DEFAULT_MODULES,
+        help="módulos a importar (padrão: %(default)s)"
+    )
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args(argv)
+    
+    print(format_report(measure(args.modules), args.top))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
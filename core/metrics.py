@@ -0,0 +1,384 @@
+"""
+Métricas
+Contadores, cronômetros e histogramas dos caminhos críticos, guardados num
+buffer circular que pode ser gravado no banco (tabela metrics)
+"""
+import functools
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+
+# Tipos de evento do buffer circular
+KIND_COUNTER = "counter"
+KIND_TIMER = "timer"
+KIND_ERROR = "error"
+
+# Limites superiores (ms) das faixas dos histogramas: 0,01 ms a ~2 min
+BUCKET_BOUNDS = tuple(0.01 * 2 ** (i / 2) for i in range(48))
+
+
+def profiling():
+    """Indica se a saída de diagnóstico no console está ligada (MSX_TOOLS_PROFILE)"""
+    return bool(os.environ.get("MSX_TOOLS_PROFILE"))
+
+
+class Histogram:
+    """Distribuição de durações em faixas exponenciais (memória constante)"""
+    
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+    
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+    
+    def observe(self, value):
+        """Registra um valor em milissegundos (chamar com o lock do Metrics)"""
+        low, high = 0, len(BUCKET_BOUNDS)
+        while low < high:
+            middle = (low + high) // 2
+            if value <= BUCKET_BOUNDS[middle]:
+                high = middle
+            else:
+                low = middle + 1
+        self.counts[low] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+    
+    def percentile(self, fraction):
+        """
+        Estima um percentil interpolando dentro da faixa
+        
+        Args:
+            fraction: Percentil entre 0 e 1 (ex: 0.95)
+        
+        Returns:
+            float: Valor estimado em ms (None se vazio)
+        """
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= target:
+                low = BUCKET_BOUNDS[index - 1] if index else 0.0
+                high = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                value = low + (high - low) * (target - seen) / count
+                return min(max(value, self.min), self.max)
+            seen += count
+        return self.max
+    
+    def summary(self):
+        """Resumo do histograma (valores em ms)"""
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.percentile(0.50),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'min': self.min,
+            'max': self.max
+        }
+
+
+class _Timer:
+    """Cronômetro usado como gerenciador de contexto ou decorador"""
+    
+    __slots__ = ('metrics', 'name', 'started')
+    
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.started = None
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.metrics.observe(self.name, (time.perf_counter() - self.started) * 1000)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.metrics.error(self.name, exc)
+        return False
+    
+    def __call__(self, func):
+        metrics, name = self.metrics, self.name
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(metrics, name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class Metrics:
+    """Registro de métricas do processo (seguro entre threads)"""
+    
+    # Eventos mantidos no buffer circular
+    RING_SIZE = 20000
+    
+    # Janela (s) usada para calcular as taxas exibidas
+    RATE_WINDOW = 10.0
+    
+    # Dias de histórico mantidos na tabela metrics
+    RETENTION_DAYS = 14
+    
+    def __init__(self, ring_size=None, enabled=True):
+        """
+        Inicializa o registro
+        
+        Args:
+            ring_size: Eventos mantidos no buffer (padrão: RING_SIZE)
+            enabled: Se False, as chamadas não registram nada
+        """
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._ring = deque(maxlen=ring_size or self.RING_SIZE)
+        self._sequence = itertools.count(1)
+        # Serializa flush(): _flushed só é lido e avançado com este lock
+        # (separado de _lock, que as gravações no banco também usam)
+        self._flush_lock = threading.Lock()
+        self._flushed = 0
+        self._counters = {}
+        self._histograms = {}
+        self._errors = deque(maxlen=50)
+    
+    def _record(self, kind, name, value):
+        """Acrescenta um evento ao buffer (chamar com o lock)"""
+        self._ring.append((next(self._sequence), time.time(), kind, name, value))
+    
+    def count(self, name, value=1):
+        """
+        Soma value a um contador
+        
+        Args:
+            name: Nome do contador (ex: 'db.rows_written')
+            value: Incremento
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+            self._record(KIND_COUNTER, name, value)
+    
+    def observe(self, name, milliseconds):
+        """
+        Registra uma duração no histograma de name
+        
+        Args:
+            name: Nome do cronômetro (ex: 'db.fetch_one')
+            milliseconds: Duração em ms
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(milliseconds)
+            self._record(KIND_TIMER, name, milliseconds)
+    
+    def error(self, name, exc):
+        """
+        Registra um erro (contado em 'errors.<name>' e guardado na lista recente)
+        
+        Com MSX_TOOLS_PROFILE, o erro também é escrito no stderr.
+        
+        Args:
+            name: Origem do erro
+            exc: Exceção ou mensagem
+        """
+        message = f"{type(exc).__name__}: {exc}"
+        if profiling():
+            print(f"Erro em {name}: {message}", file=sys.stderr)
+        if not self.enabled:
+            return
+        key = f"errors.{name}"
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            self._errors.append((time.time(), name, message))
+            self._record(KIND_ERROR, name, 1)
+    
+    def timer(self, name):
+        """
+        Cronômetro para usar com with ou como decorador
+        
+        Exemplo:
+            with metrics.timer('catalog.scan'):
+                ...
+            
+            @metrics.timer('ui.render')
+            def render(self): ...
+        """
+        return _Timer(self, name)
+    
+    def counters(self):
+        """Cópia dos contadores"""
+        with self._lock:
+            return dict(self._counters)
+    
+    def histograms(self):
+        """Resumo de cada histograma (nome -> dict de Histogram.summary)"""
+        with self._lock:
+            return {name: h.summary() for name, h in self._histograms.items()}
+    
+    def recent_errors(self):
+        """Erros mais recentes: lista de (timestamp, origem, mensagem)"""
+        with self._lock:
+            return list(self._errors)
+    
+    def events(self, since=0):
+        """
+        Eventos ainda no buffer com sequência maior que since
+        
+        Returns:
+            list: Tuplas (sequência, timestamp, tipo, nome, valor)
+        """
+        with self._lock:
+            return [event for event in self._ring if event[0] > since]
+    
+    def rates(self, window=None):
+        """
+        Eventos por segundo de cada nome na janela mais recente
+        
+        Args:
+            window: Duração da janela em segundos (padrão: RATE_WINDOW)
+        
+        Returns:
+            dict: nome -> eventos/s (contadores somam o valor)
+        """
+        window = window or self.RATE_WINDOW
+        limit = time.time() - window
+        totals = {}
+        with self._lock:
+            for _, timestamp, kind, name, value in reversed(self._ring):
+                if timestamp < limit:
+                    break
+                totals[name] = totals.get(name, 0) + (value if kind == KIND_COUNTER else 1)
+        elapsed = min(window, max(time.time() - self.started_at, 1e-3))
+        return {name: total / elapsed for name, total in totals.items()}
+    
+    def snapshot(self):
+        """
+        Estado atual das métricas, para exibição ou diagnóstico
+        
+        Returns:
+            dict: uptime, counters, histograms, rates, memory e errors
+        """
+        return {
+            'uptime': time.time() - self.started_at,
+            'counters': self.counters(),
+            'histograms': self.histograms(),
+            'rates': self.rates(),
+            'memory': memory_usage(),
+            'errors': self.recent_errors()
+        }
+    
+    def flush(self, db_manager):
+        """
+        Grava no banco os eventos registrados desde a última gravação
+        
+        Eventos que já saíram do buffer circular antes da gravação são perdidos.
+        
+        Args:
+            db_manager: Instância do DatabaseManager
+        
+        Returns:
+            int: Quantidade de eventos gravados
+        """
+        with self._flush_lock:
+            events = self.events(self._flushed)
+            if not events:
+                return 0
+            
+            db_manager.execute_many(
+                "INSERT INTO metrics (recorded_at, kind, name, value) VALUES (?, ?, ?, ?)",
+                (event[1:] for event in events)
+            )
+            self._flushed = events[-1][0]
+        db_manager.execute_query(
+            "DELETE FROM metrics WHERE recorded_at < ?",
+            (time.time() - self.RETENTION_DAYS * 86400,)
+        )
+        return len(events)
+    
+    def reset(self):
+        """Descarta contadores, histogramas e eventos"""
+        with self._lock:
+            self._ring.clear()
+            self._counters.clear()
+            self._histograms.clear()
+            self._errors.clear()
+            self.started_at = time.time()
+
+
+def memory_usage():
+    """
+    Memória do processo atual
+    
+    Returns:
+        dict: 'rss' (memória residente) e 'peak' (pico), em bytes; None
+            quando a plataforma não informa o valor
+    """
+    rss = peak = None
+    
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+            
+            class _Counters(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+            
+            counters = _Counters()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(
+                process, ctypes.byref(counters), counters.cb
+            ):
+                rss, peak = counters.WorkingSetSize, counters.PeakWorkingSetSize
+        except (OSError, AttributeError):
+            pass
+        return {'rss': rss, 'peak': peak}
+    
+    try:
+        with open("/proc/self/statm", "r") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss vem em KiB no Linux e em bytes no macOS
+        if sys.platform != "darwin":
+            peak *= 1024
+    except (ImportError, OSError):
+        pass
+    return {'rss': rss, 'peak': peak}
+
+
+# Registro usado pela aplicação (MSX_TOOLS_METRICS=0 desliga)
+metrics = Metrics(enabled=os.environ.get("MSX_TOOLS_METRICS", "1") != "0")
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""
+Registro de Módulos
+Descobre os módulos de ferramentas pelos manifestos, sem importá-los, e
+carrega cada um apenas quando é aberto pela primeira vez
+"""
+import importlib
+import json
+import os
+import threading
+from dataclasses import dataclass, asdict
+
+from core.metrics import metrics
+
+
+# Nome do arquivo de manifesto dentro do pacote de cada módulo
+MANIFEST_NAME = "module.json"
+
+
+class PluginError(Exception):
+    """Erro ao ler o manifesto ou carregar um módulo"""
+
+
+@dataclass(frozen=True)
+class ModuleManifest:
+    """Descrição de um módulo lida do module.json"""
+    name: str
+    title: str
+    entry: str
+    description: str = ""
+    icon: str = ""
+    order: int = 100
+    
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Cria o manifesto a partir de um dicionário (JSON ou snapshot)
+        
+        Raises:
+            PluginError: Se faltar algum campo obrigatório ou o entry for inválido
+        """
+        try:
+            return cls(
+                name=str(data['name']),
+                title=str(data.get('title') or data['name']),
+                entry=str(data['entry']),
+                description=str(data.get('description', "")),
+                icon=str(data.get('icon', "")),
+                order=int(data.get('order', 100))
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise PluginError(f"Manifesto inválido: {e}") from e
+    
+    def __post_init__(self):
+        if ':' not in self.entry:
+            raise PluginError(f"Entry inválido em {self.name}: '{self.entry}'")
+    
+    def to_dict(self):
+        """Retorna o manifesto como dicionário serializável em JSON"""
+        return asdict(self)
+    
+    @property
+    def label(self):
+        """Texto exibido na barra lateral"""
+        return f"{self.icon} {self.title}" if self.icon else self.title
+
+
+class ModuleContext:
+    """Serviços da aplicação entregues aos módulos carregados"""
+    
+    def __init__(self, db_manager, config_manager, **services):
+        """
+        Inicializa o contexto
+        
+        Args:
+            db_manager: Instância do DatabaseManager
+            config_manager: Instância do ConfigManager
+            **services: Outros serviços compartilhados (ex: temp_cache)
+        """
+        self.db_manager = db_manager
+        self.config_manager = config_manager
+        for name, service in services.items():
+            setattr(self, name, service)
+
+
+class ToolModule:
+    """
+    Classe base dos módulos de ferramentas
+    
+    O entry do manifesto aponta para uma subclasse ("pacote.modulo:Classe").
+    A instância é criada uma única vez e mantida enquanto a aplicação roda.
+    """
+    
+    def __init__(self, manifest, context):
+        """
+        Inicializa o módulo
+        
+        Args:
+            manifest: ModuleManifest do módulo
+            context: ModuleContext com os serviços da aplicação
+        """
+        self.manifest = manifest
+        self.context = context
+    
+    def create_view(self, parent):
+        """
+        Cria a interface do módulo (chamado na primeira abertura)
+        
+        Args:
+            parent: Widget onde a interface deve ser criada
+        
+        Returns:
+            Widget raiz da interface
+        """
+        raise NotImplementedError
+    
+    def on_show(self):
+        """Chamado sempre que a interface do módulo passa a ser exibida"""
+    
+    def on_hide(self):
+        """Chamado quando outra tela substitui a do módulo"""
+
+
+class PluginRegistry:
+    """Registro dos módulos instalados no diretório de módulos"""
+    
+    def __init__(self, modules_dir, package="modules"):
+        """
+        Inicializa o registro
+        
+        Args:
+            modules_dir: Diretório com um pacote por módulo
+            package: Nome do pacote Python correspondente ao diretório
+        """
+        self.modules_dir = modules_dir
+        self.package = package
+        self._manifests = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+    
+    def discover(self):
+        """
+        Lê os manifestos dos módulos instalados, sem importar nenhum código
+        
+        Manifestos inválidos são ignorados com um aviso.
+        
+        Returns:
+            list: ModuleManifest ordenados por (order, title)
+        """
+        manifests = {}
+        try:
+            entries = sorted(os.scandir(self.modules_dir), key=lambda e: e.name)
+        except OSError:
+            entries = []
+        
+        for entry in entries:
+            if not entry.is_dir() or entry.name.startswith(('.', '_')):
+                continue
+            manifest_path = os.path.join(entry.path, MANIFEST_NAME)
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                metrics.error(f"plugins.{entry.name}", e)
+                continue
+            
+            data.setdefault('name', entry.name)
+            data['entry'] = self._qualify_entry(entry.name, data.get('entry', ""))
+            try:
+                manifests[entry.name] = ModuleManifest.from_dict(data)
+            except PluginError as e:
+                metrics.error(f"plugins.{entry.name}", e)
+        
+        self.register(manifests.values())
+        return self.manifests()
+    
+    def _qualify_entry(self, directory, entry):
+        """
+        Completa o entry do manifesto com o pacote do módulo
+        
+        "Classe" vira "modules.<dir>:Classe", ".view:Classe" vira
+        "modules.<dir>.view:Classe" e nomes absolutos não mudam.
+        """
+        entry = str(entry or "")
+        if not entry:
+            return entry
+        if ':' not in entry:
+            return f"{self.package}.{directory}:{entry}"
+        if entry.startswith('.'):
+            return f"{self.package}.{directory}{entry}"
+        return entry
+    
+    def register(self, manifests):
+        """
+        Registra manifestos já conhecidos (ex: vindos do snapshot)
+        
+        Args:
+            manifests: ModuleManifest ou dicionários
+        """
+        with self._lock:
+            for manifest in manifests:
+                if isinstance(manifest, dict):
+                    manifest = ModuleManifest.from_dict(manifest)
+                self._manifests[manifest.name] = manifest
+    
+    def manifests(self):
+        """
+        Lista os módulos registrados
+        
+        Returns:
+            list: ModuleManifest ordenados por (order, title)
+        """
+        with self._lock:
+            manifests = list(self._manifests.values())
+        return sorted(manifests, key=lambda m: (m.order, m.title.lower()))
+    
+    def is_loaded(self, name):
+        """Indica se o código do módulo já foi importado"""
+        return name in self._instances
+    
+    def load(self, name, context):
+        """
+        Importa e instancia um módulo na primeira chamada
+        
+        As chamadas seguintes retornam a mesma instância.
+        
+        Args:
+            name: Nome do módulo
+            context: ModuleContext entregue ao módulo
+        
+        Returns:
+            ToolModule do módulo
+        
+        Raises:
+            PluginError: Se o módulo não existir ou falhar ao carregar
+        """
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+            
+            manifest = self._manifests.get(name)
+            if manifest is None:
+                raise PluginError(f"Módulo não encontrado: {name}")
+            
+            module_name, _, attribute = manifest.entry.partition(':')
+            try:
+                module = importlib.import_module(module_name)
+                factory = getattr(module, attribute)
+                instance = factory(manifest, context)
+            except Exception as e:
+                raise PluginError(f"Erro ao carregar o módulo {name}: {e}") from e
+            
+            self._instances[name] = instance
+            return instance
\ No newline at end of file
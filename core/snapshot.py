@@ -0,0 +1,146 @@
+"""
+Snapshot de Inicialização
+Guarda o estado resolvido na última execução para acelerar a próxima
+"""
+import json
+import os
+from pathlib import Path
+
+from core.metrics import metrics
+from core.plugins import MANIFEST_NAME
+
+
+class StartupSnapshot:
+    """Snapshot em JSON da configuração, módulos e tema da última execução"""
+    
+    # Incrementar sempre que o formato do snapshot mudar
+    FORMAT_VERSION = 2
+    
+    def __init__(self, db_path, modules_dir, path=None):
+        """
+        Inicializa o snapshot
+        
+        Args:
+            db_path: Caminho do banco de dados de configuração
+            modules_dir: Diretório onde os módulos são procurados
+            path: Arquivo do snapshot (padrão: ao lado do banco)
+        """
+        self.db_path = Path(db_path)
+        self.modules_dir = Path(modules_dir)
+        if path is None:
+            path = self.db_path.with_name(self.db_path.stem + ".snapshot.json")
+        self.path = Path(path)
+    
+    def _fingerprint(self):
+        """
+        Calcula a assinatura dos arquivos dos quais o snapshot depende
+        
+        Usa apenas stat(), sem abrir o banco. Um arquivo -wal presente
+        indica que outro processo está usando o banco (ou que a última
+        execução não terminou direito); nesse caso não há assinatura
+        confiável.
+        
+        Returns:
+            dict com a assinatura ou None se ela não puder ser calculada
+        """
+        wal_path = self.db_path.with_name(self.db_path.name + "-wal")
+        if wal_path.exists():
+            return None
+        
+        try:
+            db_stat = self.db_path.stat()
+        except OSError:
+            return None
+        
+        return {
+            'db_size': db_stat.st_size,
+            'db_mtime': db_stat.st_mtime_ns,
+            'modules': self._modules_signature()
+        }
+    
+    def _modules_signature(self):
+        """
+        Assinatura do diretório de módulos e dos manifestos de cada módulo
+        
+        Returns:
+            list: mtime do diretório seguido de [nome, mtime] de cada manifesto
+        """
+        try:
+            signature = [self.modules_dir.stat().st_mtime_ns]
+            entries = sorted(os.scandir(self.modules_dir), key=lambda e: e.name)
+        except OSError:
+            return None
+        
+        for entry in entries:
+            try:
+                manifest_stat = os.stat(os.path.join(entry.path, MANIFEST_NAME))
+            except OSError:
+                continue
+            signature.append([entry.name, manifest_stat.st_mtime_ns])
+        return signature
+    
+    def load(self):
+        """
+        Carrega o snapshot se ele ainda for válido
+        
+        Returns:
+            dict com 'config', 'modules' e 'theme', ou None
+        """
+        fingerprint = self._fingerprint()
+        if fingerprint is None:
+            return None
+        
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if data.get('version') != self.FORMAT_VERSION:
+            return None
+        if data.get('fingerprint') != fingerprint:
+            return None
+        return data
+    
+    def save(self, config, modules):
+        """
+        Grava o snapshot de forma atômica
+        
+        Deve ser chamado com as conexões do banco já fechadas, para que a
+        assinatura reflita o arquivo final.
+        
+        Args:
+            config: Configuração resolvida
+            modules: Manifestos dos módulos descobertos (dicionários)
+        
+        Returns:
+            bool: True se o snapshot foi gravado
+        """
+        fingerprint = self._fingerprint()
+        if fingerprint is None:
+            return False
+        
+        data = {
+            'version': self.FORMAT_VERSION,
+            'fingerprint': fingerprint,
+            'config': config,
+            'modules': list(modules),
+            'theme': config.get('theme')
+        }
+        
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            metrics.error('snapshot', e)
+            return False
+    
+    def invalidate(self):
+        """Remove o snapshot salvo"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+Pipeline de Inicialização
+Executa as etapas de inicialização como um grafo de tarefas com dependências
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.metrics import metrics
+
+
+class StartupError(Exception):
+    """Erro na definição ou execução do pipeline de inicialização"""
+
+
+class StartupTask:
+    """Uma etapa do pipeline de inicialização"""
+    
+    def __init__(self, name, func, depends=(), label=None):
+        """
+        Inicializa a tarefa
+        
+        Args:
+            name: Nome único da tarefa
+            func: Função chamada com o dicionário de resultados já obtidos
+            depends: Nomes das tarefas que precisam terminar antes desta
+            label: Texto exibido na splash screen enquanto a tarefa roda
+        """
+        self.name = name
+        self.func = func
+        self.depends = tuple(depends)
+        self.label = label or name
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+    
+    @property
+    def duration(self):
+        """Duração da tarefa em segundos (None se não terminou)"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class StartupPipeline:
+    """Executa tarefas de inicialização em paralelo respeitando dependências"""
+    
+    def __init__(self, max_workers=4):
+        """
+        Inicializa o pipeline
+        
+        Args:
+            max_workers: Número máximo de tarefas executadas ao mesmo tempo
+        """
+        self.max_workers = max_workers
+        self.tasks = {}
+        self.results = {}
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._pending = set()
+        self._running = []
+        self._completed = 0
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._executor = None
+    
+    def add_task(self, name, func, depends=(), label=None):
+        """
+        Adiciona uma tarefa ao pipeline
+        
+        Args:
+            name: Nome único da tarefa
+            func: Função chamada com o dicionário de resultados
+            depends: Nomes das tarefas das quais esta depende
+            label: Texto de status exibido durante a execução
+        
+        Returns:
+            StartupTask criada
+        """
+        if name in self.tasks:
+            raise StartupError(f"Tarefa duplicada: {name}")
+        task = StartupTask(name, func, depends, label)
+        self.tasks[name] = task
+        return task
+    
+    def _validate(self):
+        """Verifica dependências desconhecidas e ciclos"""
+        for task in self.tasks.values():
+            for dep in task.depends:
+                if dep not in self.tasks:
+                    raise StartupError(
+                        f"Tarefa '{task.name}' depende de '{dep}', que não existe"
+                    )
+        
+        visiting = set()
+        visited = set()
+        
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise StartupError(f"Dependência circular envolvendo '{name}'")
+            visiting.add(name)
+            for dep in self.tasks[name].depends:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+        
+        for name in self.tasks:
+            visit(name)
+    
+    def start(self):
+        """Inicia a execução das tarefas sem bloquear a thread atual"""
+        self._validate()
+        self.started_at = time.perf_counter()
+        self._pending = set(self.tasks)
+        
+        if not self.tasks:
+            self.finished_at = self.started_at
+            self._done.set()
+            return
+        
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="startup"
+        )
+        with self._lock:
+            self._schedule_ready()
+    
+    def _schedule_ready(self):
+        """Submete as tarefas cujas dependências já terminaram (com lock)"""
+        changed = True
+        while changed:
+            changed = False
+            running = {task.name for task in self._running}
+            for name in sorted(self._pending):
+                task = self.tasks[name]
+                if any(dep in self._pending or dep in running
+                       for dep in task.depends):
+                    continue
+                self._pending.discard(name)
+                changed = True
+                
+                failed = [dep for dep in task.depends if self.tasks[dep].error]
+                if failed:
+                    task.error = StartupError(
+                        f"Tarefa '{name}' cancelada: "
+                        f"dependência '{failed[0]}' falhou"
+                    )
+                    self._completed += 1
+                    continue
+                
+                self._running.append(task)
+                running.add(name)
+                self._executor.submit(self._run_task, task)
+        
+        if not self._pending and not self._running:
+            self._finish()
+    
+    def _run_task(self, task):
+        """Executa uma tarefa numa thread do pool"""
+        task.started_at = time.perf_counter()
+        try:
+            task.result = task.func(self.results)
+        except Exception as e:
+            task.error = e
+        task.finished_at = time.perf_counter()
+        metrics.observe(f"startup.{task.name}", task.duration * 1000)
+        if task.error is not None:
+            metrics.error(f"startup.{task.name}", task.error)
+        
+        with self._lock:
+            if task.error is None:
+                self.results[task.name] = task.result
+            elif self.error is None:
+                self.error = task.error
+            self._running.remove(task)
+            self._completed += 1
+            self._schedule_ready()
+    
+    def _finish(self):
+        """Marca o pipeline como concluído (com lock)"""
+        self.finished_at = time.perf_counter()
+        self._executor.shutdown(wait=False)
+        self._done.set()
+    
+    def wait(self, timeout=None):
+        """
+        Aguarda o fim do pipeline
+        
+        Args:
+            timeout: Tempo máximo de espera em segundos (opcional)
+        
+        Returns:
+            bool: True se o pipeline terminou
+        """
+        return self._done.wait(timeout)
+    
+    @property
+    def done(self):
+        """Indica se todas as tarefas terminaram"""
+        return self._done.is_set()
+    
+    @property
+    def progress(self):
+        """Fração das tarefas concluídas (0.0 a 1.0)"""
+        if not self.tasks:
+            return 1.0
+        with self._lock:
+            return self._completed / len(self.tasks)
+    
+    @property
+    def status(self):
+        """Texto da tarefa em execução mais antiga"""
+        with self._lock:
+            if self._running:
+                return self._running[0].label
+        return "Concluído" if self.done else "Inicializando..."
+    
+    @property
+    def timings(self):
+        """Dicionário com a duração (em segundos) de cada tarefa"""
+        return {
+            name: task.duration
+            for name, task in self.tasks.items()
+            if task.duration is not None
+        }
+    
+    def report(self):
+        """
+        Gera um relatório textual dos tempos de inicialização
+        
+        Returns:
+            str: Uma linha por tarefa, na ordem em que começaram
+        """
+        started = [t for t in self.tasks.values() if t.started_at is not None]
+        started.sort(key=lambda t: t.started_at)
+        
+        lines = []
+        for task in started:
+            offset = (task.started_at - self.started_at) * 1000
+            duration = (task.duration or 0) * 1000
+            state = "erro" if task.error else "ok"
+            lines.append(
+                f"{task.name:<20} início {offset:8.1f} ms  "
+                f"duração {duration:8.1f} ms  {state}"
+            )
+        if self.finished_at is not None:
+            total = (self.finished_at - self.started_at) * 1000
+            lines.append(f"{'total':<20} {total:8.1f} ms")
+        return "\n".join(lines)
\ No newline at end of file
@@ -0,0 +1,397 @@
+"""
+Agendador de Tarefas
+Executa trabalho longo fora da thread do Tk e entrega os resultados à
+interface por uma fila esvaziada com after(), num ritmo fixo de quadros
+"""
+import heapq
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core.metrics import metrics
+
+
+# Contexto de todos os pools de processos: spawn, porque o processo pai tem
+# conexões SQLite e threads (inclusive as do Tk) que não sobrevivem bem a um fork
+PROCESS_CONTEXT = multiprocessing.get_context("spawn")
+
+# Prioridades (menor número executa primeiro)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+# Estados de uma tarefa
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class TaskCancelled(Exception):
+    """Levantada dentro de uma tarefa que foi cancelada"""
+
+
+class Task:
+    """Tarefa submetida ao agendador"""
+    
+    def __init__(self, scheduler, func, args, kwargs, name, priority, process,
+                 on_done, on_error, on_progress):
+        """Criada por TaskScheduler.submit(); não instanciar diretamente"""
+        self.id = None
+        self.name = name or getattr(func, "__name__", "tarefa")
+        self.priority = priority
+        self.process = process
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.progress_value = None
+        self.progress_text = None
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+        self._scheduler = scheduler
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._on_done = on_done
+        self._on_error = on_error
+        self._on_progress = on_progress
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._progress_queued = False
+    
+    @property
+    def cancelled(self):
+        """Indica se o cancelamento foi pedido"""
+        return self._cancel.is_set()
+    
+    @property
+    def finished(self):
+        """Indica se a tarefa terminou (com sucesso, erro ou cancelada)"""
+        return self._finished.is_set()
+    
+    def cancel(self):
+        """
+        Pede o cancelamento da tarefa
+        
+        Tarefas pendentes nunca começam. Tarefas em thread em execução param
+        no próximo check_cancelled()/progress(); as de processo terminam,
+        mas o resultado é descartado.
+        """
+        self._cancel.set()
+        self._scheduler._cancel_pending(self)
+    
+    def check_cancelled(self):
+        """
+        Interrompe a tarefa se ela foi cancelada (chamar dentro da tarefa)
+        
+        Raises:
+            TaskCancelled: Se o cancelamento foi pedido
+        """
+        if self._cancel.is_set():
+            raise TaskCancelled(self.name)
+    
+    def progress(self, value, text=None):
+        """
+        Informa o progresso (chamar dentro da tarefa)
+        
+        Pode ser chamado a cada item: só o valor mais recente é entregue à
+        interface no próximo quadro.
+        
+        Args:
+            value: Fração concluída (0.0 a 1.0) ou None se indeterminado
+            text: Texto de status (opcional)
+        """
+        self.check_cancelled()
+        self.progress_value = value
+        if text is not None:
+            self.progress_text = text
+        if not self._progress_queued:
+            self._progress_queued = True
+            self._scheduler._post(self, "progress")
+    
+    def wait(self, timeout=None):
+        """
+        Aguarda o fim da tarefa (não usar na thread do Tk)
+        
+        Returns:
+            bool: True se a tarefa terminou
+        """
+        return self._finished.wait(timeout)
+    
+    def __lt__(self, other):
+        return (self.priority, self.id) < (other.priority, other.id)
+    
+    def __repr__(self):
+        return f"Task({self.name!r}, state={self.state}, priority={self.priority})"
+
+
+class TaskScheduler:
+    """Pools de threads e processos com fila de prioridade e entrega via Tk"""
+    
+    # Quadros por segundo em que os eventos são entregues à interface
+    FRAME_RATE = 30
+    
+    def __init__(self, max_threads=4, max_processes=None, frame_rate=None):
+        """
+        Inicializa o agendador
+        
+        Args:
+            max_threads: Tarefas em thread executadas ao mesmo tempo
+            max_processes: Processos do pool (padrão: número de CPUs)
+            frame_rate: Entregas por segundo à interface (padrão: FRAME_RATE)
+        """
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self.frame_rate = frame_rate or self.FRAME_RATE
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._available = {
+            False: threading.Condition(self._lock),
+            True: threading.Condition(self._lock)
+        }
+        self._heaps = {False: [], True: []}
+        self._workers = []
+        self._process_pool = None
+        self._events = queue.SimpleQueue()
+        self._active = set()
+        self._widget = None
+        self._after_id = None
+        self._closed = False
+    
+    def submit(self, func, *args, name=None, priority=PRIORITY_NORMAL,
+               process=False, on_done=None, on_error=None, on_progress=None,
+               **kwargs):
+        """
+        Agenda uma função
+        
+        Em thread, a função recebe a Task como primeiro argumento, para
+        informar progresso e verificar cancelamento. Em processo
+        (process=True), recebe apenas os argumentos, que precisam ser
+        serializáveis com pickle.
+        
+        Os callbacks são chamados na thread do Tk (ou em drain()):
+        on_done(resultado), on_error(exceção) e on_progress(valor, texto).
+        
+        Returns:
+            Task submetida
+        """
+        task = Task(
+            self, func, args, kwargs, name, priority, process,
+            on_done, on_error, on_progress
+        )
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Agendador encerrado")
+            task.id = next(self._ids)
+            heapq.heappush(self._heaps[process], task)
+            self._active.add(task)
+            self._ensure_workers(process)
+            self._available[process].notify()
+        return task
+    
+    def _ensure_workers(self, process):
+        """Cria as threads que consomem a fila (com lock)"""
+        lane = [w for w in self._workers if w.process == process]
+        if process:
+            limit = self.max_processes or os.cpu_count() or 1
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=limit, mp_context=PROCESS_CONTEXT
+                )
+        else:
+            limit = self.max_threads
+        
+        for index in range(len(lane), limit):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                args=(process,),
+                name=f"task-{'process' if process else 'thread'}-{index}",
+                daemon=True
+            )
+            worker.process = process
+            self._workers.append(worker)
+            worker.start()
+    
+    def _worker_loop(self, process):
+        """Retira tarefas da fila por prioridade e as executa"""
+        heap = self._heaps[process]
+        available = self._available[process]
+        while True:
+            with self._lock:
+                while not heap and not self._closed:
+                    available.wait()
+                if not heap:
+                    return
+                task = heapq.heappop(heap)
+                task.state = CANCELLED if task.cancelled else RUNNING
+            if task.state == CANCELLED:
+                self._post(task, "finished")
+                continue
+            self._run(task)
+    
+    def _run(self, task):
+        """Executa uma tarefa e publica o resultado"""
+        task.started_at = time.perf_counter()
+        try:
+            if task.process:
+                future = self._process_pool.submit(task._func, *task._args, **task._kwargs)
+                task.result = future.result()
+                task.check_cancelled()
+            else:
+                task.result = task._func(task, *task._args, **task._kwargs)
+            task.state = DONE
+        except TaskCancelled:
+            task.state = CANCELLED
+        except Exception as e:
+            task.error = e
+            task.state = CANCELLED if task.cancelled else FAILED
+        task.finished_at = time.perf_counter()
+        self._post(task, "finished")
+    
+    def _cancel_pending(self, task):
+        """Remove da fila uma tarefa que ainda não começou"""
+        with self._lock:
+            heap = self._heaps[task.process]
+            if task.state != PENDING or task not in heap:
+                return
+            heap.remove(task)
+            heapq.heapify(heap)
+            task.state = CANCELLED
+        self._post(task, "finished")
+    
+    def _post(self, task, event):
+        """Enfileira um evento para a thread da interface"""
+        if event == "finished":
+            task._finished.set()
+        self._events.put((task, event))
+    
+    def drain(self):
+        """
+        Entrega os eventos acumulados aos callbacks (na thread atual)
+        
+        Vários avisos de progresso de uma tarefa viram uma única chamada com
+        o valor mais recente.
+        
+        Returns:
+            int: Quantidade de callbacks chamados
+        """
+        progress = {}
+        finished = []
+        while True:
+            try:
+                task, event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if event == "progress":
+                task._progress_queued = False
+                progress[task.id] = task
+            else:
+                finished.append(task)
+        
+        calls = 0
+        for task in progress.values():
+            if task._on_progress and not task.finished:
+                self._callback(task._on_progress, task.progress_value, task.progress_text)
+                calls += 1
+        
+        for task in finished:
+            with self._lock:
+                self._active.discard(task)
+            if task.state == DONE and task._on_done:
+                self._callback(task._on_done, task.result)
+                calls += 1
+            elif task.state == FAILED:
+                if task._on_error:
+                    self._callback(task._on_error, task.error)
+                else:
+                    metrics.error(f"tasks.{task.name}", task.error)
+                calls += 1
+        return calls
+    
+    @staticmethod
+    def _callback(func, *args):
+        """Chama um callback sem deixar exceções interromperem a entrega"""
+        try:
+            func(*args)
+        except Exception as e:
+            metrics.error('tasks.callback', e)
+    
+    def attach(self, widget):
+        """
+        Passa a entregar os eventos pelo after() de um widget do Tk
+        
+        Args:
+            widget: Janela ou widget (normalmente a janela principal)
+        """
+        self.detach()
+        self._widget = widget
+        self._schedule_drain()
+    
+    def detach(self):
+        """Para de entregar eventos pelo widget atual"""
+        if self._widget is not None and self._after_id is not None:
+            try:
+                self._widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+        self._widget = None
+        self._after_id = None
+    
+    def _schedule_drain(self):
+        """Agenda o próximo quadro de entrega"""
+        interval = max(1, int(1000 / self.frame_rate))
+        try:
+            self._after_id = self._widget.after(interval, self._on_frame)
+        except Exception:
+            # Janela destruída
+            self._widget = None
+            self._after_id = None
+    
+    def _on_frame(self):
+        """Entrega os eventos de um quadro e agenda o próximo"""
+        if self._widget is None:
+            return
+        self.drain()
+        self._schedule_drain()
+    
+    @property
+    def active(self):
+        """Tarefas submetidas cujo fim ainda não foi entregue"""
+        with self._lock:
+            return sorted(self._active)
+    
+    def cancel_all(self):
+        """Cancela todas as tarefas pendentes e em execução"""
+        for task in self.active:
+            task.cancel()
+    
+    def shutdown(self, cancel=True, timeout=None):
+        """
+        Encerra o agendador
+        
+        Args:
+            cancel: Cancela as tarefas ainda não concluídas
+            timeout: Tempo máximo (s) para as tarefas em execução pararem;
+                None não espera
+        """
+        if cancel:
+            self.cancel_all()
+        self.detach()
+        with self._lock:
+            self._closed = True
+            for available in self._available.values():
+                available.notify_all()
+            workers = list(self._workers)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+        
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+            for worker in workers:
+                worker.join(max(0.0, deadline - time.monotonic()))
\ No newline at end of file
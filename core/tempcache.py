@@ -0,0 +1,473 @@
+"""
+Cache do Diretório Temporário
+Armazena artefatos intermediários por conteúdo, com limite de espaço e
+remoção dos menos usados (LRU) controlada pelo banco de dados
+"""
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+# Chaves válidas: SHA256 em hexadecimal (do conteúdo ou de derived_key)
+_KEY = re.compile(r"[0-9a-f]{64}")
+
+
+class _HashingWriter:
+    """Arquivo de escrita que calcula o SHA256 do que é gravado"""
+    
+    def __init__(self, file):
+        self._file = file
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.key = None
+    
+    def write(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+    
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+class TempCache:
+    """Cache endereçado por conteúdo dentro do temp_directory"""
+    
+    # Diretório configurado onde o cache fica e tabela que o controla
+    DIRECTORY_KEY = "temp_directory"
+    TABLE = "temp_cache"
+    
+    # Subdiretório com as entradas do cache
+    CACHE_DIRECTORY = "cache"
+    
+    # Subdiretório onde as gravações são montadas antes de entrar no cache
+    STAGING_DIRECTORY = ".staging"
+    
+    # Acessos acumulados antes de gravar last_access no banco
+    TOUCH_BATCH = 64
+    
+    # Tamanho dos blocos copiados por put_file
+    COPY_CHUNK_SIZE = 1024 * 1024
+    
+    # Idade mínima (s) para a limpeza descartar montagens e arquivos sem
+    # registro, que podem ser gravações em andamento de outro processo
+    CLEANUP_GRACE = 3600
+    
+    def __init__(self, db_manager, config_manager, quota=None):
+        """
+        Inicializa o cache
+        
+        Args:
+            db_manager: Instância do DatabaseManager
+            config_manager: Instância do ConfigManager
+            quota: Limite em bytes (padrão: temp_quota_mb da configuração)
+        """
+        self.db = db_manager
+        self.config_manager = config_manager
+        self._quota = quota
+        self._lock = threading.Lock()
+        # Publicação (arquivo + registro) e limpeza não se intercalam
+        self._publish_lock = threading.Lock()
+        # Montagens em andamento neste processo
+        self._staged = set()
+        self._touched = {}
+        # Ocupação estimada desde a última contagem (None: desconhecida)
+        self._usage = None
+    
+    @property
+    def base_directory(self):
+        """Diretório configurado que contém o cache"""
+        return self.config_manager.resolved().path(self.DIRECTORY_KEY)
+    
+    @property
+    def cache_directory(self):
+        """Diretório com as entradas do cache"""
+        return self.base_directory / self.CACHE_DIRECTORY
+    
+    @property
+    def staging_directory(self):
+        """Diretório das gravações em andamento"""
+        return self.base_directory / self.STAGING_DIRECTORY
+    
+    @property
+    def quota(self):
+        """Limite do cache em bytes (0 ou menos desativa a remoção)"""
+        if self._quota is not None:
+            return self._quota
+        return self.config_manager.resolved().temp_quota
+    
+    @staticmethod
+    def derived_key(*parts):
+        """
+        Gera uma chave estável a partir das entradas de um processamento
+        
+        Permite consultar o cache antes de calcular o resultado, por exemplo
+        derived_key('screen2', sha1_da_imagem).
+        
+        Args:
+            *parts: Valores que identificam o resultado
+        
+        Returns:
+            str: Chave SHA256 em hexadecimal
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            if not isinstance(part, bytes):
+                part = str(part).encode("utf-8")
+            digest.update(len(part).to_bytes(8, "little"))
+            digest.update(part)
+        return digest.hexdigest()
+    
+    def path_of(self, key):
+        """
+        Caminho de uma entrada no cache, existindo ou não
+        
+        Raises:
+            ValueError: Se a chave não for um SHA256 em hexadecimal
+        """
+        if not isinstance(key, str) or not _KEY.fullmatch(key):
+            raise ValueError(f"Chave de cache inválida: {key!r}")
+        return self.cache_directory / key[:2] / key
+    
+    def _stage_path(self):
+        """
+        Cria o diretório de montagem e retorna um caminho novo dentro dele
+        
+        O caminho fica reservado (a limpeza não o remove) até _unstage().
+        """
+        staging = self.staging_directory
+        staging.mkdir(parents=True, exist_ok=True)
+        staged = staging / uuid.uuid4().hex
+        with self._lock:
+            self._staged.add(staged.name)
+        return staged
+    
+    def _unstage(self, staged):
+        """Descarta o que sobrou de uma montagem e libera a reserva"""
+        try:
+            if staged.is_dir():
+                shutil.rmtree(staged, ignore_errors=True)
+            elif staged.exists():
+                staged.unlink()
+        finally:
+            with self._lock:
+                self._staged.discard(staged.name)
+    
+    def _commit(self, staged, key, kind, size):
+        """
+        Move uma gravação montada para o cache de forma atômica e a registra
+        
+        Se a chave já existir, a gravação é descartada e a entrada mantida.
+        A entrada gravada nunca é removida pela limpeza que segue a gravação,
+        mesmo que sozinha passe do limite.
+        """
+        target = self.path_of(key)
+        now = time.time()
+        # O arquivo e o registro aparecem juntos para a limpeza
+        with self._publish_lock:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.replace(staged, target)
+            except OSError:
+                # Diretório de mesma chave já publicado por outra gravação
+                if not target.exists():
+                    raise
+                shutil.rmtree(staged, ignore_errors=True)
+            
+            with self.db.transaction() as conn:
+                conn.execute(
+                    f"""
+                    INSERT INTO {self.TABLE} (key, kind, size, created_at, last_access)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        size = excluded.size,
+                        last_access = excluded.last_access
+                    """,
+                    (key, kind, size, now, now)
+                )
+        with self._lock:
+            if self._usage is not None:
+                self._usage += size
+        self.evict(keep=key)
+        return target
+    
+    def put_bytes(self, data, key=None):
+        """
+        Grava bytes no cache
+        
+        Args:
+            data: Conteúdo
+            key: Chave (padrão: SHA256 do conteúdo)
+        
+        Returns:
+            str: Chave da entrada
+        """
+        key = key or hashlib.sha256(data).hexdigest()
+        if self.get(key) is not None:
+            return key
+        
+        staged = self._stage_path()
+        try:
+            with open(staged, "wb") as f:
+                f.write(data)
+            self._commit(staged, key, "file", len(data))
+        finally:
+            self._unstage(staged)
+        return key
+    
+    def put_file(self, source, key=None):
+        """
+        Copia um arquivo para o cache
+        
+        Args:
+            source: Caminho do arquivo
+            key: Chave (padrão: SHA256 do conteúdo)
+        
+        Returns:
+            str: Chave da entrada
+        """
+        with open(source, "rb") as src, self.writer(key) as out:
+            while True:
+                chunk = src.read(self.COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                out.write(chunk)
+        return out.key
+    
+    @contextmanager
+    def writer(self, key=None):
+        """
+        Grava uma entrada em partes
+        
+        A entrada só aparece no cache se o bloco terminar sem erro; o
+        atributo key do objeto retornado é preenchido ao final.
+        
+        Args:
+            key: Chave (padrão: SHA256 do conteúdo gravado)
+        
+        Yields:
+            Objeto com write(data)
+        """
+        staged = self._stage_path()
+        try:
+            with open(staged, "wb") as f:
+                out = _HashingWriter(f)
+                yield out
+            out.key = key or out.hexdigest()
+            if self.get(out.key) is None:
+                self._commit(staged, out.key, "file", out.size)
+        finally:
+            self._unstage(staged)
+    
+    @contextmanager
+    def directory(self, key):
+        """
+        Monta um diretório de saída (ex: arquivo extraído) e o publica no cache
+        
+        Args:
+            key: Chave da entrada, normalmente de derived_key()
+        
+        Yields:
+            Path: Diretório vazio onde o conteúdo deve ser gravado
+        """
+        staged = self._stage_path()
+        staged.mkdir()
+        try:
+            yield staged
+            self._commit(staged, key, "directory", self._tree_size(staged))
+        finally:
+            self._unstage(staged)
+    
+    @staticmethod
+    def _tree_size(path):
+        """Soma o tamanho dos arquivos sob um diretório"""
+        total = 0
+        stack = [str(path)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+        return total
+    
+    def get(self, key):
+        """
+        Procura uma entrada e marca o acesso
+        
+        Args:
+            key: Chave da entrada
+        
+        Returns:
+            Path da entrada ou None se não estiver no cache
+        """
+        path = self.path_of(key)
+        if not path.exists():
+            return None
+        
+        with self._lock:
+            self._touched[key] = time.time()
+            flush = len(self._touched) >= self.TOUCH_BATCH
+        if flush:
+            self.flush()
+        return path
+    
+    def flush(self):
+        """Grava no banco os acessos acumulados"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if not touched:
+            return
+        with self.db.transaction() as conn:
+            conn.executemany(
+                f"UPDATE {self.TABLE} SET last_access = MAX(last_access, ?) WHERE key = ?",
+                [(when, key) for key, when in touched.items()]
+            )
+    
+    def remove(self, key):
+        """
+        Remove uma entrada do cache
+        
+        Args:
+            key: Chave da entrada
+        """
+        path = self.path_of(key)
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        elif path.exists():
+            path.unlink()
+        with self._lock:
+            self._touched.pop(key, None)
+        self.db.execute_query(f"DELETE FROM {self.TABLE} WHERE key = ?", (key,))
+    
+    def usage(self):
+        """
+        Retorna a ocupação atual do cache
+        
+        Returns:
+            tuple: (entradas, bytes)
+        """
+        row = self.db.fetch_one(
+            f"SELECT COUNT(*) AS entries, COALESCE(SUM(size), 0) AS size FROM {self.TABLE}"
+        )
+        with self._lock:
+            self._usage = row['size']
+        return row['entries'], row['size']
+    
+    def evict(self, quota=None, keep=None):
+        """
+        Remove as entradas menos usadas até o cache caber no limite
+        
+        Args:
+            quota: Limite em bytes (padrão: limite configurado)
+            keep: Chave que não deve ser removida (opcional)
+        
+        Returns:
+            int: Bytes liberados
+        """
+        quota = self.quota if quota is None else quota
+        if quota <= 0:
+            return 0
+        
+        # A estimativa evita somar a tabela a cada gravação; outros processos
+        # podem ter gravado, então a soma real é refeita antes de remover
+        if self._usage is not None and self._usage <= quota:
+            return 0
+        _, total = self.usage()
+        if total <= quota:
+            return 0
+        
+        self.flush()
+        freed = 0
+        for row in self.db.fetch_all(
+            f"SELECT key, size FROM {self.TABLE} ORDER BY last_access"
+        ):
+            if total - freed <= quota:
+                break
+            if row['key'] == keep:
+                continue
+            self.remove(row['key'])
+            freed += row['size']
+        with self._lock:
+            self._usage = total - freed
+        return freed
+    
+    @staticmethod
+    def _is_recent(path, limit):
+        """Indica se path foi modificado depois de limit (ou já sumiu)"""
+        try:
+            return path.stat().st_mtime >= limit
+        except FileNotFoundError:
+            return True
+    
+    @staticmethod
+    def _discard(path):
+        """Remove um arquivo ou diretório que pode já ter sido removido"""
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+    
+    def cleanup(self):
+        """
+        Reconcilia o cache com o disco (executado na inicialização)
+        
+        Descarta gravações interrompidas, registros sem arquivo e arquivos
+        sem registro, e depois aplica o limite de espaço. Pode rodar junto
+        com gravações: montagens em andamento neste processo são preservadas,
+        a publicação não se intercala com a varredura e, por causa de outros
+        processos, montagens e arquivos sem registro só são descartados depois
+        de CLEANUP_GRACE segundos sem modificação.
+        
+        Returns:
+            dict: Quantidades de itens descartados e bytes liberados
+        """
+        stats = {'staged': 0, 'missing': 0, 'orphans': 0, 'evicted': 0}
+        self._usage = None
+        limit = time.time() - self.CLEANUP_GRACE
+        
+        staging = self.staging_directory
+        if staging.exists():
+            with self._lock:
+                active = set(self._staged)
+            for entry in staging.iterdir():
+                if entry.name in active or self._is_recent(entry, limit):
+                    continue
+                self._discard(entry)
+                stats['staged'] += 1
+        
+        cache_directory = self.cache_directory
+        with self._publish_lock:
+            known = {row['key'] for row in self.db.fetch_all(f"SELECT key FROM {self.TABLE}")}
+            on_disk = set()
+            if cache_directory.exists():
+                for shard in cache_directory.iterdir():
+                    if not shard.is_dir():
+                        if not self._is_recent(shard, limit):
+                            self._discard(shard)
+                            stats['orphans'] += 1
+                        continue
+                    for entry in shard.iterdir():
+                        if entry.name in known:
+                            on_disk.add(entry.name)
+                        elif not self._is_recent(entry, limit):
+                            self._discard(entry)
+                            stats['orphans'] += 1
+            
+            missing = [(key,) for key in known - on_disk]
+            if missing:
+                with self.db.transaction() as conn:
+                    conn.executemany(f"DELETE FROM {self.TABLE} WHERE key = ?", missing)
+            stats['missing'] = len(missing)
+        
+        stats['evicted'] = self.evict()
+        return stats
\ No newline at end of file
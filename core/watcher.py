@@ -0,0 +1,658 @@
+"""
+Observador de Arquivos
+Acompanha as mudanças nos diretórios configurados (inotify no Linux, varredura
+por stat nos demais sistemas) e entrega lotes agrupados de alterações
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from core.metrics import metrics
+
+
+# Tipos de alteração de um arquivo
+ADDED = "added"
+MODIFIED = "modified"
+DELETED = "deleted"
+
+# Backends disponíveis
+BACKENDS = ('auto', 'inotify', 'poll')
+
+
+class WatcherError(Exception):
+    """Erro ao iniciar o observador de arquivos"""
+
+
+class ChangeBatch:
+    """Alterações agrupadas entregues aos assinantes do Watcher"""
+    
+    __slots__ = ('added', 'modified', 'deleted', 'removed_directories', 'overflow')
+    
+    def __init__(self, added=(), modified=(), deleted=(), removed_directories=(),
+                 overflow=False):
+        """
+        Inicializa o lote
+        
+        Args:
+            added: Caminhos de arquivos novos
+            modified: Caminhos de arquivos alterados
+            deleted: Caminhos de arquivos removidos
+            removed_directories: Diretórios removidos (com tudo o que continham);
+                aplicar antes de added
+            overflow: Eventos foram perdidos: só uma varredura completa é confiável
+        """
+        self.added = set(added)
+        self.modified = set(modified)
+        self.deleted = set(deleted)
+        self.removed_directories = set(removed_directories)
+        self.overflow = overflow
+    
+    def __bool__(self):
+        return bool(
+            self.added or self.modified or self.deleted
+            or self.removed_directories or self.overflow
+        )
+    
+    def __len__(self):
+        return (
+            len(self.added) + len(self.modified) + len(self.deleted)
+            + len(self.removed_directories)
+        )
+    
+    def __repr__(self):
+        return (
+            f"ChangeBatch(added={len(self.added)}, modified={len(self.modified)}, "
+            f"deleted={len(self.deleted)}, "
+            f"removed_directories={len(self.removed_directories)}, "
+            f"overflow={self.overflow})"
+        )
+
+
+def _under(path, directory):
+    """Indica se path é directory ou está dentro dele"""
+    return path == directory or path.startswith(directory + os.sep)
+
+
+class _Coalescer:
+    """Agrupa eventos até que parem de chegar (debounce) ou atinjam a latência máxima"""
+    
+    def __init__(self, debounce, max_latency):
+        self.debounce = debounce
+        self.max_latency = max_latency
+        self._pending = {}
+        self._removed = set()
+        self._overflow = False
+        self._first = None
+        self._last = None
+    
+    def add(self, kind, path):
+        """Registra um evento bruto (ADDED, MODIFIED, DELETED, 'removed_dir' ou 'overflow')"""
+        now = time.monotonic()
+        if self._first is None:
+            self._first = now
+        self._last = now
+        
+        if kind == "overflow":
+            self._overflow = True
+            return
+        if kind == "removed_dir":
+            self._pending = {p: k for p, k in self._pending.items() if not _under(p, path)}
+            self._removed = {d for d in self._removed if not _under(d, path)}
+            self._removed.add(path)
+            return
+        
+        previous = self._pending.get(path)
+        if kind == ADDED:
+            if previous is None:
+                self._pending[path] = ADDED
+            elif previous == DELETED:
+                self._pending[path] = MODIFIED
+        elif kind == MODIFIED:
+            if previous != ADDED:
+                self._pending[path] = MODIFIED
+        elif previous == ADDED:
+            # Criado e removido dentro do mesmo lote: ninguém precisa saber
+            del self._pending[path]
+        else:
+            self._pending[path] = DELETED
+    
+    def timeout(self):
+        """Segundos até o lote pendente vencer (None se não houver lote)"""
+        if self._first is None:
+            return None
+        now = time.monotonic()
+        return max(0.0, min(
+            self._last + self.debounce - now,
+            self._first + self.max_latency - now
+        ))
+    
+    def take(self):
+        """Retorna o lote pendente se já venceu (senão None)"""
+        timeout = self.timeout()
+        if timeout is None or timeout > 0:
+            return None
+        batch = ChangeBatch(
+            (p for p, k in self._pending.items() if k == ADDED),
+            (p for p, k in self._pending.items() if k == MODIFIED),
+            (p for p, k in self._pending.items() if k == DELETED),
+            self._removed,
+            self._overflow
+        )
+        self._pending = {}
+        self._removed = set()
+        self._overflow = False
+        self._first = self._last = None
+        return batch
+
+
+def _walk(root):
+    """
+    Percorre uma árvore sem seguir links simbólicos
+    
+    Yields:
+        Tuplas (diretório, [arquivos], [subdiretórios]) com caminhos completos
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        files, subdirs = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file():
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        yield directory, files, subdirs
+        stack.extend(subdirs)
+
+
+class _InotifyBackend:
+    """Eventos do kernel via inotify (Linux), um watch por diretório"""
+    
+    name = "inotify"
+    
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_DONT_FOLLOW = 0x02000000
+    IN_EXCL_UNLINK = 0x04000000
+    IN_ISDIR = 0x40000000
+    
+    MASK = (
+        IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK
+    )
+    
+    # Cabeçalho de cada evento lido do descritor (wd, mask, cookie, len)
+    EVENT = struct.Struct("iIII")
+    
+    def __init__(self, roots):
+        if not sys.platform.startswith("linux"):
+            raise WatcherError("inotify só existe no Linux")
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            self._add_watch = libc.inotify_add_watch
+            self._rm_watch = libc.inotify_rm_watch
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError) as e:
+            raise WatcherError(f"inotify indisponível: {e}") from e
+        if fd < 0:
+            raise WatcherError(f"inotify_init1 falhou: {os.strerror(ctypes.get_errno())}")
+        
+        self.fd = fd
+        self.roots = list(roots)
+        self._paths = {}
+        self._watches = {}
+        try:
+            for root in self.roots:
+                for directory, _, _ in _walk(root):
+                    self._watch(directory)
+        except WatcherError:
+            self.close()
+            raise
+    
+    def _watch(self, directory):
+        """Adiciona um watch; False se o diretório sumiu ou não pode ser lido"""
+        wd = self._add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOENT, errno.ENOTDIR, errno.EACCES, errno.EPERM):
+                return False
+            # ENOSPC: limite de fs.inotify.max_user_watches atingido
+            raise WatcherError(f"inotify_add_watch({directory}): {os.strerror(error)}")
+        self._paths[wd] = directory
+        self._watches[directory] = wd
+        return True
+    
+    def _forget(self, directory):
+        """Remove os watches de um diretório que saiu da árvore"""
+        for path in [p for p in self._watches if _under(p, directory)]:
+            wd = self._watches.pop(path)
+            self._paths.pop(wd, None)
+            self._rm_watch(self.fd, wd)
+    
+    def _new_tree(self, directory, events):
+        """Observa um diretório que apareceu e informa os arquivos que já contém"""
+        for path, files, _ in _walk(directory):
+            try:
+                self._watch(path)
+            except WatcherError:
+                events.append(("overflow", None))
+                return
+            events.extend((ADDED, file) for file in files)
+    
+    def read(self, timeout):
+        """
+        Aguarda e lê os eventos do kernel
+        
+        Args:
+            timeout: Tempo máximo de espera em segundos
+        
+        Returns:
+            list: Tuplas (tipo, caminho)
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+        
+        events = []
+        offset = 0
+        while offset + self.EVENT.size <= len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            name = data[offset + self.EVENT.size:offset + self.EVENT.size + length]
+            offset += self.EVENT.size + length
+            
+            if mask & self.IN_Q_OVERFLOW:
+                events.append(("overflow", None))
+                continue
+            directory = self._paths.get(wd)
+            if directory is None:
+                continue
+            if mask & self.IN_IGNORED:
+                self._paths.pop(wd, None)
+                if self._watches.get(directory) == wd:
+                    del self._watches[directory]
+                continue
+            if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                # Os demais diretórios são informados pelo diretório pai
+                if directory in self.roots:
+                    self._forget(directory)
+                    events.append(("removed_dir", directory))
+                continue
+            
+            path = os.path.join(directory, os.fsdecode(name.rstrip(b"\0")))
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self._new_tree(path, events)
+                elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                    self._forget(path)
+                    events.append(("removed_dir", path))
+            elif mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                events.append((ADDED, path))
+            elif mask & self.IN_CLOSE_WRITE:
+                events.append((MODIFIED, path))
+            elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                events.append((DELETED, path))
+        return events
+    
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class _PollingBackend:
+    """
+    Compara stat() periodicamente
+    
+    A cada intervalo só os diretórios são consultados (um stat cada); os que
+    mudaram de mtime são relistados. Arquivos que acabaram de aparecer ou
+    mudar são acompanhados até ficarem estáveis (ex: downloads em andamento).
+    Regravações no mesmo arquivo não mudam o mtime do diretório: para elas,
+    cada rodada confere uma fatia dos arquivos, cobrindo todos a cada
+    sweep_interval.
+    """
+    
+    name = "poll"
+    
+    def __init__(self, roots, interval, hot_time, sweep_interval):
+        self.roots = list(roots)
+        self.interval = interval
+        self.hot_time = hot_time
+        self.sweep_interval = sweep_interval
+        # diretório -> mtime_ns e diretório -> {arquivo: (size, mtime_ns)}
+        self._directories = {}
+        self._files = {}
+        self._hot = {}
+        self._sweep = []
+        self._next_poll = time.monotonic() + interval
+        for root in self.roots:
+            self._load(root, None)
+    
+    @staticmethod
+    def _stat(path):
+        try:
+            return os.stat(path, follow_symlinks=False)
+        except OSError:
+            return None
+    
+    def _load(self, root, events):
+        """Registra uma árvore (e informa os arquivos como novos se events não for None)"""
+        for directory, files, _ in _walk(root):
+            stat = self._stat(directory)
+            if stat is None:
+                continue
+            self._directories[directory] = stat.st_mtime_ns
+            known = self._files[directory] = {}
+            for path in files:
+                stat = self._stat(path)
+                if stat is None:
+                    continue
+                known[path] = (stat.st_size, stat.st_mtime_ns)
+                if events is not None:
+                    events.append((ADDED, path))
+                    self._hot[path] = time.monotonic() + self.hot_time
+    
+    def _remove_directory(self, directory, events):
+        """Esquece um diretório que sumiu (e tudo dentro dele)"""
+        for path in [p for p in self._directories if _under(p, directory)]:
+            del self._directories[path]
+            for file in self._files.pop(path, {}):
+                self._hot.pop(file, None)
+        events.append(("removed_dir", directory))
+    
+    def _relist(self, directory, events):
+        """Compara o conteúdo atual de um diretório com o conhecido"""
+        current = {}
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            current[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError:
+            return
+        
+        known = self._files.setdefault(directory, {})
+        for path in [p for p in known if p not in current]:
+            del known[path]
+            self._hot.pop(path, None)
+            events.append((DELETED, path))
+        for path, signature in current.items():
+            previous = known.get(path)
+            if previous == signature:
+                continue
+            events.append((ADDED if previous is None else MODIFIED, path))
+            known[path] = signature
+            self._hot[path] = time.monotonic() + self.hot_time
+        for path in subdirs:
+            if path not in self._directories:
+                self._load(path, events)
+    
+    def _check_file(self, path, events):
+        """Confere um arquivo conhecido; True se mudou"""
+        stat = self._stat(path)
+        known = self._files.get(os.path.dirname(path))
+        # Arquivos removidos são informados ao relistar o diretório
+        if stat is None or known is None or path not in known:
+            return False
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if known[path] == signature:
+            return False
+        known[path] = signature
+        events.append((MODIFIED, path))
+        return True
+    
+    def poll(self):
+        """Executa uma rodada de comparação; retorna os eventos encontrados"""
+        events = []
+        for directory, mtime_ns in list(self._directories.items()):
+            if directory not in self._directories:
+                continue
+            stat = self._stat(directory)
+            if stat is None:
+                self._remove_directory(directory, events)
+            elif stat.st_mtime_ns != mtime_ns:
+                self._directories[directory] = stat.st_mtime_ns
+                self._relist(directory, events)
+        
+        now = time.monotonic()
+        for path, until in list(self._hot.items()):
+            if self._check_file(path, events):
+                self._hot[path] = now + self.hot_time
+            elif until < now:
+                del self._hot[path]
+        
+        total = sum(len(known) for known in self._files.values())
+        quota = -(-total * self.interval // self.sweep_interval)
+        while quota > 0:
+            if not self._sweep:
+                self._sweep = [p for known in self._files.values() for p in known]
+                if not self._sweep:
+                    break
+            path = self._sweep.pop()
+            quota -= 1
+            if path not in self._hot and self._check_file(path, events):
+                self._hot[path] = now + self.hot_time
+        return events
+    
+    def read(self, timeout):
+        """Aguarda até a próxima rodada (ou timeout) e retorna os eventos"""
+        wait = min(timeout, max(0.0, self._next_poll - time.monotonic()))
+        if wait > 0:
+            time.sleep(wait)
+        if time.monotonic() < self._next_poll:
+            return []
+        self._next_poll = time.monotonic() + self.interval
+        return self.poll()
+    
+    def close(self):
+        self._directories.clear()
+        self._files.clear()
+        self._hot.clear()
+
+
+class Watcher:
+    """Observa diretórios numa thread e entrega lotes de alterações aos assinantes"""
+    
+    # Silêncio (s) esperado antes de entregar um lote
+    DEBOUNCE = 0.25
+    
+    # Atraso máximo (s) entre o primeiro evento e a entrega do lote
+    MAX_LATENCY = 0.8
+    
+    # Intervalo (s) entre rodadas do backend por stat
+    POLL_INTERVAL = 0.5
+    
+    # Tempo (s) que um arquivo novo ou alterado continua sendo conferido
+    HOT_TIME = 10.0
+    
+    # Tempo (s) para o backend por stat conferir todos os arquivos conhecidos
+    SWEEP_INTERVAL = 5.0
+    
+    # Espera máxima (s) de cada leitura, para perceber stop() rapidamente
+    WAKE_INTERVAL = 0.5
+    
+    def __init__(self, roots, backend='auto', debounce=None, max_latency=None,
+                 poll_interval=None):
+        """
+        Inicializa o observador (a thread só começa em start())
+        
+        Args:
+            roots: Diretórios observados, ou função que os retorna (chamada a
+                cada start(), para acompanhar mudanças na configuração)
+            backend: 'auto' (inotify se disponível), 'inotify' ou 'poll'
+            debounce: Silêncio antes de entregar um lote (padrão: DEBOUNCE)
+            max_latency: Atraso máximo de um lote (padrão: MAX_LATENCY)
+            poll_interval: Intervalo do backend por stat (padrão: POLL_INTERVAL)
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend desconhecido: {backend}")
+        self._roots = roots
+        self.backend = backend
+        self.debounce = self.DEBOUNCE if debounce is None else debounce
+        self.max_latency = self.MAX_LATENCY if max_latency is None else max_latency
+        self.poll_interval = poll_interval or self.POLL_INTERVAL
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._backend = None
+        self.error = None
+    
+    @property
+    def running(self):
+        """Indica se a thread do observador está ativa"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    @property
+    def backend_name(self):
+        """Backend em uso ('inotify' ou 'poll'; None antes de iniciar)"""
+        return self._backend.name if self._backend is not None else None
+    
+    def roots(self):
+        """Diretórios observados (existentes), sem repetir os aninhados"""
+        candidates = self._roots() if callable(self._roots) else self._roots
+        roots = []
+        for path in sorted({os.path.abspath(str(p)) for p in candidates}, key=len):
+            if os.path.isdir(path) and not any(_under(path, root) for root in roots):
+                roots.append(path)
+        return roots
+    
+    def subscribe(self, callback):
+        """
+        Registra uma função chamada com cada ChangeBatch (na thread do observador)
+        
+        Inicia o observador se ele ainda não estiver rodando.
+        """
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+        if not self.running:
+            self.start()
+    
+    def unsubscribe(self, callback):
+        """Remove uma função registrada com subscribe()"""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+    
+    def _create_backend(self, roots):
+        """Cria o backend pedido, caindo para o de stat quando inotify falhar"""
+        if self.backend in ('auto', 'inotify'):
+            try:
+                return _InotifyBackend(roots)
+            except WatcherError as e:
+                if self.backend == 'inotify':
+                    raise
+                metrics.error('watcher.inotify', e)
+        return _PollingBackend(roots, self.poll_interval, self.HOT_TIME, self.SWEEP_INTERVAL)
+    
+    def start(self):
+        """Inicia a thread do observador"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._ready.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="fs-watcher", daemon=True)
+        self._thread.start()
+    
+    def wait_ready(self, timeout=None):
+        """Aguarda os diretórios iniciais estarem sendo observados"""
+        return self._ready.wait(timeout)
+    
+    def stop(self, timeout=None):
+        """
+        Para a thread do observador
+        
+        Args:
+            timeout: Tempo máximo de espera (s); None espera terminar
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+    
+    def restart(self):
+        """Reinicia com os diretórios atuais (ex: após mudar a configuração)"""
+        if self.running:
+            self.stop()
+            self.start()
+    
+    def _run(self):
+        """Laço da thread: lê eventos, agrupa e entrega os lotes"""
+        try:
+            self._backend = self._create_backend(self.roots())
+        except Exception as e:
+            self.error = e
+            metrics.error('watcher', e)
+            self._ready.set()
+            return
+        self._ready.set()
+        
+        coalescer = _Coalescer(self.debounce, self.max_latency)
+        try:
+            while not self._stop.is_set():
+                timeout = coalescer.timeout()
+                if timeout is None:
+                    timeout = self.WAKE_INTERVAL
+                events = self._backend.read(min(timeout, self.WAKE_INTERVAL))
+                if events:
+                    metrics.count('watcher.events', len(events))
+                for kind, path in events:
+                    coalescer.add(kind, path)
+                batch = coalescer.take()
+                if batch:
+                    self._dispatch(batch)
+        except Exception as e:
+            self.error = e
+            metrics.error('watcher', e)
+        finally:
+            self._backend.close()
+    
+    def _dispatch(self, batch):
+        """Entrega um lote a cada assinante"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(batch)
+            except Exception as e:
+                metrics.error('watcher.callback', e)
\ No newline at end of file
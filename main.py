@@ -2,9 +2,12 @@
 MSX Tools Frontend
 Ponto de entrada principal da aplicação
 """
-import sys
-import os
 import time
+
+# Marca o início do processo para medir o tempo até a primeira janela
+_PROCESS_START = time.perf_counter()
+
+import sys
 import threading
 from pathlib import Path
 
@@ -13,69 +16,331 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from config.database import DatabaseManager
 from config.settings import ConfigManager
-from ui.splash_screen import SplashScreen
-from ui.config_window import ConfigWindow
-from ui.main_window import MainWindow
+from core.metrics import metrics, profiling
+from core.plugins import ModuleContext, PluginRegistry, PluginError
+from core.snapshot import StartupSnapshot
+from core.startup import StartupPipeline
+from core.tasks import TaskScheduler
+from core.tempcache import TempCache
+
+# As janelas (e o customtkinter) são importadas apenas quando usadas
 
 
 class MSXToolsApp:
     """Classe principal da aplicação MSX Tools"""
     
+    # Intervalo (ms) entre atualizações da splash screen
+    SPLASH_POLL_INTERVAL = 30
+    
+    # Meta de tempo (ms) entre o início do processo e a primeira janela
+    TIME_TO_WINDOW_TARGET = 500
+    
+    # Tempo máximo (s) de espera pelas tarefas em segundo plano ao sair
+    SHUTDOWN_TIMEOUT = 2.0
+    
+    DB_PATH = "msx_config.db"
+    MODULES_DIR = Path(__file__).parent / "modules"
+    
     def __init__(self):
         self.db_manager = None
         self.config_manager = None
         self.splash = None
-        
+        self.window_manager = None
+        self.watcher = None
+        self.modules = []
+        self.startup_timings = {}
+        self.time_to_window = None
+        self.temp_cache = None
+        self._temp_cleanup = None
+        self.plugins = PluginRegistry(self.MODULES_DIR)
+        self.scheduler = TaskScheduler()
+        self.snapshot = StartupSnapshot(self.DB_PATH, self.MODULES_DIR)
+    
     def initialize(self):
         """Inicializa a aplicação"""
+        # Usa o snapshot da última execução, se ainda for válido
+        snapshot = self.snapshot.load()
+        if snapshot is not None:
+            self._initialize_from_snapshot(snapshot)
+            return
+        
+        from ui.splash_screen import SplashScreen
+        
         # Mostra splash screen
-        self.splash = SplashScreen()
+        self.splash = SplashScreen(self._window_manager())
         self.splash.show()
         
-        # Simula carregamento
-        time.sleep(2)
+        # Executa as etapas de inicialização fora da thread do Tk
+        pipeline = self._build_startup_pipeline()
+        pipeline.start()
+        self._wait_for_startup(pipeline)
         
-        # Inicializa banco de dados
-        self.db_manager = DatabaseManager()
-        self.db_manager.initialize()
+        self.startup_timings = pipeline.timings
+        if profiling():
+            print(pipeline.report())
         
-        # Carrega configurações
-        self.config_manager = ConfigManager(self.db_manager)
+        if pipeline.error:
+            self.splash.close()
+            raise pipeline.error
+        
+        config = pipeline.results['config']
+        self.modules = pipeline.results['modules']
         
         # Verifica se precisa configurar
-        if not self.config_manager.config_exists():
-            self.splash.update_status("Primeira execução detectada...")
-            time.sleep(1)
+        if config is None:
+            self.splash.set_progress(1.0, "Primeira execução detectada...")
             self.splash.close()
             self.show_config_window(first_run=True)
         else:
-            self.splash.update_status("Carregando configurações...")
-            time.sleep(1)
-            config = self.config_manager.load_config()
             self.splash.close()
             self.show_main_window(config)
     
+    def _initialize_from_snapshot(self, snapshot):
+        """
+        Inicializa a partir do snapshot, sem ler a configuração do banco nem
+        procurar módulos
+        
+        Args:
+            snapshot: Dados carregados por StartupSnapshot.load()
+        """
+        self.db_manager = DatabaseManager(self.DB_PATH)
+        # O snapshot não cobre o esquema: tabelas e colunas novas de uma
+        # atualização são criadas aqui (idempotente, menos de 1 ms)
+        self.db_manager.initialize()
+        self.config_manager = ConfigManager(self.db_manager)
+        self.temp_cache = TempCache(self.db_manager, self.config_manager)
+        self.modules = snapshot['modules']
+        try:
+            self.plugins.register(self.modules)
+        except PluginError:
+            self.modules = [m.to_dict() for m in self.plugins.discover()]
+        
+        config = snapshot['config']
+        self.config_manager.ensure_directories(config)
+        
+        # A limpeza do temporário não atrasa a primeira janela
+        self._temp_cleanup = threading.Thread(
+            target=self._clean_temp_cache,
+            args=({'config': config},),
+            name="temp-cache-cleanup",
+            daemon=True
+        )
+        self._temp_cleanup.start()
+        self.show_main_window(config)
+    
+    def _build_startup_pipeline(self):
+        """
+        Monta o grafo de tarefas de inicialização
+        
+        Returns:
+            StartupPipeline com as tarefas registradas
+        """
+        pipeline = StartupPipeline()
+        pipeline.add_task(
+            'database',
+            self._init_database,
+            label="Inicializando banco de dados..."
+        )
+        pipeline.add_task(
+            'config',
+            self._load_config,
+            depends=['database'],
+            label="Carregando configurações..."
+        )
+        pipeline.add_task(
+            'directories',
+            self._check_directories,
+            depends=['config'],
+            label="Verificando diretórios..."
+        )
+        pipeline.add_task(
+            'temp_cache',
+            self._clean_temp_cache,
+            depends=['directories'],
+            label="Limpando diretório temporário..."
+        )
+        pipeline.add_task(
+            'modules',
+            self._discover_modules,
+            label="Procurando módulos..."
+        )
+        return pipeline
+    
+    def _wait_for_startup(self, pipeline):
+        """
+        Mantém a splash screen responsiva até o pipeline terminar
+        
+        Args:
+            pipeline: StartupPipeline em execução
+        """
+        window = self.splash.window
+        
+        def poll():
+            self.splash.set_progress(pipeline.progress, pipeline.status)
+            if pipeline.done:
+                window.quit()
+            else:
+                window.after(self.SPLASH_POLL_INTERVAL, poll)
+        
+        poll()
+        if not pipeline.done:
+            window.mainloop()
+        window.update_idletasks()
+    
+    def _init_database(self, results):
+        """Tarefa: cria o banco de dados e as tabelas"""
+        self.db_manager = DatabaseManager(self.DB_PATH)
+        try:
+            self.db_manager.initialize()
+        finally:
+            self.db_manager.close()
+        self.config_manager = ConfigManager(self.db_manager)
+        self.temp_cache = TempCache(self.db_manager, self.config_manager)
+        return self.db_manager
+    
+    def _load_config(self, results):
+        """Tarefa: carrega a configuração salva (None na primeira execução)"""
+        try:
+            if not self.config_manager.config_exists():
+                return None
+            return self.config_manager.load_config()
+        finally:
+            self.db_manager.close()
+    
+    def _check_directories(self, results):
+        """Tarefa: cria os diretórios configurados que estiverem faltando"""
+        config = results['config']
+        if config is None:
+            return []
+        return self.config_manager.ensure_directories(config)
+    
+    def _clean_temp_cache(self, results):
+        """Tarefa: descarta sobras do cache temporário e aplica o limite"""
+        if results['config'] is None:
+            return None
+        try:
+            return self.temp_cache.cleanup()
+        finally:
+            self.db_manager.close()
+    
+    def _discover_modules(self, results):
+        """Tarefa: lê os manifestos dos módulos instalados (sem importá-los)"""
+        return [manifest.to_dict() for manifest in self.plugins.discover()]
+    
+    def _window_manager(self):
+        """Janela raiz única da aplicação (criada no primeiro uso)"""
+        if self.window_manager is None:
+            from ui.window_manager import WindowManager
+            
+            self.window_manager = WindowManager()
+        return self.window_manager
+    
     def show_config_window(self, first_run=False):
-        """Mostra janela de configuração"""
-        config_window = ConfigWindow(self.config_manager, first_run)
+        """Mostra a tela de configuração"""
+        from ui.config_window import ConfigWindow
+        
+        config_window = ConfigWindow(
+            self.config_manager,
+            first_run,
+            manager=self._window_manager()
+        )
+        self._track_first_window(config_window.window)
         config_window.run()
         
-        # Após salvar configurações, mostra janela principal
+        # Após salvar configurações, troca pela tela principal na mesma janela
         if config_window.config_saved:
+            self.window_manager.remove(ConfigWindow.VIEW)
             config = self.config_manager.load_config()
             self.show_main_window(config)
     
     def show_main_window(self, config):
         """Mostra janela principal"""
-        main_window = MainWindow(config, self.config_manager)
+        from core.watcher import Watcher
+        from tools.catalog import scan_roots
+        from ui.main_window import MainWindow
+        
+        # Só começa a observar quando algum módulo assinar as alterações
+        self.watcher = Watcher(lambda: scan_roots(self.config_manager))
+        context = ModuleContext(
+            self.db_manager,
+            self.config_manager,
+            temp_cache=self.temp_cache,
+            scheduler=self.scheduler,
+            watcher=self.watcher
+        )
+        main_window = MainWindow(
+            config,
+            self.config_manager,
+            self.plugins,
+            context,
+            manager=self._window_manager()
+        )
+        self._track_first_window(main_window.window)
         main_window.run()
     
+    def _track_first_window(self, window):
+        """
+        Registra o tempo até a primeira janela ser exibida
+        
+        Args:
+            window: Janela recém-criada
+        """
+        if self.time_to_window is not None:
+            return
+        
+        def mark():
+            if self.time_to_window is not None:
+                return
+            self.time_to_window = (time.perf_counter() - _PROCESS_START) * 1000
+            metrics.observe('startup.time_to_window', self.time_to_window)
+            if self.time_to_window > self.TIME_TO_WINDOW_TARGET:
+                metrics.count('startup.slow_window')
+            if profiling():
+                print(
+                    f"Tempo até a primeira janela: {self.time_to_window:.1f} ms "
+                    f"(meta: {self.TIME_TO_WINDOW_TARGET} ms)"
+                )
+        
+        window.after(0, mark)
+    
+    def shutdown(self):
+        """Fecha o banco de dados e grava o snapshot para a próxima execução"""
+        if self.db_manager is None:
+            return
+        
+        if self.watcher is not None:
+            self.watcher.stop(timeout=self.SHUTDOWN_TIMEOUT)
+        self.scheduler.shutdown(timeout=self.SHUTDOWN_TIMEOUT)
+        if self._temp_cleanup is not None:
+            self._temp_cleanup.join()
+        if self.temp_cache is not None:
+            self.temp_cache.flush()
+        
+        config = None
+        try:
+            if self.config_manager.config_exists():
+                config = self.config_manager.load_config()
+                self._flush_metrics()
+        finally:
+            self.db_manager.close_all()
+        
+        if config is not None:
+            self.snapshot.save(config, self.modules)
+    
+    def _flush_metrics(self):
+        """Grava as métricas da sessão no banco (falhas não impedem o encerramento)"""
+        try:
+            metrics.flush(self.db_manager)
+        except Exception as e:
+            metrics.error('metrics.flush', e)
+    
     def run(self):
         """Executa a aplicação"""
         try:
             self.initialize()
+            self.shutdown()
         except Exception as e:
-            print(f"Erro ao inicializar aplicação: {e}")
+            metrics.error('app', e)
             import traceback
             traceback.print_exc()
             sys.exit(1)
@@ -0,0 +1,17 @@
+"""
+Módulos de Ferramentas
+Cada subpacote é um módulo exibido na barra lateral da janela principal.
+
+O módulo é descrito por um module.json, lido sem importar o pacote:
+
+    {
+        "title": "Cassetes",
+        "icon": "📼",
+        "description": "Conversão WAV <-> CAS",
+        "entry": ".view:CassetteModule",
+        "order": 10
+    }
+
+O entry aponta para uma subclasse de core.plugins.ToolModule, importada
+apenas quando o módulo é aberto pela primeira vez.
+"""
@@ -0,0 +1,4 @@
+"""
+Módulo Catálogo
+Lista os arquivos MSX catalogados sob o diretório raiz
+"""
\ No newline at end of file
@@ -0,0 +1,316 @@
+"""
+Tela do Catálogo
+Exibe o catálogo de arquivos numa lista virtualizada e o atualiza em segundo plano
+"""
+import threading
+import time
+
+import customtkinter as ctk
+
+from PIL import Image
+
+from core.plugins import ToolModule
+from core.tasks import PRIORITY_LOW
+from tools.catalog import Catalog
+from tools.screen import ThumbnailCache, screen_mode
+from ui.virtual_list import Column, VirtualList
+
+
+def _format_size(size):
+    """Formata um tamanho em bytes"""
+    if size is None:
+        return ""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _format_mtime(mtime_ns):
+    """Formata um mtime em nanossegundos"""
+    if mtime_ns is None:
+        return ""
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime_ns / 1e9))
+
+
+class CatalogModule(ToolModule):
+    """Módulo que mostra e atualiza o catálogo de arquivos"""
+    
+    # Filtro que mostra todas as extensões
+    ALL_EXTENSIONS = "Todas"
+    
+    # Tamanho máximo da pré-visualização de telas
+    PREVIEW_SIZE = (256, 212)
+    
+    def __init__(self, manifest, context):
+        super().__init__(manifest, context)
+        self.catalog = Catalog(context.db_manager, context.config_manager)
+        self.thumbnails = ThumbnailCache(
+            context.db_manager,
+            context.config_manager,
+            size=self.PREVIEW_SIZE
+        )
+        self.scan_task = None
+        self.prefetch_task = None
+        # A limpeza do cache de miniaturas roda uma vez, antes de qualquer
+        # tarefa que grave miniaturas
+        self._cleanup_lock = threading.Lock()
+        self._cleaned = False
+        self.list = None
+        self._preview_path = None
+        self._preview_image = None
+    
+    def create_view(self, parent):
+        """Cria a barra de ferramentas e a lista do catálogo"""
+        frame = ctk.CTkFrame(parent, fg_color="transparent")
+        
+        toolbar = ctk.CTkFrame(frame, fg_color="transparent")
+        toolbar.pack(fill="x", padx=10, pady=(10, 5))
+        
+        self.scan_button = ctk.CTkButton(
+            toolbar,
+            text="🔄 Atualizar",
+            command=self.scan,
+            width=120
+        )
+        self.scan_button.pack(side="left")
+        
+        self.extension_combo = ctk.CTkComboBox(
+            toolbar,
+            values=[self.ALL_EXTENSIONS] + sorted(Catalog.EXTENSIONS),
+            command=lambda value: self._apply_filter(),
+            width=110,
+            state="readonly"
+        )
+        self.extension_combo.set(self.ALL_EXTENSIONS)
+        self.extension_combo.pack(side="left", padx=10)
+        
+        self.status_label = ctk.CTkLabel(
+            toolbar,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color="#888888",
+            anchor="w"
+        )
+        self.status_label.pack(side="left", fill="x", expand=True, padx=10)
+        
+        self.progress = ctk.CTkProgressBar(toolbar, width=150, mode="indeterminate")
+        
+        columns = [
+            Column('name', "Nome", width=260),
+            Column('extension', "Tipo", width=60),
+            Column('size', "Tamanho", width=90, anchor="e", formatter=_format_size),
+            Column('mtime_ns', "Modificado", width=130, formatter=_format_mtime),
+            Column('directory', "Diretório", width=420)
+        ]
+        self.preview = ctk.CTkLabel(
+            frame,
+            text="",
+            width=self.PREVIEW_SIZE[0],
+            font=ctk.CTkFont(size=12),
+            text_color="#888888"
+        )
+        self.preview.pack(side="right", fill="y", padx=(0, 10), pady=(0, 10))
+        
+        self.list = VirtualList(
+            frame,
+            columns,
+            source=self.catalog.source(),
+            on_select=self._on_select
+        )
+        self.list.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        
+        self._update_status()
+        
+        # Alterações nos diretórios entram no catálogo sem nova varredura
+        watcher = getattr(self.context, 'watcher', None)
+        if watcher is not None:
+            watcher.subscribe(self._on_changes)
+        
+        # Descarta miniaturas órfãs sem atrasar a abertura
+        self.context.scheduler.submit(
+            lambda task: self._clean_thumbnails(),
+            name="thumbnail-cleanup",
+            priority=PRIORITY_LOW
+        )
+        return frame
+    
+    def _clean_thumbnails(self):
+        """
+        Limpa o cache de miniaturas uma única vez (numa thread do agendador)
+        
+        As tarefas que geram miniaturas chamam este método antes de gravar:
+        se a limpeza estiver em andamento, esperam por ela.
+        """
+        with self._cleanup_lock:
+            if self._cleaned:
+                return
+            try:
+                self.thumbnails.cleanup()
+            finally:
+                self._cleaned = True
+    
+    def _apply_filter(self):
+        """Troca a fonte da lista conforme a extensão escolhida"""
+        extension = self.extension_combo.get()
+        if extension == self.ALL_EXTENSIONS:
+            extension = None
+        self.list.set_source(self.catalog.source(extension))
+        self._update_status()
+    
+    def _count_text(self):
+        return f"{self.list.source.count():,} arquivos".replace(",", ".")
+    
+    def _update_status(self, text=None):
+        self.status_label.configure(text=text or self._count_text())
+    
+    def scan(self):
+        """Atualiza o catálogo em segundo plano"""
+        if self.scan_task is not None and not self.scan_task.finished:
+            return
+        
+        self.scan_button.configure(state="disabled")
+        self.progress.pack(side="right")
+        self.progress.start()
+        self.scan_task = self.context.scheduler.submit(
+            self._run_scan,
+            name="catalog-scan",
+            on_progress=lambda value, text: self._update_status(text),
+            on_done=self._scan_finished,
+            on_error=self._scan_failed
+        )
+    
+    def _run_scan(self, task):
+        """Executa a varredura (numa thread do agendador)"""
+        try:
+            return self.catalog.scan(
+                progress=lambda directories, files: task.progress(
+                    None, f"Varrendo... {files} arquivos em {directories} diretórios"
+                )
+            )
+        finally:
+            self.context.db_manager.close()
+    
+    def _scan_finished(self, result):
+        self._stop_progress()
+        self.list.refresh()
+        self._update_status(
+            f"{self._count_text()} (+{result.added} ~{result.updated} "
+            f"-{result.removed} em {result.duration:.1f} s)"
+        )
+        self.prefetch_thumbnails()
+    
+    def _on_changes(self, batch):
+        """Recebe um lote do observador de arquivos (na thread do observador)"""
+        self.context.scheduler.submit(
+            self._apply_changes,
+            batch,
+            name="catalog-changes",
+            on_done=self._changes_applied
+        )
+    
+    def _apply_changes(self, task, batch):
+        """Grava o lote no catálogo (numa thread do agendador)"""
+        try:
+            return self.catalog.apply_changes(batch)
+        finally:
+            self.context.db_manager.close()
+    
+    def _changes_applied(self, result):
+        # Eventos perdidos: só uma varredura completa deixa o catálogo correto
+        if result is None:
+            self.scan()
+            return
+        if not (result.added or result.updated or result.removed):
+            return
+        self.list.refresh()
+        if self.scan_task is None or self.scan_task.finished:
+            self._update_status(
+                f"{self._count_text()} (+{result.added} ~{result.updated} "
+                f"-{result.removed} alterados agora)"
+            )
+    
+    def prefetch_thumbnails(self):
+        """Gera em segundo plano as miniaturas de todas as telas catalogadas"""
+        if self.prefetch_task is not None and not self.prefetch_task.finished:
+            return
+        self.prefetch_task = self.context.scheduler.submit(
+            self._prefetch,
+            name="thumbnail-prefetch",
+            priority=PRIORITY_LOW
+        )
+    
+    def _prefetch(self, task):
+        """Lista as telas do catálogo e gera as miniaturas (numa thread do agendador)"""
+        paths = [
+            row['path'] for row in self.catalog.files()
+            if screen_mode(row['name']) is not None
+        ]
+        if not paths:
+            return {}
+        self._clean_thumbnails()
+        return self.thumbnails.thumbnails(
+            paths,
+            progress=lambda done, total: task.progress(done / total)
+        )
+    
+    def _thumbnail(self, task, path):
+        """Gera a miniatura de um arquivo (numa thread do agendador)"""
+        self._clean_thumbnails()
+        return self.thumbnails.thumbnails([path]).get(path)
+    
+    def _on_select(self, index, row):
+        """Mostra a pré-visualização de telas ao selecionar uma linha"""
+        self._preview_path = None
+        if row is None or screen_mode(row['name']) is None:
+            self._show_preview(None)
+            return
+        
+        path = row['path']
+        self._preview_path = path
+        thumbnail = self.thumbnails.cached(path)
+        if thumbnail is not None:
+            self._show_preview(thumbnail)
+            return
+        
+        self._show_preview(None, "Gerando pré-visualização...")
+        self.context.scheduler.submit(
+            self._thumbnail,
+            path,
+            name="thumbnail",
+            on_done=lambda result: self._preview_ready(path, result)
+        )
+    
+    def _preview_ready(self, path, thumbnail):
+        if path != self._preview_path:
+            return
+        if thumbnail is None:
+            self._show_preview(None, "Não foi possível decodificar a tela")
+        else:
+            self._show_preview(thumbnail)
+    
+    def _show_preview(self, thumbnail, text=""):
+        """Exibe uma miniatura PNG (ou apenas um texto)"""
+        if thumbnail is None:
+            # image=None não apaga a imagem anterior no customtkinter
+            self._preview_image = ctk.CTkImage(Image.new("RGBA", (1, 1)), size=(1, 1))
+            self.preview.configure(image=self._preview_image, text=text)
+            return
+        with Image.open(thumbnail) as image:
+            image.load()
+        self._preview_image = ctk.CTkImage(
+            light_image=image,
+            dark_image=image,
+            size=image.size
+        )
+        self.preview.configure(image=self._preview_image, text="")
+    
+    def _scan_failed(self, error):
+        self._stop_progress()
+        self._update_status(f"Erro ao atualizar o catálogo: {error}")
+    
+    def _stop_progress(self):
+        self.progress.stop()
+        self.progress.pack_forget()
+        self.scan_button.configure(state="normal")
\ No newline at end of file
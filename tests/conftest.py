@@ -0,0 +1,41 @@
+"""
+Fixtures compartilhadas pelos testes
+"""
+import pytest
+
+from config.database import DatabaseManager
+
+
+class _Resolved:
+    """Configuração resolvida com cada diretório em tmp_path/<chave>"""
+    
+    temp_quota = 0
+    
+    def __init__(self, base):
+        self.base = base
+    
+    def path(self, key):
+        return self.base / key
+
+
+class _Config:
+    def __init__(self, base):
+        self._resolved = _Resolved(base)
+    
+    def resolved(self):
+        return self._resolved
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Substituto do ConfigManager com os diretórios sob tmp_path"""
+    return _Config(tmp_path)
+
+
+@pytest.fixture
+def db(tmp_path):
+    """DatabaseManager com o esquema criado num banco temporário"""
+    db = DatabaseManager(str(tmp_path / "test.db"))
+    db.initialize()
+    yield db
+    db.close_all()
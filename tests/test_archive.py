@@ -0,0 +1,41 @@
+"""
+Testes da leitura de arquivos compactados
+"""
+import struct
+import zlib
+
+from tools.archive import scan_archive
+
+
+def _lzh_level1(name, data, extended=b"\x40\x00\x00", compressed_size=None):
+    """Monta um .lzh de nível 1 com um membro guardado (-lh0-)"""
+    extended += struct.pack("<H", 0)
+    if compressed_size is None:
+        compressed_size = len(extended) + len(data)
+    header = (
+        b"-lh0-" + struct.pack("<II", compressed_size, len(data))
+        + b"\0\0\0\0" + b"\x20\x01" + bytes([len(name)]) + name
+        + b"\0\0" + b"M" + struct.pack("<H", len(extended))
+    )
+    return bytes([len(header), 0]) + header + extended + data + b"\0"
+
+
+def test_lzh_level1_stored_member(tmp_path):
+    path = tmp_path / "ok.lzh"
+    path.write_bytes(_lzh_level1(b"GAME.ROM", b"AB" + bytes(30)))
+    
+    _, fmt, members, error = scan_archive(str(path))
+    
+    assert (fmt, error) == ('lzh', None)
+    assert [m.member for m in members] == ["GAME.ROM"]
+    assert members[0].crc32 == f"{zlib.crc32(b'AB' + bytes(30)):08x}"
+
+
+def test_lzh_negative_compressed_size_is_an_error(tmp_path):
+    # O cabeçalho estendido é maior que o tamanho compactado declarado
+    path = tmp_path / "bad.lzh"
+    path.write_bytes(_lzh_level1(b"GAME.ROM", b"", compressed_size=0))
+    
+    _, fmt, members, error = scan_archive(str(path))
+    
+    assert fmt is None and members == [] and error
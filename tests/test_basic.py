@@ -0,0 +1,39 @@
+"""
+Testes do tokenizador de MSX-BASIC
+"""
+from tools.basic import convert_tree, detokenize, read_text, tokenize, tokenize_line
+
+
+def test_fre_is_not_rem():
+    # FRE é FF 8F: o último byte coincide com REM, mas o resto da linha
+    # continua sendo tokenizado
+    _, body = tokenize_line("10 A=FRE(0):GOTO 10")
+    assert body == bytes.fromhex("41 ef ff 8f 28 11 29 3a 89 20 0e 0a 00")
+
+
+def test_round_trip_extended_tokens():
+    lines = [
+        "10 A=FRE(0):GOTO 10",
+        "20 B$=LEFT$(A$,2)+CHR$(65):PRINT ASC(B$)",
+        "30 X=INT(RND(1)*10):IF X>5 THEN 10 ELSE 20",
+        "40 REM FRE(0) fica como texto",
+        "50 PRINT FRE(\"\"):' comentário com GOTO",
+    ]
+    assert detokenize(tokenize(lines)) == lines
+
+
+def test_convert_tree_round_trips_in_spawned_pool(config, tmp_path):
+    source = tmp_path / "src"
+    (source / "jogos").mkdir(parents=True)
+    lines = ["10 PRINT \"OLA\"", "20 GOTO 10"]
+    for index in range(3):
+        (source / "jogos" / f"prog{index}.bas").write_bytes(tokenize(lines))
+    
+    results = list(convert_tree(
+        config, "ascii", root=str(source), dest_dir=str(tmp_path / "out"),
+        max_workers=2, batch_size=2
+    ))
+    
+    assert len(results) == 3 and all(error is None for _, _, error in results)
+    for _, destination, _ in results:
+        assert read_text(destination).rstrip("\r\n\x1a").split("\r\n") == lines
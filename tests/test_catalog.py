@@ -0,0 +1,83 @@
+"""
+Testes do catálogo de arquivos
+"""
+import os
+import random
+
+import pytest
+
+from tools.catalog import Catalog
+
+
+def _fill(db, count):
+    rng = random.Random(1)
+    rows = []
+    for i in range(count):
+        extension = rng.choice(('rom', 'dsk', 'cas'))
+        name = f"file{rng.randrange(count // 3)}.{extension}"
+        rows.append((
+            f"/data/{i}/{name}", f"/data/{i}", name, extension,
+            rng.randrange(4) * 16384, rng.randrange(10)
+        ))
+    db.execute_many(
+        """
+        INSERT INTO catalog_files (path, directory, name, extension, size, mtime_ns)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        rows
+    )
+
+
+@pytest.mark.parametrize("sort_key", ['path', 'name', 'size', 'mtime_ns'])
+@pytest.mark.parametrize("descending", [False, True])
+def test_source_pages_match_full_order(db, sort_key, descending):
+    _fill(db, 500)
+    catalog = Catalog(db, None)
+    source = catalog.source('rom')
+    expected = catalog.fetch(0, 1000, sort_key, descending, 'rom')
+    
+    # Páginas em sequência, depois saltos e releituras fora de ordem
+    source.count()
+    pages = [source.fetch(offset, 40, sort_key, descending) for offset in range(0, 520, 40)]
+    assert [row['id'] for page in pages for row in page] == [row['id'] for row in expected]
+    for offset in (400, 120, 0, 360, 80):
+        page = source.fetch(offset, 40, sort_key, descending)
+        assert [row['id'] for row in page] == [row['id'] for row in expected[offset:offset + 40]]
+
+
+def test_sortable_columns_are_indexed(db):
+    for sort_key in Catalog.SORT_COLUMNS:
+        plan = db.fetch_all(
+            f"EXPLAIN QUERY PLAN SELECT * FROM catalog_files "
+            f"ORDER BY {sort_key}, id LIMIT 40"
+        )
+        assert not any("TEMP B-TREE" in row['detail'] for row in plan), sort_key
+
+
+def test_scan_keeps_subtree_of_unreadable_directory(db, tmp_path, monkeypatch):
+    root = tmp_path / "root"
+    (root / "locked" / "sub").mkdir(parents=True)
+    (root / "locked" / "game.rom").write_bytes(b"AB")
+    (root / "locked" / "sub" / "disk.dsk").write_bytes(b"\0")
+    (root / "gone").mkdir()
+    (root / "gone" / "old.rom").write_bytes(b"AB")
+    
+    catalog = Catalog(db, None, max_workers=2)
+    monkeypatch.setattr(catalog, 'roots', lambda: [str(root)])
+    assert catalog.scan().added == 3
+    
+    (root / "gone" / "old.rom").unlink()
+    (root / "gone").rmdir()
+    locked = str(root / "locked")
+    scandir = os.scandir
+    
+    def denied(path):
+        if path == locked:
+            raise PermissionError(13, "Permission denied", path)
+        return scandir(path)
+    
+    monkeypatch.setattr(os, 'scandir', denied)
+    result = catalog.scan()
+    
+    assert result.removed == 1
+    assert sorted(row['name'] for row in catalog.files()) == ['disk.dsk', 'game.rom']
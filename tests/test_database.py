@@ -0,0 +1,53 @@
+"""
+Testes do gerenciador de banco de dados
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from config.database import DatabaseManager
+
+
+def test_connection_closes_when_its_thread_exits(db):
+    opened = []
+    
+    def work():
+        db.fetch_one("SELECT 1 AS one")
+        opened.append(db.conn)
+    
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join()
+    
+    # Nenhuma outra thread conectou depois: a conexão já deve estar fechada
+    assert all(conn is not opened[0] for _, conn in db._connections)
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")
+
+
+def test_connection_of_live_thread_is_reused(db):
+    conn = db.connect()
+    db.fetch_one("SELECT 1 AS one")
+    
+    assert db.conn is conn
+    db.close()
+    assert db.conn is None
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_iter_rows_survives_nested_queries_without_persistence(tmp_path):
+    db = DatabaseManager(str(tmp_path / "test.db"), persistent=False)
+    db.initialize()
+    db.execute_many("INSERT INTO file_hashes (path, size, mtime_ns, crc32, sha1) "
+                    "VALUES (?, 1, 0, '0', '0')", [(f"/f{i}",) for i in range(10)])
+    
+    paths = []
+    for row in db.iter_rows("SELECT path FROM file_hashes ORDER BY path", arraysize=3):
+        # Cada consulta abre e fecha a conexão compartilhada da thread
+        assert db.fetch_one("SELECT COUNT(*) AS n FROM file_hashes")['n'] == 10
+        paths.append(row['path'])
+    
+    assert paths == sorted(f"/f{i}" for i in range(10))
+    assert db.conn is None
@@ -0,0 +1,33 @@
+"""
+Testes da busca de arquivos duplicados
+"""
+import zipfile
+
+from tools.dedup import Deduplicator
+
+
+def test_scan_groups_files_and_archive_members(db, tmp_path):
+    root = tmp_path / "root"
+    (root / "a").mkdir(parents=True)
+    (root / "b").mkdir()
+    data = b"AB" + bytes(range(256)) * 64
+    (root / "a" / "game.rom").write_bytes(data)
+    (root / "b" / "copy.rom").write_bytes(data)
+    with zipfile.ZipFile(root / "b" / "pack.zip", "w") as archive:
+        archive.writestr("inside.rom", data)
+    
+    dedup = Deduplicator(db, None, max_workers=2)
+    result = dedup.scan(str(root))
+    
+    assert (result.members, result.errors, result.groups) == (1, 0, 1)
+    files = dedup.report()[0]['files']
+    assert sorted((f['path'], f['member']) for f in files) == [
+        (str(root / "a" / "game.rom"), None),
+        (str(root / "b" / "copy.rom"), None),
+        (str(root / "b" / "pack.zip"), "inside.rom"),
+    ]
+    
+    # Segunda busca: o arquivo compactado vem do índice, sem ser reaberto
+    pack = root / "b" / "pack.zip"
+    stat = pack.stat()
+    assert dedup.archives.refresh({str(pack): (stat.st_size, stat.st_mtime_ns)}).cached == 1
@@ -0,0 +1,159 @@
+"""
+Testes do gerenciador de downloads contra um servidor HTTP local
+"""
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tools.download import DownloadError, DownloadManager
+
+
+PAYLOAD = bytes(range(256)) * 64
+SHA1 = hashlib.sha1(PAYLOAD).hexdigest()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        server = self.server
+        server.hits[self.path] = server.hits.get(self.path, 0) + 1
+        
+        if self.path == "/missing":
+            return self._reply(404, b"")
+        if self.path == "/flaky" and server.hits[self.path] == 1:
+            return self._reply(503, b"")
+        
+        body = PAYLOAD
+        start = 0
+        header = self.headers.get("Range")
+        if header:
+            server.ranges.append(header)
+            start = int(header.split("=")[1].rstrip("-"))
+            if self.path == "/misaligned":
+                # Ignora o início pedido e manda o arquivo a partir do zero
+                start = 0
+            return self._reply(206, body[start:], {
+                "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"
+            })
+        self._reply(200, body)
+    
+    def _reply(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.hits = {}
+    httpd.ranges = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DownloadManager(None, dest_dir=tmp_path, retries=3)
+    manager.RETRY_DELAY = 0
+    yield manager
+    manager.close()
+
+
+def _url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_resume_from_partial_file(server, manager, tmp_path):
+    dest = tmp_path / "file.bin"
+    (tmp_path / "file.bin.part").write_bytes(PAYLOAD[:1000])
+    
+    job = manager.download(_url(server, "/file"), dest, checksums={'sha1': SHA1})
+    
+    assert server.ranges == ["bytes=1000-"]
+    assert job.resumed_from == 1000
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_misaligned_content_range_restarts(server, manager, tmp_path):
+    dest = tmp_path / "file.bin"
+    (tmp_path / "file.bin.part").write_bytes(PAYLOAD[:1000])
+    
+    job = manager.download(_url(server, "/misaligned"), dest, checksums={'sha1': SHA1})
+    
+    assert job.resumed_from == 0
+    assert server.hits["/misaligned"] == 2
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_temporary_error_is_retried(server, manager, tmp_path):
+    job = manager.download(_url(server, "/flaky"), tmp_path / "flaky.bin")
+    
+    assert job.status == 'done'
+    assert server.hits["/flaky"] == 2
+
+
+def test_permanent_error_is_not_retried(server, manager, tmp_path):
+    with pytest.raises(DownloadError):
+        manager.download(_url(server, "/missing"), tmp_path / "missing.bin")
+    
+    assert server.hits["/missing"] == 1
+
+
+def test_checksum_mismatch_discards_partial(server, manager, tmp_path):
+    dest = tmp_path / "file.bin"
+    
+    with pytest.raises(DownloadError):
+        manager.download(_url(server, "/file"), dest, checksums={'sha1': "0" * 40})
+    
+    assert server.hits["/file"] == manager.retries
+    assert not dest.exists()
+    assert not (tmp_path / "file.bin.part").exists()
+
+
+def test_url_without_file_name_needs_dest(manager):
+    with pytest.raises(ValueError):
+        manager.download("http://127.0.0.1:1/roms/")
+
+
+@pytest.mark.parametrize("path", ["/etc/passwd", "..\\outside.bin", "roms\\..\\..\\outside.bin"])
+def test_sync_rejects_paths_outside_dest_dir(server, manager, path):
+    manifest = {'base_url': _url(server, "/"), 'files': [{'path': path}]}
+    
+    with pytest.raises(DownloadError):
+        manager.sync(manifest)
+    
+    assert server.hits == {}
+
+
+def test_sync_keeps_nested_relative_paths(server, manager, tmp_path):
+    manifest = {'files': [{'path': "roms\\file.bin", 'url': _url(server, "/file"), 'sha1': SHA1}]}
+    
+    result = manager.sync(manifest)
+    
+    assert result.downloaded == 1
+    assert (tmp_path / "roms" / "file.bin").read_bytes() == PAYLOAD
+
+
+def test_downloaded_hashes_are_cached(server, db, tmp_path):
+    manager = DownloadManager(None, db, dest_dir=tmp_path)
+    try:
+        manager.download(_url(server, "/file"))
+    finally:
+        manager.close()
+    
+    row = db.fetch_one("SELECT size, sha1 FROM file_hashes WHERE path = ?",
+                       (str(tmp_path / "file"),))
+    assert (row['size'], row['sha1']) == (len(PAYLOAD), SHA1)
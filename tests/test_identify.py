@@ -0,0 +1,39 @@
+"""
+Testes da identificação de dumps
+"""
+import hashlib
+
+from tools.identify import Identifier, IdentifyResult
+
+
+def test_import_softwaredb_streams_every_software(db, tmp_path):
+    xml_path = tmp_path / "softwaredb.xml"
+    entries = "".join(
+        f"""
+        <software>
+            <title>Game {i}</title><company>ASCII</company><year>198{i}</year>
+            <dump><rom><type>Mirrored</type><hash algo="sha1">{i:040x}</hash></rom></dump>
+        </software>"""
+        for i in range(5)
+    )
+    xml_path.write_text(f"<softwaredb>{entries}</softwaredb>", encoding="utf-8")
+    identifier = Identifier(db, None)
+    
+    assert identifier.import_softwaredb(str(xml_path))
+    assert [row['title'] for row in identifier.lookup(f"{3:040x}")] == ["Game 3"]
+    assert len(list(identifier._parse_softwaredb(str(xml_path)))) == 5
+
+
+def test_hashes_are_computed_in_spawned_processes(db, tmp_path):
+    path = tmp_path / "game.rom"
+    path.write_bytes(b"AB" + bytes(16382))
+    stat = path.stat()
+    identifier = Identifier(db, None, max_workers=2)
+    result = IdentifyResult()
+    
+    rows = list(identifier._hash_stale(
+        {str(path): (stat.st_size, stat.st_mtime_ns)}, result, None
+    ))
+    
+    assert result.hashed == 1
+    assert rows[0][4] == hashlib.sha1(path.read_bytes()).hexdigest()
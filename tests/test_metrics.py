@@ -0,0 +1,40 @@
+"""
+Testes do registro de métricas
+"""
+import threading
+
+from core.metrics import Metrics
+
+
+def test_concurrent_flushes_write_each_event_once(db):
+    registry = Metrics()
+    for i in range(500):
+        registry.count('test.events', i)
+    
+    barrier = threading.Barrier(4)
+    
+    def flush():
+        barrier.wait()
+        registry.flush(db)
+    
+    threads = [threading.Thread(target=flush) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert db.fetch_one("SELECT COUNT(*) AS count FROM metrics")['count'] == 500
+
+
+def test_error_is_echoed_only_when_profiling(monkeypatch, capsys):
+    registry = Metrics()
+    
+    monkeypatch.delenv("MSX_TOOLS_PROFILE", raising=False)
+    registry.error('test', ValueError("quiet"))
+    monkeypatch.setenv("MSX_TOOLS_PROFILE", "1")
+    registry.error('test', ValueError("loud"))
+    
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "loud" in captured.err and "quiet" not in captured.err
+    assert registry.counters()['errors.test'] == 2
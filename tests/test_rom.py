@@ -0,0 +1,58 @@
+"""
+Testes da análise de ROMs
+"""
+import struct
+
+from tools.rom import (
+    MAPPER_ASCII16, MAPPER_KONAMI_SCC, MAPPER_PLAIN, RomAnalyzer, analyze,
+    guess_mapper, parse_header
+)
+
+
+def _switches(size, addresses, repeat=4):
+    """MegaROM vazia com instruções LD (nnnn),A para os endereços dados"""
+    data = bytearray(size)
+    code = b"".join(b"\x32" + struct.pack("<H", address) for address in addresses)
+    data[0x10:0x10 + len(code) * repeat] = code * repeat
+    return bytes(data)
+
+
+def _plain(size, init, offset=0):
+    data = bytearray(size)
+    data[offset:offset + 4] = b"AB" + struct.pack("<H", init)
+    return bytes(data)
+
+
+def test_guess_mapper_by_bank_writes():
+    assert guess_mapper(_switches(0x20000, (0x5000, 0x7000, 0x9000, 0xB000)))[0] \
+        == MAPPER_KONAMI_SCC
+    mapper, writes = guess_mapper(_switches(0x20000, (0x6000, 0x77FF)))
+    assert (mapper, writes) == (MAPPER_ASCII16, 8)
+
+
+def test_parse_header_in_first_or_second_page():
+    assert parse_header(_plain(0x8000, 0x4010)) == (0, 0x4010, 0, 0, 0)
+    assert parse_header(_plain(0x8000, 0x4010, offset=0x4000))[0] == 0x4000
+    assert parse_header(bytes(0x8000)) is None
+
+
+def test_plain_rom_start_address():
+    info = analyze(_plain(0x4000, 0x8010))
+    assert (info.mapper, info.start, info.init) == (MAPPER_PLAIN, 0x8000, 0x8010)
+    assert analyze(_plain(0x8000, 0x4010, offset=0x4000)).start == 0x0000
+
+
+def test_analyzer_caches_results_by_sha1(db, tmp_path):
+    paths = []
+    for index, addresses in enumerate(((0x5000, 0x9000), (0x6000, 0x77FF))):
+        path = tmp_path / f"game{index}.rom"
+        path.write_bytes(_switches(0x20000, addresses))
+        paths.append(str(path))
+    analyzer = RomAnalyzer(db, max_workers=2)
+    
+    result, infos = analyzer.analyze(paths)
+    again, cached = analyzer.analyze(paths)
+    
+    assert (result.analyzed, again.cached) == (2, 2)
+    assert [infos[path].mapper for path in paths] == [MAPPER_KONAMI_SCC, MAPPER_ASCII16]
+    assert [cached[path].mapper for path in paths] == [MAPPER_KONAMI_SCC, MAPPER_ASCII16]
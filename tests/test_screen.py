@@ -0,0 +1,62 @@
+"""
+Testes da decodificação de telas SCREEN e do cache de miniaturas
+"""
+from PIL import Image
+
+from tools.screen import (
+    BLOAD_ID, ThumbnailCache, decode, parse_bload, screen_mode
+)
+
+
+def _bsave(payload, start=0):
+    end = start + len(payload) - 1
+    return bytes([BLOAD_ID]) + start.to_bytes(2, "little") + end.to_bytes(2, "little") \
+        + b"\0\0" + payload
+
+
+def test_screen_mode_from_extension():
+    assert screen_mode("/tmp/TITLE.SC5") == 5
+    assert screen_mode("grafico.grp") == 2
+    assert screen_mode("leia.txt") is None
+
+
+def test_parse_bload_strips_header():
+    assert parse_bload(_bsave(b"\1\2\3", start=0x100)) == (0x100, b"\1\2\3")
+    assert parse_bload(b"\1\2\3") == (0, b"\1\2\3")
+
+
+def test_screen5_nibbles_become_pixels():
+    image = decode(_bsave(bytes([0x12, 0x3F])), 5)
+    
+    assert image.mode == "P" and image.size == (256, 212)
+    assert [image.getpixel((x, 0)) for x in range(4)] == [1, 2, 3, 15]
+    # Sem paleta gravada na VRAM, usa a paleta padrão do MSX2
+    assert image.getpalette()[15 * 3:16 * 3] == [255, 255, 255]
+
+
+def test_screen8_is_rgb332():
+    # GGGRRRBB: verde máximo, vermelho máximo, azul máximo
+    image = decode(bytes([0b11100000, 0b00011100, 0b00000011]), 8)
+    
+    assert image.mode == "RGB"
+    assert [image.getpixel((x, 0)) for x in range(3)] == [
+        (0, 255, 0), (255, 0, 0), (0, 0, 255)
+    ]
+
+
+def test_thumbnails_are_cached_by_content(db, config, tmp_path):
+    paths = []
+    for index in range(2):
+        screen = tmp_path / f"tela{index}.sc8"
+        screen.write_bytes(_bsave(bytes([index]) * 256 * 212))
+        paths.append(str(screen))
+    cache = ThumbnailCache(db, config, size=(64, 64), max_workers=2)
+    
+    thumbnails = cache.thumbnails(paths)
+    
+    for path in paths:
+        with Image.open(thumbnails[path]) as image:
+            assert max(image.size) == 64
+    # Os SHA1 calculados ficam no cache de hashes e as miniaturas são reaproveitadas
+    assert db.fetch_one("SELECT COUNT(*) AS count FROM file_hashes")['count'] == 2
+    assert cache.cached(paths[0]) == thumbnails[paths[0]]
@@ -0,0 +1,39 @@
+"""
+Testes da conversão de imagens para telas SCREEN
+"""
+import pytest
+from PIL import Image
+
+from tools.screen import parse_bload
+from tools.screen_convert import (
+    TARGETS, ConvertError, convert, convert_directory
+)
+
+
+@pytest.mark.parametrize("mode", sorted(TARGETS))
+def test_convert_writes_full_bsave_screen(mode):
+    image = Image.new("RGB", (64, 48), (255, 0, 0))
+    
+    start, data = parse_bload(convert(image, mode, dither="ordered"))
+    
+    assert start == 0
+    assert len(data) == TARGETS[mode][3] + 1
+
+
+def test_convert_rejects_unknown_dither():
+    with pytest.raises(ConvertError):
+        convert(Image.new("RGB", (8, 8)), 5, dither="random")
+
+
+def test_convert_directory_in_spawned_pool(tmp_path):
+    source = tmp_path / "src"
+    source.mkdir()
+    Image.new("RGB", (32, 32), (0, 0, 255)).save(source / "a.png")
+    Image.new("RGB", (32, 32), (0, 255, 0)).save(source / "b.png")
+    (source / "broken.png").write_bytes(b"not an image")
+    
+    result = convert_directory(str(source), str(tmp_path / "out"), mode=8, max_workers=2)
+    
+    assert result.converted == 2
+    assert [name for name, _ in result.errors] == [str(source / "broken.png")]
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["a.sc8", "b.sc8"]
@@ -0,0 +1,56 @@
+"""
+Testes do agendador de tarefas
+"""
+import math
+import threading
+
+import pytest
+
+from core.metrics import metrics
+from core.tasks import PRIORITY_HIGH, PRIORITY_LOW, DONE, FAILED, TaskScheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = TaskScheduler(max_threads=1, max_processes=1)
+    yield scheduler
+    scheduler.shutdown(timeout=5)
+
+
+def test_pending_tasks_run_by_priority(scheduler):
+    release = threading.Event()
+    order = []
+    
+    blocker = scheduler.submit(lambda task: release.wait(5))
+    low = scheduler.submit(lambda task: order.append('low'), priority=PRIORITY_LOW)
+    high = scheduler.submit(lambda task: order.append('high'), priority=PRIORITY_HIGH)
+    release.set()
+    
+    assert all(task.wait(5) for task in (blocker, low, high))
+    assert order == ['high', 'low']
+
+
+def test_drain_delivers_results_and_errors(scheduler):
+    results = []
+    
+    def fail(task):
+        raise ValueError("falhou")
+    
+    done = scheduler.submit(lambda task, x: x * 2, 21, on_done=results.append)
+    failed = scheduler.submit(fail, name="falha")
+    assert done.wait(5) and failed.wait(5)
+    errors = metrics.counters().get('errors.tasks.falha', 0)
+    
+    scheduler.drain()
+    
+    assert (done.state, failed.state) == (DONE, FAILED)
+    assert results == [42]
+    assert metrics.counters()['errors.tasks.falha'] == errors + 1
+
+
+def test_process_tasks_use_spawned_pool(scheduler):
+    task = scheduler.submit(math.factorial, 10, process=True)
+    
+    assert task.wait(30)
+    assert task.result == 3628800
+    assert scheduler._process_pool._mp_context.get_start_method() == "spawn"
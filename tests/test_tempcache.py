@@ -0,0 +1,59 @@
+"""
+Testes do cache do diretório temporário
+"""
+import os
+import time
+
+import pytest
+
+from core.tempcache import TempCache
+
+
+@pytest.fixture
+def cache(db, config):
+    return TempCache(db, config)
+
+
+def test_cleanup_keeps_writes_in_progress(cache):
+    with cache.writer() as out:
+        out.write(b"em andamento")
+        stats = cache.cleanup()
+    assert stats['staged'] == 0
+    assert cache.get(out.key) is not None
+    assert cache.cleanup()['orphans'] == 0
+
+
+def test_cleanup_discards_old_leftovers(cache):
+    key = cache.put_bytes(b"publicado")
+    leftover = cache.staging_directory / "interrompida"
+    leftover.write_bytes(b"x")
+    orphan = cache.path_of("ab" * 32)
+    orphan.parent.mkdir(parents=True, exist_ok=True)
+    orphan.write_bytes(b"y")
+    
+    # Recentes: podem ser gravações de outro processo
+    assert cache.cleanup() == {'staged': 0, 'missing': 0, 'orphans': 0, 'evicted': 0}
+    
+    old = time.time() - cache.CLEANUP_GRACE - 60
+    os.utime(leftover, (old, old))
+    os.utime(orphan, (old, old))
+    stats = cache.cleanup()
+    assert (stats['staged'], stats['orphans']) == (1, 1)
+    assert not leftover.exists() and not orphan.exists()
+    assert cache.get(key) is not None
+
+
+def test_path_of_rejects_invalid_keys(cache):
+    for key in ("../../etc/passwd", "ABCD" * 16, "ab", None):
+        with pytest.raises(ValueError):
+            cache.path_of(key)
+
+
+def test_oversize_entry_survives_its_own_commit(db, config):
+    cache = TempCache(db, config, quota=10)
+    old = cache.put_bytes(b"antiga")
+    
+    key = cache.put_bytes(b"maior que o limite")
+    
+    assert cache.get(key) is not None
+    assert cache.get(old) is None
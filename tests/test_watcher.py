@@ -0,0 +1,65 @@
+"""
+Testes do observador de arquivos
+"""
+import os
+import queue
+
+from core.watcher import ADDED, DELETED, MODIFIED, Watcher, _Coalescer, _PollingBackend
+
+
+def test_coalescer_merges_events_of_a_batch():
+    coalescer = _Coalescer(debounce=0, max_latency=0)
+    assert coalescer.take() is None
+    
+    coalescer.add(ADDED, "/r/tmp")
+    coalescer.add(DELETED, "/r/tmp")
+    coalescer.add(ADDED, "/r/new")
+    coalescer.add(MODIFIED, "/r/new")
+    coalescer.add(DELETED, "/r/swap")
+    coalescer.add(ADDED, "/r/swap")
+    coalescer.add(MODIFIED, "/r/old/file")
+    coalescer.add("removed_dir", "/r/old")
+    batch = coalescer.take()
+    
+    assert batch.added == {"/r/new"}
+    assert batch.modified == {"/r/swap"}
+    assert batch.deleted == set()
+    assert batch.removed_directories == {"/r/old"}
+    assert coalescer.take() is None
+
+
+def test_polling_backend_reports_changes(tmp_path):
+    (tmp_path / "sub").mkdir()
+    kept = tmp_path / "sub" / "kept.rom"
+    gone = tmp_path / "gone.rom"
+    kept.write_bytes(b"A")
+    gone.write_bytes(b"B")
+    backend = _PollingBackend([str(tmp_path)], 0.01, 10.0, 0.01)
+    
+    kept.write_bytes(b"AB")
+    gone.unlink()
+    (tmp_path / "sub" / "new.rom").write_bytes(b"C")
+    events = set(backend.poll())
+    
+    assert events == {
+        (MODIFIED, str(kept)),
+        (DELETED, str(gone)),
+        (ADDED, str(tmp_path / "sub" / "new.rom"))
+    }
+    assert backend.poll() == []
+
+
+def test_watcher_delivers_batches_to_subscribers(tmp_path):
+    watcher = Watcher([tmp_path], backend='poll', debounce=0.05, poll_interval=0.05)
+    batches = queue.Queue()
+    watcher.subscribe(batches.put)
+    try:
+        assert watcher.wait_ready(5)
+        assert watcher.backend_name == 'poll'
+        (tmp_path / "game.rom").write_bytes(b"AB")
+        batch = batches.get(timeout=5)
+    finally:
+        watcher.stop()
+    
+    assert batch.added == {os.path.join(str(tmp_path), "game.rom")}
+    assert not watcher.running
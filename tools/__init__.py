@@ -0,0 +1,6 @@
+"""
+Módulo de Ferramentas
+Subsistemas que operam sobre os arquivos MSX da coleção
+"""
+
+__version__ = "1.0.0"
\ No newline at end of file
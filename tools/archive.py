@@ -0,0 +1,715 @@
+"""
+Arquivos Compactados
+Lê o conteúdo de .zip, .gz e .lzh sem extrair nada para o disco: os membros
+são lidos em fluxo para calcular hashes e reconhecer o tipo pelo cabeçalho,
+e o resultado fica indexado no SQLite
+"""
+import gzip
+import hashlib
+import os
+import struct
+import time
+import zipfile
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from core.metrics import metrics
+from core.tasks import PROCESS_CONTEXT
+from tools.cassette import CAS_HEADER
+from tools.identify import HASH_CHUNK_SIZE
+
+
+# Extensões tratadas como arquivos compactados
+ARCHIVE_EXTENSIONS = frozenset({'zip', 'gz', 'lzh', 'lha'})
+
+# Métodos LZH que guardam os dados sem compressão
+LZH_STORED = frozenset({b"-lh0-", b"-lz4-"})
+
+# Tamanhos de imagem de disco MSX-DOS mais comuns
+DISK_SIZES = frozenset({163840, 184320, 327680, 368640, 655360, 737280})
+
+# Bytes do início de cada membro usados para reconhecer o tipo
+SNIFF_SIZE = 16
+
+
+class ArchiveError(Exception):
+    """Arquivo compactado inválido ou em formato não suportado"""
+
+
+class ArchiveMember:
+    """Um arquivo contido num arquivo compactado"""
+    
+    def __init__(self, member, size, compressed_size, crc32=None, sha1=None, kind=None):
+        """
+        Args:
+            member: Caminho dentro do arquivo compactado
+            size: Tamanho descompactado em bytes
+            compressed_size: Tamanho compactado em bytes
+            crc32: CRC32 em hexadecimal (None se desconhecido)
+            sha1: SHA1 em hexadecimal (None se o conteúdo não pôde ser lido)
+            kind: Tipo reconhecido pelo cabeçalho (ver sniff)
+        """
+        self.member = member
+        self.size = size
+        self.compressed_size = compressed_size
+        self.crc32 = crc32
+        self.sha1 = sha1
+        self.kind = kind
+    
+    def __repr__(self):
+        return f"ArchiveMember({self.member!r}, size={self.size}, kind={self.kind})"
+
+
+class ArchiveResult:
+    """Estatísticas de uma atualização do índice"""
+    
+    def __init__(self):
+        self.archives = 0
+        self.indexed = 0
+        self.cached = 0
+        self.removed = 0
+        self.members = 0
+        self.errors = []
+        self.duration = 0.0
+    
+    def __repr__(self):
+        return (
+            f"ArchiveResult(archives={self.archives}, indexed={self.indexed}, "
+            f"cached={self.cached}, removed={self.removed}, "
+            f"members={self.members}, errors={len(self.errors)}, "
+            f"duration={self.duration:.3f})"
+        )
+
+
+def sniff(head, name, size):
+    """
+    Reconhece o tipo de um arquivo pelos primeiros bytes
+    
+    Args:
+        head: Primeiros bytes do conteúdo (pelo menos SNIFF_SIZE, se houver)
+        name: Nome do arquivo (usado quando o cabeçalho não diz nada)
+        size: Tamanho total
+    
+    Returns:
+        str: 'rom', 'dsk', 'cas', 'basic', 'bload', 'zip', 'gz', 'lzh' ou a
+            extensão do nome em minúsculas (None se não houver)
+    """
+    ext = os.path.splitext(name)[1][1:].lower() or None
+    if head[:2] == b"AB" and size % 8192 == 0:
+        return 'rom'
+    if head[:8] == CAS_HEADER:
+        return 'cas'
+    if size in DISK_SIZES and head[:1] in (b"\xeb", b"\xe9"):
+        return 'dsk'
+    if head[:4] == b"PK\x03\x04":
+        return 'zip'
+    if head[:2] == b"\x1f\x8b":
+        return 'gz'
+    if head[2:5] in (b"-lh", b"-lz"):
+        return 'lzh'
+    if head[:1] == b"\xff" and ext in ('bas', None):
+        return 'basic'
+    if head[:1] == b"\xfe" and size >= 7:
+        return 'bload'
+    return ext
+
+
+def archive_format(path):
+    """
+    Identifica o formato de um arquivo compactado pelo cabeçalho
+    
+    Returns:
+        str: 'zip', 'gz' ou 'lzh'
+    
+    Raises:
+        ArchiveError: Se não for um formato suportado
+    """
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_SIZE)
+    if head[:4] in (b"PK\x03\x04", b"PK\x05\x06"):
+        return 'zip'
+    if head[:2] == b"\x1f\x8b":
+        return 'gz'
+    if head[2:5] in (b"-lh", b"-lz"):
+        return 'lzh'
+    raise ArchiveError(f"Formato não suportado: {os.path.basename(path)}")
+
+
+def _digest(stream, name, size):
+    """
+    Lê um fluxo calculando CRC32/SHA1 e reconhecendo o tipo
+    
+    Returns:
+        tuple: (crc32, sha1, tipo, bytes lidos)
+    """
+    crc = 0
+    sha1 = hashlib.sha1()
+    head = b""
+    total = 0
+    while True:
+        chunk = stream.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        if len(head) < SNIFF_SIZE:
+            head += chunk[:SNIFF_SIZE - len(head)]
+        crc = zlib.crc32(chunk, crc)
+        sha1.update(chunk)
+        total += len(chunk)
+    return f"{crc & 0xFFFFFFFF:08x}", sha1.hexdigest(), sniff(head, name, size or total), total
+
+
+def _scan_zip(path):
+    """Lista e lê em fluxo os membros de um .zip (diretório central)"""
+    members = []
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            member = ArchiveMember(
+                info.filename,
+                info.file_size,
+                info.compress_size,
+                crc32=f"{info.CRC:08x}",
+                kind=sniff(b"", info.filename, info.file_size)
+            )
+            if not info.flag_bits & 0x1:
+                try:
+                    with archive.open(info) as stream:
+                        _, member.sha1, member.kind, _ = _digest(
+                            stream, info.filename, info.file_size
+                        )
+                except (zipfile.BadZipFile, NotImplementedError, zlib.error, EOFError):
+                    # Método não suportado ou CRC inválido: fica só o diretório
+                    member.sha1 = None
+            members.append(member)
+    return members
+
+
+def _gzip_name(path):
+    """Nome original gravado no cabeçalho gzip (ou o nome sem .gz)"""
+    with open(path, "rb") as f:
+        header = f.read(10)
+        if len(header) < 10 or header[:2] != b"\x1f\x8b":
+            raise ArchiveError(f"Cabeçalho gzip inválido: {os.path.basename(path)}")
+        flags = header[3]
+        if flags & 0x04:
+            extra_size, = struct.unpack("<H", f.read(2))
+            f.seek(extra_size, os.SEEK_CUR)
+        if flags & 0x08:
+            name = bytearray()
+            while True:
+                byte = f.read(1)
+                if not byte or byte == b"\x00":
+                    break
+                name += byte
+            if name:
+                return os.path.basename(name.decode("latin-1"))
+    base = os.path.basename(path)
+    return base[:-3] if base.lower().endswith(".gz") else base
+
+
+def _scan_gzip(path):
+    """Lê em fluxo o único membro de um .gz"""
+    name = _gzip_name(path)
+    compressed_size = os.path.getsize(path)
+    with gzip.open(path, "rb") as stream:
+        crc32, sha1, kind, size = _digest(stream, name, None)
+    return [ArchiveMember(name, size, compressed_size, crc32, sha1, kind)]
+
+
+def _lzh_headers(f):
+    """
+    Percorre os cabeçalhos de um .lzh (níveis 0, 1 e 2)
+    
+    Yields:
+        tuple: (nome, método, tamanho compactado, tamanho, posição dos dados)
+    """
+    size = os.fstat(f.fileno()).st_size
+    offset = 0
+    while offset < size:
+        f.seek(offset)
+        head = f.read(22)
+        if len(head) < 22 or head[0] == 0:
+            return
+        method = head[2:7]
+        compressed_size, original_size = struct.unpack_from("<II", head, 7)
+        level = head[20]
+        
+        if level in (0, 1):
+            header_size = head[0] + 2
+            if header_size < 24:
+                raise ArchiveError("Cabeçalho LZH inválido")
+            rest = f.read(header_size - 22)
+            name_size = head[21]
+            name = rest[:name_size]
+            data_offset = offset + header_size
+            if level == 1:
+                # Cabeçalhos estendidos contam no tamanho compactado
+                next_size, = struct.unpack_from("<H", rest, header_size - 24)
+                while next_size:
+                    f.seek(data_offset)
+                    extended = f.read(next_size)
+                    if len(extended) < next_size or next_size < 3:
+                        raise ArchiveError("Cabeçalho LZH truncado")
+                    if extended[0] == 0x01:
+                        name = extended[1:-2]
+                    data_offset += next_size
+                    compressed_size -= next_size
+                    next_size, = struct.unpack_from("<H", extended, next_size - 2)
+        elif level == 2:
+            header_size, = struct.unpack_from("<H", head, 0)
+            if header_size < 26:
+                raise ArchiveError("Cabeçalho LZH inválido")
+            rest = f.read(header_size - 22)
+            name = b""
+            directory = b""
+            position = 4  # após CRC16, SO e o primeiro tamanho (bytes 21-25)
+            next_size, = struct.unpack_from("<H", rest, 2)
+            while next_size:
+                extended = rest[position:position + next_size]
+                if len(extended) < next_size or next_size < 3:
+                    raise ArchiveError("Cabeçalho LZH truncado")
+                if extended[0] == 0x01:
+                    name = extended[1:-2]
+                elif extended[0] == 0x02:
+                    directory = extended[1:-2].replace(b"\xff", b"/")
+                position += next_size
+                next_size, = struct.unpack_from("<H", extended, next_size - 2)
+            if directory:
+                name = directory.rstrip(b"/") + b"/" + name
+            data_offset = offset + header_size
+        else:
+            raise ArchiveError(f"Nível de cabeçalho LZH desconhecido: {level}")
+        
+        # Um tamanho negativo faria o próximo cabeçalho voltar no arquivo
+        if compressed_size < 0:
+            raise ArchiveError("Tamanho compactado LZH inválido")
+        
+        name = name.decode("latin-1").replace("\\", "/")
+        yield name, method, compressed_size, original_size, data_offset
+        offset = data_offset + compressed_size
+
+
+class _Slice:
+    """Leitura limitada a um trecho de um arquivo aberto"""
+    
+    def __init__(self, f, offset, size):
+        f.seek(offset)
+        self.f = f
+        self.remaining = size
+    
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def _scan_lzh(path):
+    """
+    Lista os membros de um .lzh
+    
+    Não há descompressor LZH na biblioteca padrão: só os membros guardados
+    sem compressão (-lh0-/-lz4-) têm CRC32 e SHA1 calculados; os demais
+    são indexados pelo nome e tamanhos.
+    """
+    members = []
+    with open(path, "rb") as f:
+        for name, method, compressed_size, size, offset in list(_lzh_headers(f)):
+            if method.endswith(b"d-"):
+                continue  # entrada de diretório
+            member = ArchiveMember(name, size, compressed_size, kind=sniff(b"", name, size))
+            if method in LZH_STORED:
+                member.crc32, member.sha1, member.kind, _ = _digest(
+                    _Slice(f, offset, compressed_size), name, size
+                )
+            members.append(member)
+    return members
+
+
+_SCANNERS = {'zip': _scan_zip, 'gz': _scan_gzip, 'lzh': _scan_lzh}
+
+
+def scan_archive(path):
+    """
+    Lê os membros de um arquivo compactado (executa num processo do pool)
+    
+    Args:
+        path: Caminho do arquivo
+    
+    Returns:
+        tuple: (path, formato, lista de ArchiveMember, erro ou None)
+    """
+    try:
+        fmt = archive_format(path)
+        return path, fmt, _SCANNERS[fmt](path), None
+    except (OSError, EOFError, zlib.error, zipfile.BadZipFile, struct.error,
+            ArchiveError, NotImplementedError, ValueError, RuntimeError) as e:
+        # zipfile levanta NotImplementedError/ValueError/RuntimeError para
+        # métodos e cabeçalhos que não entende
+        return path, None, [], str(e)
+
+
+def open_member(path, member):
+    """
+    Abre um membro para leitura em fluxo, sem extrair o arquivo
+    
+    Args:
+        path: Arquivo compactado
+        member: Caminho do membro (como em ArchiveMember.member)
+    
+    Returns:
+        Objeto de arquivo binário (usar com with)
+    
+    Raises:
+        ArchiveError: Se o membro não existir ou não puder ser lido
+    """
+    fmt = archive_format(path)
+    if fmt == 'zip':
+        # O membro continua legível depois de fechar o ZipFile: o arquivo
+        # só é fechado quando o fluxo do membro for fechado
+        with zipfile.ZipFile(path) as archive:
+            try:
+                return archive.open(member)
+            except (KeyError, NotImplementedError) as e:
+                raise ArchiveError(str(e))
+    if fmt == 'gz':
+        return gzip.open(path, "rb")
+    
+    f = open(path, "rb")
+    for name, method, compressed_size, _, offset in _lzh_headers(f):
+        if name == member:
+            if method not in LZH_STORED:
+                f.close()
+                raise ArchiveError(f"Método LZH não suportado: {method.decode()}")
+            return _LzhStream(f, offset, compressed_size)
+    f.close()
+    raise ArchiveError(f"Membro não encontrado: {member}")
+
+
+class _LzhStream(_Slice):
+    """Membro guardado sem compressão de um .lzh, aberto para leitura"""
+    
+    def close(self):
+        self.f.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ArchiveIndex:
+    """Índice em SQLite dos membros de cada arquivo compactado"""
+    
+    # Diretórios configurados onde os arquivos compactados são procurados
+    # (download_directory pode ficar fora da raiz)
+    SEARCH_DIRECTORIES = ('root_directory', 'download_directory')
+    
+    # Quantidade de arquivos gravados por transação
+    BATCH_SIZE = 200
+    
+    # Caminhos por consulta com IN (...)
+    QUERY_CHUNK = 500
+    
+    def __init__(self, db_manager, config_manager=None, max_workers=None):
+        """
+        Args:
+            db_manager: Instância do DatabaseManager
+            config_manager: Instância do ConfigManager (necessário para update)
+            max_workers: Processos usados para ler os arquivos
+        """
+        self.db = db_manager
+        self.config_manager = config_manager
+        self.max_workers = max_workers or os.cpu_count() or 1
+    
+    def list(self, path):
+        """
+        Lista os membros de um arquivo, usando o índice se ele não mudou
+        
+        Args:
+            path: Caminho do arquivo compactado
+        
+        Returns:
+            list: ArchiveMember de cada membro
+        
+        Raises:
+            ArchiveError: Se o arquivo não puder ser lido
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        
+        cached = self.db.fetch_one(
+            "SELECT size, mtime_ns FROM archive_files WHERE path = ?",
+            (path,)
+        )
+        if cached and (cached['size'], cached['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            rows = self.db.fetch_all(
+                """
+                SELECT member, size, compressed_size, crc32, sha1, kind
+                FROM archive_members WHERE path = ? ORDER BY id
+                """,
+                (path,)
+            )
+            return [ArchiveMember(**row) for row in rows]
+        
+        _, fmt, members, error = scan_archive(path)
+        if error:
+            raise ArchiveError(error)
+        self._store([(path, stat.st_size, stat.st_mtime_ns, fmt, members)])
+        return members
+    
+    def _store(self, batch):
+        """Grava um lote de (path, size, mtime_ns, formato, membros) numa transação"""
+        if not batch:
+            return
+        with self.db.transaction() as conn:
+            for path, size, mtime_ns, fmt, members in batch:
+                conn.execute("DELETE FROM archive_members WHERE path = ?", (path,))
+                conn.execute(
+                    """
+                    INSERT INTO archive_files (path, size, mtime_ns, format)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(path) DO UPDATE SET
+                        size = excluded.size,
+                        mtime_ns = excluded.mtime_ns,
+                        format = excluded.format,
+                        indexed_at = CURRENT_TIMESTAMP
+                    """,
+                    (path, size, mtime_ns, fmt)
+                )
+                conn.executemany(
+                    """
+                    INSERT INTO archive_members (
+                        path, member, size, compressed_size, crc32, sha1, kind
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (path, m.member, m.size, m.compressed_size, m.crc32, m.sha1, m.kind)
+                        for m in members
+                    ]
+                )
+    
+    def _iter_archives(self):
+        """
+        Percorre os diretórios de busca
+        
+        Yields:
+            tuple: (path, size, mtime_ns) de cada arquivo compactado
+        """
+        resolved = self.config_manager.resolved()
+        stack = [str(resolved.path(key)) for key in self.SEARCH_DIRECTORIES]
+        seen = set()
+        
+        while stack:
+            directory = stack.pop()
+            if directory in seen:
+                continue
+            seen.add(directory)
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            _, dot, ext = entry.name.rpartition('.')
+                            if not dot or ext.lower() not in ARCHIVE_EXTENSIONS:
+                                continue
+                            if not entry.is_file():
+                                continue
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        yield entry.path, stat.st_size, stat.st_mtime_ns
+            except OSError:
+                continue
+    
+    @metrics.timer('archive.update')
+    def update(self, progress=None):
+        """
+        Indexa os arquivos compactados novos ou alterados
+        
+        Arquivos cujo (caminho, tamanho, mtime_ns) não mudaram não são
+        abertos; os que sumiram saem do índice.
+        
+        Args:
+            progress: Função chamada com (processados, total) (opcional)
+        
+        Returns:
+            ArchiveResult com as estatísticas
+        """
+        started = time.perf_counter()
+        result = ArchiveResult()
+        
+        cached = {
+            path: (size, mtime_ns)
+            for path, size, mtime_ns in self.db.iter_rows(
+                "SELECT path, size, mtime_ns FROM archive_files", row_type='tuple'
+            )
+        }
+        
+        stale = {}
+        for path, size, mtime_ns in self._iter_archives():
+            result.archives += 1
+            if cached.pop(path, None) == (size, mtime_ns):
+                result.cached += 1
+            else:
+                stale[path] = (size, mtime_ns)
+        
+        resolved = self.config_manager.resolved()
+        prefixes = tuple(
+            os.path.join(str(resolved.path(key)), '')
+            for key in self.SEARCH_DIRECTORIES
+        )
+        missing = [(path,) for path in cached if path.startswith(prefixes)]
+        if missing:
+            with self.db.transaction() as conn:
+                conn.executemany("DELETE FROM archive_members WHERE path = ?", missing)
+                conn.executemany("DELETE FROM archive_files WHERE path = ?", missing)
+            result.removed = len(missing)
+        
+        self._index(stale, result, progress)
+        
+        result.duration = time.perf_counter() - started
+        return result
+    
+    def refresh(self, archives, progress=None):
+        """
+        Indexa, no pool de processos, os arquivos informados que são novos
+        ou mudaram
+        
+        Args:
+            archives: Dicionário path -> (size, mtime_ns)
+            progress: Função chamada com (processados, total) (opcional)
+        
+        Returns:
+            ArchiveResult com as estatísticas
+        """
+        started = time.perf_counter()
+        result = ArchiveResult()
+        result.archives = len(archives)
+        
+        cached = {}
+        paths = list(archives)
+        for start in range(0, len(paths), self.QUERY_CHUNK):
+            chunk = paths[start:start + self.QUERY_CHUNK]
+            cached.update(
+                (path, (size, mtime_ns))
+                for path, size, mtime_ns in self.db.iter_rows(
+                    f"""
+                    SELECT path, size, mtime_ns FROM archive_files
+                    WHERE path IN ({','.join('?' * len(chunk))})
+                    """,
+                    chunk,
+                    row_type='tuple'
+                )
+            )
+        
+        stale = {}
+        for path, stat in archives.items():
+            if cached.get(path) == stat:
+                result.cached += 1
+            else:
+                stale[path] = stat
+        self._index(stale, result, progress)
+        
+        result.duration = time.perf_counter() - started
+        return result
+    
+    def _index(self, stale, result, progress=None):
+        """Lê os arquivos de stale (path -> (size, mtime_ns)) no pool e grava em lotes"""
+        if not stale:
+            return
+        batch = []
+        done = 0
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=PROCESS_CONTEXT
+        ) as executor:
+            chunksize = max(1, min(16, len(stale) // (self.max_workers * 4)))
+            for path, fmt, members, error in executor.map(
+                scan_archive, stale, chunksize=chunksize
+            ):
+                done += 1
+                if error:
+                    result.errors.append((path, error))
+                else:
+                    size, mtime_ns = stale[path]
+                    batch.append((path, size, mtime_ns, fmt, members))
+                    result.indexed += 1
+                    result.members += len(members)
+                if len(batch) >= self.BATCH_SIZE:
+                    self._store(batch)
+                    batch = []
+                if progress:
+                    progress(done, len(stale))
+        self._store(batch)
+    
+    def members_of(self, paths):
+        """
+        Membros indexados de vários arquivos, sem abrir nenhum deles
+        
+        Args:
+            paths: Caminhos absolutos dos arquivos compactados
+        
+        Returns:
+            dict: path -> lista de ArchiveMember (só os arquivos indexados)
+        """
+        members = defaultdict(list)
+        paths = list(paths)
+        for start in range(0, len(paths), self.QUERY_CHUNK):
+            chunk = paths[start:start + self.QUERY_CHUNK]
+            for row in self.db.iter_rows(
+                f"""
+                SELECT path, member, size, compressed_size, crc32, sha1, kind
+                FROM archive_members WHERE path IN ({','.join('?' * len(chunk))})
+                ORDER BY path, id
+                """,
+                chunk,
+                row_type='dict'
+            ):
+                path = row.pop('path')
+                members[path].append(ArchiveMember(**row))
+        return dict(members)
+    
+    def find(self, sha1=None, crc32=None):
+        """
+        Procura membros pelo hash, sem abrir nenhum arquivo
+        
+        Args:
+            sha1: Hash SHA1 em hexadecimal
+            crc32: CRC32 em hexadecimal (usado se sha1 não for informado)
+        
+        Returns:
+            list: Registros com o arquivo, o membro e seus dados
+        """
+        column, value = ('sha1', sha1) if sha1 else ('crc32', crc32)
+        if not value:
+            return []
+        return self.db.fetch_all(
+            f"""
+            SELECT path, member, size, compressed_size, crc32, sha1, kind
+            FROM archive_members WHERE {column} = ?
+            ORDER BY path, id
+            """,
+            (value.lower(),)
+        )
+    
+    def matches(self):
+        """
+        Lista os membros cujo SHA1 consta na base de software
+        
+        Returns:
+            list: Registros com arquivo, membro, hashes e dados do software
+        """
+        return self.db.fetch_all("""
+            SELECT m.path, m.member, m.crc32, m.sha1, s.title, s.company,
+                   s.year, s.country, d.media, d.mapper, d.remark
+            FROM archive_members m
+            JOIN softwaredb_dumps d ON d.sha1 = m.sha1
+            JOIN softwaredb_software s ON s.id = d.software_id
+            ORDER BY m.path, m.member
+        """)
\ No newline at end of file
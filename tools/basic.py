@@ -0,0 +1,664 @@
+"""
+MSX-BASIC
+Conversão entre programas tokenizados (.bas salvos com SAVE) e texto ASCII,
+com tabelas de tokens pré-calculadas e conversão em lote de árvores inteiras
+"""
+import os
+import re
+import struct
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from decimal import ROUND_HALF_UP, Context, Decimal, InvalidOperation
+
+from core.tasks import PROCESS_CONTEXT
+
+
+# Primeiro byte de um programa tokenizado
+TOKENIZED_ID = 0xFF
+
+# Endereço da primeira linha na memória (os ponteiros de ligação são absolutos)
+PROGRAM_START = 0x8001
+
+# Fim de arquivo ASCII
+ASCII_EOF = 0x1A
+
+# Maior número de linha aceito pelo MSX-BASIC
+MAX_LINE_NUMBER = 65529
+
+# Extensões convertidas em lote
+BASIC_EXTENSIONS = frozenset({'.bas', '.asc'})
+
+# Tokens de um byte (0x81-0xFC)
+TOKENS = {
+    0x81: "END", 0x82: "FOR", 0x83: "NEXT", 0x84: "DATA", 0x85: "INPUT",
+    0x86: "DIM", 0x87: "READ", 0x88: "LET", 0x89: "GOTO", 0x8A: "RUN",
+    0x8B: "IF", 0x8C: "RESTORE", 0x8D: "GOSUB", 0x8E: "RETURN", 0x8F: "REM",
+    0x90: "STOP", 0x91: "PRINT", 0x92: "CLEAR", 0x93: "LIST", 0x94: "NEW",
+    0x95: "ON", 0x96: "WAIT", 0x97: "DEF", 0x98: "POKE", 0x99: "CONT",
+    0x9A: "CSAVE", 0x9B: "CLOAD", 0x9C: "OUT", 0x9D: "LPRINT", 0x9E: "LLIST",
+    0x9F: "CLS", 0xA0: "WIDTH", 0xA1: "ELSE", 0xA2: "TRON", 0xA3: "TROFF",
+    0xA4: "SWAP", 0xA5: "ERASE", 0xA6: "ERROR", 0xA7: "RESUME", 0xA8: "DELETE",
+    0xA9: "AUTO", 0xAA: "RENUM", 0xAB: "DEFSTR", 0xAC: "DEFINT", 0xAD: "DEFSNG",
+    0xAE: "DEFDBL", 0xAF: "LINE", 0xB0: "OPEN", 0xB1: "FIELD", 0xB2: "GET",
+    0xB3: "PUT", 0xB4: "CLOSE", 0xB5: "LOAD", 0xB6: "MERGE", 0xB7: "FILES",
+    0xB8: "LSET", 0xB9: "RSET", 0xBA: "SAVE", 0xBB: "LFILES", 0xBC: "CIRCLE",
+    0xBD: "COLOR", 0xBE: "DRAW", 0xBF: "PAINT", 0xC0: "BEEP", 0xC1: "PLAY",
+    0xC2: "PSET", 0xC3: "PRESET", 0xC4: "SOUND", 0xC5: "SCREEN", 0xC6: "VPOKE",
+    0xC7: "SPRITE", 0xC8: "VDP", 0xC9: "BASE", 0xCA: "CALL", 0xCB: "TIME",
+    0xCC: "KEY", 0xCD: "MAX", 0xCE: "MOTOR", 0xCF: "BLOAD", 0xD0: "BSAVE",
+    0xD1: "DSKO$", 0xD2: "SET", 0xD3: "NAME", 0xD4: "KILL", 0xD5: "IPL",
+    0xD6: "COPY", 0xD7: "CMD", 0xD8: "LOCATE", 0xD9: "TO", 0xDA: "THEN",
+    0xDB: "TAB(", 0xDC: "STEP", 0xDD: "USR", 0xDE: "FN", 0xDF: "SPC(",
+    0xE0: "NOT", 0xE1: "ERL", 0xE2: "ERR", 0xE3: "STRING$", 0xE4: "USING",
+    0xE5: "INSTR", 0xE6: "'", 0xE7: "VARPTR", 0xE8: "CSRLIN", 0xE9: "ATTR$",
+    0xEA: "DSKI$", 0xEB: "OFF", 0xEC: "INKEY$", 0xED: "POINT", 0xEE: ">",
+    0xEF: "=", 0xF0: "<", 0xF1: "+", 0xF2: "-", 0xF3: "*", 0xF4: "/",
+    0xF5: "^", 0xF6: "AND", 0xF7: "OR", 0xF8: "XOR", 0xF9: "EQV", 0xFA: "IMP",
+    0xFB: "MOD", 0xFC: "\\"
+}
+
+# Tokens estendidos (funções), precedidos de 0xFF
+FUNCTIONS = {
+    0x81: "LEFT$", 0x82: "RIGHT$", 0x83: "MID$", 0x84: "SGN", 0x85: "INT",
+    0x86: "ABS", 0x87: "SQR", 0x88: "RND", 0x89: "SIN", 0x8A: "LOG",
+    0x8B: "EXP", 0x8C: "COS", 0x8D: "TAN", 0x8E: "ATN", 0x8F: "FRE",
+    0x90: "INP", 0x91: "POS", 0x92: "LEN", 0x93: "STR$", 0x94: "VAL",
+    0x95: "ASC", 0x96: "CHR$", 0x97: "PEEK", 0x98: "VPEEK", 0x99: "SPACE$",
+    0x9A: "OCT$", 0x9B: "HEX$", 0x9C: "LPOS", 0x9D: "BIN$", 0x9E: "CINT",
+    0x9F: "CSNG", 0xA0: "CDBL", 0xA1: "FIX", 0xA2: "STICK", 0xA3: "STRIG",
+    0xA4: "PDL", 0xA5: "PAD", 0xA6: "DSKF", 0xA7: "FPOS", 0xA8: "CVI",
+    0xA9: "CVS", 0xAA: "CVD", 0xAB: "EOF", 0xAC: "LOC", 0xAD: "LOF",
+    0xAE: "MKI$", 0xAF: "MKS$", 0xB0: "MKD$"
+}
+
+# Prefixos de constantes numéricas
+OCTAL = 0x0B
+HEXADECIMAL = 0x0C
+LINE_POINTER = 0x0D
+LINE_NUMBER = 0x0E
+BYTE_INTEGER = 0x0F
+SMALL_INTEGER = 0x11  # 0x11-0x1A: 0 a 9
+WORD_INTEGER = 0x1C
+SINGLE = 0x1D
+DOUBLE = 0x1F
+
+# Dígitos significativos dos reais (BCD)
+SINGLE_DIGITS = 6
+DOUBLE_DIGITS = 14
+
+# Comandos cujos números seguintes são números de linha
+LINE_NUMBER_TOKENS = frozenset({
+    0x89, 0x8A, 0x8C, 0x8D, 0x93, 0x9E, 0xA1, 0xA7, 0xA8, 0xDA
+})
+
+REM = 0x8F
+DATA = 0x84
+CALL = 0xCA
+ELSE = 0xA1
+APOSTROPHE = 0xE6
+
+# Codificações especiais: ELSE e ' são gravados precedidos de ':'
+_SPECIAL = {"ELSE": b":\xa1", "'": b":\x8f\xe6", "?": b"\x91"}
+
+# Número no texto: inteiro/real com expoente E/D e sufixo de tipo opcionais
+_NUMBER = re.compile(r"(?:\d+\.?\d*|\.\d+)(?:([EeDd])([+-]?\d+))?([%!#])?")
+_HEX_DIGITS = re.compile(r"[0-9A-Fa-f]*")
+_OCTAL_DIGITS = re.compile(r"[0-7]*")
+_BINARY_DIGITS = re.compile(r"[01]*")
+_CALL_NAME = re.compile(r"[ A-Za-z0-9]*")
+_LINE = re.compile(r"\s*(\d+) ?")
+
+
+class BasicError(Exception):
+    """Programa inválido ou impossível de converter"""
+
+
+def _build_trie():
+    """Monta a trie de palavras-chave usada pelo tokenizador"""
+    keywords = {name: bytes([code]) for code, name in TOKENS.items()}
+    keywords.update({name: bytes([TOKENIZED_ID, code]) for code, name in FUNCTIONS.items()})
+    keywords.update(_SPECIAL)
+    
+    trie = {}
+    for name, encoded in keywords.items():
+        node = trie
+        for char in name:
+            node = node.setdefault(char, {})
+        node[None] = encoded
+    return trie
+
+
+def _build_detokens():
+    """Tabelas de 256 posições byte -> texto usadas pelo destokenizador"""
+    main = [None] * 256
+    for code, name in TOKENS.items():
+        main[code] = name
+    extended = [None] * 256
+    for code, name in FUNCTIONS.items():
+        extended[code] = name
+    return main, extended
+
+
+_TRIE = _build_trie()
+_DETOKENS, _DETOKENS_EXTENDED = _build_detokens()
+
+
+def is_tokenized(data):
+    """Indica se o conteúdo é um programa tokenizado"""
+    return data[:1] == bytes([TOKENIZED_ID])
+
+
+def _format_real(raw, digits):
+    """
+    Formata um real BCD do MSX como o LIST faria
+    
+    O sufixo de tipo só é escrito quando o texto seria lido de volta como
+    outro tipo (reais sem sufixo são de precisão dupla no MSX-BASIC).
+    """
+    exponent = raw[0] & 0x7F
+    sign = "-" if raw[0] & 0x80 else ""
+    mantissa = raw[1:].hex().rstrip("0")
+    single = digits == SINGLE_DIGITS
+    if exponent == 0 or not mantissa:
+        return "0!" if single else "0#"
+    if not mantissa.isdigit():
+        raise BasicError(f"Constante real inválida: {raw.hex()}")
+    
+    point = exponent - 0x40
+    if 0 < point <= digits:
+        text = mantissa[:point].ljust(point, "0")
+        if len(mantissa) > point:
+            text += "." + mantissa[point:]
+    elif point <= 0 and len(mantissa) - point <= digits:
+        text = "." + "0" * -point + mantissa
+    else:
+        text = mantissa[0] + ("." + mantissa[1:] if len(mantissa) > 1 else "")
+        return f"{sign}{text}{'E' if single else 'D'}{point - 1:+03d}"
+    
+    if single:
+        return sign + text + "!"
+    if "." not in text and int(text) <= 32767:
+        return sign + text + "#"
+    return sign + text
+
+
+def _detokenize_line(data, start, pointers, out):
+    """
+    Converte o corpo tokenizado de uma linha em texto
+    
+    Constantes numéricas podem conter bytes zero, então o fim da linha só é
+    conhecido lendo os tokens em sequência.
+    
+    Args:
+        data: Conteúdo do programa
+        start: Posição do primeiro byte do corpo da linha
+        pointers: Posições em out de ponteiros de linha (0x0D) a resolver
+        out: Lista de partes de texto da linha (recebe as novas partes)
+    
+    Returns:
+        int: Posição do terminador 0x00
+    """
+    i = start
+    size = len(data)
+    verbatim = False  # dentro de REM ou '
+    in_data = False  # dentro de DATA (até ':' fora de aspas)
+    quoted = False
+    while i < size:
+        byte = data[i]
+        i += 1
+        
+        if byte == 0:
+            return i - 1
+        if verbatim:
+            out.append(chr(byte))
+            continue
+        if byte == 0x22:
+            quoted = not quoted
+            out.append('"')
+            continue
+        if quoted:
+            out.append(chr(byte))
+            continue
+        if in_data:
+            if byte == 0x3A:
+                in_data = False
+            out.append(chr(byte))
+            continue
+        
+        if byte == 0x3A:
+            if data[i:i + 2] == b"\x8f\xe6":
+                out.append("'")
+                i += 2
+                verbatim = True
+            elif data[i:i + 1] == b"\xa1":
+                out.append("ELSE")
+                i += 1
+            else:
+                out.append(":")
+        elif byte >= 0x80:
+            if byte == TOKENIZED_ID:
+                name = _DETOKENS_EXTENDED[data[i]] if i < size else None
+                if name is None:
+                    raise BasicError(f"Token estendido inválido na posição {i}")
+                out.append(name)
+                i += 1
+                continue
+            name = _DETOKENS[byte]
+            if name is None:
+                raise BasicError(f"Token inválido: {byte:02X}")
+            out.append(name)
+            if byte == REM or byte == APOSTROPHE:
+                verbatim = True
+            elif byte == DATA:
+                in_data = True
+        elif SMALL_INTEGER <= byte < SMALL_INTEGER + 10:
+            out.append(str(byte - SMALL_INTEGER))
+        elif byte == BYTE_INTEGER:
+            if i >= size:
+                raise BasicError("Constante numérica truncada")
+            out.append(str(data[i]))
+            i += 1
+        elif byte in (WORD_INTEGER, LINE_NUMBER, HEXADECIMAL, OCTAL, LINE_POINTER):
+            if i + 2 > size:
+                raise BasicError("Constante numérica truncada")
+            value = data[i] | data[i + 1] << 8
+            i += 2
+            if byte == WORD_INTEGER:
+                out.append(str(value - 0x10000 if value & 0x8000 else value))
+            elif byte == LINE_NUMBER:
+                out.append(str(value))
+            elif byte == HEXADECIMAL:
+                out.append(f"&H{value:X}")
+            elif byte == OCTAL:
+                out.append(f"&O{value:o}")
+            else:
+                pointers.append(len(out))
+                out.append(value)
+        elif byte == SINGLE or byte == DOUBLE:
+            length = 4 if byte == SINGLE else 8
+            if i + length > size:
+                raise BasicError("Constante real truncada")
+            digits = SINGLE_DIGITS if byte == SINGLE else DOUBLE_DIGITS
+            out.append(_format_real(data[i:i + length], digits))
+            i += length
+        else:
+            out.append(chr(byte))
+    raise BasicError("Linha sem terminador")
+
+
+def detokenize(data):
+    """
+    Converte um programa tokenizado em texto ASCII
+    
+    As linhas são lidas em sequência (os ponteiros de ligação só marcam o
+    fim do programa); os ponteiros de linha (0x0D) são resolvidos pelos
+    endereços calculados.
+    
+    Args:
+        data: Conteúdo do arquivo tokenizado (começando por 0xFF)
+    
+    Returns:
+        list: Linhas de texto, sem terminadores
+    
+    Raises:
+        BasicError: Se o programa estiver corrompido
+    """
+    if not is_tokenized(data):
+        raise BasicError("Não é um programa tokenizado")
+    
+    lines = []
+    addresses = {}
+    pointers = []
+    offset = 1
+    size = len(data)
+    while offset + 2 <= size:
+        link, = struct.unpack_from("<H", data, offset)
+        if link == 0:
+            break
+        if offset + 4 > size:
+            raise BasicError("Linha truncada")
+        number, = struct.unpack_from("<H", data, offset + 2)
+        addresses[PROGRAM_START - 1 + offset] = number
+        
+        parts = [f"{number} "]
+        line_pointers = []
+        end = _detokenize_line(data, offset + 4, line_pointers, parts)
+        pointers.extend((len(lines), index) for index in line_pointers)
+        lines.append(parts)
+        offset = end + 1
+    
+    for line, index in pointers:
+        address = lines[line][index]
+        # O ponteiro aponta para o byte anterior à linha
+        number = addresses.get(address + 1, addresses.get(address))
+        if number is None:
+            raise BasicError(f"Ponteiro de linha inválido: {address:04X}")
+        lines[line][index] = str(number)
+    
+    return ["".join(parts) for parts in lines]
+
+
+def _encode_real(mantissa, exponent, digits):
+    """Codifica um real em BCD com a precisão pedida"""
+    try:
+        value = Decimal(f"{mantissa}E{exponent or 0}")
+    except InvalidOperation:
+        raise BasicError(f"Constante inválida: {mantissa}")
+    value = Context(prec=digits, rounding=ROUND_HALF_UP).plus(value)
+    if not value:
+        return bytes(1 + digits // 2)
+    
+    _, figures, power = value.as_tuple()
+    point = len(figures) + power
+    if not 0 < point + 0x40 < 0x80:
+        raise BasicError(f"Overflow: {mantissa}E{exponent}")
+    bcd = "".join(map(str, figures)).ljust(digits, "0")
+    return bytes([0x40 + point]) + bytes.fromhex(bcd)
+
+
+def _encode_number(match, line_number):
+    """Codifica uma constante numérica casada por _NUMBER"""
+    text = match.group(0)
+    marker, exponent, suffix = match.groups()
+    mantissa = text[:match.start(1) - match.start(0)] if marker else text.rstrip("%!#")
+    
+    if suffix == "%" or (not suffix and not marker and "." not in mantissa):
+        value = int(mantissa)
+        if line_number and not suffix:
+            if value > MAX_LINE_NUMBER:
+                raise BasicError(f"Número de linha inválido: {value}")
+            return struct.pack("<BH", LINE_NUMBER, value)
+        if value <= 32767:
+            if value < 10:
+                return bytes([SMALL_INTEGER + value])
+            if value < 256:
+                return bytes([BYTE_INTEGER, value])
+            return struct.pack("<BH", WORD_INTEGER, value)
+        if suffix == "%":
+            raise BasicError(f"Overflow: {text}")
+    
+    if suffix == "!" or (marker and marker in "Ee" and suffix != "#"):
+        return bytes([SINGLE]) + _encode_real(mantissa, exponent, SINGLE_DIGITS)
+    return bytes([DOUBLE]) + _encode_real(mantissa, exponent, DOUBLE_DIGITS)
+
+
+def _match_keyword(text, start):
+    """Palavra-chave mais longa que começa na posição (ou None)"""
+    node = _TRIE
+    found = None
+    i = start
+    size = len(text)
+    while i < size:
+        node = node.get(text[i].upper())
+        if node is None:
+            break
+        i += 1
+        if None in node:
+            found = (node[None], i)
+    return found
+
+
+def tokenize_line(text):
+    """
+    Tokeniza uma linha de programa
+    
+    Args:
+        text: Linha com número (ex.: '10 PRINT "OI"')
+    
+    Returns:
+        tuple: (número da linha, corpo tokenizado sem terminador)
+    
+    Raises:
+        BasicError: Se a linha não tiver número ou tiver constantes inválidas
+    """
+    match = _LINE.match(text)
+    if not match:
+        raise BasicError(f"Linha sem número: {text[:40]!r}")
+    number = int(match.group(1))
+    if number > MAX_LINE_NUMBER:
+        raise BasicError(f"Número de linha inválido: {number}")
+    
+    out = bytearray()
+    i = match.end()
+    size = len(text)
+    line_number = False  # após GOTO, THEN etc.
+    identifier = False  # dentro de um nome de variável
+    while i < size:
+        char = text[i]
+        
+        if char == '"':
+            end = text.find('"', i + 1)
+            end = size if end < 0 else end + 1
+            out += text[i:end].encode("latin-1")
+            i = end
+            line_number = identifier = False
+            continue
+        
+        if identifier and char.isdigit():
+            out.append(ord(char))
+            i += 1
+            continue
+        
+        keyword = _match_keyword(text, i)
+        if keyword is not None:
+            encoded, i = keyword
+            out += encoded
+            token = encoded[-1]
+            identifier = False
+            line_number = len(encoded) == 1 or encoded[0] == 0x3A
+            line_number = line_number and token in LINE_NUMBER_TOKENS
+            # Só o REM de um byte (FRE é FF 8F) e a forma especial de '
+            if (token == REM and len(encoded) == 1) or encoded == _SPECIAL["'"]:
+                out += text[i:].encode("latin-1")
+                break
+            if token == DATA and len(encoded) == 1:
+                end = i
+                quoted = False
+                while end < size and (quoted or text[end] != ":"):
+                    quoted ^= text[end] == '"'
+                    end += 1
+                out += text[i:end].encode("latin-1")
+                i = end
+            elif token == CALL and len(encoded) == 1:
+                end = _CALL_NAME.match(text, i).end()
+                out += text[i:end].upper().encode("latin-1")
+                i = end
+            continue
+        
+        if char.isdigit() or (char == "." and text[i + 1:i + 2].isdigit()):
+            number_match = _NUMBER.match(text, i)
+            out += _encode_number(number_match, line_number)
+            i = number_match.end()
+            identifier = False
+            continue
+        
+        if char == "&" and i + 1 < size and text[i + 1].upper() in "HOB":
+            base = text[i + 1].upper()
+            pattern = {"H": _HEX_DIGITS, "O": _OCTAL_DIGITS, "B": _BINARY_DIGITS}[base]
+            end = pattern.match(text, i + 2).end()
+            digits = text[i + 2:end]
+            if base == "B":
+                out += ("&B" + digits).encode("latin-1")
+            else:
+                value = int(digits or "0", 16 if base == "H" else 8)
+                if value > 0xFFFF:
+                    raise BasicError(f"Overflow: {text[i:end]}")
+                out += struct.pack("<BH", HEXADECIMAL if base == "H" else OCTAL, value)
+            i = end
+            identifier = line_number = False
+            continue
+        
+        if char == "_":
+            end = _CALL_NAME.match(text, i + 1).end()
+            out += text[i:end].upper().encode("latin-1")
+            i = end
+            continue
+        
+        identifier = char.isalpha()
+        if char == ":" or not (char == "," or char == " "):
+            line_number = False
+        out += (char.upper() if identifier else char).encode("latin-1")
+        i += 1
+    
+    return number, bytes(out)
+
+
+def tokenize(text):
+    """
+    Converte um programa em texto ASCII para o formato tokenizado
+    
+    Linhas em branco e o marcador de fim de arquivo (0x1A) são ignorados.
+    As linhas são gravadas na ordem do texto, com os ponteiros de ligação
+    calculados a partir de PROGRAM_START.
+    
+    Args:
+        text: Programa em texto (str ou linhas)
+    
+    Returns:
+        bytes: Conteúdo do arquivo tokenizado
+    
+    Raises:
+        BasicError: Se alguma linha for inválida
+    """
+    if isinstance(text, str):
+        text = text.split(chr(ASCII_EOF), 1)[0].splitlines()
+    
+    out = bytearray([TOKENIZED_ID])
+    address = PROGRAM_START
+    for line in text:
+        if not line.strip():
+            continue
+        number, body = tokenize_line(line.rstrip("\r\n"))
+        address += 5 + len(body)
+        if address > 0xFFFF:
+            raise BasicError("Programa grande demais para a memória do MSX")
+        out += struct.pack("<HH", address, number)
+        out += body
+        out.append(0)
+    out += b"\x00\x00"
+    return bytes(out)
+
+
+def read_text(path):
+    """Lê um programa ASCII (latin-1 preserva caracteres gráficos do MSX)"""
+    with open(path, "rb") as f:
+        return f.read().decode("latin-1")
+
+
+def write_text(path, lines):
+    """Grava um programa ASCII como o SAVE"...",A do MSX (CRLF + 0x1A)"""
+    with open(path, "wb") as f:
+        f.write(("\r\n".join(lines) + "\r\n").encode("latin-1"))
+        f.write(bytes([ASCII_EOF]))
+
+
+def convert_file(source, destination, target="ascii"):
+    """
+    Converte um programa entre tokenizado e ASCII (executa num processo)
+    
+    Args:
+        source: Programa de origem
+        destination: Arquivo de saída
+        target: 'ascii' ou 'tokenized'
+    
+    Returns:
+        tuple: (origem, destino ou None se já estava no formato, erro ou None)
+    """
+    try:
+        with open(source, "rb") as f:
+            data = f.read()
+        if is_tokenized(data) == (target == "tokenized"):
+            return source, None, None
+        
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+        tmp_path = destination + ".tmp"
+        if target == "ascii":
+            write_text(tmp_path, detokenize(data))
+        else:
+            tokenized = tokenize(data.decode("latin-1"))
+            with open(tmp_path, "wb") as f:
+                f.write(tokenized)
+        os.replace(tmp_path, destination)
+        return source, destination, None
+    except (OSError, BasicError) as e:
+        return source, destination, str(e)
+
+
+def _convert_batch(jobs, target):
+    """Converte um lote de (origem, destino) num processo do pool"""
+    return [convert_file(source, destination, target) for source, destination in jobs]
+
+
+def _walk(root):
+    """Percorre a árvore sob root retornando os programas BASIC (sem recursão)"""
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in BASIC_EXTENSIONS:
+                        yield entry.path
+        except OSError:
+            continue
+
+
+def convert_tree(config_manager, target="ascii", root=None, dest_dir=None,
+                 max_workers=None, batch_size=32):
+    """
+    Converte todos os programas BASIC de uma árvore usando todos os núcleos
+    
+    A varredura e a conversão acontecem ao mesmo tempo: os arquivos são
+    enviados ao pool em lotes conforme aparecem, com um número limitado de
+    lotes em andamento, e os resultados são entregues assim que ficam prontos.
+    
+    Args:
+        config_manager: Instância do ConfigManager
+        target: 'ascii' ou 'tokenized'
+        root: Árvore de origem (padrão: root_directory)
+        dest_dir: Destino (padrão: work_directory/basic), espelhando a árvore
+        max_workers: Processos usados (padrão: número de CPUs)
+        batch_size: Arquivos por lote enviado a um processo
+    
+    Yields:
+        tuple: (origem, destino ou None, erro ou None), na ordem de conclusão
+    """
+    if target not in ("ascii", "tokenized"):
+        raise BasicError(f"Formato desconhecido: {target}")
+    
+    resolved = config_manager.resolved()
+    root = os.path.abspath(root or resolved.root_directory)
+    dest_dir = os.path.abspath(dest_dir or resolved.work_directory / "basic")
+    extension = ".asc" if target == "ascii" else ".bas"
+    workers = max_workers or os.cpu_count() or 1
+    
+    def destination(path):
+        relative = os.path.relpath(path, root)
+        return os.path.join(dest_dir, os.path.splitext(relative)[0] + extension)
+    
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=PROCESS_CONTEXT
+    ) as executor:
+        in_flight = set()
+        batch = []
+        for path in _walk(root):
+            # Não reconverte a própria saída quando ela fica dentro da árvore
+            if os.path.commonpath([path, dest_dir]) == dest_dir:
+                continue
+            batch.append((path, destination(path)))
+            if len(batch) < batch_size:
+                continue
+            in_flight.add(executor.submit(_convert_batch, batch, target))
+            batch = []
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        
+        if batch:
+            in_flight.add(executor.submit(_convert_batch, batch, target))
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
\ No newline at end of file
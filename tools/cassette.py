@@ -0,0 +1,646 @@
+"""
+Fitas Cassete
+Conversão entre gravações WAV e contêineres .cas, com processamento vetorizado
+"""
+import os
+import wave
+
+import numpy as np
+
+
+# Cabeçalho de bloco dos arquivos .cas (sempre alinhado em 8 bytes)
+CAS_HEADER = b"\x1f\xa6\xde\xba\xcc\x13\x7d\x74"
+
+# Byte repetido 10 vezes no início do bloco de cabeçalho de arquivo
+FILE_TYPES = {0xD0: 'binary', 0xD3: 'basic', 0xEA: 'ascii'}
+
+# Fim de arquivo ASCII
+ASCII_EOF = 0x1A
+
+# Ciclos de tom piloto a 1200 baud (o dobro a 2400 baud)
+LONG_HEADER_CYCLES = 16000
+SHORT_HEADER_CYCLES = 4000
+
+
+class CassetteError(Exception):
+    """Fita inválida ou impossível de decodificar"""
+
+
+class CassetteFile:
+    """Um arquivo gravado numa fita .cas"""
+    
+    def __init__(self, position, name, type, offset, size, blocks):
+        """
+        Args:
+            position: Ordem do arquivo na fita (a partir de 0)
+            name: Nome do arquivo (até 6 caracteres)
+            type: 'binary', 'basic', 'ascii' ou 'custom'
+            offset: Posição do primeiro bloco no .cas
+            size: Tamanho dos dados em bytes
+            blocks: Quantidade de blocos ocupados
+        """
+        self.position = position
+        self.name = name
+        self.type = type
+        self.offset = offset
+        self.size = size
+        self.blocks = blocks
+    
+    def __repr__(self):
+        return f"CassetteFile({self.name!r}, {self.type}, size={self.size})"
+
+
+def split_blocks(data):
+    """
+    Localiza os blocos de um .cas
+    
+    Args:
+        data: Conteúdo do arquivo .cas
+    
+    Returns:
+        list: Tuplas (início dos dados, tamanho) de cada bloco
+    """
+    starts = []
+    pos = data.find(CAS_HEADER)
+    while pos != -1:
+        if pos % 8 == 0:
+            starts.append(pos)
+        pos = data.find(CAS_HEADER, pos + 1)
+    
+    blocks = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(data)
+        blocks.append((start + len(CAS_HEADER), end - start - len(CAS_HEADER)))
+    return blocks
+
+
+def _file_type(block):
+    """Tipo de arquivo se o bloco for um cabeçalho de arquivo, senão None"""
+    if len(block) < 16 or block[0] not in FILE_TYPES:
+        return None
+    if block[:10] != bytes([block[0]]) * 10:
+        return None
+    return FILE_TYPES[block[0]]
+
+
+def list_files(data):
+    """
+    Lista os arquivos contidos num .cas
+    
+    Args:
+        data: Conteúdo do arquivo .cas
+    
+    Returns:
+        list: CassetteFile de cada arquivo
+    """
+    blocks = split_blocks(data)
+    files = []
+    i = 0
+    
+    while i < len(blocks):
+        offset, length = blocks[i]
+        block = data[offset:offset + length]
+        file_type = _file_type(block)
+        
+        if file_type is None:
+            files.append(CassetteFile(len(files), "", 'custom', offset, length, 1))
+            i += 1
+            continue
+        
+        name = block[10:16].decode('latin-1').rstrip()
+        used = 1
+        size = 0
+        
+        if file_type == 'ascii':
+            for data_offset, data_length in blocks[i + 1:]:
+                used += 1
+                chunk = data[data_offset:data_offset + data_length]
+                eof = chunk.find(bytes([ASCII_EOF]))
+                if eof != -1:
+                    size += eof
+                    break
+                size += data_length
+        elif i + 1 < len(blocks):
+            data_offset, data_length = blocks[i + 1]
+            used += 1
+            size = data_length
+            if file_type == 'binary' and data_length >= 6:
+                start, end = np.frombuffer(data, '<u2', 2, data_offset)
+                if end >= start:
+                    size = int(end) - int(start) + 1
+        
+        files.append(CassetteFile(len(files), name, file_type, offset, size, used))
+        i += used
+    
+    return files
+
+
+def write_cas(blocks, path):
+    """
+    Grava blocos num arquivo .cas
+    
+    Args:
+        blocks: Iterável com o conteúdo de cada bloco
+        path: Arquivo de saída
+    
+    Returns:
+        int: Quantidade de blocos gravados
+    """
+    count = 0
+    position = 0
+    with open(path, "wb") as f:
+        for block in blocks:
+            padding = (-position) % 8
+            f.write(b"\x00" * padding)
+            f.write(CAS_HEADER)
+            f.write(block)
+            position += padding + len(CAS_HEADER) + len(block)
+            count += 1
+    return count
+
+
+class CassetteIndex:
+    """Índice em SQLite dos arquivos de cada fita .cas"""
+    
+    def __init__(self, db_manager):
+        """
+        Args:
+            db_manager: Instância do DatabaseManager
+        """
+        self.db = db_manager
+    
+    def list(self, path):
+        """
+        Lista os arquivos de uma fita, usando o índice se ela não mudou
+        
+        Args:
+            path: Caminho do arquivo .cas
+        
+        Returns:
+            list: CassetteFile de cada arquivo
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        
+        cached = self.db.fetch_one(
+            "SELECT size, mtime_ns FROM cassette_images WHERE path = ?",
+            (path,)
+        )
+        if cached and (cached['size'], cached['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            rows = self.db.fetch_all(
+                """
+                SELECT position, name, type, offset, size, blocks
+                FROM cassette_files WHERE path = ? ORDER BY position
+                """,
+                (path,)
+            )
+            return [CassetteFile(**row) for row in rows]
+        
+        with open(path, "rb") as f:
+            files = list_files(f.read())
+        
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM cassette_files WHERE path = ?", (path,))
+            conn.execute(
+                """
+                INSERT INTO cassette_images (path, size, mtime_ns) VALUES (?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime_ns = excluded.mtime_ns,
+                    indexed_at = CURRENT_TIMESTAMP
+                """,
+                (path, stat.st_size, stat.st_mtime_ns)
+            )
+            conn.executemany(
+                """
+                INSERT INTO cassette_files (
+                    path, position, name, type, offset, size, blocks
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (path, f.position, f.name, f.type, f.offset, f.size, f.blocks)
+                    for f in files
+                ]
+            )
+        return files
+
+
+class WavDecoder:
+    """Decodifica gravações de fita (FSK 1200/2400 baud) em blocos .cas"""
+    
+    # Amostras lidas do WAV por vez
+    CHUNK_FRAMES = 1 << 20
+    
+    # Ciclos estáveis consecutivos para reconhecer um tom piloto
+    MIN_HEADER_CYCLES = 256
+    
+    # Faixa de frequências aceitas para o tom piloto (Hz)
+    HEADER_FREQUENCIES = (1500.0, 6000.0)
+    
+    # Limite de ciclos guardados sem encontrar um novo tom piloto
+    MAX_SEGMENT_CYCLES = 1 << 22
+    
+    def __init__(self, chunk_frames=None):
+        """
+        Args:
+            chunk_frames: Amostras processadas por vez (opcional)
+        """
+        self.chunk_frames = chunk_frames or self.CHUNK_FRAMES
+        self.sample_rate = None
+    
+    def _read_chunks(self, wav_path):
+        """
+        Lê o WAV em trechos, convertendo para mono float32
+        
+        Yields:
+            np.ndarray com as amostras do primeiro canal
+        """
+        with wave.open(str(wav_path), "rb") as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            self.sample_rate = wav.getframerate()
+            
+            while True:
+                raw = wav.readframes(self.chunk_frames)
+                if not raw:
+                    break
+                if width == 1:
+                    samples = np.frombuffer(raw, np.uint8).astype(np.float32) - 128.0
+                elif width == 2:
+                    samples = np.frombuffer(raw, '<i2').astype(np.float32)
+                elif width == 3:
+                    triplets = np.frombuffer(raw, np.uint8).reshape(-1, 3).astype(np.int32)
+                    samples = (
+                        triplets[:, 0] | (triplets[:, 1] << 8) | (triplets[:, 2] << 16)
+                    )
+                    samples = np.where(samples >= 1 << 23, samples - (1 << 24), samples)
+                    samples = samples.astype(np.float32)
+                elif width == 4:
+                    samples = np.frombuffer(raw, '<i4').astype(np.float32)
+                else:
+                    raise CassetteError(f"Formato de amostra não suportado: {width} bytes")
+                yield samples[::channels] if channels > 1 else samples
+    
+    def _periods(self, chunks):
+        """
+        Converte as amostras em durações de ciclo (entre cruzamentos ascendentes)
+        
+        O nível DC é removido com uma média móvel causal, que continua de um
+        trecho para o outro.
+        
+        Yields:
+            np.ndarray float64 com as durações em amostras
+        """
+        window = None
+        tail = None
+        previous = None
+        last_crossing = None
+        offset = 0
+        
+        for samples in chunks:
+            if window is None:
+                window = max(2, int(self.sample_rate * 0.002))
+                tail = np.full(window, samples[0] if len(samples) else 0.0)
+            
+            buffer = np.concatenate((tail, samples)).astype(np.float64)
+            sums = np.cumsum(buffer)
+            average = (sums[window:] - sums[:-window]) / window
+            level = samples - average
+            tail = buffer[-window:]
+            
+            if previous is not None:
+                level = np.concatenate(([previous], level))
+                base = offset - 1
+            else:
+                base = offset
+            previous = level[-1]
+            
+            index = np.flatnonzero((level[:-1] < 0) & (level[1:] >= 0))
+            before = level[index]
+            after = level[index + 1]
+            crossings = base + index + (-before / (after - before))
+            
+            if last_crossing is not None:
+                crossings = np.concatenate(([last_crossing], crossings))
+            if len(crossings):
+                last_crossing = crossings[-1]
+            offset += len(samples)
+            
+            if len(crossings) > 1:
+                yield np.diff(crossings)
+    
+    def _find_headers(self, periods):
+        """
+        Encontra sequências longas de ciclos estáveis (tons piloto)
+        
+        Returns:
+            list: Tuplas (início, fim) em índices de ciclo
+        """
+        if len(periods) < self.MIN_HEADER_CYCLES:
+            return []
+        
+        low = self.sample_rate / self.HEADER_FREQUENCIES[1]
+        high = self.sample_rate / self.HEADER_FREQUENCIES[0]
+        ratio = periods[1:] / periods[:-1]
+        stable = (ratio > 0.75) & (ratio < 1.33) & (periods[:-1] >= low) & (periods[:-1] <= high)
+        
+        edges = np.diff(np.concatenate(([0], stable.view(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        
+        headers = []
+        for start, end in zip(starts, ends):
+            # Os pares estáveis [start, end) cobrem os ciclos [start, end + 1)
+            if end + 1 - start >= self.MIN_HEADER_CYCLES:
+                headers.append((int(start), int(end) + 1))
+        return headers
+    
+    @staticmethod
+    def _cycles_to_bits(classes):
+        """
+        Converte ciclos longos (0) e curtos (1) em bits
+        
+        Um bit 0 é um ciclo longo; um bit 1 são dois ciclos curtos.
+        
+        Returns:
+            np.ndarray uint8 com os bits
+        """
+        if not len(classes):
+            return np.empty(0, np.uint8)
+        change = np.flatnonzero(classes[1:] != classes[:-1]) + 1
+        starts = np.concatenate(([0], change))
+        lengths = np.diff(np.concatenate((starts, [len(classes)])))
+        values = classes[starts]
+        counts = np.where(values == 0, lengths, lengths // 2)
+        return np.repeat(values, counts).astype(np.uint8)
+    
+    @staticmethod
+    def _frame_bytes(bits):
+        """
+        Extrai bytes de quadros seriais (1 bit de início, 8 de dados, 2 de parada)
+        
+        Quadros consecutivos são decodificados de uma vez; em caso de erro de
+        enquadramento, a busca recomeça no próximo bit de início.
+        
+        Returns:
+            bytes decodificados
+        """
+        output = bytearray()
+        zeros = np.flatnonzero(bits == 0)
+        position = 0
+        
+        while True:
+            k = np.searchsorted(zeros, position)
+            if k == len(zeros):
+                break
+            start = zeros[k]
+            available = (len(bits) - start) // 11
+            if available == 0:
+                break
+            
+            frames = bits[start:start + available * 11].reshape(available, 11)
+            valid = (frames[:, 0] == 0) & (frames[:, 9] == 1) & (frames[:, 10] == 1)
+            invalid = np.flatnonzero(~valid)
+            good = int(invalid[0]) if len(invalid) else available
+            
+            if good:
+                output += np.packbits(frames[:good, 1:9], axis=1, bitorder='little').tobytes()
+            if good == available:
+                break
+            position = start + max(good * 11, 1)
+        
+        return bytes(output)
+    
+    def _decode_segment(self, periods, header_end):
+        """
+        Decodifica um bloco: tom piloto seguido dos dados
+        
+        Args:
+            periods: Durações dos ciclos a partir do início do tom piloto
+            header_end: Índice do primeiro ciclo após o tom piloto
+        
+        Returns:
+            bytes do bloco
+        """
+        short = float(np.median(periods[:header_end]))
+        ratio = periods[header_end:] / short
+        
+        classes = np.full(len(ratio), 2, np.int8)
+        classes[(ratio >= 0.5) & (ratio < 1.5)] = 1
+        classes[(ratio >= 1.5) & (ratio < 2.6)] = 0
+        
+        gaps = np.flatnonzero(classes == 2)
+        if len(gaps):
+            classes = classes[:gaps[0]]
+        first_start_bit = np.flatnonzero(classes == 0)
+        if not len(first_start_bit):
+            return b""
+        classes = classes[first_start_bit[0]:]
+        
+        return self._frame_bytes(self._cycles_to_bits(classes))
+    
+    def iter_blocks(self, wav_path):
+        """
+        Decodifica uma gravação em blocos, com memória limitada
+        
+        Args:
+            wav_path: Caminho do arquivo WAV
+        
+        Yields:
+            bytes de cada bloco encontrado
+        """
+        pending = np.empty(0, np.float64)
+        
+        for periods in self._periods(self._read_chunks(wav_path)):
+            pending = np.concatenate((pending, periods))
+            headers = self._find_headers(pending)
+            
+            while len(headers) >= 2:
+                (start, end), (next_start, _) = headers[0], headers[1]
+                block = self._decode_segment(pending[start:next_start], end - start)
+                if block:
+                    yield block
+                pending = pending[next_start:]
+                headers = [(s - next_start, e - next_start) for s, e in headers[1:]]
+            
+            if not headers:
+                pending = pending[-self.MIN_HEADER_CYCLES:]
+            else:
+                start, end = headers[0]
+                pending = pending[start:]
+                if len(pending) > self.MAX_SEGMENT_CYCLES:
+                    block = self._decode_segment(pending, end - start)
+                    if block:
+                        yield block
+                    pending = pending[-self.MIN_HEADER_CYCLES:]
+        
+        headers = self._find_headers(pending)
+        if headers:
+            start, end = headers[0]
+            block = self._decode_segment(pending[start:], end - start)
+            if block:
+                yield block
+    
+    def decode(self, wav_path, cas_path):
+        """
+        Converte uma gravação WAV num arquivo .cas
+        
+        Args:
+            wav_path: Arquivo WAV de entrada
+            cas_path: Arquivo .cas de saída
+        
+        Returns:
+            int: Quantidade de blocos gravados
+        """
+        return write_cas(self.iter_blocks(wav_path), cas_path)
+
+
+class WavEncoder:
+    """Gera gravações WAV (onda quadrada FSK) a partir de arquivos .cas"""
+    
+    # Ciclos gerados por vez
+    BATCH_CYCLES = 1 << 16
+    
+    def __init__(self, sample_rate=44100, baud=1200, amplitude=0.8,
+                 file_silence=2.0, block_silence=1.0):
+        """
+        Args:
+            sample_rate: Taxa de amostragem do WAV
+            baud: 1200 ou 2400
+            amplitude: Amplitude relativa da onda (0 a 1)
+            file_silence: Silêncio (s) antes de cada cabeçalho de arquivo
+            block_silence: Silêncio (s) antes dos demais blocos
+        """
+        if baud not in (1200, 2400):
+            raise CassetteError(f"Velocidade não suportada: {baud}")
+        self.sample_rate = sample_rate
+        self.baud = baud
+        self.level = int(32767 * amplitude)
+        self.file_silence = file_silence
+        self.block_silence = block_silence
+        self._time = 0.0
+        self._next_sample = 0
+    
+    def _write_silence(self, wav, seconds):
+        end = int(round((self._time + seconds) * self.sample_rate))
+        count = end - self._next_sample
+        if count > 0:
+            wav.writeframes(np.zeros(count, '<i2').tobytes())
+            self._next_sample = end
+        self._time += seconds
+    
+    def _write_cycles(self, wav, durations):
+        """
+        Gera as amostras de uma sequência de ciclos
+        
+        Args:
+            wav: Arquivo WAV aberto para escrita
+            durations: Duração de cada ciclo em segundos
+        """
+        for first in range(0, len(durations), self.BATCH_CYCLES):
+            batch = durations[first:first + self.BATCH_CYCLES]
+            ends = self._time + np.cumsum(batch)
+            starts = ends - batch
+            
+            last_sample = int(ends[-1] * self.sample_rate)
+            times = np.arange(self._next_sample, last_sample) / self.sample_rate
+            cycle = np.searchsorted(ends, times, side='right')
+            cycle = np.minimum(cycle, len(batch) - 1)
+            phase = (times - starts[cycle]) / batch[cycle]
+            
+            samples = np.where(phase < 0.5, self.level, -self.level).astype('<i2')
+            wav.writeframes(samples.tobytes())
+            self._next_sample = last_sample
+            self._time = float(ends[-1])
+    
+    def _byte_cycles(self, data):
+        """Durações dos ciclos que codificam uma sequência de bytes"""
+        values = np.frombuffer(data, np.uint8)
+        bits = np.unpackbits(values[:, None], axis=1, bitorder='little')
+        frames = np.hstack((
+            np.zeros((len(values), 1), np.uint8),
+            bits,
+            np.ones((len(values), 2), np.uint8)
+        )).ravel()
+        long_cycle = 1.0 / self.baud
+        durations = np.where(frames == 0, long_cycle, long_cycle / 2)
+        return np.repeat(durations, np.where(frames == 0, 1, 2))
+    
+    def encode(self, cas_path, wav_path):
+        """
+        Converte um arquivo .cas numa gravação WAV
+        
+        Args:
+            cas_path: Arquivo .cas de entrada
+            wav_path: Arquivo WAV de saída
+        
+        Returns:
+            int: Quantidade de blocos gravados
+        """
+        with open(cas_path, "rb") as f:
+            data = f.read()
+        blocks = split_blocks(data)
+        if not blocks:
+            raise CassetteError(f"Nenhum bloco encontrado em {cas_path}")
+        
+        scale = self.baud // 1200
+        short_cycle = 0.5 / self.baud
+        self._time = 0.0
+        self._next_sample = 0
+        
+        with wave.open(str(wav_path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            
+            for offset, length in blocks:
+                block = data[offset:offset + length]
+                if _file_type(block):
+                    self._write_silence(wav, self.file_silence)
+                    header = LONG_HEADER_CYCLES * scale
+                else:
+                    self._write_silence(wav, self.block_silence)
+                    header = SHORT_HEADER_CYCLES * scale
+                
+                self._write_cycles(wav, np.full(header, short_cycle))
+                self._write_cycles(wav, self._byte_cycles(block))
+            
+            self._write_silence(wav, self.block_silence)
+        return len(blocks)
+
+
+def decode_to_work(wav_path, config_manager):
+    """
+    Decodifica uma gravação para work_directory/<nome>.cas
+    
+    Args:
+        wav_path: Arquivo WAV de entrada
+        config_manager: Instância do ConfigManager
+    
+    Returns:
+        str: Caminho do .cas gerado
+    """
+    work = config_manager.resolved().work_directory
+    work.mkdir(parents=True, exist_ok=True)
+    cas_path = work / (os.path.splitext(os.path.basename(wav_path))[0] + ".cas")
+    WavDecoder().decode(wav_path, cas_path)
+    return str(cas_path)
+
+
+def encode_to_work(cas_path, config_manager, **options):
+    """
+    Gera a gravação de um .cas em work_directory/<nome>.wav
+    
+    Args:
+        cas_path: Arquivo .cas de entrada
+        config_manager: Instância do ConfigManager
+        **options: Parâmetros repassados ao WavEncoder
+    
+    Returns:
+        str: Caminho do WAV gerado
+    """
+    work = config_manager.resolved().work_directory
+    work.mkdir(parents=True, exist_ok=True)
+    wav_path = work / (os.path.splitext(os.path.basename(cas_path))[0] + ".wav")
+    WavEncoder(**options).encode(cas_path, wav_path)
+    return str(wav_path)
\ No newline at end of file
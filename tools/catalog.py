@@ -0,0 +1,520 @@
+"""
+Catálogo de Arquivos
+Indexa incrementalmente os arquivos MSX do diretório raiz no banco de dados
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from core.metrics import metrics
+
+
+def scan_roots(config_manager):
+    """
+    Diretórios catalogados (raiz e subdiretórios configurados), sem repetir
+    os que estão aninhados
+    
+    Args:
+        config_manager: Instância do ConfigManager
+    
+    Returns:
+        list: Caminhos absolutos (str)
+    """
+    resolved = config_manager.resolved()
+    candidates = {resolved.root_directory}
+    candidates.update(resolved.path(key) for key in Catalog.SCAN_DIRECTORIES)
+    
+    roots = []
+    for path in sorted(candidates, key=lambda p: len(p.parts)):
+        if any(root == path or root in path.parents for root in roots):
+            continue
+        roots.append(path)
+    return [str(path) for path in roots]
+
+
+def _inside_any(directory, parents):
+    """Indica se um diretório está em algum de parents (em qualquer nível)"""
+    while parents:
+        if directory in parents:
+            return True
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return False
+        directory = parent
+    return False
+
+
+class ScanResult:
+    """Estatísticas de uma varredura do catálogo"""
+    
+    def __init__(self):
+        self.directories = 0
+        self.files_seen = 0
+        self.added = 0
+        self.updated = 0
+        self.removed = 0
+        self.duration = 0.0
+    
+    @property
+    def unchanged(self):
+        """Arquivos encontrados que não mudaram desde a última varredura"""
+        return self.files_seen - self.added - self.updated
+    
+    def __repr__(self):
+        return (
+            f"ScanResult(directories={self.directories}, "
+            f"files_seen={self.files_seen}, added={self.added}, "
+            f"updated={self.updated}, removed={self.removed}, "
+            f"duration={self.duration:.3f})"
+        )
+
+
+class _DirectoryDiff:
+    """Diferença entre o conteúdo de um diretório e o catálogo"""
+    
+    __slots__ = ('directory', 'subdirs', 'seen', 'added', 'updated', 'removed', 'readable')
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.subdirs = []
+        self.seen = 0
+        self.added = []
+        self.updated = []
+        self.removed = []
+        self.readable = True
+
+
+class Catalog:
+    """Catálogo dos arquivos MSX encontrados sob o diretório raiz"""
+    
+    # Extensões catalogadas (sem ponto, em minúsculas)
+    EXTENSIONS = frozenset({
+        'rom', 'dsk', 'cas', 'bas', 'mx1', 'mx2', 'zip', 'gz', 'lzh', 'lha',
+        # Telas (ver tools.screen.SCREEN_EXTENSIONS)
+        'sc2', 'grp', 'sc4', 'sc5', 'ge5', 'sr5', 'sc6', 'sr6',
+        'sc7', 'ge7', 'sr7', 'sc8', 'sr8', 'sca', 'scc', 'srs'
+    })
+    
+    # Subdiretórios configurados que também são varridos
+    SCAN_DIRECTORIES = ('work_directory', 'download_directory', 'temp_directory')
+    
+    # Quantidade de alterações gravadas por transação
+    BATCH_SIZE = 5000
+    
+    # Colunas aceitas para ordenar as páginas do catálogo
+    SORT_COLUMNS = frozenset({
+        'path', 'directory', 'name', 'extension', 'size', 'mtime_ns', 'updated_at'
+    })
+    
+    def __init__(self, db_manager, config_manager, max_workers=None):
+        """
+        Inicializa o catálogo
+        
+        Args:
+            db_manager: Instância do DatabaseManager
+            config_manager: Instância do ConfigManager
+            max_workers: Threads usadas para listar diretórios em paralelo
+        """
+        self.db = db_manager
+        self.config_manager = config_manager
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+    
+    def roots(self):
+        """
+        Retorna os diretórios a varrer, sem repetir os que estão aninhados
+        
+        Returns:
+            list: Caminhos absolutos (str)
+        """
+        return scan_roots(self.config_manager)
+    
+    @classmethod
+    def extension_of(cls, name):
+        """
+        Retorna a extensão catalogável de um nome de arquivo
+        
+        Args:
+            name: Nome do arquivo
+        
+        Returns:
+            str: Extensão em minúsculas ou None se não for catalogada
+        """
+        _, dot, ext = name.rpartition('.')
+        if not dot:
+            return None
+        ext = ext.lower()
+        return ext if ext in cls.EXTENSIONS else None
+    
+    def _scan_directory(self, directory):
+        """
+        Lista um diretório e compara com o catálogo (executa numa thread do pool)
+        
+        Args:
+            directory: Caminho absoluto do diretório
+        
+        Returns:
+            _DirectoryDiff com as alterações encontradas
+        """
+        diff = _DirectoryDiff(directory)
+        found = {}
+        
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            diff.subdirs.append(entry.path)
+                            continue
+                        ext = self.extension_of(entry.name)
+                        if ext is None or not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    found[entry.name] = (ext, stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # Sem permissão de leitura: mantém o que já estava catalogado
+            diff.readable = False
+            return diff
+        
+        known = {
+            row['name']: (row['size'], row['mtime_ns'])
+            for row in self.db.fetch_all(
+                "SELECT name, size, mtime_ns FROM catalog_files WHERE directory = ?",
+                (directory,)
+            )
+        }
+        
+        diff.seen = len(found)
+        for name, (ext, size, mtime_ns) in found.items():
+            previous = known.pop(name, None)
+            if previous is None:
+                diff.added.append((
+                    os.path.join(directory, name), directory, name, ext, size, mtime_ns
+                ))
+            elif previous != (size, mtime_ns):
+                diff.updated.append((size, mtime_ns, os.path.join(directory, name)))
+        
+        diff.removed = [(os.path.join(directory, name),) for name in known]
+        return diff
+    
+    def _walk(self, roots, progress=None):
+        """
+        Percorre os diretórios em paralelo, gerando as diferenças encontradas
+        
+        Args:
+            roots: Diretórios iniciais
+            progress: Função chamada com (diretórios, arquivos) (opcional)
+        
+        Yields:
+            _DirectoryDiff de cada diretório visitado
+        """
+        directories = 0
+        files = 0
+        
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="catalog"
+        ) as executor:
+            pending = {executor.submit(self._scan_directory, root) for root in roots}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    diff = future.result()
+                    for subdir in diff.subdirs:
+                        pending.add(executor.submit(self._scan_directory, subdir))
+                    directories += 1
+                    files += diff.seen
+                    if progress:
+                        progress(directories, files)
+                    yield diff
+        
+        self.db.close_idle()
+    
+    @metrics.timer('catalog.scan')
+    def scan(self, progress=None):
+        """
+        Atualiza o catálogo com o conteúdo atual dos diretórios
+        
+        Arquivos cujo (caminho, tamanho, mtime_ns) não mudaram não geram
+        nenhuma escrita no banco.
+        
+        Args:
+            progress: Função chamada com (diretórios, arquivos) (opcional)
+        
+        Returns:
+            ScanResult com as estatísticas da varredura
+        """
+        started = time.perf_counter()
+        result = ScanResult()
+        visited = set()
+        unreadable = set()
+        added, updated, removed = [], [], []
+        
+        for diff in self._walk(self.roots(), progress):
+            if diff.readable:
+                visited.add(diff.directory)
+            else:
+                unreadable.add(diff.directory)
+            result.directories += 1
+            result.files_seen += diff.seen
+            added.extend(diff.added)
+            updated.extend(diff.updated)
+            removed.extend(diff.removed)
+            
+            if len(added) + len(updated) + len(removed) >= self.BATCH_SIZE:
+                self._apply(added, updated, removed, result)
+                added, updated, removed = [], [], []
+        
+        # Diretórios catalogados que deixaram de existir; o que está abaixo de
+        # um diretório que não pôde ser listado continua catalogado
+        for row in self.db.fetch_all("SELECT DISTINCT directory FROM catalog_files"):
+            directory = row['directory']
+            if directory in visited or self._is_unreadable(directory):
+                continue
+            if not _inside_any(directory, unreadable):
+                removed.extend(self.db.iter_rows(
+                    "SELECT path FROM catalog_files WHERE directory = ?",
+                    (directory,),
+                    row_type='tuple'
+                ))
+        self._apply(added, updated, removed, result)
+        
+        result.duration = time.perf_counter() - started
+        metrics.count('catalog.files_seen', result.files_seen)
+        self.db.execute_query(
+            """
+            INSERT INTO catalog_scans (
+                duration, directories, files_seen,
+                files_added, files_updated, files_removed
+            ) VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                result.duration, result.directories, result.files_seen,
+                result.added, result.updated, result.removed
+            )
+        )
+        return result
+    
+    @metrics.timer('catalog.apply_changes')
+    def apply_changes(self, batch):
+        """
+        Aplica um lote do observador de arquivos (core.watcher.ChangeBatch)
+        
+        Só os caminhos do lote são consultados: não há varredura de
+        diretórios. Arquivos com extensão não catalogada são ignorados.
+        
+        Args:
+            batch: ChangeBatch com as alterações
+        
+        Returns:
+            ScanResult com as contagens, ou None se o lote indicar perda de
+            eventos (overflow) e for preciso chamar scan()
+        """
+        if batch.overflow:
+            return None
+        
+        started = time.perf_counter()
+        result = ScanResult()
+        upserts, removed = [], []
+        
+        for path in batch.added | batch.modified:
+            directory, name = os.path.split(path)
+            ext = self.extension_of(name)
+            if ext is None:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                removed.append((path,))
+                continue
+            upserts.append((path, directory, name, ext, stat.st_size, stat.st_mtime_ns))
+        removed.extend(
+            (path,) for path in batch.deleted
+            if self.extension_of(os.path.basename(path)) is not None
+        )
+        
+        with self.db.transaction() as conn:
+            for directory in batch.removed_directories:
+                result.removed += conn.execute(
+                    """
+                    DELETE FROM catalog_files
+                    WHERE directory = ? OR substr(directory, 1, ?) = ?
+                    """,
+                    (directory, len(directory) + 1, directory + os.sep)
+                ).rowcount
+            self._apply(upserts, [], removed, result)
+        
+        # _apply conta todo upsert como novo; separa os que já existiam
+        upserted = {row[0] for row in upserts}
+        result.updated = len(batch.modified & upserted)
+        result.added -= result.updated
+        result.files_seen = len(upserts)
+        result.duration = time.perf_counter() - started
+        return result
+    
+    def _is_unreadable(self, directory):
+        """Indica se um diretório existe mas não pôde ser listado"""
+        return os.path.isdir(directory) and not os.access(directory, os.R_OK | os.X_OK)
+    
+    def _apply(self, added, updated, removed, result):
+        """
+        Grava um lote de alterações numa única transação
+        
+        Args:
+            added: Tuplas (path, directory, name, extension, size, mtime_ns)
+            updated: Tuplas (size, mtime_ns, path)
+            removed: Tuplas (path,)
+            result: ScanResult atualizado com as contagens
+        """
+        if not (added or updated or removed):
+            return
+        
+        with self.db.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO catalog_files (
+                    path, directory, name, extension, size, mtime_ns
+                ) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime_ns = excluded.mtime_ns,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                added
+            )
+            conn.executemany(
+                """
+                UPDATE catalog_files
+                SET size = ?, mtime_ns = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE path = ?
+                """,
+                updated
+            )
+            conn.executemany("DELETE FROM catalog_files WHERE path = ?", removed)
+        
+        result.added += len(added)
+        result.updated += len(updated)
+        result.removed += len(removed)
+    
+    def files(self, extension=None):
+        """
+        Lista os arquivos catalogados
+        
+        Args:
+            extension: Filtra por extensão (ex: 'rom') (opcional)
+        
+        Returns:
+            list: Registros do catálogo
+        """
+        if extension:
+            return self.db.fetch_all(
+                "SELECT * FROM catalog_files WHERE extension = ? ORDER BY path",
+                (extension.lower(),)
+            )
+        return self.db.fetch_all("SELECT * FROM catalog_files ORDER BY path")
+    
+    def count(self, extension=None):
+        """
+        Conta os arquivos catalogados
+        
+        Args:
+            extension: Conta apenas uma extensão (opcional)
+        
+        Returns:
+            int: Quantidade de arquivos no catálogo
+        """
+        if extension:
+            return self.db.fetch_one(
+                "SELECT COUNT(*) AS count FROM catalog_files WHERE extension = ?",
+                (extension.lower(),)
+            )['count']
+        return self.db.fetch_one("SELECT COUNT(*) AS count FROM catalog_files")['count']
+    
+    def fetch(self, offset, limit, sort_key=None, descending=False, extension=None,
+              after=None):
+        """
+        Retorna uma página do catálogo
+        
+        Args:
+            offset: Posição do primeiro registro (contada a partir de after,
+                se informado)
+            limit: Quantidade máxima de registros
+            sort_key: Coluna de ordenação (padrão: path)
+            descending: Ordem decrescente
+            extension: Filtra por extensão (opcional)
+            after: Par (valor de sort_key, id) do último registro já visto;
+                a página começa logo depois dele (opcional)
+        
+        Returns:
+            list: Registros da página
+        """
+        if sort_key not in self.SORT_COLUMNS:
+            sort_key = 'path'
+        direction = "DESC" if descending else "ASC"
+        conditions, params = [], ()
+        if extension:
+            conditions.append("extension = ?")
+            params += (extension.lower(),)
+        if after is not None:
+            # Paginação por chave: segue o índice a partir do último registro
+            conditions.append(f"({sort_key}, id) {'<' if descending else '>'} (?, ?)")
+            params += tuple(after)
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return self.db.fetch_all(
+            f"""
+            SELECT * FROM catalog_files {where}
+            ORDER BY {sort_key} {direction}, id {direction}
+            LIMIT ? OFFSET ?
+            """,
+            params + (limit, offset)
+        )
+    
+    def source(self, extension=None):
+        """
+        Fonte de dados paginada para a VirtualList
+        
+        Args:
+            extension: Filtra por extensão (opcional)
+        
+        Returns:
+            Objeto com count() e fetch(offset, limit, sort_key, descending)
+        """
+        return _CatalogSource(self, extension)
+
+
+class _CatalogSource:
+    """
+    Páginas do catálogo com um filtro de extensão fixo
+    
+    Guarda a chave do último registro de cada página lida, para que as
+    páginas seguintes sejam buscadas por chave em vez de OFFSET.
+    """
+    
+    def __init__(self, catalog, extension):
+        self.catalog = catalog
+        self.extension = extension
+        self._bounds = {}
+    
+    def count(self):
+        # A lista recarrega a contagem quando os dados mudam
+        self._bounds.clear()
+        return self.catalog.count(self.extension)
+    
+    def fetch(self, offset, limit, sort_key=None, descending=False):
+        if sort_key not in self.catalog.SORT_COLUMNS:
+            sort_key = 'path'
+        bounds = self._bounds.setdefault((sort_key, descending), {})
+        
+        # Parte da página conhecida mais próxima antes do offset
+        start = max((known for known in bounds if known <= offset), default=0)
+        rows = self.catalog.fetch(
+            offset - start, limit, sort_key, descending, self.extension,
+            after=bounds.get(start)
+        )
+        if rows:
+            last = rows[-1]
+            bounds[offset + len(rows)] = (last[sort_key], last['id'])
+        return rows
\ No newline at end of file
@@ -0,0 +1,498 @@
+"""
+Arquivos Duplicados
+Busca em etapas os arquivos repetidos da coleção (tamanho, hash parcial e
+hash completo só para quem sobrou), incluindo membros de arquivos compactados
+"""
+import hashlib
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from core.metrics import metrics
+from core.tasks import PROCESS_CONTEXT
+from tools.archive import ARCHIVE_EXTENSIONS, ArchiveIndex
+from tools.identify import hash_file, store_hashes
+
+
+# Bytes lidos do início e do fim de cada arquivo no hash parcial
+PARTIAL_BLOCK = 16 * 1024
+
+# Ações aceitas por resolve()
+ACTIONS = ('hardlink', 'delete')
+
+
+class DedupError(Exception):
+    """Ação de deduplicação impossível ou insegura"""
+
+
+class DedupResult:
+    """Estatísticas de uma busca de duplicados"""
+    
+    def __init__(self):
+        self.files = 0
+        self.members = 0
+        self.size_candidates = 0
+        self.partial_hashed = 0
+        self.full_hashed = 0
+        self.cached = 0
+        self.errors = 0
+        self.groups = 0
+        self.wasted = 0
+        self.duration = 0.0
+    
+    def __repr__(self):
+        return (
+            f"DedupResult(files={self.files}, members={self.members}, "
+            f"size_candidates={self.size_candidates}, "
+            f"partial_hashed={self.partial_hashed}, full_hashed={self.full_hashed}, "
+            f"cached={self.cached}, errors={self.errors}, groups={self.groups}, "
+            f"wasted={self.wasted}, duration={self.duration:.3f})"
+        )
+
+
+class _Entry:
+    """Arquivo (ou membro de arquivo compactado) candidato a duplicado"""
+    
+    __slots__ = ('path', 'member', 'size', 'mtime_ns', 'device', 'inode', 'sha1', 'links')
+    
+    def __init__(self, path, size, mtime_ns=None, device=None, inode=None,
+                 member=None, sha1=None):
+        self.path = path
+        self.member = member
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.device = device
+        self.inode = inode
+        self.sha1 = sha1
+        # Outros caminhos do mesmo inode (hardlinks já existentes)
+        self.links = []
+
+
+def partial_hash(path):
+    """
+    Calcula o hash do início e do fim de um arquivo (executa numa thread)
+    
+    Args:
+        path: Caminho do arquivo
+    
+    Returns:
+        tuple: (path, hash parcial ou None em caso de erro)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            digest.update(f.read(PARTIAL_BLOCK))
+            size = os.fstat(f.fileno()).st_size
+            if size > PARTIAL_BLOCK:
+                f.seek(max(PARTIAL_BLOCK, size - PARTIAL_BLOCK))
+                digest.update(f.read(PARTIAL_BLOCK))
+    except OSError:
+        return path, None
+    return path, digest.hexdigest()
+
+
+class Deduplicator:
+    """Encontra e resolve arquivos duplicados sob o root_directory"""
+    
+    # Quantidade de hashes gravados por transação
+    BATCH_SIZE = 1000
+    
+    def __init__(self, db_manager, config_manager, max_workers=None, io_threads=8):
+        """
+        Args:
+            db_manager: Instância do DatabaseManager
+            config_manager: Instância do ConfigManager
+            max_workers: Processos usados para os hashes completos
+            io_threads: Threads usadas para os hashes parciais
+        """
+        self.db = db_manager
+        self.config_manager = config_manager
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.io_threads = io_threads
+        self.archives = ArchiveIndex(db_manager, config_manager, max_workers)
+    
+    def _iter_files(self, root):
+        """
+        Percorre a árvore sob root, sem seguir links simbólicos
+        
+        Yields:
+            tuple: (path, size, mtime_ns, device, inode)
+        """
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        yield (entry.path, stat.st_size, stat.st_mtime_ns,
+                               stat.st_dev, stat.st_ino)
+            except OSError:
+                continue
+    
+    def _collect(self, root, result):
+        """Lista arquivos e membros, juntando caminhos do mesmo inode"""
+        files = {}
+        archives = {}
+        for path, size, mtime_ns, device, inode in self._iter_files(root):
+            result.files += 1
+            if size == 0:
+                continue
+            key = (device, inode)
+            entry = files.get(key)
+            if entry is not None:
+                entry.links.append(path)
+                continue
+            files[key] = _Entry(path, size, mtime_ns, device, inode)
+            
+            _, dot, ext = path.rpartition('.')
+            if dot and ext.lower() in ARCHIVE_EXTENSIONS:
+                archives[path] = (size, mtime_ns)
+        
+        # Os arquivos compactados novos ou alterados são lidos em lote no
+        # pool do índice; os membros saem do índice, sem abrir nenhum arquivo
+        result.errors += len(self.archives.refresh(archives).errors)
+        members = [
+            _Entry(path, member.size, member=member.member, sha1=member.sha1)
+            for path, listed in self.archives.members_of(archives).items()
+            for member in listed
+            if member.sha1 and member.size
+        ]
+        result.members = len(members)
+        return list(files.values()), members
+    
+    @metrics.timer('dedup.scan')
+    def scan(self, root=None, progress=None):
+        """
+        Busca os duplicados e grava o resultado (substituindo o anterior)
+        
+        Etapas: arquivos de tamanho único são descartados; os demais têm o
+        início e o fim comparados; só quem continua empatado é lido por
+        inteiro (ou tem o hash reaproveitado do file_hashes). Membros de
+        arquivos compactados entram com o SHA1 do índice de arquivos.
+        
+        Args:
+            root: Diretório varrido (padrão: root_directory)
+            progress: Função chamada com (etapa, processados, total) (opcional)
+        
+        Returns:
+            DedupResult com as estatísticas
+        """
+        started = time.perf_counter()
+        result = DedupResult()
+        root = os.path.abspath(root or self.config_manager.resolved().root_directory)
+        
+        files, members = self._collect(root, result)
+        
+        # Etapa 1: tamanho
+        sizes = defaultdict(int)
+        for entry in files:
+            sizes[entry.size] += 1
+        member_sizes = set()
+        for entry in members:
+            sizes[entry.size] += 1
+            member_sizes.add(entry.size)
+        files = [entry for entry in files if sizes[entry.size] > 1]
+        result.size_candidates = len(files)
+        
+        # Etapa 2: início e fim (só onde não há membros, que têm apenas SHA1)
+        partial_candidates = [entry for entry in files if entry.size not in member_sizes]
+        full = [entry for entry in files if entry.size in member_sizes]
+        if partial_candidates:
+            by_path = {entry.path: entry for entry in partial_candidates}
+            groups = defaultdict(list)
+            with ThreadPoolExecutor(
+                max_workers=self.io_threads, thread_name_prefix="dedup"
+            ) as executor:
+                for done, (path, digest) in enumerate(
+                    executor.map(partial_hash, by_path), 1
+                ):
+                    if digest is None:
+                        result.errors += 1
+                    else:
+                        entry = by_path[path]
+                        groups[(entry.size, digest)].append(entry)
+                        result.partial_hashed += 1
+                    if progress:
+                        progress('partial', done, len(by_path))
+            for group in groups.values():
+                if len(group) > 1:
+                    full.extend(group)
+        
+        # Etapa 3: hash completo, reaproveitando o cache da identificação
+        self._full_hashes(full, result, progress)
+        
+        # Etapa 4: agrupa por SHA1
+        duplicates = defaultdict(list)
+        for entry in full + members:
+            if entry.sha1:
+                duplicates[(entry.size, entry.sha1)].append(entry)
+        duplicates = {key: group for key, group in duplicates.items() if len(group) > 1}
+        self._store(duplicates)
+        
+        result.groups = len(duplicates)
+        result.wasted = sum(size * (len(group) - 1) for (size, _), group in duplicates.items())
+        result.duration = time.perf_counter() - started
+        return result
+    
+    def _full_hashes(self, entries, result, progress):
+        """Preenche o SHA1 das entradas, lendo só as que não estão no cache"""
+        if not entries:
+            return
+        cached = {}
+        paths = [entry.path for entry in entries]
+        for start in range(0, len(paths), 500):
+            chunk = paths[start:start + 500]
+            rows = self.db.fetch_all(
+                f"""
+                SELECT path, size, mtime_ns, sha1 FROM file_hashes
+                WHERE path IN ({','.join('?' * len(chunk))})
+                """,
+                chunk
+            )
+            cached.update((row['path'], row) for row in rows)
+        
+        stale = {}
+        for entry in entries:
+            row = cached.get(entry.path)
+            if row and (row['size'], row['mtime_ns']) == (entry.size, entry.mtime_ns):
+                entry.sha1 = row['sha1']
+                result.cached += 1
+            else:
+                stale[entry.path] = entry
+        if not stale:
+            return
+        
+        store_hashes(self.db, self._hash_stale(stale, result, progress), self.BATCH_SIZE)
+    
+    def _hash_stale(self, stale, result, progress):
+        """
+        Calcula os hashes completos pendentes no pool de processos
+        
+        Yields:
+            tuple: (path, size, mtime_ns, crc32, sha1) para o cache file_hashes
+        """
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=PROCESS_CONTEXT
+        ) as executor:
+            chunksize = max(1, min(64, len(stale) // (self.max_workers * 4)))
+            for done, (path, crc32, sha1) in enumerate(
+                executor.map(hash_file, stale, chunksize=chunksize), 1
+            ):
+                if sha1 is None:
+                    result.errors += 1
+                else:
+                    entry = stale[path]
+                    entry.sha1 = sha1
+                    result.full_hashed += 1
+                    yield path, entry.size, entry.mtime_ns, crc32, sha1
+                if progress:
+                    progress('full', done, len(stale))
+    
+    def _store(self, duplicates):
+        """Substitui os grupos gravados pelos encontrados agora"""
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM duplicate_files")
+            conn.execute("DELETE FROM duplicate_groups")
+            for (size, sha1), group in duplicates.items():
+                group_id = conn.execute(
+                    "INSERT INTO duplicate_groups (sha1, size) VALUES (?, ?)",
+                    (sha1, size)
+                ).lastrowid
+                rows = []
+                for entry in group:
+                    rows.append((group_id, entry.path, entry.member, entry.device, entry.inode))
+                    rows.extend(
+                        (group_id, link, None, entry.device, entry.inode)
+                        for link in entry.links
+                    )
+                conn.executemany(
+                    """
+                    INSERT INTO duplicate_files (group_id, path, member, device, inode)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    rows
+                )
+    
+    def report(self):
+        """
+        Lista os grupos de duplicados da última busca
+        
+        Returns:
+            list: dicts com id, sha1, size, wasted e files (registros com
+                path, member, device e inode), do maior desperdício ao menor
+        """
+        groups = {
+            row['id']: dict(row, files=[])
+            for row in self.db.fetch_all("SELECT id, sha1, size FROM duplicate_groups")
+        }
+        for row in self.db.fetch_all(
+            """
+            SELECT group_id, path, member, device, inode FROM duplicate_files
+            ORDER BY group_id, path, member
+            """
+        ):
+            groups[row['group_id']]['files'].append(dict(row))
+        
+        for group in groups.values():
+            copies = {
+                (f['device'], f['inode']) if f['member'] is None else (f['path'], f['member'])
+                for f in group['files']
+            }
+            group['wasted'] = group['size'] * (len(copies) - 1)
+        return sorted(groups.values(), key=lambda g: (-g['wasted'], g['id']))
+    
+    def summary(self):
+        """
+        Resume a última busca
+        
+        Returns:
+            dict: groups, files e wasted (bytes que a deduplicação liberaria)
+        """
+        report = self.report()
+        return {
+            'groups': len(report),
+            'files': sum(len(group['files']) for group in report),
+            'wasted': sum(group['wasted'] for group in report)
+        }
+    
+    def resolve(self, group_id, keep, action='hardlink', dry_run=False):
+        """
+        Substitui as cópias de um grupo por hardlinks para keep ou as apaga
+        
+        Antes de mexer em qualquer arquivo, keep e cada cópia são lidos de
+        novo e só são tocados se o SHA1 ainda for o do grupo. Membros de
+        arquivos compactados nunca são alterados. O hardlink é criado com um
+        nome temporário e trocado atomicamente pela cópia.
+        
+        Args:
+            group_id: Grupo retornado por report()
+            keep: Caminho (arquivo comum do grupo) que é mantido
+            action: 'hardlink' ou 'delete'
+            dry_run: Só informa o que seria feito
+        
+        Returns:
+            list: (caminho, ação feita ou prevista, erro ou None)
+        
+        Raises:
+            DedupError: Se o grupo ou keep forem inválidos
+        """
+        if action not in ACTIONS:
+            raise DedupError(f"Ação desconhecida: {action}")
+        group = self.db.fetch_one(
+            "SELECT sha1, size FROM duplicate_groups WHERE id = ?", (group_id,)
+        )
+        if group is None:
+            raise DedupError(f"Grupo inexistente: {group_id}")
+        rows = self.db.fetch_all(
+            "SELECT id, path, device, inode FROM duplicate_files "
+            "WHERE group_id = ? AND member IS NULL",
+            (group_id,)
+        )
+        if keep not in {row['path'] for row in rows}:
+            raise DedupError(f"{keep} não é um arquivo do grupo {group_id}")
+        
+        keep_stat = self._verify(keep, group)
+        if keep_stat is None:
+            raise DedupError(f"{keep} mudou desde a busca; refaça a busca")
+        
+        outcomes = []
+        done_ids = []
+        for row in rows:
+            path = row['path']
+            if path == keep:
+                continue
+            try:
+                stat = self._verify(path, group)
+                if stat is None:
+                    outcomes.append((path, 'skipped', "Arquivo mudou desde a busca"))
+                    continue
+                if (stat.st_dev, stat.st_ino) == (keep_stat.st_dev, keep_stat.st_ino):
+                    outcomes.append((path, 'skipped', None))
+                    continue
+                if action == 'hardlink' and stat.st_dev != keep_stat.st_dev:
+                    outcomes.append((path, 'skipped', "Dispositivo diferente"))
+                    continue
+                if not dry_run:
+                    if action == 'hardlink':
+                        tmp_path = path + ".dedup-tmp"
+                        os.link(keep, tmp_path)
+                        try:
+                            os.replace(tmp_path, path)
+                        except OSError:
+                            os.remove(tmp_path)
+                            raise
+                    else:
+                        os.remove(path)
+                    done_ids.append(row['id'])
+                outcomes.append((path, action, None))
+            except OSError as e:
+                outcomes.append((path, 'skipped', str(e)))
+        
+        if done_ids:
+            self._apply(group_id, done_ids, action, keep_stat)
+        return outcomes
+    
+    def _verify(self, path, group):
+        """Confere tamanho e SHA1 de um arquivo; retorna o stat ou None"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if stat.st_size != group['size']:
+            return None
+        _, _, sha1 = hash_file(path)
+        return stat if sha1 == group['sha1'] else None
+    
+    def _apply(self, group_id, ids, action, keep_stat):
+        """Atualiza o grupo gravado depois de uma ação"""
+        with self.db.transaction() as conn:
+            params = [(i,) for i in ids]
+            if action == 'delete':
+                conn.executemany("DELETE FROM duplicate_files WHERE id = ?", params)
+            else:
+                conn.executemany(
+                    "UPDATE duplicate_files SET device = ?, inode = ? WHERE id = ?",
+                    [(keep_stat.st_dev, keep_stat.st_ino, i) for i in ids]
+                )
+            remaining = conn.execute(
+                "SELECT COUNT(*) FROM duplicate_files WHERE group_id = ?", (group_id,)
+            ).fetchone()[0]
+            if remaining < 2:
+                conn.execute("DELETE FROM duplicate_files WHERE group_id = ?", (group_id,))
+                conn.execute("DELETE FROM duplicate_groups WHERE id = ?", (group_id,))
+    
+    def resolve_all(self, action='hardlink', dry_run=False):
+        """
+        Resolve todos os grupos mantendo o arquivo comum mais antigo de cada um
+        
+        Returns:
+            list: (caminho, ação, erro ou None) de todas as cópias
+        """
+        outcomes = []
+        for group in self.report():
+            plain = [f['path'] for f in group['files'] if f['member'] is None]
+            if len(plain) < 2:
+                continue
+            keep = min(plain, key=lambda path: (self._mtime(path), path))
+            try:
+                outcomes.extend(self.resolve(group['id'], keep, action, dry_run))
+            except DedupError as e:
+                outcomes.append((keep, 'skipped', str(e)))
+        return outcomes
+    
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return float('inf')
\ No newline at end of file
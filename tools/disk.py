@@ -0,0 +1,793 @@
+"""
+Imagens de Disco MSX-DOS
+Leitura e criação de imagens .dsk (FAT12) via mmap, sem copiar a imagem para
+a memória
+"""
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+from core.metrics import metrics
+
+
+SECTOR_SIZE = 512
+DIRECTORY_ENTRY_SIZE = 32
+
+# Atributos das entradas de diretório
+ATTR_READ_ONLY = 0x01
+ATTR_HIDDEN = 0x02
+ATTR_SYSTEM = 0x04
+ATTR_VOLUME = 0x08
+ATTR_DIRECTORY = 0x10
+ATTR_ARCHIVE = 0x20
+
+# Geometrias padrão pelo byte de mídia, para discos sem boot sector válido:
+# (setores totais, setores por cluster, setores por FAT, entradas na raiz)
+MEDIA_GEOMETRY = {
+    0xF8: (720, 2, 2, 112),
+    0xF9: (1440, 2, 3, 112),
+    0xFA: (640, 2, 1, 112),
+    0xFB: (1280, 2, 2, 112),
+    0xFC: (360, 1, 2, 64),
+    0xFD: (720, 2, 2, 112),
+    0xFE: (320, 1, 1, 64),
+    0xFF: (640, 2, 1, 112),
+}
+
+# Formatos criados pelo DiskBuilder: tamanho em KB -> (byte de mídia, faces)
+DISK_FORMATS = {
+    360: (0xF8, 1),
+    720: (0xF9, 2),
+}
+
+# Setores por trilha dos disquetes de 3,5" do MSX
+SECTORS_PER_TRACK = 9
+
+# Boot sector de disco não inicializável: salto, identificação e um RET no
+# ponto de entrada (0x1E), que devolve o controle ao BASIC
+DEFAULT_BOOT_SECTOR = (
+    b"\xEB\xFE\x90MSXTOOLS" + bytes(0x1E - 11) + b"\xC9"
+).ljust(SECTOR_SIZE, b"\x00")
+
+# Caracteres aceitos em nomes 8.3 além de letras e dígitos
+DOS_NAME_CHARS = set("!#$%&'()-@^_`{}~")
+
+
+class DiskImageError(Exception):
+    """Imagem de disco inválida ou corrompida"""
+
+
+class DirectoryEntry:
+    """Uma entrada de diretório de uma imagem FAT12"""
+    
+    __slots__ = ('name', 'extension', 'attributes', 'cluster', 'size',
+                 'time', 'date', 'parent')
+    
+    def __init__(self, raw, parent=""):
+        """
+        Decodifica uma entrada de 32 bytes
+        
+        Args:
+            raw: memoryview com os 32 bytes da entrada
+            parent: Caminho do diretório que contém a entrada
+        """
+        self.name = bytes(raw[0:8]).decode('latin-1').rstrip()
+        self.extension = bytes(raw[8:11]).decode('latin-1').rstrip()
+        self.attributes = raw[11]
+        self.time, self.date, self.cluster, self.size = struct.unpack_from(
+            "<HHHI", raw, 22
+        )
+        self.parent = parent
+    
+    @property
+    def filename(self):
+        """Nome no formato NOME.EXT"""
+        return f"{self.name}.{self.extension}" if self.extension else self.name
+    
+    @property
+    def path(self):
+        """Caminho completo dentro da imagem (separado por '/')"""
+        return f"{self.parent}/{self.filename}" if self.parent else self.filename
+    
+    @property
+    def is_directory(self):
+        return bool(self.attributes & ATTR_DIRECTORY)
+    
+    @property
+    def is_volume_label(self):
+        return bool(self.attributes & ATTR_VOLUME)
+    
+    @property
+    def modified(self):
+        """Data de modificação (None se inválida)"""
+        try:
+            return datetime(
+                1980 + (self.date >> 9),
+                (self.date >> 5) & 0x0F,
+                self.date & 0x1F,
+                self.time >> 11,
+                (self.time >> 5) & 0x3F,
+                (self.time & 0x1F) * 2
+            )
+        except ValueError:
+            return None
+    
+    def __repr__(self):
+        return f"DirectoryEntry({self.path!r}, size={self.size})"
+
+
+class DiskImage:
+    """Imagem de disco MSX-DOS aberta via mmap"""
+    
+    def __init__(self, path):
+        """
+        Abre e valida uma imagem de disco
+        
+        Args:
+            path: Caminho do arquivo .dsk
+        """
+        self.path = str(path)
+        self._view = None
+        self._fat = None
+        self._file = open(self.path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < SECTOR_SIZE * 4:
+                raise DiskImageError(f"Imagem pequena demais: {self.path}")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        
+        self._view = memoryview(self._mmap)
+        try:
+            self._parse_geometry()
+        except Exception:
+            self.close()
+            raise
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def close(self):
+        """Libera o mapeamento e fecha o arquivo"""
+        if self._view is None:
+            return
+        if self._fat is not None:
+            self._fat.release()
+            self._fat = None
+        self._view.release()
+        self._view = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Ainda há trechos de read_chunks em uso: o mapeamento é desfeito
+            # quando o último deles for descartado
+            pass
+        finally:
+            self._mmap = None
+            self._file.close()
+    
+    def _parse_geometry(self):
+        """Lê a geometria do boot sector (ou do byte de mídia da FAT)"""
+        with self._view[:SECTOR_SIZE] as boot:
+            (bytes_per_sector, sectors_per_cluster, reserved, fat_count,
+             root_entries, total_sectors, media, sectors_per_fat) = struct.unpack_from(
+                "<HBHBHHBH", boot, 0x0B
+            )
+        
+        valid = (
+            bytes_per_sector == SECTOR_SIZE
+            and sectors_per_cluster in (1, 2, 4, 8)
+            and fat_count in (1, 2)
+            and reserved >= 1
+            and root_entries > 0
+            and sectors_per_fat > 0
+        )
+        if not valid:
+            media = self._view[SECTOR_SIZE]
+            if media not in MEDIA_GEOMETRY:
+                raise DiskImageError(f"Geometria desconhecida em {self.path}")
+            total_sectors, sectors_per_cluster, sectors_per_fat, root_entries = (
+                MEDIA_GEOMETRY[media]
+            )
+            reserved = 1
+            fat_count = 2
+        
+        self.media = media
+        self.sectors_per_cluster = sectors_per_cluster
+        self.cluster_size = sectors_per_cluster * SECTOR_SIZE
+        self.total_sectors = total_sectors or len(self._view) // SECTOR_SIZE
+        self.fat_offset = reserved * SECTOR_SIZE
+        self.fat_size = sectors_per_fat * SECTOR_SIZE
+        self.root_offset = self.fat_offset + fat_count * self.fat_size
+        self.root_entries = root_entries
+        self.data_offset = self.root_offset + root_entries * DIRECTORY_ENTRY_SIZE
+        self.cluster_count = (
+            (self.total_sectors * SECTOR_SIZE - self.data_offset) // self.cluster_size
+        )
+        self.has_boot_sector = valid
+        
+        if self.data_offset >= len(self._view):
+            raise DiskImageError(f"Imagem truncada: {self.path}")
+        self._fat = self._view[self.fat_offset:self.fat_offset + self.fat_size]
+    
+    def fat_entry(self, cluster):
+        """
+        Lê uma entrada de 12 bits da FAT
+        
+        Args:
+            cluster: Número do cluster
+        
+        Returns:
+            int: Próximo cluster da cadeia (>= 0xFF8 indica fim)
+        """
+        offset = cluster + (cluster >> 1)
+        fat = self._fat
+        if offset + 1 >= len(fat):
+            return 0xFFF
+        if cluster & 1:
+            return (fat[offset] >> 4) | (fat[offset + 1] << 4)
+        return fat[offset] | ((fat[offset + 1] & 0x0F) << 8)
+    
+    def cluster_chain(self, first_cluster):
+        """
+        Percorre a cadeia de clusters de um arquivo
+        
+        Args:
+            first_cluster: Primeiro cluster do arquivo
+        
+        Yields:
+            int: Números dos clusters, em ordem
+        """
+        cluster = first_cluster
+        visited = 0
+        while 2 <= cluster < 0xFF0 and cluster - 2 < self.cluster_count:
+            yield cluster
+            visited += 1
+            if visited > self.cluster_count:
+                raise DiskImageError(f"Cadeia de clusters circular em {self.path}")
+            cluster = self.fat_entry(cluster)
+    
+    def _runs(self, first_cluster):
+        """
+        Agrupa a cadeia de clusters em trechos contíguos
+        
+        Yields:
+            tuple: (deslocamento em bytes, tamanho em bytes)
+        """
+        start = None
+        count = 0
+        for cluster in self.cluster_chain(first_cluster):
+            if start is not None and cluster == start + count:
+                count += 1
+                continue
+            if start is not None:
+                yield self._cluster_offset(start), count * self.cluster_size
+            start, count = cluster, 1
+        if start is not None:
+            yield self._cluster_offset(start), count * self.cluster_size
+    
+    def _cluster_offset(self, cluster):
+        return self.data_offset + (cluster - 2) * self.cluster_size
+    
+    def _entries_in(self, region, parent):
+        """Decodifica as entradas válidas de uma região de diretório"""
+        for offset in range(0, len(region) - DIRECTORY_ENTRY_SIZE + 1, DIRECTORY_ENTRY_SIZE):
+            first = region[offset]
+            if first == 0x00:
+                return
+            if first == 0xE5:
+                continue
+            with region[offset:offset + DIRECTORY_ENTRY_SIZE] as raw:
+                entry = DirectoryEntry(raw, parent)
+            if entry.name in (".", ".."):
+                continue
+            yield entry
+    
+    def iter_entries(self, recursive=True):
+        """
+        Percorre as entradas de diretório da imagem
+        
+        Args:
+            recursive: Entra nos subdiretórios (MSX-DOS 2)
+        
+        Yields:
+            DirectoryEntry de cada arquivo, diretório e rótulo de volume
+        """
+        # Guarda só as posições; cada região é fatiada (e liberada) ao ser lida
+        pending = [(self.root_offset, self.data_offset - self.root_offset, "")]
+        visited = set()
+        
+        while pending:
+            start, length, parent = pending.pop()
+            with self._view[start:start + length] as region:
+                for entry in self._entries_in(region, parent):
+                    yield entry
+                    if recursive and entry.is_directory and entry.cluster not in visited:
+                        visited.add(entry.cluster)
+                        for offset, size in self._runs(entry.cluster):
+                            pending.append((offset, size, entry.path))
+    
+    def list(self, recursive=True):
+        """
+        Lista os arquivos da imagem (sem diretórios nem rótulo de volume)
+        
+        Args:
+            recursive: Inclui arquivos de subdiretórios
+        
+        Returns:
+            list: DirectoryEntry de cada arquivo
+        """
+        return [
+            entry for entry in self.iter_entries(recursive)
+            if not entry.is_directory and not entry.is_volume_label
+        ]
+    
+    @property
+    def volume_label(self):
+        """Rótulo do volume (None se não houver)"""
+        for entry in self.iter_entries(recursive=False):
+            if entry.is_volume_label:
+                return (entry.name + entry.extension).strip()
+        return None
+    
+    def read_chunks(self, entry):
+        """
+        Lê o conteúdo de um arquivo em trechos, sem copiar a imagem
+        
+        Os memoryviews retornados só são válidos enquanto a imagem estiver
+        aberta; trechos ainda em uso no close() adiam a liberação do
+        mapeamento até serem descartados.
+        
+        Args:
+            entry: DirectoryEntry do arquivo
+        
+        Yields:
+            memoryview com trechos contíguos do arquivo
+        """
+        remaining = entry.size
+        for offset, length in self._runs(entry.cluster):
+            if remaining <= 0:
+                break
+            length = min(length, remaining, len(self._view) - offset)
+            if length <= 0:
+                break
+            yield self._view[offset:offset + length]
+            remaining -= length
+    
+    def read(self, entry):
+        """
+        Lê o conteúdo completo de um arquivo
+        
+        Args:
+            entry: DirectoryEntry do arquivo
+        
+        Returns:
+            bytes: Conteúdo do arquivo
+        """
+        return b"".join(bytes(chunk) for chunk in self.read_chunks(entry))
+    
+    def extract(self, entry, dest_dir):
+        """
+        Grava um arquivo da imagem em disco
+        
+        Args:
+            entry: DirectoryEntry do arquivo
+            dest_dir: Diretório de destino
+        
+        Returns:
+            str: Caminho do arquivo gravado
+        """
+        parts = [_safe_name(part) for part in entry.path.split("/")]
+        target = os.path.join(dest_dir, *parts)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            for chunk in self.read_chunks(entry):
+                f.write(chunk)
+        return target
+    
+    def extract_all(self, dest_dir):
+        """
+        Grava todos os arquivos da imagem em disco
+        
+        Args:
+            dest_dir: Diretório de destino
+        
+        Returns:
+            list: Caminhos dos arquivos gravados
+        """
+        return [self.extract(entry, dest_dir) for entry in self.list()]
+    
+    def free_space(self):
+        """
+        Calcula o espaço livre da imagem
+        
+        Returns:
+            int: Bytes livres
+        """
+        free = 0
+        for cluster in range(2, self.cluster_count + 2):
+            if self.fat_entry(cluster) == 0:
+                free += 1
+        return free * self.cluster_size
+    
+    def summary(self):
+        """
+        Resumo da imagem
+        
+        Returns:
+            dict com rótulo, geometria, arquivos e espaço livre
+        """
+        files = self.list()
+        return {
+            'path': self.path,
+            'label': self.volume_label,
+            'media': f"{self.media:02X}",
+            'size': self.total_sectors * SECTOR_SIZE,
+            'files': len(files),
+            'used': sum(entry.size for entry in files),
+            'free': self.free_space(),
+            'boot_sector': self.has_boot_sector
+        }
+
+
+def _safe_name(name):
+    """Troca caracteres que não podem aparecer em nomes de arquivo"""
+    return "".join("_" if c in '<>:"/\\|?*' or ord(c) < 32 else c for c in name) or "_"
+
+
+def inspect(path):
+    """
+    Abre uma imagem e retorna seu resumo
+    
+    Args:
+        path: Caminho do arquivo .dsk
+    
+    Returns:
+        dict: Resumo da imagem (ver DiskImage.summary)
+    """
+    with DiskImage(path) as image:
+        return image.summary()
+
+
+def inspect_many(paths, max_workers=None):
+    """
+    Inspeciona várias imagens em paralelo
+    
+    Args:
+        paths: Caminhos dos arquivos .dsk
+        max_workers: Threads usadas (opcional)
+    
+    Yields:
+        tuple: (caminho, resumo ou None, erro ou None), na ordem de entrada
+    """
+    def run(path):
+        try:
+            return path, inspect(path), None
+        except (OSError, ValueError, BufferError, DiskImageError) as e:
+            return path, None, e
+    
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dsk") as executor:
+        yield from executor.map(run, paths)
+
+
+def extract_to_work(path, config_manager):
+    """
+    Extrai todos os arquivos de uma imagem para o diretório de trabalho
+    
+    Os arquivos são gravados em work_directory/<nome da imagem>/.
+    
+    Args:
+        path: Caminho do arquivo .dsk
+        config_manager: Instância do ConfigManager
+    
+    Returns:
+        list: Caminhos dos arquivos gravados
+    """
+    work = config_manager.resolved().work_directory
+    dest_dir = work / os.path.splitext(os.path.basename(path))[0]
+    with DiskImage(path) as image:
+        return image.extract_all(str(dest_dir))
+
+
+def _dos_name(filename):
+    """
+    Converte um nome de arquivo para o formato 8.3 do MSX-DOS
+    
+    Returns:
+        tuple: (nome, extensão) em maiúsculas, sem o preenchimento
+    """
+    name, _, extension = filename.upper().rpartition(".")
+    if not name:
+        name, extension = extension, ""
+    
+    def clean(part, length):
+        return "".join(
+            c if c.isalnum() and c.isascii() or c in DOS_NAME_CHARS else "_"
+            for c in part.replace(" ", "")
+        )[:length]
+    
+    name = clean(name, 8)
+    if not name:
+        raise DiskImageError(f"Nome de arquivo inválido: {filename}")
+    return name, clean(extension, 3)
+
+
+def _dos_timestamp(mtime):
+    """Data e hora de modificação no formato da entrada de diretório"""
+    moment = time.localtime(mtime)
+    year = min(max(moment.tm_year, 1980), 2107)
+    date = ((year - 1980) << 9) | (moment.tm_mon << 5) | moment.tm_mday
+    stamp = (moment.tm_hour << 11) | (moment.tm_min << 5) | (moment.tm_sec // 2)
+    return stamp, date
+
+
+def _load_boot_sector(boot_sector):
+    """Boot sector informado como bytes ou caminho de arquivo (None: padrão)"""
+    if boot_sector is None:
+        return DEFAULT_BOOT_SECTOR
+    if not isinstance(boot_sector, (bytes, bytearray, memoryview)):
+        with open(boot_sector, "rb") as f:
+            boot_sector = f.read(SECTOR_SIZE)
+    if len(boot_sector) < 0x1E:
+        raise DiskImageError("Boot sector pequeno demais")
+    return bytes(boot_sector[:SECTOR_SIZE]).ljust(SECTOR_SIZE, b"\x00")
+
+
+class DiskBuilder:
+    """
+    Cria imagens .dsk (FAT12) de 360 KB ou 720 KB a partir de uma lista de
+    arquivos
+    
+    A imagem é pré-alocada no tamanho final e mapeada em memória; o conteúdo
+    dos arquivos é lido direto para o mapeamento, sem cópias intermediárias.
+    Os arquivos ficam na raiz, em clusters contíguos (compatível com MSX-DOS 1).
+    """
+    
+    def __init__(self, size=720, boot_sector=None, label=None):
+        """
+        Args:
+            size: Tamanho do disco em KB (360 ou 720)
+            boot_sector: Boot sector (bytes ou caminho de arquivo); a geometria
+                é sobrescrita com a do disco (padrão: disco não inicializável)
+            label: Rótulo do volume (opcional, até 11 caracteres)
+        """
+        if size not in DISK_FORMATS:
+            raise DiskImageError(f"Tamanho de disco não suportado: {size} KB")
+        self.media, self.heads = DISK_FORMATS[size]
+        (self.total_sectors, self.sectors_per_cluster,
+         self.sectors_per_fat, self.root_entries) = MEDIA_GEOMETRY[self.media]
+        self.cluster_size = self.sectors_per_cluster * SECTOR_SIZE
+        self.fat_offset = SECTOR_SIZE
+        self.root_offset = self.fat_offset + 2 * self.sectors_per_fat * SECTOR_SIZE
+        self.data_offset = self.root_offset + self.root_entries * DIRECTORY_ENTRY_SIZE
+        self.cluster_count = (
+            (self.total_sectors * SECTOR_SIZE - self.data_offset) // self.cluster_size
+        )
+        self.boot_sector = self._boot_sector(_load_boot_sector(boot_sector))
+        self.label = label.upper()[:11] if label else None
+    
+    def _boot_sector(self, template):
+        """Copia o boot sector gravando a geometria do disco nele"""
+        boot = bytearray(template)
+        struct.pack_into(
+            "<HBHBHHBHHHH", boot, 0x0B,
+            SECTOR_SIZE, self.sectors_per_cluster, 1, 2, self.root_entries,
+            self.total_sectors, self.media, self.sectors_per_fat,
+            SECTORS_PER_TRACK, self.heads, 0
+        )
+        return bytes(boot)
+    
+    def _layout(self, files):
+        """
+        Define nome, tamanho e primeiro cluster de cada arquivo
+        
+        Args:
+            files: Caminhos ou tuplas (caminho, nome dentro da imagem)
+        
+        Returns:
+            list: Tuplas (caminho, nome, extensão, tamanho, mtime, cluster, clusters)
+        """
+        layout = []
+        names = set()
+        cluster = 2
+        for item in files:
+            path, filename = item if isinstance(item, tuple) else (item, None)
+            path = os.fspath(path)
+            name, extension = _dos_name(filename or os.path.basename(path))
+            if (name, extension) in names:
+                raise DiskImageError(f"Nome repetido na imagem: {name}.{extension}")
+            names.add((name, extension))
+            
+            info = os.stat(path)
+            clusters = -(-info.st_size // self.cluster_size)
+            layout.append((
+                path, name, extension, info.st_size, info.st_mtime,
+                cluster if clusters else 0, clusters
+            ))
+            cluster += clusters
+        
+        used = cluster - 2
+        if used > self.cluster_count:
+            raise DiskImageError(
+                f"Os arquivos ocupam {used * self.cluster_size} bytes; "
+                f"o disco comporta {self.cluster_count * self.cluster_size}"
+            )
+        if len(layout) + bool(self.label) > self.root_entries:
+            raise DiskImageError(
+                f"Arquivos demais para o diretório raiz (máximo {self.root_entries})"
+            )
+        return layout
+    
+    def _fat(self, layout):
+        """Monta uma cópia da FAT com as cadeias contíguas de cada arquivo"""
+        fat = bytearray(self.sectors_per_fat * SECTOR_SIZE)
+        fat[0:3] = bytes((self.media, 0xFF, 0xFF))
+        for _, _, _, _, _, first, clusters in layout:
+            for cluster in range(first, first + clusters):
+                value = cluster + 1 if cluster + 1 < first + clusters else 0xFFF
+                offset = cluster + (cluster >> 1)
+                if cluster & 1:
+                    fat[offset] = (fat[offset] & 0x0F) | ((value << 4) & 0xF0)
+                    fat[offset + 1] = value >> 4
+                else:
+                    fat[offset] = value & 0xFF
+                    fat[offset + 1] = (fat[offset + 1] & 0xF0) | (value >> 8)
+        return fat
+    
+    def _directory(self, layout):
+        """Monta as entradas do diretório raiz"""
+        entries = bytearray()
+        if self.label:
+            stamp, date = _dos_timestamp(time.time())
+            entries += self.label.ljust(11).encode("latin-1", "replace")
+            entries += struct.pack("<B10xHHHI", ATTR_VOLUME, stamp, date, 0, 0)
+        for _, name, extension, size, mtime, first, _ in layout:
+            stamp, date = _dos_timestamp(mtime)
+            entries += name.ljust(8).encode("ascii") + extension.ljust(3).encode("ascii")
+            entries += struct.pack("<B10xHHHI", ATTR_ARCHIVE, stamp, date, first, size)
+        return entries
+    
+    def _copy(self, view, path, offset, size):
+        """Lê um arquivo direto para a região da imagem mapeada"""
+        with open(path, "rb", buffering=0) as f:
+            with view[offset:offset + size] as target:
+                done = 0
+                while done < size:
+                    with target[done:] as rest:
+                        read = f.readinto(rest)
+                    if not read:
+                        raise DiskImageError(f"Arquivo mudou durante a cópia: {path}")
+                    done += read
+    
+    @metrics.timer('disk.build')
+    def build(self, files, destination):
+        """
+        Cria a imagem
+        
+        Args:
+            files: Caminhos ou tuplas (caminho, nome dentro da imagem)
+            destination: Arquivo .dsk de saída (substituído ao final)
+        
+        Returns:
+            str: Caminho da imagem criada
+        """
+        destination = os.fspath(destination)
+        layout = self._layout(files)
+        fat = self._fat(layout)
+        directory = self._directory(layout)
+        
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+        tmp_path = destination + ".tmp"
+        try:
+            with open(tmp_path, "w+b") as f:
+                f.truncate(self.total_sectors * SECTOR_SIZE)
+                with mmap.mmap(f.fileno(), 0) as image:
+                    with memoryview(image) as view:
+                        view[0:SECTOR_SIZE] = self.boot_sector
+                        for copy in range(2):
+                            offset = self.fat_offset + copy * len(fat)
+                            view[offset:offset + len(fat)] = fat
+                        view[self.root_offset:self.root_offset + len(directory)] = directory
+                        for path, _, _, size, _, first, _ in layout:
+                            if size:
+                                offset = self.data_offset + (first - 2) * self.cluster_size
+                                self._copy(view, path, offset, size)
+            os.replace(tmp_path, destination)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return destination
+
+
+def build_image(files, destination, size=720, boot_sector=None, label=None):
+    """
+    Cria uma imagem .dsk com os arquivos informados
+    
+    Args:
+        files: Caminhos ou tuplas (caminho, nome dentro da imagem)
+        destination: Arquivo .dsk de saída
+        size: Tamanho do disco em KB (360 ou 720)
+        boot_sector: Boot sector (bytes ou caminho de arquivo, opcional)
+        label: Rótulo do volume (opcional)
+    
+    Returns:
+        str: Caminho da imagem criada
+    """
+    return DiskBuilder(size, boot_sector, label).build(files, destination)
+
+
+def build_many(jobs, size=720, boot_sector=None, max_workers=None):
+    """
+    Cria várias imagens em paralelo
+    
+    A cópia dos dados é feita pelo sistema operacional (readinto no
+    mapeamento), então as threads trabalham de fato em paralelo. Os trabalhos
+    são consumidos conforme as threads ficam livres, com um número limitado
+    em andamento, e podem vir de um gerador.
+    
+    Args:
+        jobs: Iterável de (destino, arquivos) ou (destino, arquivos, rótulo)
+        size: Tamanho dos discos em KB (360 ou 720)
+        boot_sector: Boot sector comum a todas as imagens (opcional)
+        max_workers: Threads usadas (padrão: o do ThreadPoolExecutor)
+    
+    Yields:
+        tuple: (destino, erro ou None), na ordem de conclusão
+    """
+    # Lido uma única vez e compartilhado pelas imagens
+    boot_sector = _load_boot_sector(boot_sector)
+    
+    def run(job):
+        destination, files, label = (tuple(job) + (None,))[:3]
+        try:
+            DiskBuilder(size, boot_sector, label).build(files, destination)
+            return destination, None
+        except (OSError, DiskImageError) as e:
+            return destination, e
+    
+    workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dsk") as executor:
+        limit = workers * 2
+        in_flight = set()
+        for job in jobs:
+            in_flight.add(executor.submit(run, job))
+            if len(in_flight) >= limit:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def build_to_work(name, files, config_manager, **options):
+    """
+    Cria work_directory/<nome>.dsk com arquivos do diretório de trabalho
+    
+    Args:
+        name: Nome da imagem (sem extensão)
+        files: Caminhos relativos a work_directory (ou absolutos)
+        config_manager: Instância do ConfigManager
+        **options: size, boot_sector e label (ver build_image)
+    
+    Returns:
+        str: Caminho da imagem criada
+    """
+    work = config_manager.resolved().work_directory
+    files = [
+        (work / item[0], item[1]) if isinstance(item, tuple) else work / item
+        for item in files
+    ]
+    return build_image(files, work / f"{name}.dsk", **options)
\ No newline at end of file
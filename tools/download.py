@@ -0,0 +1,544 @@
+"""
+Gerenciador de Downloads
+Downloads concorrentes e retomáveis para o diretório de download
+"""
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from core.metrics import metrics
+from tools.identify import store_hashes
+
+
+# Algoritmos de verificação aceitos nos manifestos
+HASH_ALGORITHMS = ('sha1', 'sha256', 'md5', 'crc32')
+
+
+# Respostas HTTP de falha temporária, que justificam novas tentativas
+RETRY_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class DownloadError(Exception):
+    """Falha ao baixar ou verificar um arquivo"""
+    
+    def __init__(self, message, retryable=True):
+        """
+        Args:
+            message: Descrição da falha
+            retryable: Se uma nova tentativa pode dar certo (False para
+                erros permanentes, como HTTP 404)
+        """
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def _content_range_start(value):
+    """Primeiro byte de um cabeçalho 'Content-Range: bytes a-b/c' (None se inválido)"""
+    unit, _, spec = (value or "").partition(" ")
+    start, dash, _ = spec.partition("-")
+    if unit.strip().lower() != "bytes" or not dash or not start.strip().isdigit():
+        return None
+    return int(start)
+
+
+class _Crc32:
+    """Adaptador do zlib.crc32 com a interface de hashlib"""
+    
+    def __init__(self):
+        self.value = 0
+    
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+    
+    def hexdigest(self):
+        return f"{self.value & 0xFFFFFFFF:08x}"
+
+
+def _new_hash(algorithm):
+    return _Crc32() if algorithm == 'crc32' else hashlib.new(algorithm)
+
+
+class DownloadJob:
+    """Um arquivo a ser baixado"""
+    
+    def __init__(self, url, dest, size=None, checksums=None):
+        """
+        Args:
+            url: Endereço HTTP(S) do arquivo
+            dest: Caminho de destino
+            size: Tamanho esperado em bytes (opcional)
+            checksums: Dicionário algoritmo -> hash esperado (opcional)
+        """
+        self.url = url
+        self.dest = str(dest)
+        self.size = size
+        self.checksums = {
+            algorithm: value.lower()
+            for algorithm, value in (checksums or {}).items()
+            if algorithm in HASH_ALGORITHMS and value
+        }
+        self.status = 'pending'
+        self.bytes_done = 0
+        self.total = size
+        self.resumed_from = 0
+        self.digests = {}
+        self.error = None
+    
+    def __repr__(self):
+        return f"DownloadJob({self.url!r}, status={self.status!r})"
+
+
+class SyncResult:
+    """Estatísticas de uma sincronização por manifesto"""
+    
+    def __init__(self):
+        self.checked = 0
+        self.skipped = 0
+        self.downloaded = 0
+        self.failed = 0
+        self.bytes = 0
+        self.duration = 0.0
+        self.jobs = []
+    
+    def __repr__(self):
+        return (
+            f"SyncResult(checked={self.checked}, skipped={self.skipped}, "
+            f"downloaded={self.downloaded}, failed={self.failed}, "
+            f"bytes={self.bytes}, duration={self.duration:.3f})"
+        )
+
+
+class DownloadManager:
+    """Baixa arquivos em paralelo, retomando downloads interrompidos"""
+    
+    CHUNK_SIZE = 256 * 1024
+    MAX_REDIRECTS = 5
+    # Espera (s) antes da segunda tentativa; dobra a cada nova tentativa
+    RETRY_DELAY = 1.0
+    RETRY_DELAY_MAX = 10.0
+    USER_AGENT = "MSXTools/1.0"
+    
+    def __init__(self, config_manager, db_manager=None, dest_dir=None,
+                 max_workers=4, max_per_host=2, timeout=30, retries=3):
+        """
+        Inicializa o gerenciador
+        
+        Args:
+            config_manager: Instância do ConfigManager
+            db_manager: DatabaseManager para reaproveitar o cache de hashes
+                (opcional)
+            dest_dir: Diretório de destino (padrão: download_directory)
+            max_workers: Downloads simultâneos
+            max_per_host: Conexões simultâneas por servidor
+            timeout: Tempo limite de rede em segundos
+            retries: Tentativas por arquivo
+        """
+        self.db = db_manager
+        if dest_dir is None:
+            dest_dir = config_manager.resolved().download_directory
+        self.dest_dir = str(dest_dir)
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self._local = threading.local()
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+        self._all_connections = []
+    
+    def _host_slot(self, key):
+        """Semáforo que limita as conexões simultâneas a um servidor"""
+        with self._host_lock:
+            slot = self._host_slots.get(key)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._host_slots[key] = slot
+            return slot
+    
+    def _connection(self, key):
+        """
+        Retorna a conexão desta thread com o servidor, reaproveitando-a
+        
+        Args:
+            key: Tupla (esquema, host, porta)
+        """
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+        
+        conn = connections.get(key)
+        if conn is None:
+            scheme, host, port = key
+            cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            conn = cls(host, port, timeout=self.timeout)
+            connections[key] = conn
+            with self._host_lock:
+                self._all_connections.append(conn)
+        return conn
+    
+    def _drop_connection(self, key):
+        connections = getattr(self._local, 'connections', {})
+        conn = connections.pop(key, None)
+        if conn is not None:
+            conn.close()
+            with self._host_lock:
+                self._all_connections.remove(conn)
+    
+    def close(self):
+        """Fecha todas as conexões abertas"""
+        with self._host_lock:
+            connections = self._all_connections
+            self._all_connections = []
+        for conn in connections:
+            conn.close()
+    
+    def _request(self, url, headers):
+        """
+        Faz um GET seguindo redirecionamentos
+        
+        Returns:
+            tuple: (chave da conexão, resposta HTTP)
+        """
+        for _ in range(self.MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https'):
+                raise DownloadError(f"Esquema não suportado: {url}", retryable=False)
+            port = parts.port or (443 if parts.scheme == 'https' else 80)
+            key = (parts.scheme, parts.hostname, port)
+            target = parts.path or "/"
+            if parts.query:
+                target += "?" + parts.query
+            
+            conn = self._connection(key)
+            try:
+                conn.request("GET", target, headers=headers)
+                response = conn.getresponse()
+            except (OSError, http.client.HTTPException):
+                # Conexão reaproveitada pode ter sido fechada pelo servidor
+                self._drop_connection(key)
+                conn = self._connection(key)
+                conn.request("GET", target, headers=headers)
+                response = conn.getresponse()
+            
+            if response.status in (301, 302, 303, 307, 308):
+                location = response.getheader("Location")
+                response.read()
+                if not location:
+                    raise DownloadError(
+                        f"Redirecionamento sem destino: {url}", retryable=False
+                    )
+                url = urljoin(url, location)
+                continue
+            return key, response
+        
+        raise DownloadError(f"Redirecionamentos demais: {url}", retryable=False)
+    
+    def _hash_partial(self, path, hashers):
+        """Alimenta os hashes com o conteúdo já baixado de um .part"""
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+    
+    def _fetch(self, job, progress=None):
+        """
+        Baixa um arquivo para <destino>.part e o move ao terminar
+        
+        Args:
+            job: DownloadJob
+            progress: Função chamada com o job a cada trecho recebido
+        """
+        part_path = job.dest + ".part"
+        os.makedirs(os.path.dirname(job.dest) or ".", exist_ok=True)
+        
+        algorithms = set(job.checksums) | {'sha1', 'crc32'}
+        hashers = {algorithm: _new_hash(algorithm) for algorithm in algorithms}
+        
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if job.size is not None and offset > job.size:
+            offset = 0
+        
+        headers = {"User-Agent": self.USER_AGENT, "Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        
+        parts = urlsplit(job.url)
+        slot = self._host_slot((parts.scheme, parts.hostname))
+        restart = False
+        with slot:
+            key, response = self._request(job.url, headers)
+            try:
+                if response.status == 416 and offset:
+                    # O .part já contém o arquivo inteiro
+                    response.read()
+                    mode = None
+                elif response.status == 206 and offset:
+                    # Trecho que não começa no fim do .part corromperia o arquivo
+                    if _content_range_start(response.getheader("Content-Range")) != offset:
+                        restart = True
+                    mode = "ab"
+                elif response.status == 200:
+                    offset = 0
+                    mode = "wb"
+                else:
+                    response.read()
+                    raise DownloadError(
+                        f"HTTP {response.status} {response.reason}: {job.url}",
+                        retryable=response.status in RETRY_STATUS
+                    )
+                
+                if restart:
+                    # A conexão é descartada sem ler o corpo
+                    self._drop_connection(key)
+                    mode = None
+                
+                job.resumed_from = offset
+                if offset:
+                    self._hash_partial(part_path, hashers)
+                
+                length = response.getheader("Content-Length")
+                if length is not None and mode is not None:
+                    job.total = offset + int(length)
+                job.bytes_done = offset
+                
+                if mode is not None:
+                    with open(part_path, mode) as f:
+                        while True:
+                            chunk = response.read(self.CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                            for hasher in hashers.values():
+                                hasher.update(chunk)
+                            job.bytes_done += len(chunk)
+                            if progress:
+                                progress(job)
+            except Exception:
+                self._drop_connection(key)
+                raise
+            if not restart and response.getheader("Connection", "").lower() == "close":
+                self._drop_connection(key)
+        
+        if restart:
+            # Recomeça do zero, sem Range
+            os.remove(part_path)
+            return self._fetch(job, progress)
+        
+        job.digests = {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+        self._verify(job, part_path)
+        os.replace(part_path, job.dest)
+        self._remember_hashes(job)
+    
+    def _verify(self, job, part_path):
+        """Confere tamanho e hashes; descarta o .part se não baterem"""
+        size = os.path.getsize(part_path)
+        problems = []
+        if job.size is not None and size != job.size:
+            problems.append(f"tamanho {size} != {job.size}")
+        for algorithm, expected in job.checksums.items():
+            if job.digests[algorithm] != expected:
+                problems.append(f"{algorithm} {job.digests[algorithm]} != {expected}")
+        if problems:
+            os.remove(part_path)
+            raise DownloadError(f"Verificação falhou para {job.url}: " + ", ".join(problems))
+    
+    def _remember_hashes(self, job):
+        """Guarda os hashes calculados no cache de hashes do banco"""
+        if self.db is None:
+            return
+        stat = os.stat(job.dest)
+        store_hashes(self.db, [(
+            os.path.abspath(job.dest), stat.st_size, stat.st_mtime_ns,
+            job.digests['crc32'], job.digests['sha1']
+        )])
+    
+    def _run_job(self, job, progress=None):
+        """Executa um job com novas tentativas em caso de falha"""
+        job.status = 'running'
+        for attempt in range(self.retries):
+            try:
+                self._fetch(job, progress)
+                job.status = 'done'
+                job.error = None
+                break
+            except (OSError, http.client.HTTPException, DownloadError) as e:
+                job.error = e
+                # Erros permanentes (404, 403, 410...) não melhoram com novas tentativas
+                if isinstance(e, DownloadError) and not e.retryable:
+                    job.status = 'failed'
+                    break
+                if attempt + 1 < self.retries:
+                    time.sleep(min(self.RETRY_DELAY * 2 ** attempt, self.RETRY_DELAY_MAX))
+        else:
+            job.status = 'failed'
+        if job.status == 'failed':
+            metrics.error('download', job.error)
+        if progress:
+            progress(job)
+        return job
+    
+    def download(self, url, dest=None, size=None, checksums=None, progress=None):
+        """
+        Baixa um único arquivo
+        
+        Args:
+            url: Endereço do arquivo
+            dest: Caminho de destino (padrão: nome da URL no diretório de download)
+            size: Tamanho esperado (opcional)
+            checksums: Hashes esperados (opcional)
+            progress: Função chamada com o job (opcional)
+        
+        Returns:
+            DownloadJob concluído
+        
+        Raises:
+            ValueError: Se dest não for dado e a URL não tiver nome de arquivo
+            DownloadError: Se o download falhar
+        """
+        if dest is None:
+            name = os.path.basename(urlsplit(url).path)
+            if not name:
+                raise ValueError(f"Não foi possível obter o nome do arquivo de {url}")
+            dest = os.path.join(self.dest_dir, name)
+        job = self._run_job(DownloadJob(url, dest, size, checksums), progress)
+        if job.status == 'failed':
+            raise DownloadError(str(job.error))
+        return job
+    
+    def download_many(self, jobs, progress=None):
+        """
+        Baixa vários arquivos em paralelo
+        
+        Args:
+            jobs: Lista de DownloadJob
+            progress: Função chamada com o job a cada atualização (opcional)
+        
+        Returns:
+            list: Os mesmos jobs, com status 'done' ou 'failed'
+        """
+        jobs = list(jobs)
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="download"
+        ) as executor:
+            list(executor.map(lambda job: self._run_job(job, progress), jobs))
+        return jobs
+    
+    def load_manifest(self, source):
+        """
+        Carrega um manifesto JSON de um arquivo local ou URL
+        
+        Formato:
+            {"base_url": "...", "files": [{"path": "...", "url": "...",
+             "size": 123, "sha1": "..."}]}
+        
+        Args:
+            source: Caminho ou URL do manifesto
+        
+        Returns:
+            dict com o manifesto
+        """
+        if urlsplit(source).scheme in ('http', 'https'):
+            key, response = self._request(source, {"User-Agent": self.USER_AGENT})
+            body = response.read()
+            if response.status != 200:
+                raise DownloadError(f"HTTP {response.status} ao ler manifesto {source}")
+            manifest = json.loads(body.decode("utf-8"))
+            manifest.setdefault('base_url', source)
+            return manifest
+        with open(source, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def _local_sha1(self, path, stat):
+        """SHA1 de um arquivo local, usando o cache de hashes quando possível"""
+        path = os.path.abspath(path)
+        if self.db is not None:
+            cached = self.db.fetch_one(
+                "SELECT size, mtime_ns, sha1 FROM file_hashes WHERE path = ?",
+                (path,)
+            )
+            if cached and (cached['size'], cached['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+                return cached['sha1']
+        return None
+    
+    def _needs_download(self, entry, dest):
+        """Indica se o arquivo local difere da entrada do manifesto"""
+        try:
+            stat = os.stat(dest)
+        except FileNotFoundError:
+            return True
+        if entry.get('size') is not None and stat.st_size != entry['size']:
+            return True
+        
+        expected = {a: entry[a].lower() for a in HASH_ALGORITHMS if entry.get(a)}
+        if not expected:
+            return False
+        if 'sha1' in expected:
+            cached = self._local_sha1(dest, stat)
+            if cached is not None:
+                return cached != expected['sha1']
+        
+        hashers = {algorithm: _new_hash(algorithm) for algorithm in expected}
+        with open(dest, "rb") as f:
+            while True:
+                chunk = f.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+        return any(hashers[a].hexdigest() != v for a, v in expected.items())
+    
+    def sync(self, manifest, progress=None):
+        """
+        Baixa apenas os arquivos do manifesto que faltam ou mudaram
+        
+        Args:
+            manifest: Manifesto (dict) ou caminho/URL de um manifesto
+            progress: Função chamada com o job a cada atualização (opcional)
+        
+        Returns:
+            SyncResult com as estatísticas
+        """
+        started = time.perf_counter()
+        if not isinstance(manifest, dict):
+            manifest = self.load_manifest(manifest)
+        
+        result = SyncResult()
+        root = os.path.realpath(self.dest_dir)
+        base_url = manifest.get('base_url', '')
+        jobs = []
+        
+        for entry in manifest.get('files', []):
+            result.checked += 1
+            relative = entry['path'].replace("\\", "/")
+            dest = os.path.realpath(os.path.join(root, relative))
+            if dest == root or os.path.commonpath([dest, root]) != root:
+                raise DownloadError(f"Caminho inválido no manifesto: {entry['path']}")
+            
+            if not self._needs_download(entry, dest):
+                result.skipped += 1
+                continue
+            
+            url = entry.get('url') or urljoin(base_url, relative)
+            checksums = {a: entry[a] for a in HASH_ALGORITHMS if entry.get(a)}
+            jobs.append(DownloadJob(url, dest, entry.get('size'), checksums))
+        
+        result.jobs = self.download_many(jobs, progress)
+        for job in result.jobs:
+            if job.status == 'done':
+                result.downloaded += 1
+                result.bytes += job.bytes_done - job.resumed_from
+            else:
+                result.failed += 1
+        
+        result.duration = time.perf_counter() - started
+        return result
\ No newline at end of file
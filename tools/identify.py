@@ -0,0 +1,391 @@
+"""
+Identificação de Dumps
+Calcula CRC32/SHA1 dos arquivos e os compara com a base de software local
+"""
+import hashlib
+import os
+import time
+import zlib
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+from core.metrics import metrics
+from core.tasks import PROCESS_CONTEXT
+
+
+# Tamanho dos blocos lidos ao calcular os hashes
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Elementos de <dump> que descrevem uma mídia com hash
+DUMP_MEDIA = ('rom', 'megarom', 'sccplusrom', 'dsk', 'cas')
+
+
+def hash_file(path):
+    """
+    Calcula CRC32 e SHA1 de um arquivo (executa num processo do pool)
+    
+    Args:
+        path: Caminho do arquivo
+    
+    Returns:
+        tuple: (path, crc32, sha1) ou (path, None, None) em caso de erro
+    """
+    crc = 0
+    sha1 = hashlib.sha1()
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                crc = zlib.crc32(chunk, crc)
+                sha1.update(chunk)
+    except OSError:
+        return path, None, None
+    return path, f"{crc & 0xFFFFFFFF:08x}", sha1.hexdigest()
+
+
+def store_hashes(db_manager, rows, batch_size=None):
+    """
+    Grava hashes no cache file_hashes, em transações de batch_size linhas
+    
+    Args:
+        db_manager: Instância do DatabaseManager
+        rows: Iterável (pode ser um gerador) de (path, size, mtime_ns, crc32, sha1)
+        batch_size: Linhas por transação (padrão do DatabaseManager)
+    
+    Returns:
+        int: Quantidade de linhas gravadas
+    """
+    return db_manager.upsert(
+        "file_hashes",
+        ("path", "size", "mtime_ns", "crc32", "sha1"),
+        rows,
+        conflict="path",
+        update={
+            "size": "excluded.size",
+            "mtime_ns": "excluded.mtime_ns",
+            "crc32": "excluded.crc32",
+            "sha1": "excluded.sha1",
+            "hashed_at": "CURRENT_TIMESTAMP"
+        },
+        batch_size=batch_size
+    )
+
+
+class IdentifyResult:
+    """Estatísticas de uma execução da identificação"""
+    
+    def __init__(self):
+        self.files = 0
+        self.hashed = 0
+        self.cached = 0
+        self.errors = 0
+        self.identified = 0
+        self.duration = 0.0
+    
+    def __repr__(self):
+        return (
+            f"IdentifyResult(files={self.files}, hashed={self.hashed}, "
+            f"cached={self.cached}, errors={self.errors}, "
+            f"identified={self.identified}, duration={self.duration:.3f})"
+        )
+
+
+class Identifier:
+    """Identifica dumps MSX pelo hash usando uma softwaredb.xml importada"""
+    
+    # Extensões dos arquivos identificados
+    EXTENSIONS = frozenset({'rom', 'mx1', 'mx2', 'dsk', 'cas'})
+    
+    # Diretórios configurados onde os dumps são procurados
+    SEARCH_DIRECTORIES = ('download_directory', 'work_directory')
+    
+    # Quantidade de hashes gravados por transação
+    BATCH_SIZE = 1000
+    
+    def __init__(self, db_manager, config_manager, max_workers=None):
+        """
+        Inicializa o identificador
+        
+        Args:
+            db_manager: Instância do DatabaseManager
+            config_manager: Instância do ConfigManager
+            max_workers: Processos usados para calcular hashes
+        """
+        self.db = db_manager
+        self.config_manager = config_manager
+        self.max_workers = max_workers or os.cpu_count() or 1
+    
+    def import_softwaredb(self, xml_path, force=False):
+        """
+        Importa uma softwaredb.xml para as tabelas indexadas do banco
+        
+        A importação é ignorada se o arquivo não mudou desde a última vez.
+        
+        Args:
+            xml_path: Caminho da softwaredb.xml
+            force: Reimporta mesmo se o arquivo não mudou
+        
+        Returns:
+            bool: True se o arquivo foi (re)importado
+        """
+        xml_path = os.path.abspath(xml_path)
+        stat = os.stat(xml_path)
+        
+        if not force:
+            previous = self.db.fetch_one(
+                "SELECT size, mtime_ns FROM softwaredb_imports WHERE path = ?",
+                (xml_path,)
+            )
+            if previous and (previous['size'], previous['mtime_ns']) == (
+                stat.st_size, stat.st_mtime_ns
+            ):
+                return False
+        
+        software_count = 0
+        dump_count = 0
+        
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM softwaredb_dumps")
+            conn.execute("DELETE FROM softwaredb_software")
+            conn.execute("DELETE FROM softwaredb_imports")
+            
+            for software, dumps in self._parse_softwaredb(xml_path):
+                cursor = conn.execute(
+                    """
+                    INSERT INTO softwaredb_software (
+                        title, company, year, country, system, genmsxid
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    software
+                )
+                software_id = cursor.lastrowid
+                conn.executemany(
+                    """
+                    INSERT INTO softwaredb_dumps (
+                        software_id, sha1, media, mapper, start, original, remark
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [(software_id,) + dump for dump in dumps]
+                )
+                software_count += 1
+                dump_count += len(dumps)
+            
+            conn.execute(
+                """
+                INSERT INTO softwaredb_imports (
+                    path, size, mtime_ns, software_count, dump_count
+                ) VALUES (?, ?, ?, ?, ?)
+                """,
+                (xml_path, stat.st_size, stat.st_mtime_ns, software_count, dump_count)
+            )
+        return True
+    
+    def _parse_softwaredb(self, xml_path):
+        """
+        Lê a softwaredb.xml de forma incremental
+        
+        Args:
+            xml_path: Caminho da softwaredb.xml
+        
+        Yields:
+            tuple: (campos do software, lista de campos dos dumps)
+        """
+        root = None
+        for event, element in ET.iterparse(xml_path, events=("start", "end")):
+            if root is None:
+                root = element
+            if event != "end" or element.tag != "software":
+                continue
+            
+            software = (
+                element.findtext("title", "").strip(),
+                element.findtext("company"),
+                element.findtext("year"),
+                element.findtext("country"),
+                element.findtext("system"),
+                element.findtext("genmsxid")
+            )
+            
+            dumps = []
+            for dump in element.iter("dump"):
+                original = dump.find("original")
+                original_text = original.text if original is not None else None
+                for media in dump:
+                    if media.tag not in DUMP_MEDIA:
+                        continue
+                    for hash_element in media.iter("hash"):
+                        if not hash_element.text:
+                            continue
+                        dumps.append((
+                            hash_element.text.strip().lower(),
+                            media.tag,
+                            media.findtext("type"),
+                            media.findtext("start"),
+                            original_text,
+                            media.findtext("remark")
+                        ))
+            
+            # Solta os <software> já lidos da raiz, mantendo a memória constante
+            root.clear()
+            yield software, dumps
+    
+    def _iter_files(self):
+        """
+        Percorre os diretórios de busca
+        
+        Yields:
+            tuple: (path, size, mtime_ns) de cada arquivo identificável
+        """
+        resolved = self.config_manager.resolved()
+        stack = [str(resolved.path(key)) for key in self.SEARCH_DIRECTORIES]
+        seen = set()
+        
+        while stack:
+            directory = stack.pop()
+            if directory in seen:
+                continue
+            seen.add(directory)
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            _, dot, ext = entry.name.rpartition('.')
+                            if not dot or ext.lower() not in self.EXTENSIONS:
+                                continue
+                            if not entry.is_file():
+                                continue
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        yield entry.path, stat.st_size, stat.st_mtime_ns
+            except OSError:
+                continue
+    
+    @metrics.timer('identify.hash_files')
+    def hash_files(self, progress=None):
+        """
+        Garante que todos os arquivos tenham hashes atualizados no cache
+        
+        Arquivos cujo (caminho, tamanho, mtime_ns) não mudaram não são lidos.
+        
+        Args:
+            progress: Função chamada com (processados, total) (opcional)
+        
+        Returns:
+            IdentifyResult com as estatísticas
+        """
+        started = time.perf_counter()
+        result = IdentifyResult()
+        
+        cached = {
+            path: (size, mtime_ns)
+            for path, size, mtime_ns in self.db.iter_rows(
+                "SELECT path, size, mtime_ns FROM file_hashes", row_type='tuple'
+            )
+        }
+        
+        stale = {}
+        for path, size, mtime_ns in self._iter_files():
+            result.files += 1
+            if cached.pop(path, None) == (size, mtime_ns):
+                result.cached += 1
+            else:
+                stale[path] = (size, mtime_ns)
+        
+        # O que sobrou no cache sob os diretórios de busca não existe mais
+        resolved = self.config_manager.resolved()
+        prefixes = tuple(
+            os.path.join(str(resolved.path(key)), '')
+            for key in self.SEARCH_DIRECTORIES
+        )
+        missing = [(path,) for path in cached if path.startswith(prefixes)]
+        del cached
+        if missing:
+            with self.db.transaction() as conn:
+                conn.executemany("DELETE FROM file_hashes WHERE path = ?", missing)
+        
+        if stale:
+            store_hashes(self.db, self._hash_stale(stale, result, progress), self.BATCH_SIZE)
+        
+        result.duration = time.perf_counter() - started
+        return result
+    
+    def _hash_stale(self, stale, result, progress):
+        """
+        Calcula os hashes pendentes no pool de processos
+        
+        Yields:
+            tuple: (path, size, mtime_ns, crc32, sha1) de cada arquivo lido
+        """
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=PROCESS_CONTEXT
+        ) as executor:
+            chunksize = max(1, min(64, len(stale) // (self.max_workers * 4)))
+            for done, (path, crc32, sha1) in enumerate(
+                executor.map(hash_file, stale, chunksize=chunksize), 1
+            ):
+                if crc32 is None:
+                    result.errors += 1
+                else:
+                    size, mtime_ns = stale[path]
+                    result.hashed += 1
+                    yield path, size, mtime_ns, crc32, sha1
+                if progress:
+                    progress(done, len(stale))
+    
+    def identify(self, progress=None):
+        """
+        Atualiza os hashes e retorna a identificação de cada arquivo
+        
+        Args:
+            progress: Função chamada com (processados, total) (opcional)
+        
+        Returns:
+            tuple: (IdentifyResult, lista de registros identificados)
+        """
+        result = self.hash_files(progress)
+        matches = self.matches()
+        result.identified = len({row['path'] for row in matches})
+        return result, matches
+    
+    def matches(self):
+        """
+        Lista os arquivos cujo SHA1 consta na base de software
+        
+        Returns:
+            list: Registros com caminho, hashes e dados do software
+        """
+        return self.db.fetch_all("""
+            SELECT h.path, h.crc32, h.sha1, s.title, s.company, s.year,
+                   s.country, d.media, d.mapper, d.remark
+            FROM file_hashes h
+            JOIN softwaredb_dumps d ON d.sha1 = h.sha1
+            JOIN softwaredb_software s ON s.id = d.software_id
+            ORDER BY h.path
+        """)
+    
+    def lookup(self, sha1):
+        """
+        Procura um SHA1 na base de software
+        
+        Args:
+            sha1: Hash SHA1 em hexadecimal
+        
+        Returns:
+            list: Softwares com dumps desse hash
+        """
+        return self.db.fetch_all(
+            """
+            SELECT s.title, s.company, s.year, s.country,
+                   d.media, d.mapper, d.remark
+            FROM softwaredb_dumps d
+            JOIN softwaredb_software s ON s.id = d.software_id
+            WHERE d.sha1 = ?
+            """,
+            (sha1.lower(),)
+        )
\ No newline at end of file
@@ -0,0 +1,414 @@
+"""
+Análise de ROMs
+Detecta o mapper de cartuchos MegaROM pelas escritas de troca de banco no
+código Z80 e lê o cabeçalho "AB", com resultados em cache pelo SHA1
+"""
+import hashlib
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.metrics import metrics
+from core.tasks import PROCESS_CONTEXT
+from tools.identify import store_hashes
+
+
+# Nomes dos mappers (os mesmos da softwaredb.xml do openMSX)
+MAPPER_PLAIN = "Normal"
+MAPPER_KONAMI = "Konami"
+MAPPER_KONAMI_SCC = "KonamiSCC"
+MAPPER_ASCII8 = "ASCII8"
+MAPPER_ASCII16 = "ASCII16"
+MAPPER_UNKNOWN = "Unknown"
+
+# Mappers reconhecidos pelas escritas, na ordem de preferência em empates
+MEGAROM_MAPPERS = (MAPPER_KONAMI_SCC, MAPPER_KONAMI, MAPPER_ASCII16, MAPPER_ASCII8)
+
+# Endereços de troca de banco e os mappers que os usam
+SWITCH_ADDRESSES = {
+    0x4000: (MAPPER_KONAMI,),
+    0x8000: (MAPPER_KONAMI,),
+    0xA000: (MAPPER_KONAMI,),
+    0x5000: (MAPPER_KONAMI_SCC,),
+    0x9000: (MAPPER_KONAMI_SCC,),
+    0xB000: (MAPPER_KONAMI_SCC,),
+    0x6000: (MAPPER_KONAMI, MAPPER_ASCII8, MAPPER_ASCII16),
+    0x7000: (MAPPER_KONAMI_SCC, MAPPER_ASCII8, MAPPER_ASCII16),
+    0x6800: (MAPPER_ASCII8,),
+    0x7800: (MAPPER_ASCII8,),
+    0x77FF: (MAPPER_ASCII16,),
+}
+
+# Os mesmos endereços em forma de matriz (endereço x mapper) para a votação
+_ADDRESSES = np.array(sorted(SWITCH_ADDRESSES), dtype=np.intp)
+_VOTES = np.array(
+    [
+        [mapper in SWITCH_ADDRESSES[address] for mapper in MEGAROM_MAPPERS]
+        for address in sorted(SWITCH_ADDRESSES)
+    ],
+    dtype=np.int64
+)
+
+# Opcode Z80 de LD (nnnn),A
+LD_NN_A = 0x32
+
+# Maior ROM sem mapper (64 KB ocupam o espaço de endereçamento inteiro)
+PLAIN_MAX_SIZE = 0x10000
+
+# Extensões dos arquivos analisados
+ROM_EXTENSIONS = ('rom', 'mx1', 'mx2')
+
+# Versão da heurística; resultados de versões anteriores são refeitos
+ANALYSIS_VERSION = 1
+
+
+class RomInfo:
+    """Resultado da análise de uma ROM"""
+    
+    __slots__ = ('size', 'mapper', 'start', 'init', 'statement', 'device',
+                 'text', 'writes')
+    
+    def __init__(self, size, mapper, start=None, init=None, statement=None,
+                 device=None, text=None, writes=0):
+        """
+        Args:
+            size: Tamanho da ROM em bytes
+            mapper: Nome do mapper (MAPPER_*)
+            start: Endereço onde a ROM é carregada (None se desconhecido)
+            init: Endereço de INIT do cabeçalho "AB" (None se não houver)
+            statement: Endereço de STATEMENT do cabeçalho
+            device: Endereço de DEVICE do cabeçalho
+            text: Endereço do programa BASIC do cabeçalho
+            writes: Escritas em endereços de troca de banco encontradas
+        """
+        self.size = size
+        self.mapper = mapper
+        self.start = start
+        self.init = init
+        self.statement = statement
+        self.device = device
+        self.text = text
+        self.writes = writes
+    
+    @property
+    def has_header(self):
+        """Indica se a ROM tem o cabeçalho AB"""
+        return self.init is not None
+    
+    @property
+    def is_megarom(self):
+        return self.mapper != MAPPER_PLAIN
+    
+    def __repr__(self):
+        start = f"0x{self.start:04X}" if self.start is not None else None
+        return f"RomInfo({self.mapper}, size={self.size}, start={start})"
+
+
+def bank_writes(data):
+    """
+    Conta as instruções LD (nnnn),A de cada endereço de troca de banco
+    
+    A ROM inteira é examinada de uma vez: todas as posições com o opcode são
+    localizadas e os endereços de 16 bits seguintes são contados num
+    histograma, sem laço em Python.
+    
+    Args:
+        data: Conteúdo da ROM (bytes, bytearray ou memoryview)
+    
+    Returns:
+        np.ndarray: Contagem por endereço, na ordem de _ADDRESSES
+    """
+    code = np.frombuffer(data, dtype=np.uint8)
+    if len(code) < 3:
+        return np.zeros(len(_ADDRESSES), dtype=np.int64)
+    positions = np.flatnonzero(code[:-2] == LD_NN_A)
+    addresses = code[positions + 1].astype(np.intp) | (code[positions + 2].astype(np.intp) << 8)
+    return np.bincount(addresses, minlength=0x10000)[_ADDRESSES]
+
+
+def guess_mapper(data):
+    """
+    Estima o mapper de uma MegaROM pelas escritas de troca de banco
+    
+    Args:
+        data: Conteúdo da ROM
+    
+    Returns:
+        tuple: (mapper, total de escritas consideradas)
+    """
+    counts = bank_writes(data)
+    votes = counts @ _VOTES
+    # 0x6000 e 0x7000 também aparecem nos Konami; desconta uma escrita dos ASCII
+    for mapper in (MAPPER_ASCII8, MAPPER_ASCII16):
+        index = MEGAROM_MAPPERS.index(mapper)
+        if votes[index]:
+            votes[index] -= 1
+    
+    writes = int(counts.sum())
+    if not votes.any():
+        return MAPPER_UNKNOWN, writes
+    return MEGAROM_MAPPERS[int(np.argmax(votes))], writes
+
+
+def parse_header(data):
+    """
+    Lê o cabeçalho "AB" de uma ROM (no início ou, em ROMs que começam em
+    0x0000, na segunda página)
+    
+    Args:
+        data: Conteúdo da ROM
+    
+    Returns:
+        tuple: (deslocamento do cabeçalho, init, statement, device, text) ou
+            None se não houver cabeçalho
+    """
+    for offset in (0, 0x4000):
+        if len(data) >= offset + 16 and bytes(data[offset:offset + 2]) == b"AB":
+            words = np.frombuffer(data, dtype="<u2", count=4, offset=offset + 2)
+            return (offset,) + tuple(int(word) for word in words)
+    return None
+
+
+def _start_address(size, header):
+    """Endereço de carga de uma ROM sem mapper, deduzido do cabeçalho"""
+    if header is None:
+        return 0x4000 if size <= 0x8000 else 0x0000
+    offset, init, _, _, text = header
+    if offset:
+        return 0x4000 - offset
+    # Programas BASIC em ROM não têm INIT; o texto indica a página
+    page = (init or text) & 0xC000 or 0x4000
+    return page if size <= 0x10000 - page else 0x0000
+
+
+def analyze(data):
+    """
+    Analisa o conteúdo de uma ROM
+    
+    Args:
+        data: Conteúdo da ROM
+    
+    Returns:
+        RomInfo com o mapper e o cabeçalho
+    """
+    size = len(data)
+    header = parse_header(data)
+    fields = header[1:] if header else (None, None, None, None)
+    
+    if size <= PLAIN_MAX_SIZE:
+        writes = int(bank_writes(data).sum())
+        return RomInfo(size, MAPPER_PLAIN, _start_address(size, header), *fields, writes)
+    
+    mapper, writes = guess_mapper(data)
+    # MegaROMs são sempre carregadas a partir de 0x4000
+    return RomInfo(size, mapper, 0x4000, *fields, writes)
+
+
+def analyze_file(path):
+    """
+    Calcula os hashes e analisa uma ROM (executa num processo do pool)
+    
+    Args:
+        path: Caminho do arquivo
+    
+    Returns:
+        tuple: (path, crc32, sha1, RomInfo) ou (path, None, None, None) em
+            caso de erro
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return path, None, None, None
+    crc = zlib.crc32(data) & 0xFFFFFFFF
+    return path, f"{crc:08x}", hashlib.sha1(data).hexdigest(), analyze(data)
+
+
+class AnalyzeResult:
+    """Estatísticas de uma execução da análise"""
+    
+    def __init__(self):
+        self.files = 0
+        self.analyzed = 0
+        self.cached = 0
+        self.errors = 0
+        self.duration = 0.0
+    
+    def __repr__(self):
+        return (
+            f"AnalyzeResult(files={self.files}, analyzed={self.analyzed}, "
+            f"cached={self.cached}, errors={self.errors}, "
+            f"duration={self.duration:.3f})"
+        )
+
+
+class RomAnalyzer:
+    """Analisa ROMs em paralelo, guardando os resultados pelo SHA1"""
+    
+    # Quantidade de análises gravadas por transação
+    BATCH_SIZE = 500
+    
+    def __init__(self, db_manager, max_workers=None):
+        """
+        Inicializa o analisador
+        
+        Args:
+            db_manager: Instância do DatabaseManager
+            max_workers: Processos usados na análise
+        """
+        self.db = db_manager
+        self.max_workers = max_workers or os.cpu_count() or 1
+    
+    def _cached(self):
+        """Análises já gravadas na versão atual da heurística (sha1 -> RomInfo)"""
+        return {
+            row[0]: RomInfo(*row[1:])
+            for row in self.db.iter_rows(
+                """
+                SELECT sha1, size, mapper, start, init, statement, device, text, writes
+                FROM rom_analysis WHERE version = ?
+                """,
+                (ANALYSIS_VERSION,),
+                row_type='tuple'
+            )
+        }
+    
+    def _known_hashes(self, stats):
+        """SHA1 dos arquivos cujo cache de hashes ainda vale (path -> sha1)"""
+        known = {}
+        for path, size, mtime_ns, sha1 in self.db.iter_rows(
+            "SELECT path, size, mtime_ns, sha1 FROM file_hashes", row_type='tuple'
+        ):
+            if stats.get(path) == (size, mtime_ns):
+                known[path] = sha1
+        return known
+    
+    def _store(self, rows):
+        """Grava (sha1, RomInfo) no cache de análises"""
+        self.db.upsert(
+            "rom_analysis",
+            ("sha1", "size", "mapper", "start", "init", "statement", "device",
+             "text", "writes", "version"),
+            (
+                (sha1, info.size, info.mapper, info.start, info.init,
+                 info.statement, info.device, info.text, info.writes,
+                 ANALYSIS_VERSION)
+                for sha1, info in rows
+            ),
+            conflict="sha1",
+            update={
+                column: f"excluded.{column}"
+                for column in ("size", "mapper", "start", "init", "statement",
+                               "device", "text", "writes", "version")
+            },
+            batch_size=self.BATCH_SIZE
+        )
+    
+    @metrics.timer('rom.analyze')
+    def analyze(self, paths, progress=None):
+        """
+        Analisa ROMs, lendo apenas as que não estão no cache
+        
+        Arquivos cujo (caminho, tamanho, mtime_ns) consta no cache de hashes
+        são localizados pelo SHA1 sem serem abertos. Os demais são lidos uma
+        única vez num processo do pool, que calcula os hashes (gravados também
+        em file_hashes) e faz a análise.
+        
+        Args:
+            paths: Caminhos das ROMs
+            progress: Função chamada com (processados, total) (opcional)
+        
+        Returns:
+            tuple: (AnalyzeResult, dict path -> RomInfo)
+        """
+        started = time.perf_counter()
+        result = AnalyzeResult()
+        
+        stats = {}
+        for path in paths:
+            path = os.path.abspath(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                result.errors += 1
+                continue
+            stats[path] = (stat.st_size, stat.st_mtime_ns)
+        result.files = len(stats)
+        
+        cached = self._cached()
+        infos = {}
+        for path, sha1 in self._known_hashes(stats).items():
+            info = cached.get(sha1)
+            if info is not None:
+                infos[path] = info
+        result.cached = len(infos)
+        del cached
+        
+        pending = [path for path in stats if path not in infos]
+        if pending:
+            hashes = []
+            analyses = {}
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=PROCESS_CONTEXT
+            ) as executor:
+                chunksize = max(1, min(64, len(pending) // (self.max_workers * 4)))
+                for done, (path, crc32, sha1, info) in enumerate(
+                    executor.map(analyze_file, pending, chunksize=chunksize), 1
+                ):
+                    if info is None:
+                        result.errors += 1
+                    else:
+                        result.analyzed += 1
+                        infos[path] = info
+                        analyses[sha1] = info
+                        hashes.append((path, *stats[path], crc32, sha1))
+                    if progress:
+                        progress(result.cached + done, result.files)
+            
+            store_hashes(self.db, hashes, self.BATCH_SIZE)
+            self._store(analyses.items())
+        
+        result.duration = time.perf_counter() - started
+        return result, infos
+    
+    def update(self, progress=None):
+        """
+        Analisa as ROMs do catálogo
+        
+        Args:
+            progress: Função chamada com (processados, total) (opcional)
+        
+        Returns:
+            tuple: (AnalyzeResult, dict path -> RomInfo)
+        """
+        placeholders = ", ".join("?" * len(ROM_EXTENSIONS))
+        paths = [
+            row[0] for row in self.db.iter_rows(
+                f"SELECT path FROM catalog_files WHERE extension IN ({placeholders})",
+                ROM_EXTENSIONS,
+                row_type='tuple'
+            )
+        ]
+        return self.analyze(paths, progress)
+    
+    def lookup(self, sha1):
+        """
+        Procura a análise de um SHA1 no cache
+        
+        Args:
+            sha1: Hash SHA1 em hexadecimal
+        
+        Returns:
+            RomInfo ou None se a ROM ainda não foi analisada
+        """
+        row = self.db.fetch_one(
+            """
+            SELECT size, mapper, start, init, statement, device, text, writes
+            FROM rom_analysis WHERE sha1 = ? AND version = ?
+            """,
+            (sha1.lower(), ANALYSIS_VERSION)
+        )
+        return RomInfo(**row) if row else None
\ No newline at end of file
@@ -0,0 +1,478 @@
+"""
+Imagens SCREEN
+Decodificação vetorizada de telas MSX (SCREEN 2 a 12) e cache de miniaturas
+"""
+import hashlib
+import io
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from core.tasks import PROCESS_CONTEXT
+from core.tempcache import TempCache
+from tools.identify import store_hashes
+
+
+# Cabeçalho dos arquivos gravados com BSAVE
+BLOAD_ID = 0xFE
+BLOAD_HEADER_SIZE = 7
+
+# Tamanho da VRAM endereçável por uma página de tela
+VRAM_SIZE = 0x10000
+
+# Extensão -> modo de tela
+SCREEN_EXTENSIONS = {
+    'sc2': 2, 'grp': 2,
+    'sc4': 4,
+    'sc5': 5, 'ge5': 5, 'sr5': 5,
+    'sc6': 6, 'sr6': 6,
+    'sc7': 7, 'ge7': 7, 'sr7': 7,
+    'sc8': 8, 'sr8': 8,
+    'sca': 10,
+    'scc': 12, 'srs': 12
+}
+
+# Modo -> (largura, altura, endereço da paleta na VRAM, formato dos pixels)
+SCREEN_MODES = {
+    2: (256, 192, 0x1B80, 'pattern'),
+    4: (256, 192, 0x1B80, 'pattern'),
+    5: (256, 212, 0x7680, '4bpp'),
+    6: (512, 212, 0x7680, '2bpp'),
+    7: (512, 212, 0xFA80, '4bpp'),
+    8: (256, 212, None, 'rgb332'),
+    10: (256, 212, 0xFA80, 'yjk_yae'),
+    12: (256, 212, None, 'yjk')
+}
+
+# Paleta padrão do MSX2 (componentes de 3 bits)
+DEFAULT_PALETTE = np.array([
+    (0, 0, 0), (0, 0, 0), (1, 6, 1), (3, 7, 3),
+    (1, 1, 7), (2, 3, 7), (5, 1, 1), (2, 6, 7),
+    (7, 1, 1), (7, 3, 3), (6, 6, 1), (6, 6, 4),
+    (1, 4, 1), (6, 2, 5), (5, 5, 5), (7, 7, 7)
+], dtype=np.uint8)
+
+# Endereços das tabelas da SCREEN 2/4
+PATTERN_TABLE = 0x0000
+NAME_TABLE = 0x1800
+COLOR_TABLE = 0x2000
+
+
+class ScreenError(Exception):
+    """Arquivo de tela inválido ou em formato desconhecido"""
+
+
+def screen_mode(name):
+    """
+    Retorna o modo de tela correspondente à extensão de um arquivo
+    
+    Args:
+        name: Nome ou caminho do arquivo
+    
+    Returns:
+        int: Modo de tela ou None se a extensão não for conhecida
+    """
+    _, dot, ext = os.path.basename(name).rpartition('.')
+    return SCREEN_EXTENSIONS.get(ext.lower()) if dot else None
+
+
+def parse_bload(data):
+    """
+    Separa o cabeçalho BSAVE dos dados
+    
+    Arquivos sem cabeçalho são tratados como um dump da VRAM a partir de 0.
+    
+    Args:
+        data: Conteúdo do arquivo
+    
+    Returns:
+        tuple: (endereço inicial, dados)
+    """
+    if len(data) >= BLOAD_HEADER_SIZE and data[0] == BLOAD_ID:
+        start, end, _ = struct.unpack_from("<HHH", data, 1)
+        if end >= start:
+            payload = data[BLOAD_HEADER_SIZE:BLOAD_HEADER_SIZE + end - start + 1]
+            return start, payload
+    return 0, data
+
+
+def load_vram(data):
+    """
+    Monta a VRAM a partir do conteúdo de um arquivo de tela
+    
+    Args:
+        data: Conteúdo do arquivo (com ou sem cabeçalho BSAVE)
+    
+    Returns:
+        np.ndarray: VRAM com VRAM_SIZE bytes
+    """
+    start, payload = parse_bload(data)
+    vram = np.zeros(VRAM_SIZE, dtype=np.uint8)
+    length = max(0, min(len(payload), VRAM_SIZE - start))
+    vram[start:start + length] = np.frombuffer(payload, dtype=np.uint8, count=length)
+    return vram
+
+
+def parse_palette(data):
+    """
+    Converte 16 registros de paleta do V9938 (2 bytes cada) em RGB de 3 bits
+    
+    Args:
+        data: 32 bytes no formato 0RRR0BBB 00000GGG
+    
+    Returns:
+        np.ndarray (16, 3) ou None se a paleta estiver vazia
+    """
+    raw = np.frombuffer(bytes(data[:32]), dtype=np.uint8)
+    if len(raw) < 32 or not raw.any():
+        return None
+    first, second = raw[0::2], raw[1::2]
+    return np.stack(((first >> 4) & 7, second & 7, first & 7), axis=1)
+
+
+def _palette_rgb(palette):
+    """Expande uma paleta de 3 bits para 8 bits por componente"""
+    return (palette.astype(np.uint16) * 255 // 7).astype(np.uint8)
+
+
+def _decode_pattern(vram):
+    """SCREEN 2/4: padrões 8x8 com duas cores por linha de 8 pixels"""
+    banks = np.arange(768) // 256 * 256
+    names = vram[NAME_TABLE:NAME_TABLE + 768].astype(np.intp) + banks
+    patterns = vram[PATTERN_TABLE:PATTERN_TABLE + 0x1800].reshape(768, 8)[names]
+    colors = vram[COLOR_TABLE:COLOR_TABLE + 0x1800].reshape(768, 8)[names]
+    
+    bits = np.unpackbits(patterns[..., None], axis=-1).astype(bool)
+    pixels = np.where(bits, (colors >> 4)[..., None], (colors & 15)[..., None])
+    return pixels.reshape(24, 32, 8, 8).transpose(0, 2, 1, 3).reshape(192, 256)
+
+
+def _decode_4bpp(vram, width, height):
+    """SCREEN 5/7: dois pixels por byte, o da esquerda no nibble alto"""
+    raw = vram[:width // 2 * height].reshape(height, width // 2)
+    pixels = np.empty((height, width), dtype=np.uint8)
+    pixels[:, 0::2] = raw >> 4
+    pixels[:, 1::2] = raw & 15
+    return pixels
+
+
+def _decode_2bpp(vram, width, height):
+    """SCREEN 6: quatro pixels por byte"""
+    raw = vram[:width // 4 * height].reshape(height, width // 4, 1)
+    shifts = np.array([6, 4, 2, 0], dtype=np.uint8)
+    return ((raw >> shifts) & 3).reshape(height, width)
+
+
+def _decode_rgb332(vram, width, height):
+    """SCREEN 8: um byte por pixel no formato GGGRRRBB"""
+    raw = vram[:width * height].reshape(height, width)
+    rgb = np.empty((height, width, 3), dtype=np.uint8)
+    rgb[..., 0] = ((raw >> 2) & 7).astype(np.uint16) * 255 // 7
+    rgb[..., 1] = (raw >> 5).astype(np.uint16) * 255 // 7
+    rgb[..., 2] = (raw & 3).astype(np.uint16) * 255 // 3
+    return rgb
+
+
+def _signed6(low, high):
+    """Junta dois campos de 3 bits num inteiro de 6 bits com sinal"""
+    value = (low & 7).astype(np.int16) | ((high & 7).astype(np.int16) << 3)
+    return np.where(value >= 32, value - 64, value)
+
+
+def _decode_yjk(vram, width, height, palette=None):
+    """
+    SCREEN 10/12: grupos de 4 pixels com luminância própria e J/K comuns
+    
+    Com palette (SCREEN 10), pixels com o bit A ligado usam a cor da
+    paleta indicada pelos 4 bits altos.
+    """
+    groups = vram[:width * height].reshape(height, width // 4, 4)
+    k = _signed6(groups[..., 0], groups[..., 1])[..., None]
+    j = _signed6(groups[..., 2], groups[..., 3])[..., None]
+    
+    if palette is None:
+        y = (groups >> 3).astype(np.int16)
+    else:
+        y = (groups >> 4).astype(np.int16) << 1
+    
+    rgb = np.stack((y + j, y + k, (5 * y - 2 * j - k) // 4), axis=-1)
+    rgb = (np.clip(rgb, 0, 31) * 255 // 31).astype(np.uint8).reshape(height, width, 3)
+    
+    if palette is not None:
+        flags = ((groups >> 3) & 1).astype(bool).reshape(height, width)
+        codes = (groups >> 4).reshape(height, width)
+        rgb[flags] = _palette_rgb(palette)[codes[flags]]
+    return rgb
+
+
+def decode(data, mode, palette=None):
+    """
+    Decodifica uma tela MSX
+    
+    Args:
+        data: Conteúdo do arquivo (com ou sem cabeçalho BSAVE)
+        mode: Modo de tela (2, 4, 5, 6, 7, 8, 10 ou 12)
+        palette: 32 bytes de paleta externa (opcional); sem ela usa a
+            paleta gravada na VRAM ou a padrão do MSX2
+    
+    Returns:
+        PIL.Image no modo "P" (cores indexadas) ou "RGB"
+    
+    Raises:
+        ScreenError: Se o modo não for suportado
+    """
+    if mode not in SCREEN_MODES:
+        raise ScreenError(f"SCREEN {mode} não suportada")
+    
+    width, height, palette_address, layout = SCREEN_MODES[mode]
+    vram = load_vram(data)
+    
+    colors = parse_palette(palette) if palette is not None else None
+    if colors is None and palette_address is not None:
+        colors = parse_palette(vram[palette_address:palette_address + 32])
+    if colors is None:
+        colors = DEFAULT_PALETTE
+    
+    if layout == 'rgb332':
+        return Image.fromarray(_decode_rgb332(vram, width, height), "RGB")
+    if layout == 'yjk':
+        return Image.fromarray(_decode_yjk(vram, width, height), "RGB")
+    if layout == 'yjk_yae':
+        return Image.fromarray(_decode_yjk(vram, width, height, colors), "RGB")
+    
+    if layout == 'pattern':
+        pixels = _decode_pattern(vram)
+    elif layout == '2bpp':
+        pixels = _decode_2bpp(vram, width, height)
+    else:
+        pixels = _decode_4bpp(vram, width, height)
+    
+    image = Image.fromarray(pixels.astype(np.uint8), "P")
+    image.putpalette(_palette_rgb(colors).tobytes())
+    return image
+
+
+def find_palette_file(path, mode):
+    """
+    Procura o arquivo de paleta do Graph Saurus ao lado da imagem (.PL5, .PL7...)
+    
+    Returns:
+        str: Caminho da paleta ou None
+    """
+    stem, _ = os.path.splitext(path)
+    for ext in (f".pl{mode}", f".PL{mode}"):
+        if os.path.isfile(stem + ext):
+            return stem + ext
+    return None
+
+
+def load(path, mode=None):
+    """
+    Lê e decodifica um arquivo de tela
+    
+    Args:
+        path: Caminho do arquivo
+        mode: Modo de tela (padrão: deduzido da extensão)
+    
+    Returns:
+        PIL.Image
+    
+    Raises:
+        ScreenError: Se o modo não puder ser determinado
+    """
+    mode = mode or screen_mode(path)
+    if mode is None:
+        raise ScreenError(f"Extensão de tela desconhecida: {path}")
+    
+    with open(path, "rb") as f:
+        data = f.read()
+    
+    palette = None
+    palette_path = find_palette_file(path, mode)
+    if palette_path:
+        with open(palette_path, "rb") as f:
+            palette = f.read(32)
+    return decode(data, mode, palette)
+
+
+def square_pixels(image):
+    """Corrige a proporção dos modos de 512 pixels de largura"""
+    if image.width == 512:
+        return image.resize((256, image.height), Image.BOX)
+    return image
+
+
+def render_thumbnail(path, size):
+    """
+    Gera a miniatura PNG de um arquivo de tela (executa num processo do pool)
+    
+    Args:
+        path: Caminho do arquivo
+        size: Tamanho máximo (largura, altura)
+    
+    Returns:
+        tuple: (path, crc32, sha1, png) com png None em caso de erro
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return path, None, None, None
+    
+    crc32 = f"{zlib.crc32(data) & 0xFFFFFFFF:08x}"
+    sha1 = hashlib.sha1(data).hexdigest()
+    try:
+        mode = screen_mode(path)
+        palette = None
+        palette_path = find_palette_file(path, mode)
+        if palette_path:
+            with open(palette_path, "rb") as f:
+                palette = f.read(32)
+        image = square_pixels(decode(data, mode, palette)).convert("RGB")
+        image.thumbnail(size, Image.BOX)
+        output = io.BytesIO()
+        image.save(output, "PNG")
+        return path, crc32, sha1, output.getvalue()
+    except (ScreenError, ValueError, OSError):
+        return path, crc32, sha1, None
+
+
+class ThumbnailCache(TempCache):
+    """Miniaturas de telas sob o work_directory, indexadas pelo SHA1 do arquivo"""
+    
+    DIRECTORY_KEY = "work_directory"
+    TABLE = "thumbnail_cache"
+    CACHE_DIRECTORY = ".thumbnails"
+    STAGING_DIRECTORY = ".thumbnails-staging"
+    
+    # Limite padrão do cache de miniaturas
+    QUOTA = 256 * 1024 * 1024
+    
+    # Tamanho máximo padrão das miniaturas
+    SIZE = (128, 128)
+    
+    # Caminhos consultados por instrução SQL
+    LOOKUP_BATCH = 500
+    
+    def __init__(self, db_manager, config_manager, quota=None, size=None,
+                 max_workers=None):
+        """
+        Inicializa o cache de miniaturas
+        
+        Args:
+            db_manager: Instância do DatabaseManager
+            config_manager: Instância do ConfigManager
+            quota: Limite em bytes (padrão: QUOTA)
+            size: Tamanho máximo das miniaturas (padrão: SIZE)
+            max_workers: Processos usados para gerar miniaturas
+        """
+        super().__init__(db_manager, config_manager, quota or self.QUOTA)
+        self.size = tuple(size or self.SIZE)
+        self.max_workers = max_workers or os.cpu_count() or 1
+    
+    def key_for(self, sha1):
+        """Chave da miniatura de um arquivo com esse SHA1"""
+        return self.derived_key('thumbnail', sha1, *self.size)
+    
+    def _known_hashes(self, paths):
+        """
+        Busca no cache de hashes os SHA1 ainda válidos dos arquivos
+        
+        Returns:
+            dict: path -> sha1 dos arquivos que não mudaram desde o cálculo
+        """
+        known = {}
+        for index in range(0, len(paths), self.LOOKUP_BATCH):
+            batch = paths[index:index + self.LOOKUP_BATCH]
+            rows = self.db.fetch_all(
+                "SELECT path, size, mtime_ns, sha1 FROM file_hashes "
+                f"WHERE path IN ({', '.join('?' * len(batch))})",
+                batch
+            )
+            for row in rows:
+                try:
+                    stat = os.stat(row['path'])
+                except OSError:
+                    continue
+                if (stat.st_size, stat.st_mtime_ns) == (row['size'], row['mtime_ns']):
+                    known[row['path']] = row['sha1']
+        return known
+    
+    def cached(self, path):
+        """
+        Retorna a miniatura já gerada de um arquivo, sem decodificá-lo
+        
+        Args:
+            path: Caminho do arquivo de tela
+        
+        Returns:
+            Path da miniatura PNG ou None
+        """
+        path = os.path.abspath(path)
+        sha1 = self._known_hashes([path]).get(path)
+        return self.get(self.key_for(sha1)) if sha1 else None
+    
+    def thumbnails(self, paths, progress=None):
+        """
+        Garante miniaturas para vários arquivos
+        
+        As que já existem são retornadas direto; as demais são geradas em
+        paralelo num pool de processos.
+        
+        Args:
+            paths: Caminhos dos arquivos de tela
+            progress: Função chamada com (geradas, total a gerar) (opcional)
+        
+        Returns:
+            dict: path -> Path da miniatura (arquivos inválidos ficam de fora)
+        """
+        paths = [os.path.abspath(path) for path in paths]
+        result = {}
+        for path, sha1 in self._known_hashes(paths).items():
+            thumbnail = self.get(self.key_for(sha1))
+            if thumbnail is not None:
+                result[path] = thumbnail
+        missing = [path for path in paths if path not in result]
+        if not missing:
+            return result
+        
+        hashes = []
+        for done, (path, crc32, sha1, png) in enumerate(self._render(missing), 1):
+            if sha1 is not None:
+                try:
+                    stat = os.stat(path)
+                    hashes.append((path, stat.st_size, stat.st_mtime_ns, crc32, sha1))
+                except OSError:
+                    pass
+            if png is not None:
+                key = self.put_bytes(png, key=self.key_for(sha1))
+                result[path] = self.path_of(key)
+            if progress:
+                progress(done, len(missing))
+        
+        store_hashes(self.db, hashes)
+        return result
+    
+    def _render(self, paths):
+        """
+        Gera as miniaturas, num pool de processos quando há mais de uma
+        
+        Yields:
+            tuple: Resultados de render_thumbnail()
+        """
+        if len(paths) == 1:
+            yield render_thumbnail(paths[0], self.size)
+            return
+        
+        workers = min(self.max_workers, len(paths))
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=PROCESS_CONTEXT
+        ) as executor:
+            chunksize = max(1, min(32, len(paths) // (workers * 4)))
+            yield from executor.map(
+                render_thumbnail, paths, [self.size] * len(paths), chunksize=chunksize
+            )
\ No newline at end of file
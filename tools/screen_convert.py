@@ -0,0 +1,508 @@
+"""
+Conversão para SCREEN
+Converte imagens comuns (PNG, JPEG...) em telas MSX SCREEN 2/5/8/12, com
+otimização de paleta e pontilhado vetorizados com NumPy
+"""
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from core.tasks import PROCESS_CONTEXT
+from tools.screen import BLOAD_ID, DEFAULT_PALETTE
+
+
+# Modo -> (largura, altura, extensão, último endereço gravado pelo BSAVE)
+TARGETS = {
+    2: (256, 192, ".sc2", 0x37FF),
+    5: (256, 212, ".sc5", 0x769F),
+    8: (256, 212, ".sc8", 0xD3FF),
+    12: (256, 212, ".scc", 0xD3FF)
+}
+
+# Formas de pontilhado aceitas
+DITHER_MODES = ('none', 'ordered', 'floyd')
+
+# Endereços da paleta gravada junto com a tela
+PALETTE_ADDRESS = {2: 0x1B80, 5: 0x7680}
+
+# Extensões de imagem convertidas em lote
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp'})
+
+# Matriz de Bayer 8x8 normalizada para [0, 1)
+BAYER_8 = np.array([
+    [0, 32, 8, 40, 2, 34, 10, 42],
+    [48, 16, 56, 24, 50, 18, 58, 26],
+    [12, 44, 4, 36, 14, 46, 6, 38],
+    [60, 28, 52, 20, 62, 30, 54, 22],
+    [3, 35, 11, 43, 1, 33, 9, 41],
+    [51, 19, 59, 27, 49, 17, 57, 25],
+    [15, 47, 7, 39, 13, 45, 5, 37],
+    [63, 31, 55, 23, 61, 29, 53, 21]
+], dtype=np.float32) / 64
+
+# Componentes de 3 bits em 0-255
+LEVELS_3 = np.arange(8, dtype=np.float32) * 255 / 7
+
+
+class ConvertError(Exception):
+    """Parâmetros de conversão inválidos"""
+
+
+class ConvertResult:
+    """Estatísticas de uma conversão em lote"""
+    
+    def __init__(self):
+        self.converted = 0
+        self.errors = []
+        self.duration = 0.0
+    
+    def __repr__(self):
+        return (
+            f"ConvertResult(converted={self.converted}, "
+            f"errors={len(self.errors)}, duration={self.duration:.3f})"
+        )
+
+
+def prepare(image, size, fit="contain"):
+    """
+    Redimensiona a imagem para a tela de destino
+    
+    Args:
+        image: PIL.Image de origem
+        size: (largura, altura) da tela
+        fit: "contain" mantém a proporção com bordas pretas,
+            "cover" mantém a proporção cortando as sobras e
+            "stretch" distorce para preencher
+    
+    Returns:
+        np.ndarray (altura, largura, 3) float32 em 0-255
+    """
+    image = image.convert("RGB")
+    width, height = size
+    if fit == "stretch":
+        resized = image.resize(size, Image.LANCZOS)
+    elif fit in ("contain", "cover"):
+        scale = (min if fit == "contain" else max)(width / image.width, height / image.height)
+        scaled = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(scaled, Image.LANCZOS)
+        resized = Image.new("RGB", size)
+        resized.paste(image, ((width - scaled[0]) // 2, (height - scaled[1]) // 2))
+    else:
+        raise ConvertError(f"Ajuste desconhecido: {fit}")
+    return np.asarray(resized, dtype=np.float32)
+
+
+def palette_to_rgb(palette):
+    """Converte uma paleta de 3 bits (16, 3) em RGB float 0-255"""
+    return LEVELS_3[np.asarray(palette, dtype=np.intp)]
+
+
+def palette_bytes(palette):
+    """Codifica uma paleta de 3 bits no formato dos registros do V9938"""
+    palette = np.asarray(palette, dtype=np.uint8)
+    raw = np.empty((16, 2), dtype=np.uint8)
+    raw[:, 0] = (palette[:, 0] << 4) | palette[:, 2]
+    raw[:, 1] = palette[:, 1]
+    return raw.tobytes()
+
+
+def optimize_palette(pixels, colors=16, iterations=10, sample=65536):
+    """
+    Escolhe a melhor paleta de 9 bits (3 bits por componente) para a imagem
+    
+    Usa k-means vetorizado sobre uma amostra dos pixels, partindo do
+    corte mediano do Pillow, e arredonda o resultado para a grade do V9938.
+    
+    Args:
+        pixels: np.ndarray (..., 3) em 0-255
+        colors: Quantidade de cores
+        iterations: Iterações do k-means
+        sample: Pixels amostrados
+    
+    Returns:
+        np.ndarray (colors, 3) uint8 com componentes de 0 a 7
+    """
+    data = pixels.reshape(-1, 3)
+    if len(data) > sample:
+        data = data[np.random.default_rng(0).choice(len(data), sample, replace=False)]
+    
+    seed = Image.fromarray(data.reshape(1, -1, 3).astype(np.uint8), "RGB")
+    seed = seed.quantize(colors, method=Image.Quantize.MEDIANCUT)
+    centers = np.asarray(seed.getpalette()[:colors * 3], dtype=np.float32).reshape(-1, 3)
+    if len(centers) < colors:
+        centers = np.vstack([centers, np.zeros((colors - len(centers), 3), np.float32)])
+    
+    for _ in range(iterations):
+        labels = _nearest_color(data, centers)
+        counts = np.bincount(labels, minlength=colors)[:, None]
+        sums = np.stack([
+            np.bincount(labels, weights=data[:, channel], minlength=colors)
+            for channel in range(3)
+        ], axis=1)
+        moved = np.where(counts > 0, sums / np.maximum(counts, 1), centers)
+        if np.allclose(moved, centers, atol=0.5):
+            break
+        centers = moved
+    
+    palette = np.clip(np.rint(centers * 7 / 255), 0, 7).astype(np.uint8)
+    # Mais escuras primeiro, para a cor 0 (borda) tender ao preto
+    return palette[np.argsort(palette.astype(np.int16).sum(axis=1), kind="stable")]
+
+
+def _nearest_color(values, colors):
+    """Índice da cor mais próxima (distância euclidiana) de cada valor"""
+    # |v - c|² = |v|² - 2 v·c + |c|²; |v|² não muda o argmin
+    distances = (colors * colors).sum(axis=1) - 2 * (values @ colors.T)
+    return distances.argmin(axis=1)
+
+
+def _bayer(height, width):
+    """Matriz de Bayer repetida sobre a tela, centrada em zero"""
+    reps = (-(-height // 8), -(-width // 8))
+    return np.tile(BAYER_8, reps)[:height, :width] - 0.5
+
+
+def _grid(height, width):
+    """Coordenadas (ys, xs) de todos os pixels, achatadas"""
+    ys, xs = np.indices((height, width))
+    return ys.ravel(), xs.ravel()
+
+
+def _quantize(values, nearest, dither, step):
+    """
+    Quantiza uma imagem com o pontilhado escolhido
+    
+    Args:
+        values: np.ndarray (altura, largura, canais)
+        nearest: Função (valores (N, C), ys, xs) -> (índices, valores quantizados)
+        dither: 'none', 'ordered' ou 'floyd'
+        step: Distância típica entre níveis, usada pelo pontilhado ordenado
+    
+    Returns:
+        np.ndarray (altura, largura) com os índices escolhidos
+    """
+    height, width, channels = values.shape
+    if dither == 'floyd':
+        return _error_diffusion(values, nearest)
+    
+    if dither == 'ordered':
+        values = values + _bayer(height, width)[..., None] * step
+    elif dither != 'none':
+        raise ConvertError(f"Pontilhado desconhecido: {dither}")
+    
+    ys, xs = _grid(height, width)
+    indices, _ = nearest(values.reshape(-1, channels), ys, xs)
+    return indices.reshape(height, width)
+
+
+def _error_diffusion(values, nearest):
+    """
+    Floyd-Steinberg processado em frentes de onda
+    
+    Um pixel depende do vizinho à esquerda e dos três de cima, então todos
+    os pixels com o mesmo 2*y + x podem ser quantizados juntos: são cerca
+    de largura + 2*altura passos vetorizados em vez de um por pixel.
+    """
+    height, width, _ = values.shape
+    work = values.astype(np.float32, copy=True)
+    indices = np.zeros((height, width), dtype=np.intp)
+    
+    for wave in range(width + 2 * (height - 1)):
+        first = max(0, (wave - width + 2) // 2)
+        last = min(height - 1, wave // 2)
+        if first > last:
+            continue
+        ys = np.arange(first, last + 1)
+        xs = wave - 2 * ys
+        
+        old = work[ys, xs]
+        chosen, new = nearest(old, ys, xs)
+        indices[ys, xs] = chosen
+        error = old - new
+        
+        right = xs + 1 < width
+        work[ys[right], xs[right] + 1] += error[right] * (7 / 16)
+        
+        below = ys + 1 < height
+        ys_below, xs_below, error_below = ys[below] + 1, xs[below], error[below]
+        work[ys_below, xs_below] += error_below * (5 / 16)
+        left = xs_below > 0
+        work[ys_below[left], xs_below[left] - 1] += error_below[left] * (3 / 16)
+        right = xs_below + 1 < width
+        work[ys_below[right], xs_below[right] + 1] += error_below[right] * (1 / 16)
+    
+    return indices
+
+
+def _palette_nearest(colors):
+    """Função nearest para uma paleta fixa"""
+    def nearest(values, ys, xs):
+        chosen = _nearest_color(values, colors)
+        return chosen, colors[chosen]
+    return nearest
+
+
+def _encode_screen2(pixels, palette, dither):
+    """
+    SCREEN 2: cada linha de 8 pixels de um padrão só pode ter duas cores
+    
+    Para cada segmento, todas as 105 combinações de duas cores (1 a 15)
+    são avaliadas de uma vez; depois cada pixel escolhe entre as duas.
+    """
+    colors = palette_to_rgb(palette)
+    candidates = np.arange(1, 16)
+    first, second = np.triu_indices(len(candidates), k=1)
+    pairs = np.stack((candidates[first], candidates[second]), axis=1)
+    
+    segments = pixels.reshape(192, 32, 8, 3)
+    distances = ((segments[..., None, :] - colors[candidates]) ** 2).sum(axis=-1)
+    costs = np.minimum(distances[..., first], distances[..., second]).sum(axis=2)
+    best = pairs[costs.argmin(axis=-1)]  # (192, 32, 2)
+    
+    def nearest(values, ys, xs):
+        pair = best[ys, xs // 8]
+        options = colors[pair]
+        d = ((values[:, None, :] - options) ** 2).sum(axis=-1)
+        choice = d.argmin(axis=1)
+        chosen = pair[np.arange(len(pair)), choice]
+        return chosen, colors[chosen]
+    
+    indices = _quantize(pixels, nearest, dither, step=64)
+    
+    fg, bg = best[..., 0], best[..., 1]
+    bits = indices.reshape(192, 32, 8) == fg[..., None]
+    patterns = np.packbits(bits, axis=-1)[..., 0]
+    color_bytes = ((fg << 4) | bg).astype(np.uint8)
+    
+    # Tabela de nomes sequencial: o padrão de (linha, coluna) fica em
+    # ((linha // 8) * 32 + coluna) * 8 + linha % 8
+    def to_table(table):
+        return table.reshape(24, 8, 32).transpose(0, 2, 1).tobytes()
+    
+    vram = bytearray(TARGETS[2][3] + 1)
+    vram[0x0000:0x1800] = to_table(patterns)
+    vram[0x1800:0x1B00] = bytes(range(256)) * 3
+    vram[0x1B80:0x1BA0] = palette_bytes(palette)
+    vram[0x2000:0x3800] = to_table(color_bytes)
+    return bytes(vram)
+
+
+def _encode_screen5(pixels, palette, dither):
+    """SCREEN 5: 16 cores de uma paleta de 512, dois pixels por byte"""
+    colors = palette_to_rgb(palette)
+    indices = _quantize(pixels, _palette_nearest(colors), dither, step=48)
+    packed = (indices[:, 0::2] << 4) | indices[:, 1::2]
+    
+    vram = bytearray(TARGETS[5][3] + 1)
+    vram[:packed.size] = packed.astype(np.uint8).tobytes()
+    vram[0x7680:0x76A0] = palette_bytes(palette)
+    return bytes(vram)
+
+
+def _encode_screen8(pixels, dither):
+    """SCREEN 8: 256 cores fixas no formato GGGRRRBB"""
+    steps = np.array([255 / 7, 255 / 7, 255 / 3], dtype=np.float32)
+    
+    def nearest(values, ys, xs):
+        levels = np.clip(np.rint(values / steps), 0, [7, 7, 3]).astype(np.intp)
+        return (levels[:, 1] << 5) | (levels[:, 0] << 2) | levels[:, 2], levels * steps
+    
+    indices = _quantize(pixels, nearest, dither, step=steps)
+    return indices.astype(np.uint8).tobytes()
+
+
+def _encode_screen12(pixels, dither):
+    """
+    SCREEN 12: grupos de 4 pixels com Y próprio e J/K comuns
+    
+    J e K saem da cor média do grupo; o Y de cada pixel é o que minimiza o
+    erro RGB dado o J/K do grupo, e o pontilhado atua só sobre o Y.
+    """
+    height, width = pixels.shape[:2]
+    rgb = pixels * (31 / 255)
+    groups = rgb.reshape(height, width // 4, 4, 3)
+    r, g, b = groups[..., 0], groups[..., 1], groups[..., 2]
+    
+    y_mean = (b / 2 + r / 4 + g / 8).mean(axis=-1)
+    j = np.clip(np.rint(r.mean(axis=-1) - y_mean), -32, 31)[..., None]
+    k = np.clip(np.rint(g.mean(axis=-1) - y_mean), -32, 31)[..., None]
+    
+    # Mínimos quadrados de (Y+J-R)² + (Y+K-G)² + ((5Y-2J-K)/4-B)²
+    y = (r + g - j - k + 1.25 * b + (10 * j + 5 * k) / 16) / (57 / 16)
+    y = y.reshape(height, width, 1)
+    
+    def nearest(values, ys, xs):
+        levels = np.clip(np.rint(values[:, 0]), 0, 31).astype(np.intp)
+        return levels, levels[:, None].astype(np.float32)
+    
+    levels = _quantize(y, nearest, dither, step=1).reshape(height, width // 4, 4)
+    
+    j = j[..., 0].astype(np.int16) & 63
+    k = k[..., 0].astype(np.int16) & 63
+    data = (levels << 3).astype(np.uint8)
+    data[..., 0] |= (k & 7).astype(np.uint8)
+    data[..., 1] |= (k >> 3).astype(np.uint8)
+    data[..., 2] |= (j & 7).astype(np.uint8)
+    data[..., 3] |= (j >> 3).astype(np.uint8)
+    return data.tobytes()
+
+
+def convert(image, mode, dither="floyd", fit="contain", palette="optimize"):
+    """
+    Converte uma imagem numa tela MSX
+    
+    Args:
+        image: PIL.Image de origem
+        mode: SCREEN de destino (2, 5, 8 ou 12)
+        dither: 'none', 'ordered' (Bayer 8x8) ou 'floyd' (Floyd-Steinberg)
+        fit: Ajuste ao tamanho da tela (ver prepare)
+        palette: Para SCREEN 2/5, "optimize" calcula a melhor paleta,
+            "default" usa a paleta padrão do MSX2, ou uma paleta de 3 bits
+            (16, 3). SCREEN 2 usa a padrão quando "optimize" (MSX1)
+    
+    Returns:
+        bytes: Arquivo no formato BSAVE
+    
+    Raises:
+        ConvertError: Se os parâmetros forem inválidos
+    """
+    if mode not in TARGETS:
+        raise ConvertError(f"SCREEN {mode} não suportada na conversão")
+    if dither not in DITHER_MODES:
+        raise ConvertError(f"Pontilhado desconhecido: {dither}")
+    
+    width, height, _, end = TARGETS[mode]
+    pixels = prepare(image, (width, height), fit)
+    
+    if mode in (2, 5):
+        if isinstance(palette, str):
+            if palette == "optimize" and mode == 5:
+                palette = optimize_palette(pixels)
+            else:
+                palette = DEFAULT_PALETTE
+        palette = np.asarray(palette, dtype=np.uint8)
+        if palette.shape != (16, 3) or palette.max() > 7:
+            raise ConvertError("A paleta deve ter 16 cores com componentes de 0 a 7")
+    
+    if mode == 2:
+        data = _encode_screen2(pixels, palette, dither)
+    elif mode == 5:
+        data = _encode_screen5(pixels, palette, dither)
+    elif mode == 8:
+        data = _encode_screen8(pixels, dither)
+    else:
+        data = _encode_screen12(pixels, dither)
+    
+    return struct.pack("<BHHH", BLOAD_ID, 0, end, 0) + data
+
+
+def convert_file(source, destination=None, mode=5, **options):
+    """
+    Converte um arquivo de imagem (executa num processo do pool)
+    
+    Args:
+        source: Imagem de origem
+        destination: Arquivo de saída (padrão: ao lado, com a extensão da tela)
+        mode: SCREEN de destino
+        **options: Parâmetros repassados a convert()
+    
+    Returns:
+        tuple: (origem, destino, erro ou None)
+    """
+    if destination is None:
+        destination = os.path.splitext(source)[0] + TARGETS[mode][2]
+    try:
+        with Image.open(source) as image:
+            data = convert(image, mode, **options)
+        tmp_path = destination + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, destination)
+        return source, destination, None
+    except (OSError, ValueError, ConvertError) as e:
+        return source, destination, str(e)
+
+
+def convert_directory(source_dir, dest_dir, mode=5, max_workers=None, progress=None,
+                      **options):
+    """
+    Converte todas as imagens de um diretório usando todos os núcleos
+    
+    Args:
+        source_dir: Diretório com as imagens
+        dest_dir: Diretório onde as telas são gravadas
+        mode: SCREEN de destino
+        max_workers: Processos usados (padrão: número de CPUs)
+        progress: Função chamada com (convertidas, total) (opcional)
+        **options: Parâmetros repassados a convert()
+    
+    Returns:
+        ConvertResult com as estatísticas
+    """
+    started = time.perf_counter()
+    result = ConvertResult()
+    os.makedirs(dest_dir, exist_ok=True)
+    
+    with os.scandir(source_dir) as entries:
+        sources = sorted(
+            entry.path for entry in entries
+            if entry.is_file()
+            and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+        )
+    if not sources:
+        return result
+    
+    extension = TARGETS[mode][2]
+    destinations = [
+        os.path.join(dest_dir, os.path.splitext(os.path.basename(path))[0] + extension)
+        for path in sources
+    ]
+    
+    workers = min(max_workers or os.cpu_count() or 1, len(sources))
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=PROCESS_CONTEXT
+    ) as executor:
+        futures = [
+            executor.submit(convert_file, source, destination, mode, **options)
+            for source, destination in zip(sources, destinations)
+        ]
+        for done, future in enumerate(futures, 1):
+            source, _, error = future.result()
+            if error:
+                result.errors.append((source, error))
+            else:
+                result.converted += 1
+            if progress:
+                progress(done, len(sources))
+    
+    result.duration = time.perf_counter() - started
+    return result
+
+
+def convert_to_work(path, config_manager, mode=5, **options):
+    """
+    Converte uma imagem para work_directory/<nome>.<extensão da tela>
+    
+    Args:
+        path: Imagem de origem
+        config_manager: Instância do ConfigManager
+        mode: SCREEN de destino
+        **options: Parâmetros repassados a convert()
+    
+    Returns:
+        str: Caminho da tela gerada
+    
+    Raises:
+        ConvertError: Se a conversão falhar
+    """
+    work = config_manager.resolved().work_directory
+    work.mkdir(parents=True, exist_ok=True)
+    destination = work / (os.path.splitext(os.path.basename(path))[0] + TARGETS[mode][2])
+    _, destination, error = convert_file(path, str(destination), mode, **options)
+    if error:
+        raise ConvertError(error)
+    return destination
\ No newline at end of file
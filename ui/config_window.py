@@ -8,51 +8,63 @@ from pathlib import Path
 
 
 class ConfigWindow:
-    """Janela para configuração do sistema"""
+    """Tela para configuração do sistema"""
     
-    def __init__(self, config_manager, first_run=False):
+    # Nome da tela no WindowManager
+    VIEW = "config"
+    
+    # Chaves da configuração editadas em campos de texto
+    FIELDS = (
+        'root_directory', 'database_directory', 'work_directory',
+        'temp_directory', 'download_directory', 'temp_quota_mb'
+    )
+    
+    def __init__(self, config_manager, first_run=False, manager=None, on_close=None):
         """
-        Inicializa a janela de configuração
+        Inicializa a tela de configuração
         
         Args:
             config_manager: Instância do ConfigManager
             first_run: Se é a primeira execução
+            manager: WindowManager da aplicação (padrão: cria um próprio)
+            on_close: Chamada com config_saved ao salvar ou cancelar
+                (padrão: sai do loop de eventos iniciado por run())
         """
         self.config_manager = config_manager
         self.first_run = first_run
+        self.on_close = on_close
         self.config_saved = False
         
         # Carrega configuração atual ou padrão
         self.config = config_manager.load_config()
         
-        # Cria janela
-        self.window = ctk.CTk()
-        self.window.title("MSX Tools - Configuração")
-        
-        # Define tema
-        ctk.set_appearance_mode("dark")
-        ctk.set_default_color_theme("blue")
-        
-        # Dimensões
-        width = 700
-        height = 650
-        
-        # Centraliza
-        screen_width = self.window.winfo_screenwidth()
-        screen_height = self.window.winfo_screenheight()
-        x = (screen_width - width) // 2
-        y = (screen_height - height) // 2
-        
-        self.window.geometry(f"{width}x{height}+{x}+{y}")
-        self.window.resizable(False, False)
+        if manager is None:
+            from ui.window_manager import WindowManager
+            manager = WindowManager()
+        self.manager = manager
+        self.window = manager.root
+        
+        # Na primeira execução ainda não há tema salvo: usa o padrão
+        if first_run:
+            manager.apply_theme(self.config['theme'])
+        
+        self.frame = ctk.CTkFrame(self.window, fg_color="transparent", corner_radius=0)
+        manager.add(
+            self.VIEW,
+            self.frame,
+            title="MSX Tools - Configuração",
+            size=(700, 700),
+            resizable=False,
+            on_close=None if first_run else self._cancel
+        )
         
         self._create_widgets()
-        
+    
     def _create_widgets(self):
         """Cria os widgets da interface"""
         
         # Frame principal
-        main_frame = ctk.CTkFrame(self.window)
+        main_frame = ctk.CTkFrame(self.frame)
         main_frame.pack(fill="both", expand=True, padx=20, pady=20)
         
         # Título
@@ -122,8 +134,17 @@ class ConfigWindow:
             "(relativo ao raiz)"
         )
         
+        # Limite do diretório temporário
+        self._create_simple_field(
+            fields_frame,
+            "Limite do Temporário:",
+            "temp_quota_mb",
+            5,
+            "(MB)"
+        )
+        
         # Tema
-        self._create_theme_field(fields_frame, 5)
+        self._create_theme_field(fields_frame, 6)
         
         # Botões
         button_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
@@ -143,7 +164,7 @@ class ConfigWindow:
             cancel_button = ctk.CTkButton(
                 button_frame,
                 text="Cancelar",
-                command=self.window.destroy,
+                command=self._cancel,
                 font=ctk.CTkFont(size=14),
                 height=40,
                 corner_radius=8,
@@ -211,11 +232,11 @@ class ConfigWindow:
         
         entry = ctk.CTkEntry(
             frame,
-            placeholder_text=self.config[config_key],
+            placeholder_text=str(self.config[config_key]),
             font=ctk.CTkFont(size=12),
             height=35
         )
-        entry.insert(0, self.config[config_key])
+        entry.insert(0, str(self.config[config_key]))
         entry.pack(side="left", fill="x", expand=True, padx=5)
         setattr(self, f"{config_key}_entry", entry)
         
@@ -274,7 +295,8 @@ class ConfigWindow:
             'work_directory': self.work_directory_entry.get(),
             'temp_directory': self.temp_directory_entry.get(),
             'download_directory': self.download_directory_entry.get(),
-            'theme': self.theme_combo.get()
+            'theme': self.theme_combo.get(),
+            'temp_quota_mb': self.temp_quota_mb_entry.get().strip()
         }
         
         # Valida
@@ -282,14 +304,16 @@ class ConfigWindow:
             self._show_error("O diretório raiz é obrigatório!")
             return
         
+        if not new_config['temp_quota_mb'].isdigit() or int(new_config['temp_quota_mb']) <= 0:
+            self._show_error("O limite do temporário deve ser um número de MB maior que zero!")
+            return
+        new_config['temp_quota_mb'] = int(new_config['temp_quota_mb'])
+        
         # Salva
         if self.config_manager.save_config(new_config):
-            self.config_saved = True
-            
-            # Aplica tema
-            ctk.set_appearance_mode(new_config['theme'])
-            
-            self.window.destroy()
+            # Aplica tema (os widgets existentes são apenas recoloridos)
+            self.manager.apply_theme(new_config['theme'])
+            self._close(True)
         else:
             self._show_error("Erro ao salvar configuração!")
     
@@ -320,6 +344,33 @@ class ConfigWindow:
         )
         button.pack(pady=10)
     
+    def reload(self):
+        """Recarrega os campos com a configuração salva (ao reabrir a tela)"""
+        self.config = self.config_manager.load_config()
+        self.config_saved = False
+        for key in self.FIELDS:
+            entry = getattr(self, f"{key}_entry")
+            entry.delete(0, "end")
+            entry.insert(0, str(self.config[key]))
+        self.theme_combo.set(self.config['theme'])
+    
+    def show(self):
+        """Exibe a tela na janela principal"""
+        self.manager.show(self.VIEW)
+    
+    def _cancel(self):
+        """Volta sem salvar"""
+        self._close(False)
+    
+    def _close(self, saved):
+        """Encerra a edição e avisa quem abriu a tela"""
+        self.config_saved = saved
+        if self.on_close is not None:
+            self.on_close(saved)
+        else:
+            self.manager.quit()
+    
     def run(self):
-        """Executa a janela"""
-        self.window.mainloop()
\ No newline at end of file
+        """Exibe a tela e executa o loop de eventos até salvar ou cancelar"""
+        self.show()
+        self.manager.run()
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Tela de Diagnóstico
+Mostra as métricas da sessão (vazão, latências, memória e erros) ao vivo
+"""
+import time
+
+import customtkinter as ctk
+
+from core.metrics import metrics
+from ui.virtual_list import Column, ListDataSource, VirtualList
+
+
+def _format_ms(value):
+    """Formata uma duração em milissegundos"""
+    if value is None:
+        return ""
+    if value < 1:
+        return f"{value * 1000:.0f} µs"
+    if value < 1000:
+        return f"{value:.1f} ms"
+    return f"{value / 1000:.2f} s"
+
+
+def _format_rate(value):
+    """Formata uma taxa por segundo"""
+    if not value:
+        return ""
+    return f"{value:.1f}/s" if value < 100 else f"{value:.0f}/s"
+
+
+def _format_bytes(size):
+    """Formata um tamanho em bytes"""
+    if size is None:
+        return "?"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+class _MetricsSource:
+    """Fonte da lista cujos dados são trocados a cada atualização"""
+    
+    def __init__(self):
+        self.data = ListDataSource([])
+    
+    def count(self):
+        return self.data.count()
+    
+    def fetch(self, offset, limit, sort_key=None, descending=False):
+        return self.data.fetch(offset, limit, sort_key, descending)
+
+
+class DiagnosticsView(ctk.CTkFrame):
+    """Painel com as métricas registradas em core.metrics"""
+    
+    # Intervalo (ms) entre atualizações enquanto a tela está visível
+    REFRESH_INTERVAL = 1000
+    
+    # Erros recentes exibidos
+    ERROR_LINES = 8
+    
+    def __init__(self, master, db_manager=None, registry=None, **kwargs):
+        """
+        Inicializa o painel
+        
+        Args:
+            master: Widget pai
+            db_manager: DatabaseManager usado para gravar as métricas (opcional)
+            registry: Registro de métricas (padrão: core.metrics.metrics)
+            **kwargs: Opções repassadas ao CTkFrame
+        """
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(master, **kwargs)
+        self.db = db_manager
+        self.registry = registry or metrics
+        self._source = _MetricsSource()
+        self._after_id = None
+        
+        self._create_widgets()
+        self.refresh()
+    
+    def _create_widgets(self):
+        """Cria o resumo, a lista de métricas e a lista de erros"""
+        toolbar = ctk.CTkFrame(self, fg_color="transparent")
+        toolbar.pack(fill="x", padx=10, pady=(10, 5))
+        
+        title = ctk.CTkLabel(
+            toolbar,
+            text="Diagnóstico",
+            font=ctk.CTkFont(size=20, weight="bold")
+        )
+        title.pack(side="left")
+        
+        self.summary_label = ctk.CTkLabel(
+            toolbar,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color="#888888",
+            anchor="w"
+        )
+        self.summary_label.pack(side="left", fill="x", expand=True, padx=15)
+        
+        reset_button = ctk.CTkButton(
+            toolbar,
+            text="Zerar",
+            command=self._reset,
+            width=80
+        )
+        reset_button.pack(side="right")
+        
+        self.flush_button = ctk.CTkButton(
+            toolbar,
+            text="💾 Gravar no banco",
+            command=self._flush,
+            width=140,
+            state="normal" if self.db is not None else "disabled"
+        )
+        self.flush_button.pack(side="right", padx=10)
+        
+        self.errors_box = ctk.CTkTextbox(
+            self,
+            height=self.ERROR_LINES * 18,
+            font=ctk.CTkFont(family="Courier", size=11),
+            state="disabled"
+        )
+        self.errors_box.pack(side="bottom", fill="x", padx=10, pady=(0, 10))
+        
+        columns = [
+            Column('name', "Métrica", width=220),
+            Column('count', "Total", width=80, anchor="e"),
+            Column('rate', "Taxa", width=80, anchor="e", formatter=_format_rate),
+            Column('mean', "Média", width=80, anchor="e", formatter=_format_ms),
+            Column('p50', "p50", width=80, anchor="e", formatter=_format_ms),
+            Column('p95', "p95", width=80, anchor="e", formatter=_format_ms),
+            Column('p99', "p99", width=80, anchor="e", formatter=_format_ms),
+            Column('max', "Máximo", width=80, anchor="e", formatter=_format_ms)
+        ]
+        self.list = VirtualList(self, columns, source=self._source)
+        self.list.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+    
+    def _rows(self, snapshot):
+        """Monta uma linha por cronômetro e por contador"""
+        rates = snapshot['rates']
+        rows = []
+        for name, summary in snapshot['histograms'].items():
+            row = dict(summary, name=name, rate=rates.get(name))
+            rows.append(row)
+        for name, value in snapshot['counters'].items():
+            rows.append({'name': name, 'count': value, 'rate': rates.get(name)})
+        rows.sort(key=lambda row: row['name'])
+        return rows
+    
+    def refresh(self):
+        """Atualiza o painel e agenda a próxima atualização"""
+        self._after_id = self.after(self.REFRESH_INTERVAL, self.refresh)
+        # Escondido: não gasta tempo montando linhas que ninguém vê
+        if not self.winfo_ismapped() and self._source.count():
+            return
+        
+        snapshot = self.registry.snapshot()
+        memory = snapshot['memory']
+        errors = snapshot['errors']
+        self.summary_label.configure(
+            text=(
+                f"Sessão: {snapshot['uptime'] / 60:.0f} min   "
+                f"Memória: {_format_bytes(memory['rss'])} "
+                f"(pico {_format_bytes(memory['peak'])})   "
+                f"Erros: {sum(v for k, v in snapshot['counters'].items() if k.startswith('errors.'))}"
+            )
+        )
+        
+        self._source.data = ListDataSource(self._rows(snapshot))
+        self.list.refresh()
+        
+        lines = [
+            f"{time.strftime('%H:%M:%S', time.localtime(timestamp))}  {name}: {message}"
+            for timestamp, name, message in errors[-self.ERROR_LINES:]
+        ]
+        self.errors_box.configure(state="normal")
+        self.errors_box.delete("1.0", "end")
+        self.errors_box.insert("1.0", "\n".join(lines) or "Nenhum erro registrado.")
+        self.errors_box.configure(state="disabled")
+    
+    def _flush(self):
+        """Grava os eventos pendentes na tabela metrics"""
+        try:
+            count = self.registry.flush(self.db)
+        except Exception as e:
+            self.summary_label.configure(text=f"Erro ao gravar métricas: {e}")
+            return
+        self.summary_label.configure(text=f"{count} eventos gravados no banco.")
+    
+    def _reset(self):
+        """Zera as métricas e atualiza o painel"""
+        self.registry.reset()
+        self.after_cancel(self._after_id)
+        self.refresh()
+    
+    def destroy(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        super().destroy()
\ No newline at end of file
@@ -5,48 +5,74 @@ Interface principal da aplicação
 import customtkinter as ctk
 from pathlib import Path
 
+from core.metrics import metrics
+from ui.window_manager import WindowManager
+
 
 class MainWindow:
     """Janela principal da aplicação"""
     
-    def __init__(self, config, config_manager):
+    # Nome da tela no WindowManager
+    VIEW = "main"
+    
+    # Chave da tela de diagnóstico em _views (não conflita com nomes de módulos)
+    DIAGNOSTICS_VIEW = ":diagnostics"
+    
+    def __init__(self, config, config_manager, plugins=None, context=None, manager=None):
         """
         Inicializa a janela principal
         
         Args:
             config: Configuração do sistema
             config_manager: Gerenciador de configurações
+            plugins: PluginRegistry com os módulos instalados (opcional)
+            context: ModuleContext entregue aos módulos ao carregá-los
+            manager: WindowManager da aplicação (padrão: cria um próprio)
         """
         self.config = config
         self.config_manager = config_manager
+        self.plugins = plugins
+        self.context = context
+        self.scheduler = getattr(context, 'scheduler', None)
         
-        # Cria janela
-        self.window = ctk.CTk()
-        self.window.title("MSX Tools - Frontend")
+        # Telas já criadas (a tela inicial usa a chave None)
+        self._views = {}
+        self._current_view = None
+        self._module_buttons = {}
         
-        # Aplica tema
-        ctk.set_appearance_mode(config['theme'])
-        ctk.set_default_color_theme("blue")
+        # Textos da configuração na tela inicial (atualizados ao salvar)
+        self._config_labels = {}
+        
+        # Tela de configurações, criada na primeira abertura
+        self._config_view = None
         
-        # Dimensões
-        width = 1200
-        height = 700
+        # Usa a janela raiz da aplicação
+        self.manager = manager or WindowManager()
+        self.window = self.manager.root
         
-        # Centraliza
-        screen_width = self.window.winfo_screenwidth()
-        screen_height = self.window.winfo_screenheight()
-        x = (screen_width - width) // 2
-        y = (screen_height - height) // 2
+        # Aplica tema
+        self.manager.apply_theme(config['theme'])
+        
+        self.frame = ctk.CTkFrame(self.window, fg_color="transparent", corner_radius=0)
+        self.manager.add(
+            self.VIEW,
+            self.frame,
+            title="MSX Tools - Frontend",
+            size=(1200, 700)
+        )
         
-        self.window.geometry(f"{width}x{height}+{x}+{y}")
+        # Resultados das tarefas em segundo plano chegam pelo after() da janela
+        if self.scheduler is not None:
+            self.scheduler.attach(self.window)
         
         self._create_widgets()
+        self.manager.show(self.VIEW)
     
     def _create_widgets(self):
         """Cria os widgets da interface"""
         
         # Frame lateral (sidebar)
-        self.sidebar = ctk.CTkFrame(self.window, width=250, corner_radius=0)
+        self.sidebar = ctk.CTkFrame(self.frame, width=250, corner_radius=0)
         self.sidebar.pack(side="left", fill="y")
         self.sidebar.pack_propagate(False)
         
@@ -74,7 +100,6 @@ class MainWindow:
         menu_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
         menu_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
-        # Placeholder para módulos futuros
         modules_label = ctk.CTkLabel(
             menu_frame,
             text="Módulos",
@@ -83,14 +108,7 @@ class MainWindow:
         )
         modules_label.pack(fill="x", padx=10, pady=(10, 5))
         
-        info_label = ctk.CTkLabel(
-            menu_frame,
-            text="Nenhum módulo instalado ainda.\n\nMódulos serão adicionados aqui conforme\nforem desenvolvidos.",
-            font=ctk.CTkFont(size=11),
-            text_color="#888888",
-            justify="left"
-        )
-        info_label.pack(fill="x", padx=10, pady=10)
+        self._create_module_buttons(menu_frame)
         
         # Botão de configurações no rodapé
         config_button = ctk.CTkButton(
@@ -104,19 +122,188 @@ class MainWindow:
         )
         config_button.pack(side="bottom", fill="x", padx=10, pady=10)
         
+        # Botão do painel de diagnóstico (métricas da sessão)
+        diagnostics_button = ctk.CTkButton(
+            self.sidebar,
+            text="📊 Diagnóstico",
+            command=self._toggle_diagnostics,
+            font=ctk.CTkFont(size=13),
+            height=40,
+            fg_color="#2b2b2b",
+            hover_color="#3b3b3b"
+        )
+        diagnostics_button.pack(side="bottom", fill="x", padx=10, pady=(10, 0))
+        self._module_buttons[self.DIAGNOSTICS_VIEW] = diagnostics_button
+        
         # Frame principal (conteúdo)
-        self.main_frame = ctk.CTkFrame(self.window)
+        self.main_frame = ctk.CTkFrame(self.frame)
         self.main_frame.pack(side="right", fill="both", expand=True, padx=10, pady=10)
         
         # Conteúdo de boas-vindas
-        self._create_welcome_content()
+        self._show_view(None)
+    
+    def _create_module_buttons(self, parent):
+        """
+        Cria um botão por módulo instalado, usando apenas os manifestos
+        
+        Args:
+            parent: Frame do menu lateral
+        """
+        manifests = self.plugins.manifests() if self.plugins else []
+        
+        if not manifests:
+            info_label = ctk.CTkLabel(
+                parent,
+                text="Nenhum módulo instalado ainda.\n\nMódulos serão adicionados aqui conforme\nforem desenvolvidos.",
+                font=ctk.CTkFont(size=11),
+                text_color="#888888",
+                justify="left"
+            )
+            info_label.pack(fill="x", padx=10, pady=10)
+            return
+        
+        home_button = ctk.CTkButton(
+            parent,
+            text="🏠 Início",
+            command=lambda: self._show_view(None),
+            font=ctk.CTkFont(size=13),
+            height=36,
+            anchor="w",
+            fg_color="transparent",
+            hover_color="#3b3b3b"
+        )
+        home_button.pack(fill="x", padx=5, pady=2)
+        self._module_buttons[None] = home_button
+        
+        for manifest in manifests:
+            button = ctk.CTkButton(
+                parent,
+                text=manifest.label,
+                command=lambda name=manifest.name: self._show_view(name),
+                font=ctk.CTkFont(size=13),
+                height=36,
+                anchor="w",
+                fg_color="transparent",
+                hover_color="#3b3b3b"
+            )
+            button.pack(fill="x", padx=5, pady=2)
+            self._module_buttons[manifest.name] = button
+    
+    def _show_view(self, name):
+        """
+        Exibe a tela inicial (name=None) ou a de um módulo
+        
+        Na primeira abertura o código do módulo é importado e sua tela
+        criada; depois disso a tela é apenas escondida e mostrada de novo.
+        
+        Args:
+            name: Nome do módulo ou None
+        """
+        if name == self._current_view and name in self._views:
+            return
+        
+        view = self._views.get(name)
+        if view is None:
+            view = self._create_view(name)
+            if view is None:
+                return
+            self._views[name] = view
+        
+        if self._current_view in self._views:
+            self._views[self._current_view].pack_forget()
+            self._notify_module(self._current_view, 'on_hide')
+        
+        view.pack(fill="both", expand=True)
+        self._current_view = name
+        self._notify_module(name, 'on_show')
+        
+        for key, button in self._module_buttons.items():
+            button.configure(fg_color="#1f538d" if key == name else "transparent")
+    
+    def _toggle_diagnostics(self):
+        """Abre o painel de diagnóstico ou, se já aberto, volta à tela inicial"""
+        if self._current_view == self.DIAGNOSTICS_VIEW:
+            self._show_view(None)
+        else:
+            self._show_view(self.DIAGNOSTICS_VIEW)
+    
+    def _create_view(self, name):
+        """
+        Cria a tela inicial ou carrega o módulo e cria a tela dele
+        
+        Returns:
+            Widget da tela ou None se o módulo não pôde ser carregado
+        """
+        if name is None:
+            view = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+            self._create_welcome_content(view)
+            return view
+        
+        if name == self.DIAGNOSTICS_VIEW:
+            from ui.diagnostics import DiagnosticsView
+            
+            return DiagnosticsView(
+                self.main_frame,
+                db_manager=getattr(self.context, 'db_manager', None)
+            )
+        
+        self.window.configure(cursor="watch")
+        self.window.update_idletasks()
+        try:
+            module = self.plugins.load(name, self.context)
+            container = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+            module.create_view(container).pack(fill="both", expand=True)
+            return container
+        except Exception as e:
+            self._show_error(f"Não foi possível abrir o módulo:\n{e}")
+            return None
+        finally:
+            self.window.configure(cursor="")
+    
+    def _notify_module(self, name, event):
+        """Chama on_show/on_hide de um módulo já carregado"""
+        if name in (None, self.DIAGNOSTICS_VIEW) or not self.plugins.is_loaded(name):
+            return
+        try:
+            getattr(self.plugins.load(name, self.context), event)()
+        except Exception as e:
+            metrics.error(f"module.{name}.{event}", e)
+    
+    def _show_error(self, message):
+        """Mostra mensagem de erro"""
+        error_window = ctk.CTkToplevel(self.window)
+        error_window.title("Erro")
+        error_window.geometry("420x170")
+        error_window.transient(self.window)
+        error_window.grab_set()
+        
+        label = ctk.CTkLabel(
+            error_window,
+            text=message,
+            font=ctk.CTkFont(size=13),
+            wraplength=380
+        )
+        label.pack(pady=25, padx=20)
+        
+        button = ctk.CTkButton(
+            error_window,
+            text="OK",
+            command=error_window.destroy,
+            width=100
+        )
+        button.pack(pady=10)
     
-    def _create_welcome_content(self):
-        """Cria o conteúdo de boas-vindas"""
+    def _create_welcome_content(self, parent):
+        """
+        Cria o conteúdo de boas-vindas
+        
+        Args:
+            parent: Frame da tela inicial
+        """
         
         # Título
         title = ctk.CTkLabel(
-            self.main_frame,
+            parent,
             text="Bem-vindo ao MSX Tools!",
             font=ctk.CTkFont(size=32, weight="bold")
         )
@@ -124,7 +311,7 @@ class MainWindow:
         
         # Descrição
         description = ctk.CTkLabel(
-            self.main_frame,
+            parent,
             text="Sistema modular para ferramentas MSX\nMódulos serão adicionados em versões futuras",
             font=ctk.CTkFont(size=16),
             text_color="#888888"
@@ -132,7 +319,7 @@ class MainWindow:
         description.pack(pady=(0, 40))
         
         # Frame de informações
-        info_frame = ctk.CTkFrame(self.main_frame)
+        info_frame = ctk.CTkFrame(parent)
         info_frame.pack(fill="both", expand=True, padx=40, pady=20)
         
         # Título da seção
@@ -145,15 +332,15 @@ class MainWindow:
         
         # Informações de configuração
         config_info = [
-            ("📁 Diretório Raiz:", self.config['root_directory']),
-            ("💾 Banco de Dados:", self.config['database_directory']),
-            ("🔧 Trabalho:", self.config['work_directory']),
-            ("📥 Download:", self.config['download_directory']),
-            ("🗑️ Temporário:", self.config['temp_directory']),
-            ("🎨 Tema:", self.config['theme'].capitalize())
+            ("📁 Diretório Raiz:", 'root_directory'),
+            ("💾 Banco de Dados:", 'database_directory'),
+            ("🔧 Trabalho:", 'work_directory'),
+            ("📥 Download:", 'download_directory'),
+            ("🗑️ Temporário:", 'temp_directory'),
+            ("🎨 Tema:", 'theme')
         ]
         
-        for label, value in config_info:
+        for label, key in config_info:
             row_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
             row_frame.pack(fill="x", padx=40, pady=5)
             
@@ -168,42 +355,74 @@ class MainWindow:
             
             value_widget = ctk.CTkLabel(
                 row_frame,
-                text=value,
+                text=self._config_text(key),
                 font=ctk.CTkFont(size=13),
                 anchor="w",
                 text_color="#888888"
             )
             value_widget.pack(side="left", fill="x", expand=True)
+            self._config_labels[key] = value_widget
         
         # Versão
         version_label = ctk.CTkLabel(
-            self.main_frame,
+            parent,
             text="Versão 1.0.0",
             font=ctk.CTkFont(size=11),
             text_color="#666666"
         )
         version_label.pack(side="bottom", pady=20)
     
+    def _config_text(self, key):
+        """Texto de um valor da configuração na tela inicial"""
+        value = self.config[key]
+        return value.capitalize() if key == 'theme' else str(value)
+    
     def _open_config(self):
-        """Abre janela de configurações"""
-        from ui.config_window import ConfigWindow
-        
-        # Fecha janela atual
-        self.window.withdraw()
-        
-        # Abre configurações
-        config_window = ConfigWindow(self.config_manager, first_run=False)
-        config_window.run()
-        
-        # Recarrega configuração e recria janela
-        if config_window.config_saved:
-            self.config = self.config_manager.load_config()
-            self.window.destroy()
-            self.__init__(self.config, self.config_manager)
-            self.run()
+        """Abre a tela de configurações (criada uma vez e reaproveitada)"""
+        if self._config_view is None:
+            from ui.config_window import ConfigWindow
+            
+            self._config_view = ConfigWindow(
+                self.config_manager,
+                first_run=False,
+                manager=self.manager,
+                on_close=self._on_config_closed
+            )
         else:
-            self.window.deiconify()
+            self._config_view.reload()
+        self._config_view.show()
+    
+    def _on_config_closed(self, saved):
+        """Volta da tela de configurações, aplicando o que mudou"""
+        if saved:
+            self.apply_config(self.config_manager.load_config())
+        self.manager.show(self.VIEW)
+    
+    def apply_config(self, config):
+        """
+        Aplica uma nova configuração sem recriar a janela
+        
+        Só os textos que mudaram são atualizados; o tema é aplicado aos
+        widgets existentes.
+        
+        Args:
+            config: Configuração salva
+        """
+        previous, self.config = self.config, config
+        self.manager.apply_theme(config['theme'])
+        for key, label in self._config_labels.items():
+            if previous.get(key) != config.get(key):
+                label.configure(text=self._config_text(key))
+        
+        # Diretórios mudaram: o observador passa a acompanhar os novos
+        watcher = getattr(self.context, 'watcher', None)
+        moved = any(
+            previous.get(key) != config.get(key)
+            for key in ('root_directory',) + self.config_manager.DIRECTORY_KEYS
+        )
+        if watcher is not None and moved:
+            watcher.restart()
     
     def run(self):
         """Executa a janela"""
-        self.window.mainloop()
\ No newline at end of file
+        self.manager.run()
\ No newline at end of file
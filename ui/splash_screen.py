@@ -3,31 +3,26 @@ Splash Screen
 Tela inicial mostrada durante o carregamento
 """
 import customtkinter as ctk
-from tkinter import Canvas
-import time
 
 
 class SplashScreen:
     """Splash screen exibida ao iniciar a aplicação"""
     
-    def __init__(self):
-        self.window = ctk.CTk()
-        self.window.title("")
-        
-        # Remove bordas da janela
-        self.window.overrideredirect(True)
-        
-        # Dimensões
-        width = 600
-        height = 400
-        
-        # Centraliza na tela
-        screen_width = self.window.winfo_screenwidth()
-        screen_height = self.window.winfo_screenheight()
-        x = (screen_width - width) // 2
-        y = (screen_height - height) // 2
+    # Nome da tela no WindowManager
+    VIEW = "splash"
+    
+    def __init__(self, manager=None):
+        """
+        Inicializa a splash screen
         
-        self.window.geometry(f"{width}x{height}+{x}+{y}")
+        Args:
+            manager: WindowManager da aplicação (padrão: cria um próprio)
+        """
+        if manager is None:
+            from ui.window_manager import WindowManager
+            manager = WindowManager()
+        self.manager = manager
+        self.window = manager.root
         
         # Frame principal
         self.main_frame = ctk.CTkFrame(
@@ -36,7 +31,7 @@ class SplashScreen:
             border_width=2,
             border_color="#1f538d"
         )
-        self.main_frame.pack(fill="both", expand=True, padx=2, pady=2)
+        manager.add(self.VIEW, self.main_frame, size=(600, 400), decorated=False)
         
         # Logo/Título
         self.title_label = ctk.CTkLabel(
@@ -83,16 +78,23 @@ class SplashScreen:
             text_color="#aaaaaa"
         )
         self.version_label.pack(side="bottom", pady=20)
-        
+    
     def show(self):
         """Mostra a splash screen"""
+        self.manager.show(self.VIEW)
         self.window.update()
+    
+    def set_progress(self, value, text=None):
+        """
+        Atualiza a barra de progresso
         
-        # Anima a barra de progresso
-        for i in range(101):
-            self.progress_bar.set(i / 100)
-            self.window.update()
-            time.sleep(0.01)
+        Args:
+            value: Progresso entre 0.0 e 1.0
+            text: Novo texto de status (opcional)
+        """
+        self.progress_bar.set(max(0.0, min(1.0, value)))
+        if text is not None:
+            self.status_label.configure(text=text)
     
     def update_status(self, text):
         """
@@ -105,5 +107,5 @@ class SplashScreen:
         self.window.update()
     
     def close(self):
-        """Fecha a splash screen"""
-        self.window.destroy()
\ No newline at end of file
+        """Fecha a splash screen (a janela raiz continua para a próxima tela)"""
+        self.manager.remove(self.VIEW)
\ No newline at end of file
@@ -0,0 +1,559 @@
+"""
+Lista Virtualizada
+Tabela que desenha apenas as linhas visíveis e busca os dados por páginas,
+com uso de memória constante independente do número de registros
+"""
+import tkinter as tk
+from collections import OrderedDict
+
+import customtkinter as ctk
+
+from core.metrics import metrics
+
+
+class Column:
+    """Coluna exibida pela VirtualList"""
+    
+    def __init__(self, key, title, width=150, min_width=40, anchor="w",
+                 sortable=True, formatter=None):
+        """
+        Inicializa a coluna
+        
+        Args:
+            key: Chave do valor no registro (nome do campo ou índice)
+            title: Texto do cabeçalho
+            width: Largura inicial em pixels
+            min_width: Largura mínima ao redimensionar
+            anchor: Alinhamento do texto ("w", "e" ou "center")
+            sortable: Se um clique no cabeçalho ordena pela coluna
+            formatter: Função que converte o valor em texto (opcional)
+        """
+        self.key = key
+        self.title = title
+        self.width = width
+        self.min_width = min_width
+        self.anchor = anchor
+        self.sortable = sortable
+        self.formatter = formatter
+    
+    def text(self, row):
+        """Texto da coluna para um registro"""
+        try:
+            value = row[self.key]
+        except (KeyError, IndexError, TypeError):
+            return ""
+        if self.formatter is not None:
+            return self.formatter(value)
+        return "" if value is None else str(value)
+
+
+class ListDataSource:
+    """Fonte de dados paginada sobre uma lista em memória"""
+    
+    def __init__(self, rows):
+        """
+        Inicializa a fonte
+        
+        Args:
+            rows: Sequência de registros (dicionários ou tuplas)
+        """
+        self.rows = rows
+        self._order = None
+        self._order_key = None
+    
+    def count(self):
+        """Quantidade de registros"""
+        return len(self.rows)
+    
+    def fetch(self, offset, limit, sort_key=None, descending=False):
+        """
+        Retorna uma página de registros
+        
+        Args:
+            offset: Índice do primeiro registro
+            limit: Quantidade máxima de registros
+            sort_key: Chave da coluna de ordenação (opcional)
+            descending: Ordem decrescente
+        
+        Returns:
+            list: Registros da página
+        """
+        if sort_key is None:
+            return list(self.rows[offset:offset + limit])
+        
+        if self._order_key != (sort_key, descending):
+            def key(index):
+                value = self.rows[index][sort_key]
+                return (value is None, value)
+            self._order = sorted(range(len(self.rows)), key=key, reverse=descending)
+            self._order_key = (sort_key, descending)
+        return [self.rows[i] for i in self._order[offset:offset + limit]]
+
+
+class VirtualList(ctk.CTkFrame):
+    """Tabela virtualizada com ordenação e colunas redimensionáveis"""
+    
+    # Altura das linhas e do cabeçalho (antes da escala do customtkinter)
+    ROW_HEIGHT = 24
+    HEADER_HEIGHT = 28
+    
+    # Registros buscados por vez e páginas mantidas em memória
+    PAGE_SIZE = 200
+    CACHED_PAGES = 8
+    
+    # Distância (px) da borda da coluna em que o cabeçalho redimensiona
+    RESIZE_MARGIN = 5
+    
+    # Espaçamento interno das células
+    CELL_PADDING = 6
+    
+    # Textos truncados guardados antes de limpar o cache
+    TEXT_CACHE_SIZE = 4096
+    
+    def __init__(self, master, columns, source=None, on_select=None,
+                 on_activate=None, **kwargs):
+        """
+        Inicializa a lista
+        
+        Args:
+            master: Widget pai
+            columns: Lista de Column
+            source: Objeto com count() e fetch(offset, limit, sort_key, descending)
+            on_select: Chamada com (índice, registro) ao selecionar uma linha
+            on_activate: Chamada com (índice, registro) no duplo clique/Enter
+            **kwargs: Opções repassadas ao CTkFrame
+        """
+        super().__init__(master, **kwargs)
+        
+        self.columns = list(columns)
+        self.source = source
+        self.on_select = on_select
+        self.on_activate = on_activate
+        
+        self._count = 0
+        self._top = 0
+        self._selected = None
+        self._sort_key = None
+        self._descending = False
+        self._pages = OrderedDict()
+        self._slots = []
+        self._text_cache = {}
+        self._render_pending = False
+        self._drag = None
+        
+        self._font = ctk.CTkFont(size=12)
+        self._header_font = ctk.CTkFont(size=12, weight="bold")
+        self._row_height = round(self._apply_widget_scaling(self.ROW_HEIGHT))
+        header_height = round(self._apply_widget_scaling(self.HEADER_HEIGHT))
+        
+        self.header = tk.Canvas(self, height=header_height, highlightthickness=0, bd=0)
+        self.canvas = tk.Canvas(self, highlightthickness=0, bd=0, takefocus=1)
+        self.vscroll = ctk.CTkScrollbar(self, command=self._on_vscroll)
+        self.hscroll = ctk.CTkScrollbar(
+            self, orientation="horizontal", command=self._on_hscroll
+        )
+        
+        self.header.grid(row=0, column=0, sticky="ew")
+        self.canvas.grid(row=1, column=0, sticky="nsew")
+        self.vscroll.grid(row=0, column=1, rowspan=2, sticky="ns")
+        self.hscroll.grid(row=2, column=0, sticky="ew")
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        
+        self._update_colors()
+        self._bind_events()
+        self.refresh()
+    
+    def _bind_events(self):
+        """Associa os eventos de mouse e teclado"""
+        self.canvas.bind("<Configure>", lambda e: self._request_render())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Double-Button-1>", self._on_double_click)
+        self.canvas.bind("<Up>", lambda e: self._move_selection(-1))
+        self.canvas.bind("<Down>", lambda e: self._move_selection(1))
+        self.canvas.bind("<Prior>", lambda e: self._move_selection(-self._visible_rows()))
+        self.canvas.bind("<Next>", lambda e: self._move_selection(self._visible_rows()))
+        self.canvas.bind("<Home>", lambda e: self._move_selection(-self._count))
+        self.canvas.bind("<End>", lambda e: self._move_selection(self._count))
+        self.canvas.bind("<Return>", lambda e: self._activate(self._selected))
+        
+        for widget in (self.canvas, self.header):
+            widget.bind("<MouseWheel>", self._on_wheel)
+            widget.bind("<Button-4>", self._on_wheel)
+            widget.bind("<Button-5>", self._on_wheel)
+        
+        self.header.bind("<Motion>", self._on_header_motion)
+        self.header.bind("<Leave>", lambda e: self.header.configure(cursor=""))
+        self.header.bind("<ButtonPress-1>", self._on_header_press)
+        self.header.bind("<B1-Motion>", self._on_header_drag)
+        self.header.bind("<ButtonRelease-1>", self._on_header_release)
+    
+    def _set_appearance_mode(self, mode_string):
+        super()._set_appearance_mode(mode_string)
+        if hasattr(self, 'canvas'):
+            self._update_colors()
+            self._draw_header()
+            self._request_render()
+    
+    def _update_colors(self):
+        """Lê as cores do tema do customtkinter para o modo atual"""
+        theme = ctk.ThemeManager.theme
+        self._colors = {
+            'background': self._apply_appearance_mode(theme["CTkFrame"]["fg_color"]),
+            'alternate': self._apply_appearance_mode(theme["CTkFrame"]["top_fg_color"]),
+            'header': self._apply_appearance_mode(theme["CTkFrame"]["top_fg_color"]),
+            'border': self._apply_appearance_mode(theme["CTkFrame"]["border_color"]),
+            'text': self._apply_appearance_mode(theme["CTkLabel"]["text_color"]),
+            'selected': self._apply_appearance_mode(theme["CTkButton"]["fg_color"]),
+            'selected_text': "#FFFFFF"
+        }
+        self.canvas.configure(bg=self._colors['background'])
+        self.header.configure(bg=self._colors['header'])
+    
+    def set_source(self, source):
+        """
+        Troca a fonte de dados
+        
+        Args:
+            source: Objeto com count() e fetch(offset, limit, sort_key, descending)
+        """
+        self.source = source
+        self._selected = None
+        self._top = 0
+        self.refresh()
+    
+    def refresh(self):
+        """Descarta as páginas em memória e recarrega a contagem"""
+        self._pages.clear()
+        self._count = self.source.count() if self.source is not None else 0
+        if self._selected is not None and self._selected >= self._count:
+            self._selected = None
+        self._draw_header()
+        self._request_render()
+    
+    def sort(self, key, descending=None):
+        """
+        Ordena pela coluna indicada
+        
+        Args:
+            key: Chave da coluna
+            descending: Ordem decrescente (padrão: inverte se já ordenada)
+        """
+        if descending is None:
+            descending = not self._descending if self._sort_key == key else False
+        self._sort_key = key
+        self._descending = descending
+        self._selected = None
+        self.refresh()
+    
+    def row(self, index):
+        """
+        Retorna o registro de um índice, buscando a página se necessário
+        
+        Args:
+            index: Índice na ordem atual
+        
+        Returns:
+            Registro ou None se o índice não existir
+        """
+        if index is None or not 0 <= index < self._count:
+            return None
+        
+        page_number, position = divmod(index, self.PAGE_SIZE)
+        page = self._pages.get(page_number)
+        if page is None:
+            page = self.source.fetch(
+                page_number * self.PAGE_SIZE, self.PAGE_SIZE,
+                self._sort_key, self._descending
+            )
+            self._pages[page_number] = page
+            while len(self._pages) > self.CACHED_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page_number)
+        return page[position] if position < len(page) else None
+    
+    @property
+    def selected(self):
+        """Índice da linha selecionada (ou None)"""
+        return self._selected
+    
+    def selected_row(self):
+        """Registro da linha selecionada (ou None)"""
+        return self.row(self._selected)
+    
+    def see(self, index):
+        """Rola a lista até a linha ficar visível"""
+        height = self.canvas.winfo_height()
+        y = index * self._row_height
+        if y < self._top:
+            self._scroll_to(y)
+        elif y + self._row_height > self._top + height:
+            self._scroll_to(y + self._row_height - height)
+    
+    def _column_widths(self):
+        """Larguras das colunas já com a escala aplicada"""
+        return [round(self._apply_widget_scaling(c.width)) for c in self.columns]
+    
+    def _total_height(self):
+        return self._count * self._row_height
+    
+    def _visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self._row_height)
+    
+    def _scroll_to(self, top):
+        """Posiciona o topo da área visível (em pixels) e redesenha"""
+        limit = max(0, self._total_height() - self.canvas.winfo_height())
+        top = max(0, min(int(top), limit))
+        if top != self._top:
+            self._top = top
+            self._request_render()
+    
+    def _request_render(self):
+        """Agrupa vários pedidos de redesenho num único quadro"""
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+    
+    @metrics.timer('ui.render')
+    def _render(self):
+        """Atualiza as linhas visíveis reaproveitando os itens do canvas"""
+        self._render_pending = False
+        height = self.canvas.winfo_height()
+        width = max(sum(self._column_widths()), self.canvas.winfo_width())
+        self._top = max(0, min(self._top, self._total_height() - height))
+        
+        first = self._top // self._row_height
+        offset = first * self._row_height - self._top
+        visible = height // self._row_height + 2
+        self._ensure_slots(visible)
+        
+        widths = self._column_widths()
+        for number, slot in enumerate(self._slots):
+            index = first + number
+            record = self.row(index) if number < visible else None
+            if record is None:
+                self.canvas.itemconfigure(slot['tag'], state="hidden")
+                continue
+            
+            y = offset + number * self._row_height
+            selected = index == self._selected
+            if selected:
+                fill = self._colors['selected']
+            elif index % 2:
+                fill = self._colors['alternate']
+            else:
+                fill = self._colors['background']
+            text_color = self._colors['selected_text'] if selected else self._colors['text']
+            
+            self.canvas.coords(slot['background'], 0, y, width, y + self._row_height)
+            self.canvas.itemconfigure(slot['background'], fill=fill, state="normal")
+            
+            x = 0
+            for column, column_width, cell in zip(self.columns, widths, slot['cells']):
+                text = self._fit(column.text(record), column_width - 2 * self.CELL_PADDING)
+                anchor, text_x = self._anchor(column, x, column_width)
+                self.canvas.coords(cell, text_x, y + self._row_height // 2)
+                self.canvas.itemconfigure(
+                    cell, text=text, fill=text_color, anchor=anchor, state="normal"
+                )
+                x += column_width
+        
+        self.canvas.configure(scrollregion=(0, 0, width, height))
+        self.header.configure(scrollregion=(0, 0, width, self.header.winfo_height()))
+        self.hscroll.set(*self.canvas.xview())
+        
+        total = self._total_height()
+        if total <= height:
+            self.vscroll.set(0.0, 1.0)
+        else:
+            self.vscroll.set(self._top / total, (self._top + height) / total)
+    
+    def _ensure_slots(self, count):
+        """Cria os itens de canvas de linhas que ainda não existem"""
+        while len(self._slots) < count:
+            tag = f"slot{len(self._slots)}"
+            background = self.canvas.create_rectangle(
+                0, 0, 0, 0, width=0, tags=(tag,), state="hidden"
+            )
+            cells = [
+                self.canvas.create_text(
+                    0, 0, font=self._font, tags=(tag,), state="hidden"
+                )
+                for _ in self.columns
+            ]
+            self._slots.append({'tag': tag, 'background': background, 'cells': cells})
+    
+    def _anchor(self, column, x, width):
+        """Retorna (anchor, x do texto) conforme o alinhamento da coluna"""
+        if column.anchor == "e":
+            return "e", x + width - self.CELL_PADDING
+        if column.anchor == "center":
+            return "center", x + width // 2
+        return "w", x + self.CELL_PADDING
+    
+    def _fit(self, text, width):
+        """Corta o texto com reticências para caber na largura"""
+        key = (text, width)
+        fitted = self._text_cache.get(key)
+        if fitted is not None:
+            return fitted
+        
+        if width <= 0:
+            fitted = ""
+        elif self._font.measure(text) <= width:
+            fitted = text
+        else:
+            low, high = 0, len(text)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if self._font.measure(text[:middle] + "…") <= width:
+                    low = middle
+                else:
+                    high = middle - 1
+            fitted = text[:low] + "…" if low else ""
+        
+        if len(self._text_cache) >= self.TEXT_CACHE_SIZE:
+            self._text_cache.clear()
+        self._text_cache[key] = fitted
+        return fitted
+    
+    def _draw_header(self):
+        """Desenha o cabeçalho com o indicador de ordenação"""
+        self.header.delete("all")
+        height = round(self._apply_widget_scaling(self.HEADER_HEIGHT))
+        x = 0
+        for column, width in zip(self.columns, self._column_widths()):
+            title = column.title
+            if column.key == self._sort_key:
+                title += " ▼" if self._descending else " ▲"
+            text = self._fit_header(title, width - 2 * self.CELL_PADDING)
+            anchor, text_x = self._anchor(column, x, width)
+            self.header.create_text(
+                text_x, height // 2, text=text, anchor=anchor,
+                font=self._header_font, fill=self._colors['text']
+            )
+            x += width
+            self.header.create_line(x - 1, 4, x - 1, height - 4, fill=self._colors['border'])
+        self.header.create_line(0, height - 1, x, height - 1, fill=self._colors['border'])
+    
+    def _fit_header(self, text, width):
+        """Corta o título do cabeçalho (fonte em negrito)"""
+        if self._header_font.measure(text) <= width:
+            return text
+        while text and self._header_font.measure(text + "…") > width:
+            text = text[:-1]
+        return text + "…" if text else ""
+    
+    def _column_at(self, x):
+        """
+        Localiza a coluna sob a coordenada x do cabeçalho
+        
+        Returns:
+            tuple: (índice da coluna, True se está na borda direita) ou (None, False)
+        """
+        right = 0
+        for index, width in enumerate(self._column_widths()):
+            right += width
+            if abs(x - right) <= self.RESIZE_MARGIN:
+                return index, True
+            if x < right:
+                return index, False
+        return None, False
+    
+    def _on_header_motion(self, event):
+        _, border = self._column_at(self.header.canvasx(event.x))
+        self.header.configure(cursor="sb_h_double_arrow" if border else "")
+    
+    def _on_header_press(self, event):
+        x = self.header.canvasx(event.x)
+        index, border = self._column_at(x)
+        if index is None:
+            self._drag = None
+            return
+        self._drag = {
+            'index': index,
+            'resize': border,
+            'x': x,
+            'width': self.columns[index].width
+        }
+    
+    def _on_header_drag(self, event):
+        if not self._drag or not self._drag['resize']:
+            return
+        column = self.columns[self._drag['index']]
+        delta = self._reverse_widget_scaling(self.header.canvasx(event.x) - self._drag['x'])
+        column.width = max(column.min_width, round(self._drag['width'] + delta))
+        self._draw_header()
+        self._request_render()
+    
+    def _on_header_release(self, event):
+        drag, self._drag = self._drag, None
+        if not drag or drag['resize']:
+            return
+        column = self.columns[drag['index']]
+        if column.sortable:
+            self.sort(column.key)
+    
+    def _on_vscroll(self, action, value, unit=None):
+        """Recebe os comandos da barra de rolagem vertical"""
+        if action == "moveto":
+            self._scroll_to(float(value) * self._total_height())
+        elif unit == "pages":
+            self._scroll_to(self._top + int(value) * self.canvas.winfo_height())
+        else:
+            self._scroll_to(self._top + int(value) * self._row_height * 3)
+    
+    def _on_hscroll(self, action, value, unit=None):
+        """Recebe os comandos da barra de rolagem horizontal"""
+        if action == "moveto":
+            self.canvas.xview_moveto(value)
+            self.header.xview_moveto(value)
+        else:
+            self.canvas.xview_scroll(int(value), unit or "units")
+            self.header.xview_scroll(int(value), unit or "units")
+        self.hscroll.set(*self.canvas.xview())
+    
+    def _on_wheel(self, event):
+        if event.num == 4:
+            steps = -1
+        elif event.num == 5:
+            steps = 1
+        else:
+            steps = -1 if event.delta > 0 else 1
+        self._scroll_to(self._top + steps * self._row_height * 3)
+        return "break"
+    
+    def _index_at(self, y):
+        index = (self._top + int(y)) // self._row_height
+        return index if 0 <= index < self._count else None
+    
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        index = self._index_at(event.y)
+        if index is not None:
+            self._select(index)
+    
+    def _on_double_click(self, event):
+        self._activate(self._index_at(event.y))
+    
+    def _select(self, index):
+        """Seleciona uma linha e avisa on_select"""
+        if index == self._selected:
+            return
+        self._selected = index
+        self.see(index)
+        self._request_render()
+        if self.on_select:
+            self.on_select(index, self.row(index))
+    
+    def _move_selection(self, delta):
+        if not self._count:
+            return "break"
+        current = self._selected if self._selected is not None else -1
+        self._select(max(0, min(self._count - 1, current + delta)))
+        return "break"
+    
+    def _activate(self, index):
+        if index is not None and self.on_activate:
+            self.on_activate(index, self.row(index))
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+Gerenciador de Janelas
+Mantém uma única janela raiz do Tk e troca as telas (frames) dentro dela
+"""
+import customtkinter as ctk
+
+
+class _View:
+    """Tela registrada no WindowManager"""
+    
+    __slots__ = ('frame', 'title', 'size', 'resizable', 'decorated', 'on_close', 'geometry')
+    
+    def __init__(self, frame, title, size, resizable, decorated, on_close):
+        self.frame = frame
+        self.title = title
+        self.size = size
+        self.resizable = resizable
+        self.decorated = decorated
+        self.on_close = on_close
+        # Geometria deixada pelo usuário ao sair da tela (telas redimensionáveis)
+        self.geometry = None
+
+
+class WindowManager:
+    """Janela raiz única; as telas ficam em cache e são apenas trocadas"""
+    
+    # Título usado quando a tela não define um
+    DEFAULT_TITLE = "MSX Tools"
+    
+    def __init__(self):
+        """Cria a janela raiz (ainda sem nenhuma tela)"""
+        ctk.set_default_color_theme("blue")
+        self.root = ctk.CTk()
+        self.root.title(self.DEFAULT_TITLE)
+        self.root.protocol("WM_DELETE_WINDOW", self._on_delete)
+        
+        self.theme = None
+        self._views = {}
+        self._current = None
+        self._decorated = True
+        self._running = False
+        self._closed = False
+    
+    @property
+    def current(self):
+        """Nome da tela exibida (None se nenhuma)"""
+        return self._current
+    
+    @property
+    def closed(self):
+        """Indica se a janela raiz já foi destruída"""
+        return self._closed
+    
+    def add(self, name, frame, title=None, size=None, resizable=True,
+            decorated=True, on_close=None):
+        """
+        Registra uma tela (o frame deve ter a janela raiz como pai)
+        
+        Args:
+            name: Nome único da tela
+            frame: Frame com o conteúdo da tela
+            title: Título da janela enquanto a tela é exibida
+            size: (largura, altura) usada na primeira exibição (centralizada)
+            resizable: Se o usuário pode redimensionar a janela
+            decorated: False remove as bordas (ex: splash screen)
+            on_close: Chamada quando o usuário fecha a janela nesta tela
+                (padrão: encerra a aplicação)
+        """
+        if name in self._views:
+            raise ValueError(f"Tela já registrada: {name}")
+        self._views[name] = _View(
+            frame, title or self.DEFAULT_TITLE, size, resizable, decorated, on_close
+        )
+    
+    def has(self, name):
+        """Indica se a tela está registrada"""
+        return name in self._views
+    
+    def get(self, name):
+        """Frame da tela registrada (None se não existir)"""
+        view = self._views.get(name)
+        return view.frame if view else None
+    
+    def show(self, name):
+        """
+        Exibe uma tela registrada, escondendo a atual
+        
+        Args:
+            name: Nome da tela
+        """
+        view = self._views[name]
+        if name == self._current:
+            return
+        
+        previous = self._views.get(self._current)
+        if previous is not None:
+            if previous.resizable:
+                previous.geometry = self.root.geometry()
+            previous.frame.pack_forget()
+        
+        self._set_decorated(view.decorated)
+        self.root.title(view.title)
+        self.root.resizable(view.resizable, view.resizable)
+        if view.geometry:
+            self.root.geometry(view.geometry)
+        elif view.size:
+            self.root.geometry(self.centered(*view.size))
+        
+        view.frame.pack(fill="both", expand=True)
+        self._current = name
+    
+    def remove(self, name):
+        """
+        Destrói uma tela que não será mais usada
+        
+        Args:
+            name: Nome da tela
+        """
+        view = self._views.pop(name, None)
+        if view is None:
+            return
+        if self._current == name:
+            self._current = None
+        view.frame.destroy()
+    
+    def centered(self, width, height):
+        """
+        Geometria que centraliza uma janela de width x height na tela
+        
+        Returns:
+            str: Geometria no formato do Tk
+        """
+        x = (self.root.winfo_screenwidth() - width) // 2
+        y = (self.root.winfo_screenheight() - height) // 2
+        return f"{width}x{height}+{x}+{y}"
+    
+    def _set_decorated(self, decorated):
+        """Liga ou desliga as bordas da janela"""
+        if decorated == self._decorated:
+            return
+        # Alguns gerenciadores de janela só aplicam a mudança ao reexibir
+        self.root.withdraw()
+        self.root.overrideredirect(not decorated)
+        self.root.deiconify()
+        self._decorated = decorated
+    
+    def apply_theme(self, theme):
+        """
+        Aplica o tema a todos os widgets existentes, sem recriá-los
+        
+        Args:
+            theme: 'dark', 'light' ou 'system'
+        """
+        if theme == self.theme:
+            return
+        ctk.set_appearance_mode(theme)
+        self.theme = theme
+    
+    def _on_delete(self):
+        """Botão de fechar da janela"""
+        view = self._views.get(self._current)
+        if view is not None and view.on_close is not None:
+            view.on_close()
+        else:
+            self.close()
+    
+    def run(self):
+        """Executa o loop de eventos (não aninha se ele já estiver rodando)"""
+        if self._running or self._closed:
+            return
+        self._running = True
+        try:
+            self.root.mainloop()
+        finally:
+            self._running = False
+    
+    def quit(self):
+        """Sai do loop de eventos mantendo a janela e as telas"""
+        self.root.quit()
+    
+    def close(self):
+        """Destrói a janela raiz e todas as telas"""
+        if self._closed:
+            return
+        self._closed = True
+        self._views.clear()
+        self._current = None
+        self.root.destroy()
\ No newline at end of file